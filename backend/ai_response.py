@@ -5,6 +5,9 @@ Haiku API integration via direct HTTP (no SDK needed)
 
 import os
 import json
+import codecs
+import time
+import threading
 from typing import Dict, List, Optional
 from datetime import datetime
 
@@ -15,14 +18,16 @@ try:
 except ImportError:
     pass
 
-# Try urllib for HTTP requests (stdlib, always available)
-import urllib.request
-import urllib.error
+# Keep-alive connection pool (stdlib http.client underneath)
+from http_pool import get_pool
+from tracing import span, record
+from metrics import LLM_TOKENS, LLM_REQUEST_SECONDS, UPSTREAM_ERRORS, STREAMS_CANCELLED, TOKENS_SAVED
 
 # API Configuration
 ANTHROPIC_API_KEY = os.getenv("ANTHROPIC_API_KEY")
 API_URL = "https://api.anthropic.com/v1/messages"
 MODEL = "claude-3-5-haiku-20241022"
+MAX_OUTPUT_TOKENS = 1024
 
 
 # ============================================
@@ -402,6 +407,7 @@ def call_anthropic_api(messages: List[Dict], system: str) -> Dict:
     """
     Call Anthropic API directly via HTTP.
     No SDK required - works on Termux.
+    Reuses keep-alive connections from the shared pool.
     """
     if not ANTHROPIC_API_KEY:
         return {"error": "ANTHROPIC_API_KEY not set"}
@@ -414,25 +420,32 @@ def call_anthropic_api(messages: List[Dict], system: str) -> Dict:
 
     payload = {
         "model": MODEL,
-        "max_tokens": 1024,
+        "max_tokens": MAX_OUTPUT_TOKENS,
         "system": system,
         "messages": messages
     }
 
+    start = time.perf_counter()
     try:
         data = json.dumps(payload).encode('utf-8')
-        req = urllib.request.Request(API_URL, data=data, headers=headers, method='POST')
+        status, body = get_pool().request("POST", API_URL, body=data, headers=headers, timeout=30)
+        LLM_REQUEST_SECONDS.observe(time.perf_counter() - start, mode="blocking")
 
-        with urllib.request.urlopen(req, timeout=30) as response:
-            result = json.loads(response.read().decode('utf-8'))
-            return result
+        if status != 200:
+            UPSTREAM_ERRORS.inc(upstream="anthropic", reason=f"http_{status}")
+            return {"error": f"HTTP {status}: {body.decode('utf-8')}"}
 
-    except urllib.error.HTTPError as e:
-        error_body = e.read().decode('utf-8')
-        return {"error": f"HTTP {e.code}: {error_body}"}
-    except urllib.error.URLError as e:
+        result = json.loads(body.decode('utf-8'))
+        usage = result.get("usage", {})
+        LLM_TOKENS.inc(usage.get("input_tokens", 0), direction="input", mode="blocking")
+        LLM_TOKENS.inc(usage.get("output_tokens", 0), direction="output", mode="blocking")
+        return result
+
+    except OSError as e:
+        UPSTREAM_ERRORS.inc(upstream="anthropic", reason="network")
         return {"error": f"Network error: {str(e)}"}
     except Exception as e:
+        UPSTREAM_ERRORS.inc(upstream="anthropic", reason="other")
         return {"error": str(e)}
 
 
@@ -440,12 +453,104 @@ def call_anthropic_api(messages: List[Dict], system: str) -> Dict:
 # STREAMING API CALL (SSE)
 # ============================================
 
-def stream_anthropic_api(messages: List[Dict], system: str):
+class StreamHandle:
+    """
+    Control handle for one upstream stream.
+
+    The consumer thread calls cancel() when the client goes away; this closes
+    the upstream socket so the blocked read returns immediately and no more
+    output tokens are generated (and billed) for nobody.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._cancelled = threading.Event()
+        self._conn = None
+        self.input_tokens = 0
+        self.output_tokens = 0
+        self.output_chars = 0
+        self.finished = False
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancelled.is_set()
+
+    def attach(self, conn):
+        """Register the live upstream connection (closed at once if already cancelled)."""
+        with self._lock:
+            self._conn = conn
+        if self.cancelled:
+            self._close()
+
+    def cancel(self):
+        """Abort the upstream stream from any thread."""
+        self._cancelled.set()
+        self._close()
+
+    def _close(self):
+        with self._lock:
+            conn, self._conn = self._conn, None
+        if conn is not None:
+            try:
+                conn.close()
+            except Exception:
+                pass
+
+    def generated_tokens(self) -> int:
+        """Output tokens produced so far (usage if reported, else ~4 chars/token)."""
+        return max(self.output_tokens, self.output_chars // 4)
+
+
+_stream_stats_lock = threading.Lock()
+_stream_stats = {
+    "streams_started": 0,
+    "streams_completed": 0,
+    "streams_cancelled": 0,
+    "tokens_generated_before_cancel": 0,
+    "tokens_saved_estimate": 0,
+}
+
+
+def record_stream_started():
+    with _stream_stats_lock:
+        _stream_stats["streams_started"] += 1
+
+
+def record_stream_finished(handle: StreamHandle) -> int:
+    """
+    Account for a finished or aborted stream.
+
+    Returns the estimated output tokens saved by cancelling early
+    (0 for streams that ran to completion).
+    """
+    with _stream_stats_lock:
+        if handle.finished or not handle.cancelled:
+            _stream_stats["streams_completed"] += 1
+            return 0
+        generated = handle.generated_tokens()
+        saved = max(0, MAX_OUTPUT_TOKENS - generated)
+        _stream_stats["streams_cancelled"] += 1
+        _stream_stats["tokens_generated_before_cancel"] += generated
+        _stream_stats["tokens_saved_estimate"] += saved
+    STREAMS_CANCELLED.inc()
+    TOKENS_SAVED.inc(saved)
+    return saved
+
+
+def get_stream_stats() -> Dict:
+    """Snapshot of streaming/cancellation counters."""
+    with _stream_stats_lock:
+        return dict(_stream_stats)
+
+
+def stream_anthropic_api(messages: List[Dict], system: str, handle: Optional[StreamHandle] = None):
     """
     Stream Anthropic API response token by token.
     Yields text chunks as they arrive.
 
     Uses Server-Sent Events (SSE) format from Anthropic API.
+    If a StreamHandle is given, cancelling it closes the upstream
+    connection and ends the generator without yielding an error.
     """
     if not ANTHROPIC_API_KEY:
         yield {"error": "ANTHROPIC_API_KEY not set"}
@@ -459,73 +564,101 @@ def stream_anthropic_api(messages: List[Dict], system: str):
 
     payload = {
         "model": MODEL,
-        "max_tokens": 1024,
+        "max_tokens": MAX_OUTPUT_TOKENS,
         "system": system,
         "messages": messages,
         "stream": True  # Enable streaming
     }
 
-    try:
-        import http.client
-        import ssl
-
-        # Parse API URL
-        conn = http.client.HTTPSConnection("api.anthropic.com", context=ssl.create_default_context())
-
-        data = json.dumps(payload)
-        conn.request("POST", "/v1/messages", body=data, headers=headers)
+    if handle is None:
+        handle = StreamHandle()  # Still tracks usage for metrics
 
-        response = conn.getresponse()
+    start = time.perf_counter()
+    try:
+        data = json.dumps(payload).encode('utf-8')
 
-        if response.status != 200:
-            error_body = response.read().decode('utf-8')
-            yield {"error": f"HTTP {response.status}: {error_body}"}
-            return
+        with get_pool().open("POST", API_URL, body=data, headers=headers, timeout=60) as (conn, response):
+            handle.attach(conn)
 
-        # Read SSE stream
-        buffer = ""
-        for chunk in iter(lambda: response.read(1024), b''):
-            buffer += chunk.decode('utf-8')
+            if response.status != 200:
+                UPSTREAM_ERRORS.inc(upstream="anthropic", reason=f"http_{response.status}")
+                error_body = response.read().decode('utf-8')
+                yield {"error": f"HTTP {response.status}: {error_body}"}
+                return
 
-            # Process complete SSE events
-            while '\n\n' in buffer:
-                event, buffer = buffer.split('\n\n', 1)
+            # Read SSE stream
+            buffer = ""
+            # Chunks can end mid-character; the decoder carries the partial bytes over
+            decoder = codecs.getincrementaldecoder('utf-8')()
+            # read1() returns whatever bytes are available instead of waiting
+            # for a full 1KB block, so tokens are forwarded as soon as they land
+            for chunk in iter(lambda: response.read1(1024), b''):
+                if handle.cancelled:
+                    return
+                buffer += decoder.decode(chunk)
+
+                # Process complete SSE events
+                while '\n\n' in buffer:
+                    event, buffer = buffer.split('\n\n', 1)
+
+                    for line in event.split('\n'):
+                        if line.startswith('data: '):
+                            data_str = line[6:]  # Remove 'data: ' prefix
+
+                            if data_str == '[DONE]':
+                                response.read()  # Drain so the connection can be reused
+                                return
 
-                for line in event.split('\n'):
-                    if line.startswith('data: '):
-                        data_str = line[6:]  # Remove 'data: ' prefix
+                            try:
+                                data_obj = json.loads(data_str)
 
-                        if data_str == '[DONE]':
-                            return
+                                # Handle different event types
+                                event_type = data_obj.get('type', '')
 
-                        try:
-                            data_obj = json.loads(data_str)
+                                if event_type == 'content_block_delta':
+                                    delta = data_obj.get('delta', {})
+                                    if delta.get('type') == 'text_delta':
+                                        text = delta.get('text', '')
+                                        if text:
+                                            handle.output_chars += len(text)
+                                            yield {"text": text}
 
-                            # Handle different event types
-                            event_type = data_obj.get('type', '')
+                                elif event_type == 'message_start':
+                                    usage = data_obj.get('message', {}).get('usage', {})
+                                    handle.input_tokens = usage.get('input_tokens', 0)
 
-                            if event_type == 'content_block_delta':
-                                delta = data_obj.get('delta', {})
-                                if delta.get('type') == 'text_delta':
-                                    text = delta.get('text', '')
-                                    if text:
-                                        yield {"text": text}
+                                elif event_type == 'message_delta':
+                                    usage = data_obj.get('usage', {})
+                                    handle.output_tokens = usage.get('output_tokens', handle.output_tokens)
 
-                            elif event_type == 'message_stop':
-                                return
+                                elif event_type == 'message_stop':
+                                    handle.finished = True
+                                    response.read()  # Drain so the connection can be reused
+                                    return
 
-                            elif event_type == 'error':
-                                yield {"error": data_obj.get('error', {}).get('message', 'Unknown error')}
-                                return
+                                elif event_type == 'error':
+                                    UPSTREAM_ERRORS.inc(upstream="anthropic", reason="stream_error")
+                                    yield {"error": data_obj.get('error', {}).get('message', 'Unknown error')}
+                                    return
 
-                        except json.JSONDecodeError:
-                            continue
+                            except json.JSONDecodeError:
+                                continue
 
-        conn.close()
+            # EOF without message_stop: raises if the stream stopped mid-character
+            decoder.decode(b'', final=True)
 
     except Exception as e:
+        # A read failing because we closed the socket ourselves is not an error
+        if handle.cancelled:
+            return
+        UPSTREAM_ERRORS.inc(upstream="anthropic", reason="network")
         yield {"error": str(e)}
 
+    finally:
+        LLM_REQUEST_SECONDS.observe(time.perf_counter() - start, mode="stream")
+        LLM_TOKENS.inc(handle.input_tokens, direction="input", mode="stream")
+        LLM_TOKENS.inc(handle.generated_tokens(), direction="output", mode="stream")
+
 
 # ============================================
 # VOCABULARY ENFORCEMENT (HIGH IMPACT)
@@ -650,6 +783,8 @@ def generate_response(
         }
 
     try:
+        prompt_start = time.perf_counter()
+
         # Build messages
         messages = []
 
@@ -731,8 +866,11 @@ Example phrases to weave in: {phrases}""")
         else:
             system = KG_RAG_GENERIC_PROMPT.format(current_date=current_date)
 
+        record("llm.build_prompt", (time.perf_counter() - prompt_start) * 1000)
+
         # Call API
-        result = call_anthropic_api(messages, system)
+        with span("llm.api_call"):
+            result = call_anthropic_api(messages, system)
 
         if "error" in result:
             return {
@@ -741,14 +879,15 @@ Example phrases to weave in: {phrases}""")
                 "error": result["error"]
             }
 
-        # Extract response text
-        response_text = result.get("content", [{}])[0].get("text", "No response generated")
+        with span("llm.postprocess"):
+            # Extract response text
+            response_text = result.get("content", [{}])[0].get("text", "No response generated")
 
-        # HIGH IMPACT: Enforce vocabulary rules (match not game, nil not zero)
-        response_text = enforce_vocabulary_rules(response_text, persona_data)
+            # HIGH IMPACT: Enforce vocabulary rules (match not game, nil not zero)
+            response_text = enforce_vocabulary_rules(response_text, persona_data)
 
-        # OUTPUT VALIDATION: Sanitize response before returning
-        response_text = validate_response(response_text)
+            # OUTPUT VALIDATION: Sanitize response before returning
+            response_text = validate_response(response_text)
 
         return {
             "response": response_text,
@@ -955,7 +1094,8 @@ def generate_response_stream(
     sources: List[Dict],
     conversation_history: Optional[List[Dict]] = None,
     club: str = "default",
-    persona_data: Optional[Dict] = None
+    persona_data: Optional[Dict] = None,
+    handle: Optional[StreamHandle] = None
 ):
     """
     Generate streaming response - yields text chunks as they arrive.
@@ -967,6 +1107,7 @@ def generate_response_stream(
         conversation_history: Previous messages for context
         club: Current fan persona
         persona_data: Cached personality data
+        handle: Optional StreamHandle used to abort the upstream call
 
     Yields:
         Dict with either {"text": "chunk"} or {"error": "message"} or {"done": True}
@@ -1044,7 +1185,7 @@ DIALECT: {dialect.get('vocab_inject', '')}""")
 
         # Stream the response
         full_response = ""
-        for chunk in stream_anthropic_api(messages, system):
+        for chunk in stream_anthropic_api(messages, system, handle=handle):
             if "error" in chunk:
                 yield {"error": chunk["error"]}
                 return
@@ -1053,6 +1194,9 @@ DIALECT: {dialect.get('vocab_inject', '')}""")
                 full_response += chunk["text"]
                 yield {"text": chunk["text"]}
 
+        if handle is not None and handle.cancelled:
+            return
+
         # Apply vocabulary enforcement to full response (for logging/analytics)
         # Note: Frontend already received chunks, this is for consistency
         yield {"done": True, "full_response": enforce_vocabulary_rules(full_response, persona_data)}
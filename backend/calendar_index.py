@@ -0,0 +1,128 @@
+"""
+Soccer-AI Calendar Index
+Month-day ("MM-DD") key shared by the "on this day" features.
+
+Dates are stored as YYYY-MM-DD text, and filtering on LIKE '%-MM-DD' or
+substr(date, 6, 5) can't use an index. Tables that serve "on this day"
+get a virtual generated column, month_day = substr(<date>, 6, 5), with an
+index on it, so each lookup is an index seek. Tables not yet migrated
+fall back to the substr() filter.
+
+Results are cached per day key (DayCache) until the underlying data
+version changes.
+"""
+
+import os
+import time
+import sqlite3
+import threading
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Callable, Dict, Hashable, Optional
+
+try:
+    from metrics import cache_lookup
+except ImportError:  # Imported as backend.calendar_index
+    from backend.metrics import cache_lookup
+
+MONTH_DAY_COLUMN = "month_day"
+
+# Cached "on this day" results (one entry per day key / filter combination)
+CALENDAR_CACHE_SIZE = int(os.getenv("CALENDAR_CACHE_SIZE", "1024"))
+
+# Upper bound on how long a cached day is served without re-checking its version
+CALENDAR_CACHE_TTL = float(os.getenv("CALENDAR_CACHE_TTL", "3600"))
+
+
+def month_day_key(month: Optional[int] = None, day: Optional[int] = None) -> str:
+    """"MM-DD" for the given month/day (today for whichever is missing)."""
+    now = datetime.now()
+    return f"{month or now.month:02d}-{day or now.day:02d}"
+
+
+def _has_column(conn: sqlite3.Connection, table: str, column: str) -> bool:
+    # table_xinfo also lists generated columns (table_info hides them)
+    return any(row[1] == column for row in conn.execute(f"PRAGMA table_xinfo({table})"))
+
+
+def ensure_month_day_column(conn: sqlite3.Connection, table: str, date_column: str) -> bool:
+    """
+    Add the month_day generated column and its index to table (idempotent).
+
+    Returns True if the column exists afterwards. Virtual columns cost no
+    storage; only the index holds the keys. Caller commits.
+    """
+    if not conn.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (table,)).fetchone():
+        return False
+    if not _has_column(conn, table, MONTH_DAY_COLUMN):
+        try:
+            conn.execute(
+                f"ALTER TABLE {table} ADD COLUMN {MONTH_DAY_COLUMN} TEXT "
+                f"GENERATED ALWAYS AS (substr({date_column}, 6, 5)) VIRTUAL"
+            )
+        except sqlite3.OperationalError as e:  # Read-only file or SQLite < 3.31
+            print(f"[CALENDAR] Could not add {table}.{MONTH_DAY_COLUMN}: {e}")
+            return False
+    conn.execute(f"CREATE INDEX IF NOT EXISTS idx_{table}_{MONTH_DAY_COLUMN} ON {table} ({MONTH_DAY_COLUMN})")
+    return True
+
+
+def month_day_filter(conn: sqlite3.Connection, table: str, date_column: str, alias: str = "") -> str:
+    """WHERE fragment matching one "MM-DD" parameter - indexed when the table has month_day."""
+    prefix = f"{alias}." if alias else ""
+    if _has_column(conn, table, MONTH_DAY_COLUMN):
+        return f"{prefix}{MONTH_DAY_COLUMN} = ?"
+    return f"substr({prefix}{date_column}, 6, 5) = ?"
+
+
+class DayCache:
+    """
+    Bounded LRU of "on this day" results.
+
+    Each entry remembers the data version it was computed from; a lookup
+    with a different version (or an entry older than the TTL) recomputes.
+    """
+
+    def __init__(self, name: str, maxsize: int = CALENDAR_CACHE_SIZE, ttl: float = CALENDAR_CACHE_TTL):
+        self.name = name
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_or_compute(self, key: Hashable, version: Any, compute: Callable[[], Any]) -> Any:
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] == version and now - entry[1] < self.ttl:
+                self._entries.move_to_end(key)
+                cache_lookup(self.name, hit=True)
+                return entry[2]
+        cache_lookup(self.name, hit=False)
+        value = compute()
+        with self._lock:
+            self._entries[key] = (version, now, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def get_stats(self) -> Dict:
+        with self._lock:
+            return {"entries": len(self._entries), "maxsize": self.maxsize}
+
+
+def file_version(path) -> tuple:
+    """(mtime, size) of a SQLite file and its WAL - changes whenever the data does."""
+    parts = []
+    for candidate in (str(path), f"{path}-wal"):
+        try:
+            stat = os.stat(candidate)
+            parts.append((stat.st_mtime_ns, stat.st_size))
+        except OSError:
+            parts.append(None)
+    return tuple(parts)
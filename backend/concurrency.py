@@ -0,0 +1,211 @@
+"""
+Concurrency helpers for Soccer-AI
+Runs the blocking parts of the chat pipeline (SQLite reads, KG retrieval,
+LLM calls) on a bounded worker pool so the event loop stays free.
+"""
+
+import os
+import asyncio
+import functools
+import threading
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Iterable, Optional
+
+# ============================================
+# CONFIGURATION
+# ============================================
+
+# Worker threads available to blocking pipeline stages. The chat pipeline is
+# dominated by upstream LLM latency, so this can sit well above CPU count.
+PIPELINE_WORKERS = int(os.getenv("SOCCER_AI_PIPELINE_WORKERS", "64"))
+
+# Maximum pipeline calls admitted at once; extra callers wait on the event
+# loop (cheap) instead of piling up in the executor queue.
+PIPELINE_MAX_INFLIGHT = int(os.getenv("SOCCER_AI_PIPELINE_MAX_INFLIGHT", "256"))
+
+
+# ============================================
+# EXECUTOR
+# ============================================
+
+_executor: ThreadPoolExecutor = None
+_executor_lock = threading.Lock()
+_admission: asyncio.Semaphore = None
+_admission_loop = None
+
+_stats_lock = threading.Lock()
+_stats = {"submitted": 0, "completed": 0, "failed": 0, "active": 0, "waiting": 0}
+
+
+def get_executor() -> ThreadPoolExecutor:
+    """Get or create the shared pipeline executor."""
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(
+                    max_workers=PIPELINE_WORKERS,
+                    thread_name_prefix="pipeline"
+                )
+    return _executor
+
+
+def _get_admission() -> asyncio.Semaphore:
+    """Admission semaphore, bound to the running loop."""
+    global _admission, _admission_loop
+    loop = asyncio.get_running_loop()
+    if _admission is None or _admission_loop is not loop:
+        _admission = asyncio.Semaphore(PIPELINE_MAX_INFLIGHT)
+        _admission_loop = loop
+    return _admission
+
+
+def _bump(key: str, delta: int = 1):
+    with _stats_lock:
+        _stats[key] += delta
+
+
+def _tracked(func: Callable, *args, **kwargs) -> Any:
+    """Run func in a worker thread, keeping the active count accurate."""
+    _bump("active")
+    try:
+        result = func(*args, **kwargs)
+        _bump("completed")
+        return result
+    except BaseException:
+        _bump("failed")
+        raise
+    finally:
+        _bump("active", -1)
+
+
+async def run_blocking(func: Callable, *args, **kwargs) -> Any:
+    """
+    Await a blocking callable on the pipeline executor.
+
+    Context variables are copied into the worker thread (like
+    asyncio.to_thread) so per-request state follows the call.
+    """
+    loop = asyncio.get_running_loop()
+    ctx = contextvars.copy_context()
+    call = functools.partial(ctx.run, _tracked, func, *args, **kwargs)
+
+    _bump("waiting")
+    admission = _get_admission()
+    try:
+        await admission.acquire()
+    finally:
+        _bump("waiting", -1)
+
+    try:
+        _bump("submitted")
+        return await loop.run_in_executor(get_executor(), call)
+    finally:
+        admission.release()
+
+
+_END = object()
+
+
+async def iterate_blocking(
+    make_iterable: Callable[[], Iterable],
+    should_stop: Optional[Callable[[], Awaitable[bool]]] = None,
+    on_abort: Optional[Callable[[], None]] = None,
+    poll_interval: float = 0.5
+) -> AsyncIterator:
+    """
+    Consume a blocking iterator on the pipeline executor.
+
+    Items are handed to the event loop as soon as the worker produces them.
+    should_stop() is checked after every item and at least every
+    poll_interval seconds while waiting; when it returns True (or the
+    consumer stops iterating, e.g. on cancellation) on_abort() is called so
+    the producer can tear down its upstream work, and iteration ends.
+    """
+    loop = asyncio.get_running_loop()
+    queue: asyncio.Queue = asyncio.Queue()
+    stop = threading.Event()
+
+    def publish(item, error=None):
+        try:
+            loop.call_soon_threadsafe(queue.put_nowait, (item, error))
+        except RuntimeError:
+            stop.set()  # Loop already closed - nobody is listening
+
+    def pump():
+        iterator = iter(make_iterable())
+        try:
+            for item in iterator:
+                if stop.is_set():
+                    break
+                publish(item)
+        except BaseException as e:
+            publish(_END, e)
+            return
+        finally:
+            close = getattr(iterator, "close", None)
+            if close is not None:
+                close()
+        publish(_END)
+
+    admission = _get_admission()
+    await admission.acquire()
+    finished = False
+    getter = None
+    try:
+        _bump("submitted")
+        ctx = contextvars.copy_context()
+        loop.run_in_executor(get_executor(), functools.partial(ctx.run, _tracked, pump))
+
+        while True:
+            # Keep one pending get() across polls so no item is ever dropped
+            if getter is None:
+                getter = asyncio.ensure_future(queue.get())
+            done, _ = await asyncio.wait({getter}, timeout=poll_interval)
+            if not done:
+                if should_stop is not None and await should_stop():
+                    return
+                continue
+
+            item, error = getter.result()
+            getter = None
+
+            if item is _END:
+                finished = True
+                if error is not None:
+                    raise error
+                return
+
+            yield item
+
+            if should_stop is not None and await should_stop():
+                return
+    finally:
+        if getter is not None and not getter.done():
+            getter.cancel()
+        admission.release()
+        if not finished:
+            stop.set()
+            if on_abort is not None:
+                on_abort()
+
+
+def shutdown(wait: bool = True):
+    """Stop the executor (called from the app shutdown hook)."""
+    global _executor, _admission, _admission_loop
+    with _executor_lock:
+        if _executor is not None:
+            _executor.shutdown(wait=wait)
+            _executor = None
+    _admission = None
+    _admission_loop = None
+
+
+def get_stats() -> Dict[str, int]:
+    """Snapshot of executor usage."""
+    with _stats_lock:
+        stats = dict(_stats)
+    stats["workers"] = PIPELINE_WORKERS
+    stats["max_inflight"] = PIPELINE_MAX_INFLIGHT
+    return stats
@@ -14,6 +14,9 @@ from datetime import datetime
 from dataclasses import dataclass, field
 import re
 
+from tracing import traced
+from session_store import open_store
+
 
 @dataclass
 class ConversationState:
@@ -62,18 +65,16 @@ class ConversationState:
         self.last_update = datetime.now()
 
 
-# In-memory conversation states (use Redis in production)
-_conversation_states: Dict[str, ConversationState] = {}
+# Conversation states, bounded + idle-expiring (per process, or shared via SQLite)
+_conversation_states = open_store("conversation_state")
 
 
 def get_conversation_state(conversation_id: str, club: Optional[str] = None) -> ConversationState:
     """Get or create conversation state."""
-    if conversation_id not in _conversation_states:
-        _conversation_states[conversation_id] = ConversationState(
-            conversation_id=conversation_id,
-            club=club
-        )
-    return _conversation_states[conversation_id]
+    return _conversation_states.get_or_create(
+        conversation_id,
+        lambda: ConversationState(conversation_id=conversation_id, club=club)
+    )
 
 
 def detect_follow_up(query: str, state: ConversationState) -> Tuple[bool, Optional[str]]:
@@ -142,6 +143,7 @@ def detect_follow_up(query: str, state: ConversationState) -> Tuple[bool, Option
     return False, None
 
 
+@traced("ci.compound_context")
 def build_compound_context(
     query: str,
     base_context: str,
@@ -236,22 +238,33 @@ def update_conversation_state(
     - Entities mentioned (teams, players)
     - Current topic (intent)
     - Turn count
-    """
-    # Update entities
-    if 'teams' in entities:
-        for team in entities['teams']:
-            state.add_entity('teams', team)
 
-    if 'players' in entities:
-        for player in entities['players']:
-            player_name = player.get('name') if isinstance(player, dict) else player
-            state.add_entity('players', player_name)
-
-    # Update topic
-    state.last_topic = intent
-
-    # Increment turn
-    state.increment_turn()
+    The stored state is re-read and written back under the store's edit()
+    lock, so concurrent turns on one conversation don't overwrite each
+    other. Facts and persona data picked up on `state` while preparing the
+    turn are merged in.
+    """
+    with _conversation_states.edit(state.conversation_id, lambda: state) as current:
+        if current is not state:
+            current.discussed_facts |= state.discussed_facts
+            if state.persona_data is not None:
+                current.persona_data = state.persona_data
+
+        # Update entities
+        if 'teams' in entities:
+            for team in entities['teams']:
+                current.add_entity('teams', team)
+
+        if 'players' in entities:
+            for player in entities['players']:
+                player_name = player.get('name') if isinstance(player, dict) else player
+                current.add_entity('players', player_name)
+
+        # Update topic
+        current.last_topic = intent
+
+        # Increment turn
+        current.increment_turn()
 
 
 def enhance_prompt_with_context(
@@ -1,30 +1,99 @@
 """
 Soccer-AI Database Module
 SQLite + FTS5 for knowledge base and RAG retrieval
+
+In serving mode (sqlite_pool.SERVING_MODE) the main database is opened
+read-only and immutable; the tables the serving process writes (query
+analytics, security sessions/log, trivia answer stats, data generation)
+live in a separate small database, WRITE_DB_PATH, reached through
+get_write_connection().
 """
 
+import os
+import re
+import base64
 import sqlite3
 import json
+import heapq
+import time
+import threading
 from pathlib import Path
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, Iterable, Tuple
+from collections import Counter
 from contextlib import contextmanager
 from datetime import datetime, date
 
+from tracing import sketch_bucket, sketch_percentiles
+from metrics import SQLITE_SECONDS, cache_lookup
+from write_behind import WriteBehindQueue
+from calendar_index import DayCache, ensure_month_day_column, month_day_filter
+from team_identity import sync_team_identity
+from trivia_sampler import TriviaSampler, pool_key
+import sqlite_pool
+
 # Database path
 DB_PATH = Path(__file__).parent / "soccer_ai.db"
 SCHEMA_PATH = Path(__file__).parent.parent / "schema.sql"
 
+# Reference database with match_history / elo_history (loaded by scripts)
+ARCHITECTURE_DB_PATH = Path(__file__).parent.parent / "soccer_ai_architecture_kg.db"
+
+# Writable database for analytics/sessions/trivia stats in serving mode
+WRITE_DB_PATH = Path(os.getenv("SQLITE_WRITE_DB", str(Path(__file__).parent / "soccer_ai_writes.db")))
+
+SERVING_MODE = sqlite_pool.SERVING_MODE
+
+
+class ReadOnlyError(RuntimeError):
+    """A write to the main database was attempted in serving mode."""
+
+
+def _require_build_side(what: str):
+    """Refuse writes to the (immutable) main database on serving nodes."""
+    if SERVING_MODE:
+        raise ReadOnlyError(
+            f"{what} writes the main database, which is read-only in serving mode; "
+            "apply it on the build side and redeploy"
+        )
+
 
 @contextmanager
 def get_connection():
-    """Context manager for database connections."""
-    conn = sqlite3.connect(DB_PATH)
-    conn.row_factory = sqlite3.Row  # Return dicts instead of tuples
-    conn.execute("PRAGMA foreign_keys = ON")
+    """
+    Context manager for database connections.
+
+    Yields this thread's persistent connection (see sqlite_pool); rows are
+    sqlite3.Row. Uncommitted changes are rolled back on exit.
+    """
+    start = time.perf_counter()
+    # Return dicts instead of tuples; immutable on serving nodes
+    conn = sqlite_pool.acquire(DB_PATH, row_factory=sqlite3.Row, readonly=SERVING_MODE)
+    try:
+        yield conn
+    finally:
+        conn.close()  # Releases to the pool
+        SQLITE_SECONDS.observe(time.perf_counter() - start, db="soccer_ai")
+
+
+@contextmanager
+def get_write_connection():
+    """
+    Connection for the tables written while serving (analytics, security
+    sessions/log, trivia answer stats, data generation).
+
+    The main database normally; WRITE_DB_PATH in serving mode.
+    """
+    if not SERVING_MODE:
+        with get_connection() as conn:
+            yield conn
+        return
+    start = time.perf_counter()
+    conn = sqlite_pool.acquire(WRITE_DB_PATH, row_factory=sqlite3.Row)
     try:
         yield conn
     finally:
         conn.close()
+        SQLITE_SECONDS.observe(time.perf_counter() - start, db="soccer_ai_writes")
 
 
 def init_db():
@@ -33,6 +102,7 @@ def init_db():
         with open(SCHEMA_PATH, 'r') as f:
             conn.executescript(f.read())
         conn.commit()
+    ensure_pagination_indexes()
     print(f"Database initialized at {DB_PATH}")
 
 
@@ -41,25 +111,147 @@ def dict_from_row(row: sqlite3.Row) -> Dict[str, Any]:
     return dict(row) if row else None
 
 
+# ============================================
+# KEYSET PAGINATION
+# ============================================
+# List queries page on their sort key instead of OFFSET: the cursor holds
+# the last row's key and the next page starts with `WHERE key > cursor`,
+# so deep pages cost the same as the first one (given an index on the key,
+# see PAGINATION_INDEXES). Every ordering ends in the row id to make keys
+# unique; nullable sort columns go through IFNULL(.., '') so row-value
+# comparisons work, and sort as NULL did (lowest).
+
+# kind -> ((SQL key expression, row field), ...), descending
+PAGE_ORDERINGS = {
+    "teams": ((("name", "name"), ("id", "id")), False),
+    "players": ((("p.name", "name"), ("p.id", "id")), False),
+    "games": ((("g.date", "date"), ("IFNULL(g.time, '')", "time"), ("g.id", "id")), True),
+    "injuries": ((("IFNULL(i.occurred_date, '')", "occurred_date"), ("i.id", "id")), True),
+    "transfers": ((("IFNULL(tr.announced_date, '')", "announced_date"), ("tr.id", "id")), True),
+    "legends": ((("IFNULL(t.name, '')", "team_name"), ("l.name", "name"), ("l.id", "id")), False),
+    "team_legends": ((("l.name", "name"), ("l.id", "id")), False),
+}
+
+# (index name, table, key expressions) - applied by ensure_pagination_indexes()
+PAGINATION_INDEXES = [
+    ("idx_teams_league_name", "teams", ("league", "name")),
+    ("idx_players_name", "players", ("name",)),
+    ("idx_players_team_name", "players", ("team_id", "name")),
+    ("idx_players_position_name", "players", ("position", "name")),
+    ("idx_games_date_time", "games", ("date", "IFNULL(time, '')")),
+    ("idx_games_status_date_time", "games", ("status", "date", "IFNULL(time, '')")),
+    ("idx_injuries_status_date", "injuries", ("status", "IFNULL(occurred_date, '')")),
+    ("idx_transfers_date", "transfers", ("IFNULL(announced_date, '')",)),
+    ("idx_transfers_status_date", "transfers", ("status", "IFNULL(announced_date, '')")),
+    ("idx_legends_team_name", "club_legends", ("team_id", "name")),
+]
+
+
+def encode_cursor(kind: str, row: Dict) -> str:
+    """Opaque cursor pointing just past `row` in the `kind` ordering."""
+    keys, _ = PAGE_ORDERINGS[kind]
+    values = ['' if row[field] is None else row[field] for _, field in keys]
+    payload = json.dumps([kind, values], separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(payload).decode('ascii').rstrip('=')
+
+
+def decode_cursor(kind: str, cursor: str) -> List[Any]:
+    """Key values from a cursor. Raises ValueError if it is malformed or for another listing."""
+    try:
+        payload = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        cursor_kind, values = json.loads(payload)
+    except (ValueError, TypeError) as e:
+        raise ValueError("Invalid cursor") from e
+    keys, _ = PAGE_ORDERINGS[kind]
+    if cursor_kind != kind or not isinstance(values, list) or len(values) != len(keys):
+        raise ValueError("Cursor does not belong to this listing")
+    return values
+
+
+def next_cursor(kind: str, rows: List[Dict], limit: int) -> Optional[str]:
+    """Cursor for the page after `rows`, or None when this page was not full."""
+    if not rows or len(rows) < limit:
+        return None
+    return encode_cursor(kind, rows[-1])
+
+
+def _keyset(kind: str, cursor: Optional[str]) -> Tuple[Optional[str], list, str]:
+    """(condition for rows after the cursor or None, its params, ORDER BY clause)."""
+    keys, descending = PAGE_ORDERINGS[kind]
+    expressions = [expression for expression, _ in keys]
+    direction = " DESC" if descending else ""
+    order_by = "ORDER BY " + ", ".join(expression + direction for expression in expressions)
+    if not cursor:
+        return None, [], order_by
+    values = decode_cursor(kind, cursor)
+    op = '<' if descending else '>'
+    # The redundant bound on the leading key lets SQLite range-scan
+    # expression indexes, which it won't do from the row value alone
+    condition = (
+        f"{expressions[0]} {op}= ? AND "
+        f"({', '.join(expressions)}) {op} ({', '.join('?' * len(keys))})"
+    )
+    return condition, [values[0], *values], order_by
+
+
+def ensure_pagination_indexes() -> Dict[str, List[str]]:
+    """
+    Create the keyset pagination indexes (idempotent). Indexes whose table
+    or columns don't exist in this database are skipped. Returns the index
+    names by outcome: created, existing, skipped.
+    """
+    result = {"created": [], "existing": [], "skipped": []}
+    with get_connection() as conn:
+        existing = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'index'")}
+        columns_by_table: Dict[str, set] = {}
+        for name, table, expressions in PAGINATION_INDEXES:
+            if name in existing:
+                result["existing"].append(name)
+                continue
+            if table not in columns_by_table:
+                columns_by_table[table] = {row[1] for row in conn.execute(f"PRAGMA table_info({table})")}
+            needed = {re.match(r"(?:IFNULL\()?(\w+)", expression).group(1) for expression in expressions}
+            if not needed <= columns_by_table[table]:
+                result["skipped"].append(name)
+                continue
+            conn.execute(f"CREATE INDEX IF NOT EXISTS {name} ON {table} ({', '.join(expressions)})")
+            result["created"].append(name)
+        conn.commit()
+    return result
+
+
 # ============================================
 # TEAM OPERATIONS
 # ============================================
 
-def get_teams(limit: int = 20, offset: int = 0, league: Optional[str] = None) -> List[Dict]:
-    """Get list of teams with optional filtering."""
+def get_teams(
+    limit: int = 20,
+    offset: int = 0,
+    league: Optional[str] = None,
+    cursor: Optional[str] = None
+) -> List[Dict]:
+    """Get list of teams with optional filtering (keyset `cursor` or legacy offset)."""
+    after, after_params, order_by = _keyset("teams", cursor)
     with get_connection() as conn:
         query = "SELECT * FROM teams"
+        conditions = []
         params = []
 
         if league:
-            query += " WHERE league = ?"
+            conditions.append("league = ?")
             params.append(league)
+        if after:
+            conditions.append(after)
+            params.extend(after_params)
+
+        if conditions:
+            query += " WHERE " + " AND ".join(conditions)
 
-        query += " ORDER BY name LIMIT ? OFFSET ?"
-        params.extend([limit, offset])
+        query += f" {order_by} LIMIT ? OFFSET ?"
+        params.extend([limit, 0 if cursor else offset])
 
-        cursor = conn.execute(query, params)
-        return [dict_from_row(row) for row in cursor.fetchall()]
+        rows = conn.execute(query, params)
+        return [dict_from_row(row) for row in rows.fetchall()]
 
 
 def get_team(team_id: int) -> Optional[Dict]:
@@ -87,9 +279,11 @@ def get_players(
     limit: int = 20,
     offset: int = 0,
     team_id: Optional[int] = None,
-    position: Optional[str] = None
+    position: Optional[str] = None,
+    cursor: Optional[str] = None
 ) -> List[Dict]:
-    """Get list of players with optional filtering."""
+    """Get list of players with optional filtering (keyset `cursor` or legacy offset)."""
+    after, after_params, order_by = _keyset("players", cursor)
     with get_connection() as conn:
         query = "SELECT p.*, t.name as team_name FROM players p LEFT JOIN teams t ON p.team_id = t.id"
         conditions = []
@@ -101,15 +295,18 @@ def get_players(
         if position:
             conditions.append("p.position = ?")
             params.append(position)
+        if after:
+            conditions.append(after)
+            params.extend(after_params)
 
         if conditions:
             query += " WHERE " + " AND ".join(conditions)
 
-        query += " ORDER BY p.name LIMIT ? OFFSET ?"
-        params.extend([limit, offset])
+        query += f" {order_by} LIMIT ? OFFSET ?"
+        params.extend([limit, 0 if cursor else offset])
 
-        cursor = conn.execute(query, params)
-        return [dict_from_row(row) for row in cursor.fetchall()]
+        rows = conn.execute(query, params)
+        return [dict_from_row(row) for row in rows.fetchall()]
 
 
 def get_player(player_id: int) -> Optional[Dict]:
@@ -152,9 +349,11 @@ def get_games(
     team_id: Optional[int] = None,
     status: Optional[str] = None,
     date_from: Optional[str] = None,
-    date_to: Optional[str] = None
+    date_to: Optional[str] = None,
+    cursor: Optional[str] = None
 ) -> List[Dict]:
-    """Get list of games with optional filtering."""
+    """Get list of games with optional filtering (keyset `cursor` or legacy offset)."""
+    after, after_params, order_by = _keyset("games", cursor)
     with get_connection() as conn:
         query = """
             SELECT g.*,
@@ -179,15 +378,18 @@ def get_games(
         if date_to:
             conditions.append("g.date <= ?")
             params.append(date_to)
+        if after:
+            conditions.append(after)
+            params.extend(after_params)
 
         if conditions:
             query += " WHERE " + " AND ".join(conditions)
 
-        query += " ORDER BY g.date DESC, g.time DESC LIMIT ? OFFSET ?"
-        params.extend([limit, offset])
+        query += f" {order_by} LIMIT ? OFFSET ?"
+        params.extend([limit, 0 if cursor else offset])
 
-        cursor = conn.execute(query, params)
-        return [dict_from_row(row) for row in cursor.fetchall()]
+        rows = conn.execute(query, params)
+        return [dict_from_row(row) for row in rows.fetchall()]
 
 
 def get_game(game_id: int) -> Optional[Dict]:
@@ -250,9 +452,11 @@ def get_upcoming_games(team_id: int, limit: int = 5) -> List[Dict]:
 def get_injuries(
     team_id: Optional[int] = None,
     status: str = 'active',
-    limit: int = 50
+    limit: int = 50,
+    cursor: Optional[str] = None
 ) -> List[Dict]:
-    """Get injuries with optional filtering."""
+    """Get injuries with optional filtering, newest first (keyset `cursor`)."""
+    after, after_params, order_by = _keyset("injuries", cursor)
     with get_connection() as conn:
         query = """
             SELECT i.*, p.name as player_name, t.name as team_name
@@ -266,12 +470,15 @@ def get_injuries(
         if team_id:
             query += " AND p.team_id = ?"
             params.append(team_id)
+        if after:
+            query += f" AND {after}"
+            params.extend(after_params)
 
-        query += " ORDER BY i.occurred_date DESC LIMIT ?"
+        query += f" {order_by} LIMIT ?"
         params.append(limit)
 
-        cursor = conn.execute(query, params)
-        return [dict_from_row(row) for row in cursor.fetchall()]
+        rows = conn.execute(query, params)
+        return [dict_from_row(row) for row in rows.fetchall()]
 
 
 # ============================================
@@ -281,9 +488,11 @@ def get_injuries(
 def get_transfers(
     team_id: Optional[int] = None,
     status: Optional[str] = None,
-    limit: int = 50
+    limit: int = 50,
+    cursor: Optional[str] = None
 ) -> List[Dict]:
-    """Get transfers with optional filtering."""
+    """Get transfers with optional filtering, newest first (keyset `cursor`)."""
+    after, after_params, order_by = _keyset("transfers", cursor)
     with get_connection() as conn:
         query = """
             SELECT tr.*,
@@ -304,15 +513,18 @@ def get_transfers(
         if status:
             conditions.append("tr.status = ?")
             params.append(status)
+        if after:
+            conditions.append(after)
+            params.extend(after_params)
 
         if conditions:
             query += " WHERE " + " AND ".join(conditions)
 
-        query += " ORDER BY tr.announced_date DESC LIMIT ?"
+        query += f" {order_by} LIMIT ?"
         params.append(limit)
 
-        cursor = conn.execute(query, params)
-        return [dict_from_row(row) for row in cursor.fetchall()]
+        rows = conn.execute(query, params)
+        return [dict_from_row(row) for row in rows.fetchall()]
 
 
 # ============================================
@@ -381,179 +593,371 @@ def escape_fts_query(query: str) -> str:
     return ' '.join(quoted_tokens)
 
 
-def search_players(query: str, limit: int = 10) -> List[Dict]:
-    """Full-text search on players."""
+# Ranked search sources: FTS table, bm25 column weights (in FTS column
+# order), table weight applied when merging across tables, and extra
+# columns / joins for the content row (aliased x).
+SEARCH_SOURCES = {
+    "players": {
+        "fts": "players_fts",
+        "weights": (10.0, 1.0, 2.0),  # name, position, nationality
+        "table_weight": 1.0,
+        "columns": "x.*, t.name AS team_name",
+        "joins": "LEFT JOIN teams t ON x.team_id = t.id",
+    },
+    "teams": {
+        "fts": "teams_fts",
+        "weights": (10.0, 5.0, 1.0, 1.0),  # name, short_name, league, country
+        "table_weight": 1.2,
+        "columns": "x.*",
+        "joins": "",
+    },
+    "news": {
+        "fts": "news_fts",
+        "weights": (4.0, 1.0, 2.0, 1.0),  # title, content, summary, category
+        "table_weight": 0.8,
+        "columns": "x.*",
+        "joins": "",
+    },
+}
+
+SNIPPET_TOKENS = int(os.getenv("SEARCH_SNIPPET_TOKENS", "12"))
+SNIPPET_HIGHLIGHT = ("<mark>", "</mark>")
+
+
+def _ranked_sql(table: str) -> str:
+    source = SEARCH_SOURCES[table]
+    fts = source["fts"]
+    weights = ", ".join(str(w) for w in source["weights"])
+    return f"""
+        SELECT {source['columns']},
+               bm25({fts}, {weights}) AS bm25_score,
+               snippet({fts}, -1, ?, ?, '...', ?) AS snippet
+        FROM {fts}
+        JOIN {table} x ON x.id = {fts}.rowid
+        {source['joins']}
+        WHERE {fts} MATCH ?
+        ORDER BY bm25_score
+        LIMIT ?
+    """
+
+
+def _search_tables(
+    query: str,
+    limit: int,
+    tables: Iterable[str],
+    match_any: bool,
+    highlight: Tuple[str, str],
+) -> Dict[str, List[Dict]]:
+    """
+    Top-`limit` hits per FTS table, best first, all on one connection.
+
+    bm25() is lower-is-better, so each hit gets `score` = -bm25 scaled
+    by the table weight (higher is better, comparable across tables).
+    """
     escaped_query = escape_fts_query(query)
     if not escaped_query:
-        return []
+        return {table: [] for table in tables}
+    if match_any:
+        escaped_query = escaped_query.replace('" "', '" OR "')
+
+    results = {}
     with get_connection() as conn:
-        cursor = conn.execute("""
-            SELECT p.*, t.name as team_name
-            FROM players p
-            LEFT JOIN teams t ON p.team_id = t.id
-            WHERE p.id IN (
-                SELECT rowid FROM players_fts WHERE players_fts MATCH ?
+        for table in tables:
+            table_weight = SEARCH_SOURCES[table]["table_weight"]
+            cursor = conn.execute(
+                _ranked_sql(table),
+                (highlight[0], highlight[1], SNIPPET_TOKENS, escaped_query, limit)
             )
-            LIMIT ?
-        """, (escaped_query, limit))
-        return [dict_from_row(row) for row in cursor.fetchall()]
+            hits = []
+            for row in cursor.fetchall():
+                hit = dict_from_row(row)
+                hit["type"] = table
+                hit["score"] = -hit.pop("bm25_score") * table_weight
+                hits.append(hit)
+            results[table] = hits
+    return results
+
+
+def search(
+    query: str,
+    limit: int = 10,
+    tables: Iterable[str] = None,
+    match_any: bool = False,
+    highlight: Tuple[str, str] = SNIPPET_HIGHLIGHT,
+) -> List[Dict]:
+    """
+    Ranked full-text search across players, teams and news.
+
+    Returns the global top-`limit` hits, each a content row plus `type`,
+    `score` and a highlighted `snippet`. Terms are ANDed unless
+    `match_any` is set, in which case any term matches and bm25 ranks
+    rows matching more of them higher.
+    """
+    tables = list(tables or SEARCH_SOURCES)
+    per_table = _search_tables(query, limit, tables, match_any, highlight)
+    # Any global top-k hit is within its own table's top-k
+    return heapq.nlargest(
+        limit,
+        (hit for hits in per_table.values() for hit in hits),
+        key=lambda hit: hit["score"]
+    )
+
+
+def search_players(query: str, limit: int = 10) -> List[Dict]:
+    """Full-text search on players, best match first."""
+    return search(query, limit, tables=["players"])
 
 
 def search_teams(query: str, limit: int = 10) -> List[Dict]:
-    """Full-text search on teams."""
-    escaped_query = escape_fts_query(query)
-    if not escaped_query:
-        return []
-    with get_connection() as conn:
-        cursor = conn.execute("""
-            SELECT * FROM teams
-            WHERE id IN (
-                SELECT rowid FROM teams_fts WHERE teams_fts MATCH ?
-            )
-            LIMIT ?
-        """, (escaped_query, limit))
-        return [dict_from_row(row) for row in cursor.fetchall()]
+    """Full-text search on teams, best match first."""
+    return search(query, limit, tables=["teams"])
 
 
 def search_news(query: str, limit: int = 10) -> List[Dict]:
-    """Full-text search on news articles."""
-    escaped_query = escape_fts_query(query)
-    if not escaped_query:
-        return []
-    with get_connection() as conn:
-        cursor = conn.execute("""
-            SELECT * FROM news
-            WHERE id IN (
-                SELECT rowid FROM news_fts WHERE news_fts MATCH ?
-            )
-            ORDER BY published_at DESC
-            LIMIT ?
-        """, (escaped_query, limit))
-        return [dict_from_row(row) for row in cursor.fetchall()]
+    """Full-text search on news articles, best match first."""
+    return search(query, limit, tables=["news"])
 
 
 def search_all(query: str, limit: int = 5) -> Dict[str, List[Dict]]:
-    """Search across all FTS tables."""
-    return {
-        "players": search_players(query, limit),
-        "teams": search_teams(query, limit),
-        "news": search_news(query, limit)
-    }
+    """Top-`limit` ranked hits from each FTS table, on one connection."""
+    return _search_tables(query, limit, list(SEARCH_SOURCES), False, SNIPPET_HIGHLIGHT)
 
 
 # ============================================
 # WRITE OPERATIONS (For data updates)
 # ============================================
 
+# FTS5 index maintained by an AFTER INSERT trigger (schema.sql), per content table:
+# table -> (fts table, insert trigger, indexed columns)
+FTS_INDEXES = {
+    "teams": ("teams_fts", "teams_ai", ("name", "short_name", "league", "country")),
+    "players": ("players_fts", "players_ai", ("name", "position", "nationality")),
+    "news": ("news_fts", "news_ai", ("title", "content", "summary", "category")),
+}
+
+# Batches at least this large index FTS once at the end instead of per row
+# (suspending the trigger is a schema change, not worth it for a few rows)
+FTS_DEFER_MIN_ROWS = 50
+
+
+def _suspend_fts(conn: sqlite3.Connection, table: str) -> Optional[tuple]:
+    """Drop table's FTS insert trigger for this transaction; returns what _resume_fts needs."""
+    fts_table, trigger, columns = FTS_INDEXES[table]
+    row = conn.execute(
+        "SELECT sql FROM sqlite_master WHERE type = 'trigger' AND name = ?", (trigger,)
+    ).fetchone()
+    if row is None:
+        return None  # No FTS index, or already suspended by an enclosing batch
+    conn.execute(f"DROP TRIGGER {trigger}")
+    high_water = conn.execute(f"SELECT COALESCE(MAX(rowid), 0) FROM {table}").fetchone()[0]
+    return table, row[0], high_water
+
+
+def _resume_fts(conn: sqlite3.Connection, suspended: tuple):
+    """Index the rows inserted since _suspend_fts in one statement, then restore the trigger."""
+    table, trigger_sql, high_water = suspended
+    fts_table, _, columns = FTS_INDEXES[table]
+    column_list = ", ".join(columns)
+    conn.execute(f"""
+        INSERT INTO {fts_table}(rowid, {column_list})
+        SELECT rowid, {column_list} FROM {table} WHERE rowid > ?
+    """, (high_water,))
+    conn.execute(trigger_sql)
+
+
+@contextmanager
+def bulk_write(defer_fts: Iterable[str] = ()):
+    """
+    One write transaction for a batch of statements (committed on success,
+    rolled back on error).
+
+    Tables in defer_fts (keys of FTS_INDEXES) have their per-row FTS
+    trigger suspended; rows inserted in the block are indexed once at the
+    end. A bulk_write nested in another joins the outer transaction.
+    """
+    with get_connection() as conn:
+        if conn.in_transaction:
+            outer = True
+        else:
+            outer = False
+            conn.execute("BEGIN IMMEDIATE")
+        try:
+            suspended = [s for s in (_suspend_fts(conn, table) for table in defer_fts) if s]
+            yield conn
+            for entry in suspended:
+                _resume_fts(conn, entry)
+            if not outer:
+                conn.commit()
+        except BaseException:
+            if not outer:
+                conn.rollback()
+            raise
+
+
+def _insert_many(table: str, sql: str, rows: Iterable[tuple]) -> List[int]:
+    """
+    executemany inside bulk_write; returns the new row ids.
+
+    The write lock is held for the whole statement, so the ids are the
+    consecutive run ending at last_insert_rowid().
+    """
+    rows = list(rows)
+    if not rows:
+        return []
+    defer = [table] if table in FTS_INDEXES and len(rows) >= FTS_DEFER_MIN_ROWS else []
+    with bulk_write(defer_fts=defer) as conn:
+        conn.executemany(sql, rows)
+        last = conn.execute("SELECT last_insert_rowid()").fetchone()[0]
+    return list(range(last - len(rows) + 1, last + 1))
+
+
+def _team_row(team_data: Dict) -> tuple:
+    return (
+        team_data['name'],
+        team_data.get('short_name'),
+        team_data['league'],
+        team_data['country'],
+        team_data.get('stadium'),
+        team_data.get('founded'),
+        team_data.get('logo_url')
+    )
+
+
+def _player_row(player_data: Dict) -> tuple:
+    return (
+        player_data['name'],
+        player_data.get('team_id'),
+        player_data.get('position'),
+        player_data.get('nationality'),
+        player_data.get('birth_date'),
+        player_data.get('jersey_number')
+    )
+
+
+def _game_row(game_data: Dict) -> tuple:
+    return (
+        game_data['date'],
+        game_data.get('time'),
+        game_data['home_team_id'],
+        game_data['away_team_id'],
+        game_data.get('home_score'),
+        game_data.get('away_score'),
+        game_data.get('status', 'scheduled'),
+        game_data.get('competition'),
+        game_data.get('matchday'),
+        game_data.get('venue'),
+        game_data.get('attendance'),
+        game_data.get('referee')
+    )
+
+
+def _news_row(news_data: Dict) -> tuple:
+    return (
+        news_data['title'],
+        news_data.get('content'),
+        news_data.get('summary'),
+        news_data.get('source'),
+        news_data.get('source_url'),
+        news_data.get('published_at'),
+        news_data.get('category'),
+        json.dumps(news_data.get('related_team_ids', [])),
+        json.dumps(news_data.get('related_player_ids', []))
+    )
+
+
+def insert_teams(teams: Iterable[Dict]) -> List[int]:
+    """Insert teams in one transaction. Returns their ids, in order."""
+    return _insert_many('teams', """
+        INSERT INTO teams (name, short_name, league, country, stadium, founded, logo_url)
+        VALUES (?, ?, ?, ?, ?, ?, ?)
+    """, (_team_row(team) for team in teams))
+
+
+def insert_players(players: Iterable[Dict]) -> List[int]:
+    """Insert players in one transaction. Returns their ids, in order."""
+    return _insert_many('players', """
+        INSERT INTO players (name, team_id, position, nationality, birth_date, jersey_number)
+        VALUES (?, ?, ?, ?, ?, ?)
+    """, (_player_row(player) for player in players))
+
+
+def insert_games(games: Iterable[Dict]) -> List[int]:
+    """Insert games in one transaction. Returns their ids, in order."""
+    ids = _insert_many('games', """
+        INSERT INTO games (date, time, home_team_id, away_team_id, home_score, away_score,
+                          status, competition, matchday, venue, attendance, referee)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    """, (_game_row(game) for game in games))
+    if ids:
+        bump_data_generation()
+    return ids
+
+
+def insert_news_articles(articles: Iterable[Dict]) -> List[int]:
+    """Insert news articles in one transaction. Returns their ids, in order."""
+    return _insert_many('news', """
+        INSERT INTO news (title, content, summary, source, source_url, published_at,
+                         category, related_team_ids, related_player_ids)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+    """, (_news_row(article) for article in articles))
+
+
 def insert_team(team_data: Dict) -> int:
     """Insert a new team."""
-    with get_connection() as conn:
-        cursor = conn.execute("""
-            INSERT INTO teams (name, short_name, league, country, stadium, founded, logo_url)
-            VALUES (?, ?, ?, ?, ?, ?, ?)
-        """, (
-            team_data['name'],
-            team_data.get('short_name'),
-            team_data['league'],
-            team_data['country'],
-            team_data.get('stadium'),
-            team_data.get('founded'),
-            team_data.get('logo_url')
-        ))
-        conn.commit()
-        return cursor.lastrowid
+    return insert_teams([team_data])[0]
 
 
 def insert_player(player_data: Dict) -> int:
     """Insert a new player."""
-    with get_connection() as conn:
-        cursor = conn.execute("""
-            INSERT INTO players (name, team_id, position, nationality, birth_date, jersey_number)
-            VALUES (?, ?, ?, ?, ?, ?)
-        """, (
-            player_data['name'],
-            player_data.get('team_id'),
-            player_data.get('position'),
-            player_data.get('nationality'),
-            player_data.get('birth_date'),
-            player_data.get('jersey_number')
-        ))
-        conn.commit()
-        return cursor.lastrowid
+    return insert_players([player_data])[0]
 
 
 def insert_game(game_data: Dict) -> int:
     """Insert a new game."""
-    with get_connection() as conn:
-        cursor = conn.execute("""
-            INSERT INTO games (date, time, home_team_id, away_team_id, home_score, away_score,
-                              status, competition, matchday, venue, attendance, referee)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-        """, (
-            game_data['date'],
-            game_data.get('time'),
-            game_data['home_team_id'],
-            game_data['away_team_id'],
-            game_data.get('home_score'),
-            game_data.get('away_score'),
-            game_data.get('status', 'scheduled'),
-            game_data.get('competition'),
-            game_data.get('matchday'),
-            game_data.get('venue'),
-            game_data.get('attendance'),
-            game_data.get('referee')
-        ))
-        conn.commit()
-        return cursor.lastrowid
+    return insert_games([game_data])[0]
 
 
 def insert_news(news_data: Dict) -> int:
     """Insert a news article."""
-    with get_connection() as conn:
-        cursor = conn.execute("""
-            INSERT INTO news (title, content, summary, source, source_url, published_at,
-                             category, related_team_ids, related_player_ids)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-        """, (
-            news_data['title'],
-            news_data.get('content'),
-            news_data.get('summary'),
-            news_data.get('source'),
-            news_data.get('source_url'),
-            news_data.get('published_at'),
-            news_data.get('category'),
-            json.dumps(news_data.get('related_team_ids', [])),
-            json.dumps(news_data.get('related_player_ids', []))
-        ))
-        conn.commit()
-        return cursor.lastrowid
+    return insert_news_articles([news_data])[0]
 
 
 # ============================================
 # LEGENDS & CLUB PERSONALITY
 # ============================================
 
-def get_legends(team_id: Optional[int] = None, limit: int = 50) -> List[Dict]:
-    """Get club legends with optional team filtering."""
+def get_legends(team_id: Optional[int] = None, limit: int = 50, cursor: Optional[str] = None) -> List[Dict]:
+    """
+    Get club legends with optional team filtering (keyset `cursor`).
+
+    Cursors are per listing: one from the all-clubs list ("legends",
+    ordered by club then name) is rejected for a single club.
+    """
+    after, after_params, order_by = _keyset("team_legends" if team_id else "legends", cursor)
     with get_connection() as conn:
+        query = """
+            SELECT l.*, t.name as team_name
+            FROM club_legends l
+            LEFT JOIN teams t ON l.team_id = t.id
+        """
+        conditions = []
+        params = []
+
         if team_id:
-            cursor = conn.execute("""
-                SELECT l.*, t.name as team_name
-                FROM club_legends l
-                LEFT JOIN teams t ON l.team_id = t.id
-                WHERE l.team_id = ?
-                ORDER BY l.name
-                LIMIT ?
-            """, (team_id, limit))
-        else:
-            cursor = conn.execute("""
-                SELECT l.*, t.name as team_name
-                FROM club_legends l
-                LEFT JOIN teams t ON l.team_id = t.id
-                ORDER BY t.name, l.name
-                LIMIT ?
-            """, (limit,))
-        return [dict_from_row(row) for row in cursor.fetchall()]
+            conditions.append("l.team_id = ?")
+            params.append(team_id)
+        if after:
+            conditions.append(after)
+            params.extend(after_params)
+
+        if conditions:
+            query += " WHERE " + " AND ".join(conditions)
+
+        query += f" {order_by} LIMIT ?"
+        params.append(limit)
+
+        rows = conn.execute(query, params)
+        return [dict_from_row(row) for row in rows.fetchall()]
 
 
 def get_legend(legend_id: int) -> Optional[Dict]:
@@ -716,16 +1120,157 @@ def load_full_persona(team_id: int) -> Dict:
         - legends: Club heroes and their stories
         - moments: Defining historical moments
     """
+    document = get_persona_document(team_id)
+    return {
+        "team_id": team_id,
+        "personality": document["identity"],
+        "mood": document["mood"],
+        "rivalries": document["rivalries"],
+        "legends": document["legends"],
+        "moments": document["moments"]
+    }
+
+
+# ============================================
+# PERSONA DOCUMENTS (materialised per club)
+# ============================================
+
+# Tables a persona document is built from; writes to them drop the club's document
+PERSONA_SOURCE_TABLES = ["club_identity", "club_mood", "club_rivalries", "club_legends", "club_moments"]
+
+# In-memory copies: team_id -> (data generation, serialised document)
+_persona_cache: Dict[int, tuple] = {}
+_persona_cache_lock = threading.Lock()
+
+
+def init_persona_documents():
+    """
+    Create the persona_documents table and the triggers that invalidate it.
+
+    A write to any source table deletes the affected clubs' documents (and
+    bumps the data generation), so the next read rebuilds them - whichever
+    process or script made the write. Source tables that don't exist yet
+    are skipped; run again after seeding them.
+    """
+    with get_connection() as conn:
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS persona_documents (
+                team_id INTEGER PRIMARY KEY,
+                document TEXT NOT NULL,
+                built_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        ''')
+        tables = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+        bump = (
+            "UPDATE data_generation SET generation = generation + 1, updated_at = CURRENT_TIMESTAMP WHERE id = 1;"
+            if "data_generation" in tables else ""
+        )
+        for table in PERSONA_SOURCE_TABLES:
+            if table not in tables:
+                continue
+            for event, team_ids in (("INSERT", "NEW.team_id"),
+                                    ("UPDATE", "OLD.team_id, NEW.team_id"),
+                                    ("DELETE", "OLD.team_id")):
+                conn.execute(f'''
+                    CREATE TRIGGER IF NOT EXISTS {table}_persona_{event.lower()}
+                    AFTER {event} ON {table} BEGIN
+                        DELETE FROM persona_documents WHERE team_id IN ({team_ids});
+                        {bump}
+                    END
+                ''')
+        # Documents embed team and rival names
+        conn.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS teams_persona_update
+            AFTER UPDATE OF name ON teams BEGIN
+                DELETE FROM persona_documents;
+                {bump}
+            END
+        ''')
+        conn.commit()
+
+
+def build_persona_document(team_id: int) -> Dict:
+    """Everything the persona endpoints and RAG read for a club, from the source tables."""
     return {
         "team_id": team_id,
-        "personality": get_club_identity(team_id),
+        "team": get_team(team_id),
+        "identity": get_club_identity(team_id),
         "mood": get_club_mood(team_id),
         "rivalries": get_club_rivalries(team_id),
         "legends": get_club_legends(team_id, limit=10),
-        "moments": get_club_moments(team_id, limit=10)
+        "legends_by_name": get_legends(team_id=team_id, limit=5),
+        "moments": get_club_moments(team_id, limit=10),
+        "built_at": time.time()
     }
 
 
+def _store_persona_document(team_id: int) -> str:
+    """Build a club's serialised document and save it (when the database is writable)."""
+    document = None
+    with get_connection() as conn:
+        if not SERVING_MODE and not conn.in_transaction:
+            try:
+                # Hold the write lock while reading, so a concurrent source
+                # write can't land between the build and the save
+                conn.execute("BEGIN IMMEDIATE")
+                document = build_persona_document(team_id)
+                if document["team"] is not None:
+                    conn.execute(
+                        "INSERT OR REPLACE INTO persona_documents (team_id, document) VALUES (?, ?)",
+                        (team_id, json.dumps(document, separators=(',', ':')))
+                    )
+                conn.commit()
+            except sqlite3.OperationalError:
+                conn.rollback()
+                document = None  # Not initialized or locked - serve it unsaved
+    if document is None:
+        document = build_persona_document(team_id)
+    return json.dumps(document, separators=(',', ':'))
+
+
+def get_persona_document(team_id: int) -> Dict:
+    """
+    A club's persona document: the in-memory copy while the data generation
+    is unchanged, else its persona_documents row, else rebuilt.
+
+    Returns a fresh dict each call (callers may modify it).
+    """
+    generation = get_data_generation()
+    with _persona_cache_lock:
+        cached = _persona_cache.get(team_id)
+    if cached is not None and cached[0] == generation:
+        cache_lookup("persona_document", hit=True)
+        return json.loads(cached[1])
+    cache_lookup("persona_document", hit=False)
+
+    blob = None
+    try:
+        with get_connection() as conn:
+            row = conn.execute("SELECT document FROM persona_documents WHERE team_id = ?", (team_id,)).fetchone()
+            blob = row['document'] if row else None
+    except sqlite3.OperationalError:
+        pass  # Not initialized
+    if blob is None:
+        blob = _store_persona_document(team_id)
+
+    with _persona_cache_lock:
+        _persona_cache[team_id] = (generation, blob)
+    return json.loads(blob)
+
+
+def rebuild_persona_documents(team_ids: List[int] = None) -> int:
+    """Rebuild and save documents (default: every team). Returns the number rebuilt."""
+    if team_ids is None:
+        with get_connection() as conn:
+            team_ids = [row['id'] for row in conn.execute("SELECT id FROM teams")]
+    for team_id in team_ids:
+        _store_persona_document(team_id)
+    with _persona_cache_lock:
+        for team_id in team_ids:
+            _persona_cache.pop(team_id, None)
+    return len(team_ids)
+
+
 # ============================================
 # KNOWLEDGE GRAPH (KG-RAG)
 # ============================================
@@ -768,29 +1313,52 @@ def init_knowledge_graph():
     print("Knowledge Graph tables initialized")
 
 
+def create_kg_nodes(nodes: Iterable[Tuple]) -> List[int]:
+    """
+    Create nodes in one transaction.
+
+    nodes: (node_type, entity_id, name[, properties]) tuples.
+    Returns their node ids, in order.
+    """
+    return _insert_many('kg_nodes', """
+        INSERT INTO kg_nodes (node_type, entity_id, name, properties)
+        VALUES (?, ?, ?, ?)
+    """, (
+        (node_type, entity_id, name, json.dumps(properties[0]) if properties and properties[0] else None)
+        for node_type, entity_id, name, *properties in nodes
+    ))
+
+
+def create_kg_edges(edges: Iterable[Tuple]) -> List[int]:
+    """
+    Create edges in one transaction.
+
+    edges: (source_id, target_id, relationship[, weight[, properties]]) tuples.
+    Returns their edge ids, in order.
+    """
+    def rows():
+        for source_id, target_id, relationship, *rest in edges:
+            weight = rest[0] if rest else 1.0
+            properties = rest[1] if len(rest) > 1 else None
+            yield (source_id, target_id, relationship, weight,
+                   json.dumps(properties) if properties else None)
+
+    return _insert_many('kg_edges', """
+        INSERT INTO kg_edges (source_id, target_id, relationship, weight, properties)
+        VALUES (?, ?, ?, ?, ?)
+    """, rows())
+
+
 def create_kg_node(node_type: str, entity_id: int, name: str,
                    properties: Dict = None) -> int:
     """Create a node in the knowledge graph."""
-    with get_connection() as conn:
-        cursor = conn.execute("""
-            INSERT INTO kg_nodes (node_type, entity_id, name, properties)
-            VALUES (?, ?, ?, ?)
-        """, (node_type, entity_id, name, json.dumps(properties) if properties else None))
-        conn.commit()
-        return cursor.lastrowid
+    return create_kg_nodes([(node_type, entity_id, name, properties)])[0]
 
 
 def create_kg_edge(source_id: int, target_id: int, relationship: str,
                    weight: float = 1.0, properties: Dict = None) -> int:
     """Create an edge in the knowledge graph."""
-    with get_connection() as conn:
-        cursor = conn.execute("""
-            INSERT INTO kg_edges (source_id, target_id, relationship, weight, properties)
-            VALUES (?, ?, ?, ?, ?)
-        """, (source_id, target_id, relationship, weight,
-              json.dumps(properties) if properties else None))
-        conn.commit()
-        return cursor.lastrowid
+    return create_kg_edges([(source_id, target_id, relationship, weight, properties)])[0]
 
 
 def get_kg_node(node_id: int) -> Optional[Dict]:
@@ -958,83 +1526,106 @@ def get_entity_context(entity_type: str, entity_id: int) -> Dict:
 
 
 def populate_knowledge_graph():
-    """Populate KG from existing data tables."""
+    """
+    Populate KG from existing data tables.
+
+    Rebuilt in a single transaction: readers see the old graph until the
+    new one is committed.
+    """
     init_knowledge_graph()
+    start = time.perf_counter()
 
-    with get_connection() as conn:
+    with bulk_write() as conn:
         # Clear existing KG data
         conn.execute("DELETE FROM kg_edges")
         conn.execute("DELETE FROM kg_nodes")
-        conn.commit()
 
-    node_map = {}  # (type, entity_id) -> node_id
-
-    # 1. Create team nodes
-    teams = get_teams(limit=100)
-    for team in teams:
-        node_id = create_kg_node('team', team['id'], team['name'], {
-            'league': team.get('league'),
-            'stadium': team.get('stadium')
-        })
-        node_map[('team', team['id'])] = node_id
-
-    # 2. Create legend nodes + edges
-    legends = get_legends(limit=100)
-    for legend in legends:
-        node_id = create_kg_node('legend', legend['id'], legend['name'], {
-            'era': legend.get('era'),
-            'position': legend.get('position'),
-            'achievements': legend.get('achievements')
-        })
-        node_map[('legend', legend['id'])] = node_id
-        # Edge: legend -> team
-        team_node_id = node_map.get(('team', legend['team_id']))
-        if team_node_id:
-            create_kg_edge(node_id, team_node_id, 'legendary_at')
-
-    # 3. Create moment nodes + edges
-    # All Top 6: City(1), Liverpool(2), Arsenal(3), Chelsea(4), ManU(5), Spurs(6)
-    for team_id in [1, 2, 3, 4, 5, 6]:
-        moments = get_club_moments(team_id, limit=50)
-        for moment in moments:
-            node_id = create_kg_node('moment', moment['id'], moment['title'], {
-                'emotion': moment.get('emotion'),
-                'significance': moment.get('significance'),
-                'date': moment.get('date'),
-                'opponent': moment.get('opponent')
+        node_map = {}  # (type, entity_id) -> node_id
+        edge_rows = []  # (source_id, target_id, relationship[, weight, properties])
+
+        def add_nodes(node_type: str, rows: List[tuple]):
+            ids = create_kg_nodes((node_type, entity_id, name, properties)
+                                  for entity_id, name, properties in rows)
+            for (entity_id, _, _), node_id in zip(rows, ids):
+                node_map[(node_type, entity_id)] = node_id
+
+        # 1. Create team nodes
+        teams = get_teams(limit=100)
+        add_nodes('team', [
+            (team['id'], team['name'], {'league': team.get('league'), 'stadium': team.get('stadium')})
+            for team in teams
+        ])
+        # Opponent lookup (same match as get_team_by_name)
+        team_ids_by_name = {}
+        for row in conn.execute("SELECT id, name, short_name FROM teams ORDER BY id DESC"):
+            for name in (row['name'], row['short_name']):
+                if name:
+                    team_ids_by_name[name.lower()] = row['id']
+
+        # 2. Create legend nodes + edges
+        legends = get_legends(limit=100)
+        add_nodes('legend', [
+            (legend['id'], legend['name'], {
+                'era': legend.get('era'),
+                'position': legend.get('position'),
+                'achievements': legend.get('achievements')
             })
-            node_map[('moment', moment['id'])] = node_id
-            # Edge: moment -> team
-            team_node_id = node_map.get(('team', team_id))
+            for legend in legends
+        ])
+        for legend in legends:
+            # Edge: legend -> team
+            team_node_id = node_map.get(('team', legend['team_id']))
             if team_node_id:
-                create_kg_edge(node_id, team_node_id, 'occurred_at')
-            # Edge: moment -> opponent (if opponent is tracked)
-            if moment.get('opponent'):
-                opponent_team = get_team_by_name(moment['opponent'])
-                if opponent_team:
-                    opponent_node_id = node_map.get(('team', opponent_team['id']))
+                edge_rows.append((node_map[('legend', legend['id'])], team_node_id, 'legendary_at'))
+
+        # 3. Create moment nodes + edges
+        # All Top 6: City(1), Liverpool(2), Arsenal(3), Chelsea(4), ManU(5), Spurs(6)
+        for team_id in [1, 2, 3, 4, 5, 6]:
+            moments = get_club_moments(team_id, limit=50)
+            add_nodes('moment', [
+                (moment['id'], moment['title'], {
+                    'emotion': moment.get('emotion'),
+                    'significance': moment.get('significance'),
+                    'date': moment.get('date'),
+                    'opponent': moment.get('opponent')
+                })
+                for moment in moments
+            ])
+            for moment in moments:
+                node_id = node_map[('moment', moment['id'])]
+                # Edge: moment -> team
+                team_node_id = node_map.get(('team', team_id))
+                if team_node_id:
+                    edge_rows.append((node_id, team_node_id, 'occurred_at'))
+                # Edge: moment -> opponent (if opponent is tracked)
+                if moment.get('opponent'):
+                    opponent_id = team_ids_by_name.get(moment['opponent'].lower())
+                    opponent_node_id = node_map.get(('team', opponent_id))
                     if opponent_node_id:
-                        create_kg_edge(node_id, opponent_node_id, 'against')
-
-    # 4. Create rivalry edges
-    # All Top 6: City(1), Liverpool(2), Arsenal(3), Chelsea(4), ManU(5), Spurs(6)
-    for team_id in [1, 2, 3, 4, 5, 6]:
-        rivalries = get_club_rivalries(team_id)
-        for rivalry in rivalries:
-            team_node_id = node_map.get(('team', team_id))
-            rival_node_id = node_map.get(('team', rivalry['rival_team_id']))
-            if team_node_id and rival_node_id:
-                create_kg_edge(team_node_id, rival_node_id, 'rival_of',
-                              weight=rivalry['intensity'] / 10.0,
-                              properties={'type': rivalry.get('rivalry_type')})
-
-    # Count results
-    with get_connection() as conn:
+                        edge_rows.append((node_id, opponent_node_id, 'against'))
+
+        # 4. Create rivalry edges
+        # All Top 6: City(1), Liverpool(2), Arsenal(3), Chelsea(4), ManU(5), Spurs(6)
+        for team_id in [1, 2, 3, 4, 5, 6]:
+            rivalries = get_club_rivalries(team_id)
+            for rivalry in rivalries:
+                team_node_id = node_map.get(('team', team_id))
+                rival_node_id = node_map.get(('team', rivalry['rival_team_id']))
+                if team_node_id and rival_node_id:
+                    edge_rows.append((team_node_id, rival_node_id, 'rival_of',
+                                  rivalry['intensity'] / 10.0, {'type': rivalry.get('rivalry_type')}))
+
+        create_kg_edges(edge_rows)
+
+        # Count results
         nodes = conn.execute("SELECT COUNT(*) FROM kg_nodes").fetchone()[0]
         edges = conn.execute("SELECT COUNT(*) FROM kg_edges").fetchone()[0]
 
-    print(f"Knowledge Graph populated: {nodes} nodes, {edges} edges")
-    return {'nodes': nodes, 'edges': edges}
+    seconds = time.perf_counter() - start
+    rows_per_sec = round((nodes + edges) / seconds) if seconds > 0 else None
+    print(f"Knowledge Graph populated: {nodes} nodes, {edges} edges "
+          f"in {seconds * 1000:.0f}ms ({rows_per_sec} rows/s)")
+    return {'nodes': nodes, 'edges': edges, 'seconds': round(seconds, 3), 'rows_per_sec': rows_per_sec}
 
 
 def get_kg_stats() -> Dict:
@@ -1064,7 +1655,7 @@ def get_kg_stats() -> Dict:
 
 def init_analytics():
     """Initialize analytics table."""
-    with get_connection() as conn:
+    with get_write_connection() as conn:
         conn.execute('''
             CREATE TABLE IF NOT EXISTS query_analytics (
                 id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -1089,10 +1680,256 @@ def init_analytics():
             CREATE INDEX IF NOT EXISTS idx_analytics_intent
             ON query_analytics(intent)
         ''')
+        # Per-stage timings (JSON, ms) - added after the original schema
+        columns = {row['name'] for row in conn.execute("PRAGMA table_info(query_analytics)")}
+        if 'stage_timings' not in columns:
+            conn.execute("ALTER TABLE query_analytics ADD COLUMN stage_timings TEXT")
+        _init_rollup_tables(conn)
         conn.commit()
     print("Analytics table initialized")
 
 
+# ============================================
+# ANALYTICS ROLLUPS
+# ============================================
+# Hourly aggregates of query_analytics and security_log, folded in by the
+# log writer in the same transaction as the raw rows. The dashboard
+# summaries read these, so their cost depends on the window, not on how
+# much history the raw tables hold.
+
+# Column order of the log INSERTs (also used to read queued params back)
+_LOG_COLUMNS = {
+    'query_analytics': (
+        'query', 'intent', 'kg_intent', 'club_detected', 'kg_nodes_used',
+        'kg_edges_traversed', 'response_time_ms', 'source_count',
+        'confidence', 'was_injection_attempt', 'stage_timings'
+    ),
+    'security_log': (
+        'session_id', 'attempt_number', 'query_hash', 'pattern_matched',
+        'escalation_level', 'response_type'
+    ),
+}
+
+# Rollup hours use the same text format as CURRENT_TIMESTAMP
+_HOUR_FORMAT = '%Y-%m-%d %H:00:00'
+
+# Latency sketch stage for the end-to-end response time
+RESPONSE_STAGE = 'response'
+
+
+def _log_insert_sql(table: str) -> str:
+    columns = _LOG_COLUMNS[table]
+    return f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))})"
+
+
+def _init_rollup_tables(conn: sqlite3.Connection):
+    """Create the rollup tables and backfill them from existing raw rows."""
+    conn.executescript('''
+        CREATE TABLE IF NOT EXISTS analytics_hourly (
+            hour TEXT NOT NULL,
+            dimension TEXT NOT NULL,
+            value TEXT NOT NULL DEFAULT '',
+            count INTEGER NOT NULL DEFAULT 0,
+            total REAL NOT NULL DEFAULT 0,
+            PRIMARY KEY (hour, dimension, value)
+        ) WITHOUT ROWID;
+        CREATE TABLE IF NOT EXISTS analytics_queries_hourly (
+            hour TEXT NOT NULL,
+            query TEXT NOT NULL,
+            count INTEGER NOT NULL DEFAULT 0,
+            confidence_total REAL NOT NULL DEFAULT 0,
+            confidence_count INTEGER NOT NULL DEFAULT 0,
+            time_total REAL NOT NULL DEFAULT 0,
+            time_count INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (hour, query)
+        );
+        CREATE TABLE IF NOT EXISTS analytics_latency_hourly (
+            hour TEXT NOT NULL,
+            stage TEXT NOT NULL,
+            bucket_ms REAL NOT NULL,
+            count INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (hour, stage, bucket_ms)
+        ) WITHOUT ROWID;
+        CREATE TABLE IF NOT EXISTS security_hourly (
+            hour TEXT NOT NULL,
+            escalation_level TEXT NOT NULL,
+            count INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (hour, escalation_level)
+        ) WITHOUT ROWID;
+    ''')
+    raw_tables = {
+        row[0] for row in conn.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'table' AND name IN ('query_analytics', 'security_log')"
+        )
+    }
+    if 'query_analytics' in raw_tables and conn.execute("SELECT 1 FROM analytics_hourly LIMIT 1").fetchone() is None:
+        _backfill_rollups(conn, 'query_analytics', 'created_at')
+    if 'security_log' in raw_tables and conn.execute("SELECT 1 FROM security_hourly LIMIT 1").fetchone() is None:
+        _backfill_rollups(conn, 'security_log', 'timestamp')
+
+
+def _backfill_rollups(conn: sqlite3.Connection, table: str, time_column: str):
+    """Fold every raw row of a log table into the (empty) rollups."""
+    rollup = _Rollup()
+    cursor = conn.execute(
+        f"SELECT {', '.join(_LOG_COLUMNS[table])}, strftime(?, {time_column}) FROM {table}",
+        (_HOUR_FORMAT,)
+    )
+    for row in cursor:
+        rollup.add(table, row[-1], dict(zip(_LOG_COLUMNS[table], row)))
+    rollup.write(conn)
+
+
+def _rollup_log_rows(conn: sqlite3.Connection, rows: List[Tuple[str, str, tuple]]):
+    """Fold freshly inserted (table, sql, params) log rows into the current hour."""
+    rows = [(table, params) for table, _, params in rows if table in _LOG_COLUMNS]
+    if not rows:
+        return  # e.g. a batch of trivia answer counts only
+    hour = time.strftime(_HOUR_FORMAT, time.gmtime())
+    rollup = _Rollup()
+    for table, params in rows:
+        rollup.add(table, hour, dict(zip(_LOG_COLUMNS[table], params)))
+    rollup.write(conn)
+
+
+class _Rollup:
+    """Aggregates for a batch of log rows, written with one upsert per key."""
+
+    def __init__(self):
+        self.metrics: Dict[tuple, List[float]] = {}  # (hour, dimension, value) -> [count, total]
+        self.queries: Dict[tuple, List[float]] = {}  # (hour, query) -> [count, conf total/count, time total/count]
+        self.latency: Counter = Counter()            # (hour, stage, bucket_ms) -> count
+        self.security: Counter = Counter()           # (hour, escalation_level) -> count
+
+    def add(self, table: str, hour: str, row: Dict):
+        if table == 'query_analytics':
+            self._add_query(hour, row)
+        elif table == 'security_log':
+            self.security[(hour, row['escalation_level'] or 'normal')] += 1
+
+    def _metric(self, hour: str, dimension: str, value: str = '', amount: float = 0):
+        entry = self.metrics.setdefault((hour, dimension, value), [0, 0.0])
+        entry[0] += 1
+        entry[1] += amount
+
+    def _add_query(self, hour: str, row: Dict):
+        self._metric(hour, 'queries')
+        if row['was_injection_attempt']:
+            self._metric(hour, 'injection')
+        for dimension, column in (('intent', 'intent'), ('kg_intent', 'kg_intent'), ('club', 'club_detected')):
+            if row[column] is not None:
+                self._metric(hour, dimension, row[column])
+        for column in ('response_time_ms', 'confidence', 'kg_nodes_used', 'kg_edges_traversed'):
+            if row[column] is not None:
+                self._metric(hour, column, amount=row[column])
+        if (row['kg_nodes_used'] or 0) > 0:
+            self._metric(hour, 'kg_queries')
+
+        stats = self.queries.setdefault((hour, row['query']), [0, 0.0, 0, 0.0, 0])
+        stats[0] += 1
+        if row['confidence'] is not None:
+            stats[1] += row['confidence']
+            stats[2] += 1
+        if row['response_time_ms'] is not None:
+            stats[3] += row['response_time_ms']
+            stats[4] += 1
+            self.latency[(hour, RESPONSE_STAGE, sketch_bucket(row['response_time_ms']))] += 1
+
+        if row['stage_timings']:
+            try:
+                timings = json.loads(row['stage_timings'])
+            except (TypeError, ValueError):
+                timings = {}
+            for stage, ms in timings.items():
+                self.latency[(hour, stage, sketch_bucket(ms))] += 1
+
+    def write(self, conn: sqlite3.Connection):
+        conn.executemany('''
+            INSERT INTO analytics_hourly (hour, dimension, value, count, total)
+            VALUES (?, ?, ?, ?, ?)
+            ON CONFLICT (hour, dimension, value) DO UPDATE SET
+                count = count + excluded.count,
+                total = total + excluded.total
+        ''', [(*key, count, total) for key, (count, total) in self.metrics.items()])
+        conn.executemany('''
+            INSERT INTO analytics_queries_hourly
+            (hour, query, count, confidence_total, confidence_count, time_total, time_count)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT (hour, query) DO UPDATE SET
+                count = count + excluded.count,
+                confidence_total = confidence_total + excluded.confidence_total,
+                confidence_count = confidence_count + excluded.confidence_count,
+                time_total = time_total + excluded.time_total,
+                time_count = time_count + excluded.time_count
+        ''', [(*key, *stats) for key, stats in self.queries.items()])
+        conn.executemany('''
+            INSERT INTO analytics_latency_hourly (hour, stage, bucket_ms, count)
+            VALUES (?, ?, ?, ?)
+            ON CONFLICT (hour, stage, bucket_ms) DO UPDATE SET count = count + excluded.count
+        ''', [(*key, count) for key, count in self.latency.items()])
+        conn.executemany('''
+            INSERT INTO security_hourly (hour, escalation_level, count)
+            VALUES (?, ?, ?)
+            ON CONFLICT (hour, escalation_level) DO UPDATE SET count = count + excluded.count
+        ''', [(*key, count) for key, count in self.security.items()])
+
+
+# ============================================
+# WRITE-BEHIND LOGGING
+# ============================================
+
+# Set by start_write_behind(); until then log writes are synchronous
+_log_writer: Optional[WriteBehindQueue] = None
+
+
+def _log_connection() -> sqlite3.Connection:
+    """Connection for the background log writer (resolves the path at connect time)."""
+    return sqlite3.connect(WRITE_DB_PATH if SERVING_MODE else DB_PATH, timeout=10)
+
+
+def start_write_behind():
+    """Batch analytics/security inserts in a background writer from now on."""
+    global _log_writer
+    if _log_writer is None:
+        _log_writer = WriteBehindQueue("logs", _log_connection, on_write=_rollup_log_rows)
+    _log_writer.start()
+
+
+def stop_write_behind():
+    """Flush queued log rows and go back to synchronous writes."""
+    global _log_writer
+    writer, _log_writer = _log_writer, None
+    if writer is not None:
+        writer.stop()
+
+
+def flush_write_behind() -> int:
+    """Write queued log rows now. Returns rows written."""
+    return _log_writer.flush() if _log_writer is not None else 0
+
+
+def get_write_behind_stats() -> Optional[Dict]:
+    return _log_writer.get_stats() if _log_writer is not None else None
+
+
+def _log_insert(table: str, sql: str, params: tuple) -> Optional[int]:
+    """
+    Write a log row (or counter update): queued when write-behind is
+    running (returns None), otherwise written immediately (returns the row
+    id). Either way log rows are folded into the hourly rollups in the
+    same transaction.
+    """
+    writer = _log_writer
+    if writer is not None:
+        writer.enqueue(table, sql, params)
+        return None
+    with get_write_connection() as conn:
+        cursor = conn.execute(sql, params)
+        _rollup_log_rows(conn, [(table, sql, params)])
+        conn.commit()
+        return cursor.lastrowid
+
+
 def log_query(
     query: str,
     intent: str = None,
@@ -1103,135 +1940,107 @@ def log_query(
     response_time_ms: int = None,
     source_count: int = 0,
     confidence: float = None,
-    was_injection_attempt: bool = False
-) -> int:
-    """Log a query for analytics."""
-    with get_connection() as conn:
-        cursor = conn.execute('''
-            INSERT INTO query_analytics
-            (query, intent, kg_intent, club_detected, kg_nodes_used,
-             kg_edges_traversed, response_time_ms, source_count,
-             confidence, was_injection_attempt)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-        ''', (
-            query[:500],  # Truncate long queries
-            intent,
-            kg_intent,
-            club_detected,
-            kg_nodes_used,
-            kg_edges_traversed,
-            response_time_ms,
-            source_count,
-            confidence,
-            1 if was_injection_attempt else 0
-        ))
-        conn.commit()
-        return cursor.lastrowid
+    was_injection_attempt: bool = False,
+    stage_timings: Dict[str, float] = None
+) -> Optional[int]:
+    """
+    Log a query for analytics (stage_timings: stage -> ms from tracing).
+
+    Returns the row id, or None when the row was queued for write-behind.
+    """
+    return _log_insert('query_analytics', _log_insert_sql('query_analytics'), (
+        query[:500],  # Truncate long queries
+        intent,
+        kg_intent,
+        club_detected,
+        kg_nodes_used,
+        kg_edges_traversed,
+        response_time_ms,
+        source_count,
+        confidence,
+        1 if was_injection_attempt else 0,
+        json.dumps(stage_timings, separators=(',', ':')) if stage_timings else None
+    ))
 
 
 def get_analytics_summary(days: int = 7) -> Dict:
-    """Get analytics summary for the last N days."""
-    with get_connection() as conn:
-        # Total queries
-        total = conn.execute('''
-            SELECT COUNT(*) as count FROM query_analytics
-            WHERE created_at >= datetime('now', ?)
-        ''', (f'-{days} days',)).fetchone()['count']
-
-        # Injection attempts
-        injections = conn.execute('''
-            SELECT COUNT(*) as count FROM query_analytics
-            WHERE was_injection_attempt = 1
-            AND created_at >= datetime('now', ?)
-        ''', (f'-{days} days',)).fetchone()['count']
-
-        # By intent
-        intent_stats = {}
-        cursor = conn.execute('''
-            SELECT intent, COUNT(*) as count
-            FROM query_analytics
-            WHERE intent IS NOT NULL
-            AND created_at >= datetime('now', ?)
-            GROUP BY intent
-            ORDER BY count DESC
-        ''', (f'-{days} days',))
-        for row in cursor.fetchall():
-            intent_stats[row['intent']] = row['count']
+    """
+    Get analytics summary for the last N days (whole hours, from the rollups).
 
-        # By KG intent
-        kg_intent_stats = {}
+    Latency percentiles come from the hourly sketches, so they are within
+    5% of the exact values.
+    """
+    window = (_HOUR_FORMAT, f'-{days} days')
+    with get_write_connection() as conn:
+        counts: Dict[str, Dict[str, int]] = {}
+        totals: Dict[str, float] = {}
         cursor = conn.execute('''
-            SELECT kg_intent, COUNT(*) as count
-            FROM query_analytics
-            WHERE kg_intent IS NOT NULL
-            AND created_at >= datetime('now', ?)
-            GROUP BY kg_intent
-            ORDER BY count DESC
-        ''', (f'-{days} days',))
-        for row in cursor.fetchall():
-            kg_intent_stats[row['kg_intent']] = row['count']
-
-        # Most queried clubs
-        club_stats = {}
+            SELECT dimension, value, SUM(count) AS count, SUM(total) AS total
+            FROM analytics_hourly
+            WHERE hour >= strftime(?, 'now', ?)
+            GROUP BY dimension, value
+        ''', window)
+        for row in cursor:
+            counts.setdefault(row['dimension'], {})[row['value']] = row['count']
+            totals[row['dimension']] = totals.get(row['dimension'], 0.0) + row['total']
+
+        latency: Dict[str, Dict[float, int]] = {}
         cursor = conn.execute('''
-            SELECT club_detected, COUNT(*) as count
-            FROM query_analytics
-            WHERE club_detected IS NOT NULL
-            AND created_at >= datetime('now', ?)
-            GROUP BY club_detected
-            ORDER BY count DESC
-            LIMIT 10
-        ''', (f'-{days} days',))
-        for row in cursor.fetchall():
-            club_stats[row['club_detected']] = row['count']
-
-        # Average response time
-        avg_time = conn.execute('''
-            SELECT AVG(response_time_ms) as avg_ms
-            FROM query_analytics
-            WHERE response_time_ms IS NOT NULL
-            AND created_at >= datetime('now', ?)
-        ''', (f'-{days} days',)).fetchone()['avg_ms']
-
-        # Average confidence
-        avg_conf = conn.execute('''
-            SELECT AVG(confidence) as avg_conf
-            FROM query_analytics
-            WHERE confidence IS NOT NULL
-            AND created_at >= datetime('now', ?)
-        ''', (f'-{days} days',)).fetchone()['avg_conf']
-
-        # KG usage stats
-        kg_usage = conn.execute('''
-            SELECT
-                AVG(kg_nodes_used) as avg_nodes,
-                AVG(kg_edges_traversed) as avg_edges,
-                SUM(CASE WHEN kg_nodes_used > 0 THEN 1 ELSE 0 END) as kg_queries
-            FROM query_analytics
-            WHERE created_at >= datetime('now', ?)
-        ''', (f'-{days} days',)).fetchone()
+            SELECT stage, bucket_ms, SUM(count) AS count
+            FROM analytics_latency_hourly
+            WHERE hour >= strftime(?, 'now', ?)
+            GROUP BY stage, bucket_ms
+        ''', window)
+        for row in cursor:
+            latency.setdefault(row['stage'], {})[row['bucket_ms']] = row['count']
+
+    def ranked(dimension: str, limit: int = None) -> Dict[str, int]:
+        items = sorted(counts.get(dimension, {}).items(), key=lambda item: item[1], reverse=True)
+        return dict(items[:limit])
+
+    def count(dimension: str) -> int:
+        return counts.get(dimension, {}).get('', 0)
+
+    def average(dimension: str) -> Optional[float]:
+        n = count(dimension)
+        return totals[dimension] / n if n else None
+
+    total = count('queries')
+    injections = count('injection')
+    avg_time = average('response_time_ms')
+    avg_conf = average('confidence')
+    avg_nodes = average('kg_nodes_used')
+    avg_edges = average('kg_edges_traversed')
+
+    response_sketch = latency.pop(RESPONSE_STAGE, {})
+    stage_latency = {
+        stage: {'count': sum(buckets.values()), **sketch_percentiles(buckets)}
+        for stage, buckets in sorted(latency.items())
+    }
 
-        return {
-            'period_days': days,
-            'total_queries': total,
-            'injection_attempts': injections,
-            'injection_rate': injections / total if total > 0 else 0,
-            'by_intent': intent_stats,
-            'by_kg_intent': kg_intent_stats,
-            'by_club': club_stats,
-            'avg_response_time_ms': round(avg_time, 2) if avg_time else None,
-            'avg_confidence': round(avg_conf, 3) if avg_conf else None,
-            'kg_usage': {
-                'queries_using_kg': kg_usage['kg_queries'] or 0,
-                'avg_nodes_per_query': round(kg_usage['avg_nodes'], 2) if kg_usage['avg_nodes'] else 0,
-                'avg_edges_per_query': round(kg_usage['avg_edges'], 2) if kg_usage['avg_edges'] else 0
-            }
-        }
+    return {
+        'period_days': days,
+        'total_queries': total,
+        'injection_attempts': injections,
+        'injection_rate': injections / total if total > 0 else 0,
+        'by_intent': ranked('intent'),
+        'by_kg_intent': ranked('kg_intent'),
+        'by_club': ranked('club', limit=10),
+        'avg_response_time_ms': round(avg_time, 2) if avg_time else None,
+        'response_time_percentiles_ms': sketch_percentiles(response_sketch),
+        'avg_confidence': round(avg_conf, 3) if avg_conf else None,
+        'kg_usage': {
+            'queries_using_kg': count('kg_queries'),
+            'avg_nodes_per_query': round(avg_nodes, 2) if avg_nodes else 0,
+            'avg_edges_per_query': round(avg_edges, 2) if avg_edges else 0
+        },
+        'stage_latency_ms': stage_latency
+    }
 
 
 def get_recent_queries(limit: int = 20) -> List[Dict]:
     """Get most recent queries for debugging."""
-    with get_connection() as conn:
+    with get_write_connection() as conn:
         cursor = conn.execute('''
             SELECT * FROM query_analytics
             ORDER BY created_at DESC
@@ -1241,20 +2050,20 @@ def get_recent_queries(limit: int = 20) -> List[Dict]:
 
 
 def get_hot_queries(days: int = 7, limit: int = 10) -> List[Dict]:
-    """Get most common query patterns."""
-    with get_connection() as conn:
+    """Get most common query patterns (whole hours, from the rollups)."""
+    with get_write_connection() as conn:
         cursor = conn.execute('''
             SELECT
                 query,
-                COUNT(*) as count,
-                AVG(confidence) as avg_confidence,
-                AVG(response_time_ms) as avg_time_ms
-            FROM query_analytics
-            WHERE created_at >= datetime('now', ?)
+                SUM(count) as count,
+                SUM(confidence_total) / NULLIF(SUM(confidence_count), 0) as avg_confidence,
+                SUM(time_total) / NULLIF(SUM(time_count), 0) as avg_time_ms
+            FROM analytics_queries_hourly
+            WHERE hour >= strftime(?, 'now', ?)
             GROUP BY query
             ORDER BY count DESC
             LIMIT ?
-        ''', (f'-{days} days', limit))
+        ''', (_HOUR_FORMAT, f'-{days} days', limit))
         return [dict_from_row(row) for row in cursor.fetchall()]
 
 
@@ -1570,7 +2379,7 @@ def get_gap_summary() -> Dict:
 
 def init_security_tables():
     """Initialize security tables."""
-    with get_connection() as conn:
+    with get_write_connection() as conn:
         conn.execute('''
             CREATE TABLE IF NOT EXISTS session_state (
                 session_id TEXT PRIMARY KEY,
@@ -1593,12 +2402,13 @@ def init_security_tables():
                 response_type TEXT
             )
         ''')
+        _init_rollup_tables(conn)
         conn.commit()
 
 
 def get_session_state(session_id: str) -> Optional[Dict]:
     """Get security session state."""
-    with get_connection() as conn:
+    with get_write_connection() as conn:
         cursor = conn.execute(
             "SELECT * FROM session_state WHERE session_id = ?",
             (session_id,)
@@ -1608,7 +2418,7 @@ def get_session_state(session_id: str) -> Optional[Dict]:
 
 def create_session_state(session_id: str) -> Dict:
     """Create new session state."""
-    with get_connection() as conn:
+    with get_write_connection() as conn:
         conn.execute('''
             INSERT OR REPLACE INTO session_state
             (session_id, state, injection_count, clean_query_count, created_at, last_activity)
@@ -1625,7 +2435,7 @@ def update_session_state(
     clean_query_count: int = None
 ):
     """Update session state."""
-    with get_connection() as conn:
+    with get_write_connection() as conn:
         updates = ["last_activity = CURRENT_TIMESTAMP"]
         params = []
 
@@ -1651,38 +2461,30 @@ def update_session_state(
 def log_security_event(
     session_id: str,
     attempt_number: int,
-    query_hash: str,
     pattern_matched: str,
     escalation_level: str,
-    response_type: str
+    response_type: str,
+    query_hash: str = None
 ):
-    """Log a security event."""
-    with get_connection() as conn:
-        conn.execute('''
-            INSERT INTO security_log
-            (session_id, attempt_number, query_hash, pattern_matched, escalation_level, response_type)
-            VALUES (?, ?, ?, ?, ?, ?)
-        ''', (session_id, attempt_number, query_hash, pattern_matched, escalation_level, response_type))
-        conn.commit()
+    """Log a security event (queued when write-behind is running)."""
+    _log_insert('security_log', _log_insert_sql('security_log'), (
+        session_id, attempt_number, query_hash, pattern_matched, escalation_level, response_type
+    ))
 
 
 def get_security_metrics(days: int = 7) -> Dict:
-    """Get security metrics."""
-    with get_connection() as conn:
-        total_attempts = conn.execute('''
-            SELECT COUNT(*) as count FROM security_log
-            WHERE timestamp >= datetime('now', ?)
-        ''', (f'-{days} days',)).fetchone()['count']
-
+    """Get security metrics (event counts from the hourly rollups)."""
+    with get_write_connection() as conn:
         by_level = {}
         cursor = conn.execute('''
-            SELECT escalation_level, COUNT(*) as count
-            FROM security_log
-            WHERE timestamp >= datetime('now', ?)
+            SELECT escalation_level, SUM(count) as count
+            FROM security_hourly
+            WHERE hour >= strftime(?, 'now', ?)
             GROUP BY escalation_level
-        ''', (f'-{days} days',))
+        ''', (_HOUR_FORMAT, f'-{days} days'))
         for row in cursor.fetchall():
-            by_level[row['escalation_level'] or 'normal'] = row['count']
+            by_level[row['escalation_level']] = row['count']
+        total_attempts = sum(by_level.values())
 
         active_sessions = conn.execute('''
             SELECT COUNT(*) as count FROM session_state
@@ -1719,7 +2521,10 @@ def update_mood_after_match(
     Derby W = +0.4
     Rival L = +0.1
     Clamped to 0.1-1.0
+
+    Raises ReadOnlyError in serving mode.
     """
+    _require_build_side("Updating club mood")
     with get_connection() as conn:
         # Get current mood
         cursor = conn.execute(
@@ -1766,15 +2571,266 @@ def update_mood_after_match(
         ''', (new_mood, new_intensity, team_id))
         conn.commit()
 
-        return get_club_mood(team_id)
+    bump_data_generation()
+    rebuild_persona_documents([team_id])
+    return get_club_mood(team_id)
+
+
+# ============================================
+# DATA GENERATION (Cache invalidation)
+# ============================================
+
+# How often other workers' bumps and new match_history rows are noticed
+GENERATION_REFRESH_SECONDS = 2.0
+
+_generation_lock = threading.Lock()
+_generation_cache = {"value": None, "checked_at": 0.0, "bumps": 0}
+
+
+def init_data_generation():
+    """Initialize the shared data generation counter."""
+    with get_write_connection() as conn:
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS data_generation (
+                id INTEGER PRIMARY KEY CHECK (id = 1),
+                generation INTEGER NOT NULL DEFAULT 0,
+                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        ''')
+        conn.execute("INSERT OR IGNORE INTO data_generation (id, generation) VALUES (1, 0)")
+        conn.commit()
+
+
+def bump_data_generation():
+    """Mark match/mood data as changed so cached answers are invalidated (call after commit)."""
+    try:
+        with get_write_connection() as conn:
+            conn.execute('''
+                UPDATE data_generation
+                SET generation = generation + 1, updated_at = CURRENT_TIMESTAMP
+                WHERE id = 1
+            ''')
+            conn.commit()
+    except sqlite3.OperationalError:
+        pass  # Table not initialized (e.g. seed scripts) - local reset still applies
+
+    with _generation_lock:
+        _generation_cache["checked_at"] = 0.0  # Force re-read on next lookup
+        _generation_cache["bumps"] += 1
+
+
+def _match_history_watermark() -> int:
+    """Highest match_history rowid - grows whenever new results are loaded."""
+    try:
+        conn = sqlite3.connect(sqlite_pool.readonly_uri(ARCHITECTURE_DB_PATH), uri=True)
+        try:
+            row = conn.execute("SELECT MAX(rowid) FROM match_history").fetchone()
+            return row[0] or 0
+        finally:
+            conn.close()
+    except sqlite3.Error:
+        return 0
+
+
+def get_data_generation() -> str:
+    """
+    Current data generation token, e.g. "12.48213".
+
+    Combines the write counter with the match_history watermark. Re-read at
+    most every GENERATION_REFRESH_SECONDS (immediately after a local bump).
+    """
+    now = time.monotonic()
+    with _generation_lock:
+        if (_generation_cache["value"] is not None
+                and now - _generation_cache["checked_at"] < GENERATION_REFRESH_SECONDS):
+            return _generation_cache["value"]
+        bumps_before = _generation_cache["bumps"]
+
+    generation = 0
+    try:
+        with get_write_connection() as conn:
+            row = conn.execute("SELECT generation FROM data_generation WHERE id = 1").fetchone()
+            generation = row['generation'] if row else 0
+    except sqlite3.OperationalError:
+        pass
+
+    value = f"{generation}.{_match_history_watermark()}"
+    with _generation_lock:
+        # Don't cache a value read before a concurrent local bump
+        if _generation_cache["bumps"] == bumps_before:
+            _generation_cache["value"] = value
+            _generation_cache["checked_at"] = now
+    return value
+
+
+# ============================================
+# REFERENCE DB INDEXES (match_history / elo_history)
+# ============================================
+
+# (index name, table, columns) - covering where the query reads few columns
+REFERENCE_INDEXES = [
+    # Poisson strengths, HybridOracle recent matches, PatternExtractor E0 scans:
+    # division filter + match_date range/order, result columns read from the index
+    ("idx_mh_division_date", "match_history",
+     ("division", "match_date", "home_team", "away_team", "ft_home", "ft_away", "ft_result")),
+    # Head-to-head / derby pairs and "home_team = ?" (mood form), newest first;
+    # the score columns also make LIKE-based pair scans index-only
+    ("idx_mh_home_away_date", "match_history",
+     ("home_team", "away_team", "match_date", "ft_home", "ft_away", "ft_result")),
+    # "away_team = ?" side of the same OR filters
+    ("idx_mh_away_home_date", "match_history",
+     ("away_team", "home_team", "match_date", "ft_home", "ft_away", "ft_result")),
+    # Same access paths by canonical team id (team_identity)
+    ("idx_mh_home_id_away_id_date", "match_history", ("home_team_id", "away_team_id", "match_date")),
+    ("idx_mh_away_id_home_id_date", "match_history", ("away_team_id", "home_team_id", "match_date")),
+    # ELO trajectories and golden-era scans (club, date order), covering elo
+    ("idx_elo_club_date", "elo_history", ("club", "date", "elo")),
+]
+
+
+def ensure_reference_indexes(db_path: Path = None) -> Dict[str, List[str]]:
+    """
+    Create the managed match_history / elo_history indexes if missing.
+
+    Also brings the reference DB's derived columns up to date first: the
+    month_day key and the team_identity ids on match_history.
+
+    Idempotent - safe to run at every startup. Indexes whose table or
+    columns don't exist in this database are skipped. Returns the index
+    names by outcome: created, existing, skipped.
+    """
+    db_path = Path(db_path or ARCHITECTURE_DB_PATH)
+    result = {"created": [], "existing": [], "skipped": []}
+    if not db_path.exists():
+        result["skipped"] = [name for name, _, _ in REFERENCE_INDEXES]
+        return result
+
+    conn = sqlite3.connect(db_path, timeout=30)
+    try:
+        # "On this day" key: generated column, indexed below
+        ensure_month_day_column(conn, "match_history", "match_date")
+        # Canonical team ids (backfills only rows that don't have one yet)
+        identity = sync_team_identity(conn)
+        if identity["rows_backfilled"]:
+            print(f"[DB] Team ids: {identity['new_teams']} new clubs, {identity['rows_backfilled']} match sides backfilled")
+        existing = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'index'")}
+        columns_by_table: Dict[str, set] = {}
+        for name, table, columns in REFERENCE_INDEXES:
+            if name in existing:
+                result["existing"].append(name)
+                continue
+            if table not in columns_by_table:
+                columns_by_table[table] = {row[1] for row in conn.execute(f"PRAGMA table_info({table})")}
+            if not set(columns) <= columns_by_table[table]:
+                result["skipped"].append(name)
+                continue
+            conn.execute(f"CREATE INDEX IF NOT EXISTS {name} ON {table} ({', '.join(columns)})")
+            result["created"].append(name)
+        if result["created"]:
+            # Give the planner statistics for the new indexes
+            for table in {table for name, table, _ in REFERENCE_INDEXES if name in result["created"]}:
+                conn.execute(f"ANALYZE {table}")
+        conn.commit()
+    finally:
+        conn.close()
+
+    if result["created"]:
+        print(f"[DB] Created reference indexes: {', '.join(result['created'])}")
+    return result
+
+
+def prepare_for_serving():
+    """
+    Build-side step before files are shipped to serving nodes: apply the
+    derived columns and indexes, materialise the persona documents, then
+    freeze the main and reference databases for immutable readers
+    (sqlite_pool.freeze).
+    """
+    init_calendar_index()
+    ensure_pagination_indexes()
+    init_trivia_table()  # trivia_version counter + triggers
+    init_persona_documents()
+    rebuild_persona_documents()
+    if ARCHITECTURE_DB_PATH.exists():
+        ensure_reference_indexes()
+    sqlite_pool.close_all()  # Our own connections must not hold the WAL open
+    for path in (DB_PATH, ARCHITECTURE_DB_PATH):
+        if Path(path).exists():
+            sqlite_pool.freeze(path)
+            print(f"[DB] Frozen for serving: {path}")
 
 
 # ============================================
 # TRIVIA SYSTEM
 # ============================================
 
+def _load_trivia_pool_rows() -> List[tuple]:
+    with get_connection() as conn:
+        return [tuple(row) for row in conn.execute(
+            "SELECT id, team_id, category, difficulty FROM trivia_questions"
+        )]
+
+
+_trivia_version_lock = threading.Lock()
+_trivia_version_cache = {"value": None, "checked_at": 0.0, "bumps": 0}
+
+
+def _trivia_version() -> int:
+    """
+    Pool version for the trivia sampler: the trivia_version counter, bumped
+    by triggers whenever trivia_questions gains, loses or re-files a row
+    (whichever process made the write). Separate from the data generation,
+    so new questions don't flush the LLM answer, persona or on-this-day
+    caches. Re-read at most every GENERATION_REFRESH_SECONDS (immediately
+    after a local change), so a draw costs no extra query.
+    """
+    now = time.monotonic()
+    with _trivia_version_lock:
+        if (_trivia_version_cache["value"] is not None
+                and now - _trivia_version_cache["checked_at"] < GENERATION_REFRESH_SECONDS):
+            return _trivia_version_cache["value"]
+        bumps_before = _trivia_version_cache["bumps"]
+
+    version = 0
+    try:
+        with get_connection() as conn:
+            row = conn.execute("SELECT version FROM trivia_version WHERE id = 1").fetchone()
+            version = row['version'] if row else 0
+    except sqlite3.OperationalError:
+        pass  # Prepared before the counter existed: pools built once
+
+    with _trivia_version_lock:
+        if _trivia_version_cache["bumps"] == bumps_before:
+            _trivia_version_cache["value"] = version
+            _trivia_version_cache["checked_at"] = now
+    return version
+
+
+def _trivia_changed():
+    """Re-read the trivia version on the next draw (after a local write)."""
+    with _trivia_version_lock:
+        _trivia_version_cache["checked_at"] = 0.0
+        _trivia_version_cache["bumps"] += 1
+
+
+# Id pools per (team, category, difficulty) + per-session decks
+_trivia_sampler = TriviaSampler("trivia_decks", _load_trivia_pool_rows)
+
+
 def init_trivia_table():
-    """Initialize trivia table."""
+    """Initialize trivia table (in serving mode: the answer stats table in the write DB)."""
+    if SERVING_MODE:
+        with get_write_connection() as conn:
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS trivia_answer_stats (
+                    question_id INTEGER PRIMARY KEY,
+                    times_asked INTEGER NOT NULL DEFAULT 0,
+                    times_correct INTEGER NOT NULL DEFAULT 0
+                )
+            ''')
+            conn.commit()
+        return
+
     with get_connection() as conn:
         conn.execute('''
             CREATE TABLE IF NOT EXISTS trivia_questions (
@@ -1791,6 +2847,21 @@ def init_trivia_table():
                 created_at DATETIME DEFAULT CURRENT_TIMESTAMP
             )
         ''')
+        # Pool version for the sampler (see _trivia_version)
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS trivia_version (
+                id INTEGER PRIMARY KEY CHECK (id = 1),
+                version INTEGER NOT NULL DEFAULT 0
+            )
+        ''')
+        conn.execute("INSERT OR IGNORE INTO trivia_version (id, version) VALUES (1, 0)")
+        for event in ("INSERT", "DELETE", "UPDATE OF team_id, category, difficulty"):
+            conn.execute(f'''
+                CREATE TRIGGER IF NOT EXISTS trivia_questions_version_{event.split()[0].lower()}
+                AFTER {event} ON trivia_questions BEGIN
+                    UPDATE trivia_version SET version = version + 1 WHERE id = 1;
+                END
+            ''')
         conn.commit()
 
 
@@ -1803,7 +2874,8 @@ def add_trivia_question(
     difficulty: str = 'medium',
     explanation: str = None
 ) -> int:
-    """Add a trivia question."""
+    """Add a trivia question. Raises ReadOnlyError in serving mode."""
+    _require_build_side("Adding trivia questions")
     with get_connection() as conn:
         cursor = conn.execute('''
             INSERT INTO trivia_questions
@@ -1811,39 +2883,39 @@ def add_trivia_question(
             VALUES (?, ?, ?, ?, ?, ?, ?)
         ''', (team_id, category, difficulty, question, correct_answer, json.dumps(wrong_answers), explanation))
         conn.commit()
-        return cursor.lastrowid
+    _trivia_sampler.invalidate()
+    _trivia_changed()  # Other workers see the trigger's trivia_version bump
+    return cursor.lastrowid
 
 
 def get_trivia_question(
     team_id: int = None,
     category: str = None,
-    difficulty: str = None
+    difficulty: str = None,
+    session_id: str = None
 ) -> Optional[Dict]:
-    """Get a random trivia question."""
-    with get_connection() as conn:
-        query = "SELECT * FROM trivia_questions WHERE 1=1"
-        params = []
-
-        if team_id:
-            query += " AND team_id = ?"
-            params.append(team_id)
-        if category:
-            query += " AND category = ?"
-            params.append(category)
-        if difficulty:
-            query += " AND difficulty = ?"
-            params.append(difficulty)
-
-        query += " ORDER BY RANDOM() LIMIT 1"
+    """
+    Get a random trivia question.
 
-        cursor = conn.execute(query, params)
-        row = cursor.fetchone()
+    Drawn from the precomputed id pool for the filters, then fetched by
+    primary key. With a session_id, questions don't repeat until every
+    matching question has been asked in that session.
+    """
+    key = pool_key(team_id, category, difficulty)
+    for _ in range(2):
+        question_id = _trivia_sampler.draw(key, _trivia_version(), session_id)
+        if question_id is None:
+            return None
+        with get_connection() as conn:
+            row = conn.execute("SELECT * FROM trivia_questions WHERE id = ?", (question_id,)).fetchone()
         if row:
             result = dict_from_row(row)
             if result.get('wrong_answers'):
                 result['wrong_answers'] = json.loads(result['wrong_answers'])
             return result
-        return None
+        _trivia_sampler.invalidate()  # Deleted since the pools were built
+        _trivia_changed()
+    return None
 
 
 def check_trivia_answer(question_id: int, answer: str) -> Dict:
@@ -1858,23 +2930,42 @@ def check_trivia_answer(question_id: int, answer: str) -> Dict:
             return {"error": "Question not found"}
 
         is_correct = answer.lower().strip() == question['correct_answer'].lower().strip()
-
-        # Update stats
-        conn.execute('''
-            UPDATE trivia_questions
-            SET times_asked = times_asked + 1,
-                times_correct = times_correct + ?
-            WHERE id = ?
-        ''', (1 if is_correct else 0, question_id))
-        conn.commit()
-
-        return {
+        result = {
             "correct": is_correct,
             "correct_answer": question['correct_answer'],
             "explanation": question['explanation'],
             "your_answer": answer
         }
 
+    _record_trivia_answer(question_id, is_correct)
+    return result
+
+
+def _record_trivia_answer(question_id: int, is_correct: bool):
+    """
+    Count an answer: on the question row, or in trivia_answer_stats when
+    serving. Queued with the log rows while write-behind is running, so
+    answers are committed in batches rather than one transaction each.
+    """
+    if SERVING_MODE:
+        sql = '''
+            INSERT INTO trivia_answer_stats (question_id, times_asked, times_correct)
+            VALUES (?, 1, ?)
+            ON CONFLICT(question_id) DO UPDATE SET
+                times_asked = times_asked + 1,
+                times_correct = times_correct + excluded.times_correct
+        '''
+        params = (question_id, 1 if is_correct else 0)
+    else:
+        sql = '''
+            UPDATE trivia_questions
+            SET times_asked = times_asked + 1,
+                times_correct = times_correct + ?
+            WHERE id = ?
+        '''
+        params = (1 if is_correct else 0, question_id)
+    _log_insert('trivia_answer_stats' if SERVING_MODE else 'trivia_questions', sql, params)
+
 
 def get_trivia_stats(team_id: int = None) -> Dict:
     """Get trivia statistics."""
@@ -1918,6 +3009,17 @@ def get_trivia_stats(team_id: int = None) -> Dict:
 # ON THIS DAY FEATURE
 # ============================================
 
+# Moments per MM-DD, until the data generation changes
+_moments_on_this_day_cache = DayCache("on_this_day_moments")
+
+
+def init_calendar_index():
+    """Add the indexed month_day key to club_moments (idempotent)."""
+    with get_connection() as conn:
+        ensure_month_day_column(conn, "club_moments", "date")
+        conn.commit()
+
+
 def get_moments_on_this_day(month_day: str = None) -> List[Dict]:
     """
     Get club moments that happened on this day in history.
@@ -1927,19 +3029,28 @@ def get_moments_on_this_day(month_day: str = None) -> List[Dict]:
     if month_day is None:
         month_day = datetime.now().strftime("%m-%d")
 
-    with get_connection() as conn:
-        # Match moments where date contains the month-day
-        cursor = conn.execute('''
-            SELECT cm.*, t.name as team_name
-            FROM club_moments cm
-            JOIN teams t ON cm.team_id = t.id
-            WHERE substr(cm.date, 6, 5) = ?
-            ORDER BY cm.date DESC
-        ''', (month_day,))
-        return [dict_from_row(row) for row in cursor.fetchall()]
+    def load():
+        with get_connection() as conn:
+            # Index seek on month_day once init_calendar_index() has run
+            cursor = conn.execute(f'''
+                SELECT cm.*, t.name as team_name
+                FROM club_moments cm
+                JOIN teams t ON cm.team_id = t.id
+                WHERE {month_day_filter(conn, "club_moments", "date", alias="cm")}
+                ORDER BY cm.date DESC
+            ''', (month_day,))
+            return [dict_from_row(row) for row in cursor.fetchall()]
+
+    moments = _moments_on_this_day_cache.get_or_compute(month_day, get_data_generation(), load)
+    return [dict(moment) for moment in moments]
 
 
 if __name__ == "__main__":
-    # Initialize database when run directly
-    init_db()
-    print("Database stats:", get_db_stats())
+    import sys
+
+    if "--prepare-serving" in sys.argv:
+        prepare_for_serving()
+    else:
+        # Initialize database when run directly
+        init_db()
+        print("Database stats:", get_db_stats())
@@ -5,7 +5,8 @@ Fan Enhancements Module
 - Local dialect injection
 """
 
-import sqlite3
+import sqlite_pool
+from team_identity import resolve
 from typing import Dict, List, Optional, Tuple
 from datetime import datetime, timedelta
 
@@ -45,28 +46,10 @@ DB_PATH = _find_database()
 # TEAM NAME NORMALIZATION
 # ============================================
 
-CLUB_TO_DB_NAME = {
-    "arsenal": "Arsenal",
-    "chelsea": "Chelsea",
-    "manchester_united": "Man United",
-    "manchester_city": "Man City",
-    "liverpool": "Liverpool",
-    "tottenham": "Tottenham",
-    "newcastle": "Newcastle",
-    "west_ham": "West Ham",
-    "everton": "Everton",
-    "brighton": "Brighton",
-    "aston_villa": "Aston Villa",
-    "wolves": "Wolves",
-    "crystal_palace": "Crystal Palace",
-    "fulham": "Fulham",
-    "nottingham_forest": "Nott'm Forest",
-    "brentford": "Brentford",
-    "bournemouth": "Bournemouth",
-    "leicester": "Leicester",
-}
-
-DB_NAME_TO_CLUB = {v: k for k, v in CLUB_TO_DB_NAME.items()}
+def _history_name(club: str) -> Optional[str]:
+    """match_history name for a club ("manchester_united" -> "Man United")."""
+    team = resolve(club)
+    return team.history_name if team else None
 
 
 # ============================================
@@ -242,7 +225,7 @@ def calculate_mood_from_results(club: str, num_matches: int = 5) -> Dict:
     Returns:
         Dict with mood state, intensity, reason, and form string
     """
-    db_team = CLUB_TO_DB_NAME.get(club)
+    db_team = _history_name(club)
     if not db_team:
         return {
             "current_mood": "neutral",
@@ -252,27 +235,29 @@ def calculate_mood_from_results(club: str, num_matches: int = 5) -> Dict:
         }
 
     try:
-        conn = sqlite3.connect(DB_PATH)
-        cursor = conn.cursor()
-
-        # Get recent matches for this team
-        cursor.execute('''
-            SELECT
-                match_date,
-                home_team,
-                away_team,
-                ft_home,
-                ft_away,
-                ft_result
-            FROM match_history
-            WHERE (home_team = ? OR away_team = ?)
-                AND division = 'E0'
-            ORDER BY match_date DESC
-            LIMIT ?
-        ''', (db_team, db_team, num_matches))
-
-        matches = cursor.fetchall()
-        conn.close()
+        conn = sqlite_pool.acquire(DB_PATH, readonly=True)
+        try:
+            cursor = conn.cursor()
+
+            # Get recent matches for this team
+            cursor.execute('''
+                SELECT
+                    match_date,
+                    home_team,
+                    away_team,
+                    ft_home,
+                    ft_away,
+                    ft_result
+                FROM match_history
+                WHERE (home_team = ? OR away_team = ?)
+                    AND division = 'E0'
+                ORDER BY match_date DESC
+                LIMIT ?
+            ''', (db_team, db_team, num_matches))
+
+            matches = cursor.fetchall()
+        finally:
+            conn.close()
 
         if not matches:
             return {
@@ -397,7 +382,7 @@ def detect_rivalry(club: str, message: str) -> Optional[Dict]:
     # Check for each rival
     for rival_key, rival_data in club_rivals.items():
         # Get display name from DB mapping
-        rival_display = CLUB_TO_DB_NAME.get(rival_key, rival_key).lower()
+        rival_display = (_history_name(rival_key) or rival_key).lower()
 
         # Check various forms of the rival name
         rival_patterns = [
@@ -429,7 +414,7 @@ def detect_rivalry(club: str, message: str) -> Optional[Dict]:
             if pattern in message_lower:
                 return {
                     "rival": rival_key,
-                    "rival_display": CLUB_TO_DB_NAME.get(rival_key, rival_key.title()),
+                    "rival_display": _history_name(rival_key) or rival_key.title(),
                     "intensity": rival_data["intensity"],
                     "derby_name": rival_data["name"],
                     "banter": rival_data["banter"]
@@ -17,6 +17,11 @@ from typing import Dict, List, Optional
 from datetime import datetime, timedelta
 from pathlib import Path
 
+try:
+    from metrics import cache_lookup, UPSTREAM_ERRORS
+except ImportError:  # Imported as backend.football_api
+    from backend.metrics import cache_lookup, UPSTREAM_ERRORS
+
 
 class FootballDataAPI:
     """
@@ -54,7 +59,9 @@ class FootballDataAPI:
         if cache_key in self._cache:
             cached_time, cached_data = self._cache[cache_key]
             if now - cached_time < self._cache_ttl:
+                cache_lookup("football_api", hit=True)
                 return cached_data
+        cache_lookup("football_api", hit=False)
 
         url = f"{self.BASE_URL}{endpoint}"
         req = urllib.request.Request(url, headers=self.headers)
@@ -65,10 +72,12 @@ class FootballDataAPI:
                 self._cache[cache_key] = (now, data)
                 return data
         except urllib.error.HTTPError as e:
+            UPSTREAM_ERRORS.inc(upstream="football_data", reason=f"http_{e.code}")
             if e.code == 429:
                 raise Exception("API rate limit exceeded. Wait before retrying.")
             raise Exception(f"API error: {e.code} - {e.reason}")
         except urllib.error.URLError as e:
+            UPSTREAM_ERRORS.inc(upstream="football_data", reason="network")
             raise Exception(f"Network error: {e.reason}")
 
     def get_standings(self, competition: str = "PL") -> Dict:
@@ -0,0 +1,282 @@
+"""
+Soccer-AI HTTP Connection Pool
+Keep-alive HTTP(S) connections shared by the blocking and streaming LLM paths,
+so a chat turn reuses an open TCP/TLS session instead of handshaking again.
+"""
+
+import os
+import ssl
+import time
+import threading
+import http.client
+from collections import deque
+from contextlib import contextmanager
+from typing import Dict, Optional, Tuple
+from urllib.parse import urlsplit
+
+from metrics import cache_lookup
+
+# ============================================
+# CONFIGURATION
+# ============================================
+
+# Idle connections kept open across all hosts
+POOL_MAX_SIZE = int(os.getenv("LLM_POOL_MAX_SIZE", "32"))
+
+# Concurrent connections allowed to any single host
+POOL_MAX_PER_HOST = int(os.getenv("LLM_POOL_MAX_PER_HOST", "16"))
+
+# Idle connections older than this are closed instead of reused (seconds)
+POOL_IDLE_TIMEOUT = float(os.getenv("LLM_POOL_IDLE_TIMEOUT", "60"))
+
+# How long a caller waits for a per-host slot before giving up (seconds)
+POOL_ACQUIRE_TIMEOUT = float(os.getenv("LLM_POOL_ACQUIRE_TIMEOUT", "30"))
+
+# Errors that mean a reused keep-alive socket was already dead
+_STALE_ERRORS = (
+    http.client.RemoteDisconnected,
+    http.client.BadStatusLine,
+    ConnectionResetError,
+    BrokenPipeError,
+    ConnectionAbortedError,
+)
+
+HostKey = Tuple[str, str, int]
+
+
+class PoolTimeout(Exception):
+    """No per-host connection slot became free in time."""
+    pass
+
+
+# ============================================
+# CONNECTION POOL
+# ============================================
+
+class ConnectionPool:
+    """
+    Thread-safe keep-alive connection pool.
+
+    Connections are checked out per request with open(); they return to the
+    idle list only when the response was read to the end and the server did
+    not ask to close, otherwise they are discarded.
+    """
+
+    def __init__(
+        self,
+        max_size: int = POOL_MAX_SIZE,
+        max_per_host: int = POOL_MAX_PER_HOST,
+        idle_timeout: float = POOL_IDLE_TIMEOUT,
+        acquire_timeout: float = POOL_ACQUIRE_TIMEOUT,
+        ssl_context: Optional[ssl.SSLContext] = None
+    ):
+        self.max_size = max_size
+        self.max_per_host = max_per_host
+        self.idle_timeout = idle_timeout
+        self.acquire_timeout = acquire_timeout
+        # One TLS context for every connection (loads CA store once)
+        self.ssl_context = ssl_context or ssl.create_default_context()
+
+        self._lock = threading.Lock()
+        self._idle: Dict[HostKey, deque] = {}
+        self._idle_count = 0
+        self._slots: Dict[HostKey, threading.BoundedSemaphore] = {}
+        self._in_use: Dict[HostKey, int] = {}
+        self._stats = {
+            "requests": 0,
+            "hits": 0,
+            "misses": 0,
+            "stale_retries": 0,
+            "released": 0,
+            "discarded": 0,
+            "expired": 0,
+            "slot_waits": 0,
+            "slot_timeouts": 0,
+        }
+
+    # ---------- internals ----------
+
+    @staticmethod
+    def _split(url: str) -> Tuple[HostKey, str]:
+        parts = urlsplit(url)
+        scheme = parts.scheme or "https"
+        port = parts.port or (443 if scheme == "https" else 80)
+        path = parts.path or "/"
+        if parts.query:
+            path += "?" + parts.query
+        return (scheme, parts.hostname, port), path
+
+    def _slot(self, key: HostKey) -> threading.BoundedSemaphore:
+        with self._lock:
+            slot = self._slots.get(key)
+            if slot is None:
+                slot = threading.BoundedSemaphore(self.max_per_host)
+                self._slots[key] = slot
+            return slot
+
+    def _count(self, name: str, delta: int = 1):
+        with self._lock:
+            self._stats[name] += delta
+
+    def _new_connection(self, key: HostKey, timeout: float) -> http.client.HTTPConnection:
+        scheme, host, port = key
+        if scheme == "https":
+            return http.client.HTTPSConnection(host, port, timeout=timeout, context=self.ssl_context)
+        return http.client.HTTPConnection(host, port, timeout=timeout)
+
+    def _checkout(self, key: HostKey, timeout: float) -> Tuple[http.client.HTTPConnection, bool]:
+        """Return (connection, reused) - an idle one if fresh enough, else a new one."""
+        now = time.monotonic()
+        stale = []
+        conn = None
+        with self._lock:
+            idle = self._idle.get(key)
+            while idle:
+                candidate, last_used = idle.pop()  # LIFO: warmest socket first
+                self._idle_count -= 1
+                if now - last_used > self.idle_timeout or candidate.sock is None:
+                    stale.append(candidate)
+                    continue
+                conn = candidate
+                break
+            self._stats["expired"] += len(stale)
+            self._stats["hits" if conn is not None else "misses"] += 1
+            self._in_use[key] = self._in_use.get(key, 0) + 1
+
+        for old in stale:
+            old.close()
+        cache_lookup("llm_pool", hit=conn is not None)
+
+        if conn is None:
+            return self._new_connection(key, timeout), False
+
+        conn.timeout = timeout
+        if conn.sock is not None:
+            conn.sock.settimeout(timeout)
+        return conn, True
+
+    def _checkin(self, key: HostKey, conn: http.client.HTTPConnection, reusable: bool):
+        with self._lock:
+            self._in_use[key] = self._in_use.get(key, 1) - 1
+            if reusable and conn.sock is not None and self._idle_count < self.max_size:
+                self._idle.setdefault(key, deque()).append((conn, time.monotonic()))
+                self._idle_count += 1
+                self._stats["released"] += 1
+                return
+            self._stats["discarded"] += 1
+        conn.close()
+
+    # ---------- public API ----------
+
+    @contextmanager
+    def open(
+        self,
+        method: str,
+        url: str,
+        body: Optional[bytes] = None,
+        headers: Optional[Dict[str, str]] = None,
+        timeout: float = 30
+    ):
+        """
+        Send a request on a pooled connection.
+
+        Yields (connection, response). Read the response fully for the
+        connection to be kept alive; closing the connection from another
+        thread (e.g. to cancel a stream) simply discards it.
+        """
+        key, path = self._split(url)
+        slot = self._slot(key)
+
+        if not slot.acquire(blocking=False):
+            self._count("slot_waits")
+            if not slot.acquire(timeout=self.acquire_timeout):
+                self._count("slot_timeouts")
+                raise PoolTimeout(f"No free connection to {key[1]}:{key[2]} after {self.acquire_timeout}s")
+
+        self._count("requests")
+        try:
+            conn, reused = self._checkout(key, timeout)
+            try:
+                conn.request(method, path, body=body, headers=headers or {})
+                response = conn.getresponse()
+            except _STALE_ERRORS:
+                if not reused:
+                    self._checkin(key, conn, reusable=False)
+                    raise
+                # Server closed the idle socket under us - retry once on a fresh one
+                self._count("stale_retries")
+                conn.close()
+                conn = self._new_connection(key, timeout)
+                try:
+                    conn.request(method, path, body=body, headers=headers or {})
+                    response = conn.getresponse()
+                except BaseException:
+                    self._checkin(key, conn, reusable=False)
+                    raise
+            except BaseException:
+                self._checkin(key, conn, reusable=False)
+                raise
+
+            reusable = False
+            try:
+                yield conn, response
+                reusable = response.isclosed() and not response.will_close
+            finally:
+                self._checkin(key, conn, reusable)
+        finally:
+            slot.release()
+
+    def request(
+        self,
+        method: str,
+        url: str,
+        body: Optional[bytes] = None,
+        headers: Optional[Dict[str, str]] = None,
+        timeout: float = 30
+    ) -> Tuple[int, bytes]:
+        """Send a request and read the whole body. Returns (status, body)."""
+        with self.open(method, url, body=body, headers=headers, timeout=timeout) as (conn, response):
+            return response.status, response.read()
+
+    def close_all(self):
+        """Close every idle connection (in-flight ones are discarded on return)."""
+        with self._lock:
+            idle = [conn for entries in self._idle.values() for conn, _ in entries]
+            self._idle.clear()
+            self._idle_count = 0
+        for conn in idle:
+            conn.close()
+
+    def get_stats(self) -> Dict:
+        """Pool hit/miss counters plus current idle and in-use connections."""
+        with self._lock:
+            stats = dict(self._stats)
+            stats["idle"] = self._idle_count
+            stats["in_use"] = sum(self._in_use.values())
+            stats["per_host"] = {
+                f"{host}:{port}": {
+                    "idle": len(self._idle.get((scheme, host, port), ())),
+                    "in_use": self._in_use.get((scheme, host, port), 0),
+                }
+                for (scheme, host, port) in self._slots
+            }
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_rate"] = round(stats["hits"] / lookups, 3) if lookups else 0.0
+        stats["max_size"] = self.max_size
+        stats["max_per_host"] = self.max_per_host
+        return stats
+
+
+# Singleton instance
+_pool_instance = None
+_pool_lock = threading.Lock()
+
+
+def get_pool() -> ConnectionPool:
+    """Get the shared LLM connection pool."""
+    global _pool_instance
+    if _pool_instance is None:
+        with _pool_lock:
+            if _pool_instance is None:
+                _pool_instance = ConnectionPool()
+    return _pool_instance
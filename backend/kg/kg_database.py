@@ -14,6 +14,11 @@ from typing import Optional, List, Dict, Any, Generator
 from contextlib import contextmanager
 from datetime import datetime
 
+try:
+    import sqlite_pool
+except ImportError:  # Imported as backend.kg.kg_database
+    from backend import sqlite_pool
+
 
 # Database path
 KG_DB_PATH = Path(__file__).parent.parent / "soccer_ai_kg.db"
@@ -21,14 +26,12 @@ KG_DB_PATH = Path(__file__).parent.parent / "soccer_ai_kg.db"
 
 @contextmanager
 def get_kg_connection(db_path: Path = KG_DB_PATH) -> Generator[sqlite3.Connection, None, None]:
-    """Context manager for KG database connections."""
-    conn = sqlite3.connect(db_path)
-    conn.row_factory = sqlite3.Row
-    conn.execute("PRAGMA foreign_keys = ON")
+    """Context manager for KG database connections (per-thread, persistent)."""
+    conn = sqlite_pool.acquire(db_path, row_factory=sqlite3.Row)
     try:
         yield conn
     finally:
-        conn.close()
+        conn.close()  # Releases to the pool
 
 
 class KnowledgeGraphDB:
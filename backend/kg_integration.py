@@ -6,10 +6,18 @@ Provides enhanced context retrieval for fan persona responses.
 """
 
 import sqlite3
+from contextlib import contextmanager
 import json
 from typing import List, Dict, Any, Optional, Tuple
 from pathlib import Path
 
+try:
+    import sqlite_pool
+    from team_identity import get_resolver
+except ImportError:  # Imported as backend.kg_integration
+    from backend import sqlite_pool
+    from backend.team_identity import get_resolver
+
 # Path to the new 500-node KG database
 KG_DB_PATH = Path(__file__).parent.parent / "soccer_ai_architecture_kg.db"
 
@@ -29,40 +37,27 @@ class KGIntegration:
         self.db_path = db_path or str(KG_DB_PATH)
         self._load_entities()
 
+    @contextmanager
     def _get_conn(self):
-        """Get database connection."""
-        return sqlite3.connect(self.db_path)
+        """This thread's read-only connection, released on exit (also on error)."""
+        conn = sqlite_pool.acquire(self.db_path, readonly=True)
+        try:
+            yield conn
+        finally:
+            conn.close()
 
     def _load_entities(self):
         """Load entity names for quick matching."""
         try:
-            conn = self._get_conn()
-            cursor = conn.cursor()
-            cursor.execute("SELECT node_id, name, type FROM kg_nodes")
-            self.entities = {row[1].lower(): (row[0], row[1], row[2]) for row in cursor.fetchall()}
-            conn.close()
+            with self._get_conn() as conn:
+                cursor = conn.cursor()
+                cursor.execute("SELECT node_id, name, type FROM kg_nodes")
+                self.entities = {row[1].lower(): (row[0], row[1], row[2]) for row in cursor.fetchall()}
         except:
             self.entities = {}
 
-        # Common aliases
+        # Common aliases (club aliases come from team_identity)
         self.aliases = {
-            # Club aliases
-            "united": "manchester united",
-            "man utd": "manchester united",
-            "man u": "manchester united",
-            "city": "manchester city",
-            "man city": "manchester city",
-            "spurs": "tottenham hotspur",
-            "tottenham": "tottenham hotspur",
-            "the reds": "liverpool",
-            "the gunners": "arsenal",
-            "the blues": "chelsea",
-            "wolves": "wolverhampton wanderers",
-            "villa": "aston villa",
-            "hammers": "west ham united",
-            "west ham": "west ham united",
-            "toon": "newcastle united",
-            "toffees": "everton",
             # Manager aliases
             "fergie": "alex ferguson",
             "sir alex": "alex ferguson",
@@ -139,7 +134,16 @@ class KGIntegration:
         text_lower = text.lower()
         found = []
 
-        # Check aliases first
+        # Clubs first: any alias resolves to the club's KG node
+        for team in get_resolver().find_in_text(text):
+            for name in (team.full_name, team.name, team.history_name):
+                entity = self.entities.get(name.lower())
+                if entity is not None:
+                    if entity not in found:
+                        found.append(entity)
+                    break
+
+        # Then people, derbies and matches
         for alias, canonical in self.aliases.items():
             if alias in text_lower and canonical in self.entities:
                 node_id, name, node_type = self.entities[canonical]
@@ -162,71 +166,69 @@ class KGIntegration:
         - entity: name, type, description, properties
         - relationships: list of connected entities
         """
-        conn = self._get_conn()
-        cursor = conn.cursor()
+        with self._get_conn() as conn:
+            cursor = conn.cursor()
 
-        # Get node info
-        cursor.execute("""
-            SELECT node_id, name, type, description, properties
-            FROM kg_nodes WHERE LOWER(name) = LOWER(?)
-        """, (entity_name,))
+            # Get node info
+            cursor.execute("""
+                SELECT node_id, name, type, description, properties
+                FROM kg_nodes WHERE LOWER(name) = LOWER(?)
+            """, (entity_name,))
 
-        row = cursor.fetchone()
-        if not row:
-            conn.close()
-            return None
-
-        node_id, name, node_type, desc, props = row
-        props_dict = json.loads(props) if props else {}
-
-        result = {
-            "entity": {
-                "name": name,
-                "type": node_type,
-                "description": desc,
-                "properties": props_dict
-            },
-            "relationships": []
-        }
+            row = cursor.fetchone()
+            if not row:
+                return None
 
-        if include_relationships:
-            # Get outgoing relationships
-            cursor.execute("""
-                SELECT e.relationship, e.properties, n.name, n.type
-                FROM kg_edges e
-                JOIN kg_nodes n ON e.to_node = n.node_id
-                WHERE e.from_node = ?
-            """, (node_id,))
-
-            for rel, rel_props, target_name, target_type in cursor.fetchall():
-                rel_props_dict = json.loads(rel_props) if rel_props else {}
-                result["relationships"].append({
-                    "direction": "outgoing",
-                    "relationship": rel,
-                    "target": target_name,
-                    "target_type": target_type,
-                    "properties": rel_props_dict
-                })
+            node_id, name, node_type, desc, props = row
+            props_dict = json.loads(props) if props else {}
 
-            # Get incoming relationships
-            cursor.execute("""
-                SELECT e.relationship, e.properties, n.name, n.type
-                FROM kg_edges e
-                JOIN kg_nodes n ON e.from_node = n.node_id
-                WHERE e.to_node = ?
-            """, (node_id,))
-
-            for rel, rel_props, source_name, source_type in cursor.fetchall():
-                rel_props_dict = json.loads(rel_props) if rel_props else {}
-                result["relationships"].append({
-                    "direction": "incoming",
-                    "relationship": rel,
-                    "source": source_name,
-                    "source_type": source_type,
-                    "properties": rel_props_dict
-                })
+            result = {
+                "entity": {
+                    "name": name,
+                    "type": node_type,
+                    "description": desc,
+                    "properties": props_dict
+                },
+                "relationships": []
+            }
+
+            if include_relationships:
+                # Get outgoing relationships
+                cursor.execute("""
+                    SELECT e.relationship, e.properties, n.name, n.type
+                    FROM kg_edges e
+                    JOIN kg_nodes n ON e.to_node = n.node_id
+                    WHERE e.from_node = ?
+                """, (node_id,))
+
+                for rel, rel_props, target_name, target_type in cursor.fetchall():
+                    rel_props_dict = json.loads(rel_props) if rel_props else {}
+                    result["relationships"].append({
+                        "direction": "outgoing",
+                        "relationship": rel,
+                        "target": target_name,
+                        "target_type": target_type,
+                        "properties": rel_props_dict
+                    })
+
+                # Get incoming relationships
+                cursor.execute("""
+                    SELECT e.relationship, e.properties, n.name, n.type
+                    FROM kg_edges e
+                    JOIN kg_nodes n ON e.from_node = n.node_id
+                    WHERE e.to_node = ?
+                """, (node_id,))
+
+                for rel, rel_props, source_name, source_type in cursor.fetchall():
+                    rel_props_dict = json.loads(rel_props) if rel_props else {}
+                    result["relationships"].append({
+                        "direction": "incoming",
+                        "relationship": rel,
+                        "source": source_name,
+                        "source_type": source_type,
+                        "properties": rel_props_dict
+                    })
 
-        conn.close()
         return result
 
     def search_facts(self, query: str, limit: int = 10) -> List[Dict]:
@@ -235,79 +237,76 @@ class KGIntegration:
 
         Returns list of matching facts with confidence scores.
         """
-        conn = self._get_conn()
-        cursor = conn.cursor()
+        with self._get_conn() as conn:
+            cursor = conn.cursor()
 
-        # Clean query for FTS
-        import re
-        search_terms = re.sub(r'[^\w\s]', '', query)
+            # Clean query for FTS
+            import re
+            search_terms = re.sub(r'[^\w\s]', '', query)
+
+            facts = []
+            try:
+                cursor.execute("""
+                    SELECT f.fact_id, f.content, f.fact_type, f.confidence, f.source_type
+                    FROM kb_facts f
+                    JOIN kb_facts_fts fts ON f.fact_id = fts.rowid
+                    WHERE kb_facts_fts MATCH ?
+                    ORDER BY f.confidence DESC
+                    LIMIT ?
+                """, (search_terms, limit))
+
+                for row in cursor.fetchall():
+                    facts.append({
+                        "fact_id": row[0],
+                        "content": row[1],
+                        "type": row[2],
+                        "confidence": row[3],
+                        "source": row[4]
+                    })
+            except:
+                pass  # FTS might fail on complex queries
 
-        facts = []
-        try:
-            cursor.execute("""
-                SELECT f.fact_id, f.content, f.fact_type, f.confidence, f.source_type
-                FROM kb_facts f
-                JOIN kb_facts_fts fts ON f.fact_id = fts.rowid
-                WHERE kb_facts_fts MATCH ?
-                ORDER BY f.confidence DESC
-                LIMIT ?
-            """, (search_terms, limit))
-
-            for row in cursor.fetchall():
-                facts.append({
-                    "fact_id": row[0],
-                    "content": row[1],
-                    "type": row[2],
-                    "confidence": row[3],
-                    "source": row[4]
-                })
-        except:
-            pass  # FTS might fail on complex queries
-
-        conn.close()
         return facts
 
     def get_club_players(self, club_name: str, current_only: bool = False) -> List[Dict]:
         """Get players for a club."""
-        conn = self._get_conn()
-        cursor = conn.cursor()
-
-        # Get club node_id
-        cursor.execute("SELECT node_id FROM kg_nodes WHERE LOWER(name) = LOWER(?)", (club_name,))
-        club_row = cursor.fetchone()
-        if not club_row:
-            conn.close()
-            return []
-
-        club_id = club_row[0]
-
-        # Get players with played_for or plays_for edges
-        query = """
-            SELECT n.name, n.description, e.relationship, e.properties
-            FROM kg_nodes n
-            JOIN kg_edges e ON n.node_id = e.from_node
-            WHERE e.to_node = ? AND e.relationship IN ('played_for', 'plays_for')
-            AND n.type = 'person'
-        """
-
-        cursor.execute(query, (club_id,))
-
-        players = []
-        for name, desc, rel, props in cursor.fetchall():
-            props_dict = json.loads(props) if props else {}
-            is_current = rel == 'plays_for' or props_dict.get('current', False)
-
-            if current_only and not is_current:
-                continue
+        with self._get_conn() as conn:
+            cursor = conn.cursor()
 
-            players.append({
-                "name": name,
-                "description": desc,
-                "current": is_current,
-                "properties": props_dict
-            })
+            # Get club node_id
+            cursor.execute("SELECT node_id FROM kg_nodes WHERE LOWER(name) = LOWER(?)", (club_name,))
+            club_row = cursor.fetchone()
+            if not club_row:
+                return []
+
+            club_id = club_row[0]
+
+            # Get players with played_for or plays_for edges
+            query = """
+                SELECT n.name, n.description, e.relationship, e.properties
+                FROM kg_nodes n
+                JOIN kg_edges e ON n.node_id = e.from_node
+                WHERE e.to_node = ? AND e.relationship IN ('played_for', 'plays_for')
+                AND n.type = 'person'
+            """
+
+            cursor.execute(query, (club_id,))
+
+            players = []
+            for name, desc, rel, props in cursor.fetchall():
+                props_dict = json.loads(props) if props else {}
+                is_current = rel == 'plays_for' or props_dict.get('current', False)
+
+                if current_only and not is_current:
+                    continue
+
+                players.append({
+                    "name": name,
+                    "description": desc,
+                    "current": is_current,
+                    "properties": props_dict
+                })
 
-        conn.close()
         return players
 
     def get_enhanced_context(self, query: str, club: str = None) -> Dict:
@@ -410,22 +409,20 @@ class KGIntegration:
 
     def get_stats(self) -> Dict:
         """Get KG statistics."""
-        conn = self._get_conn()
-        cursor = conn.cursor()
-
-        cursor.execute("SELECT COUNT(*) FROM kg_nodes")
-        nodes = cursor.fetchone()[0]
+        with self._get_conn() as conn:
+            cursor = conn.cursor()
 
-        cursor.execute("SELECT COUNT(*) FROM kg_edges")
-        edges = cursor.fetchone()[0]
+            cursor.execute("SELECT COUNT(*) FROM kg_nodes")
+            nodes = cursor.fetchone()[0]
 
-        cursor.execute("SELECT COUNT(*) FROM kb_facts")
-        facts = cursor.fetchone()[0]
+            cursor.execute("SELECT COUNT(*) FROM kg_edges")
+            edges = cursor.fetchone()[0]
 
-        cursor.execute("SELECT type, COUNT(*) FROM kg_nodes GROUP BY type ORDER BY COUNT(*) DESC")
-        node_types = {row[0]: row[1] for row in cursor.fetchall()}
+            cursor.execute("SELECT COUNT(*) FROM kb_facts")
+            facts = cursor.fetchone()[0]
 
-        conn.close()
+            cursor.execute("SELECT type, COUNT(*) FROM kg_nodes GROUP BY type ORDER BY COUNT(*) DESC")
+            node_types = {row[0]: row[1] for row in cursor.fetchall()}
 
         return {
             "total_nodes": nodes,
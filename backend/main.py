@@ -4,22 +4,36 @@ Main entry point for the backend API
 """
 
 import uuid
+import time
+import threading
+from contextlib import aclosing
 from datetime import datetime
 from typing import Optional, List
 from pathlib import Path
 
-from fastapi import FastAPI, HTTPException, Query, Body
+from fastapi import FastAPI, HTTPException, Query, Body, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse, FileResponse, StreamingResponse
+from fastapi.responses import JSONResponse, FileResponse, StreamingResponse, PlainTextResponse
 from fastapi.staticfiles import StaticFiles
 
 import database
+import concurrency
+import http_pool
+import tracing
+import metrics
+import response_cache
+import session_store
+import sqlite_pool
+import team_identity
+import query_trace
+import single_flight
+import warmup
 import rag
 import ai_response
 import conversation_intelligence as ci
 import fan_enhancements
 from predictor.prediction_engine import PredictionEngine
-from predictor.tri_lens_predictor import TriLensPredictor
+from predictor.registry import get_registry as get_predictor_registry
 from models import (
     ChatRequest, ChatResponse, ChatSource,
     ApiResponse, PaginatedMeta, SearchResults, DbStats,
@@ -49,8 +63,43 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# In-memory conversation storage (use Redis in production)
-conversations = {}
+
+@app.middleware("http")
+async def record_request_metrics(request: Request, call_next):
+    """Observe latency and SQLite query count per route template (to response start for streams)."""
+    start = time.perf_counter()
+    status = 500
+    with query_trace.track(f"{request.method} {request.url.path}") as queries:
+        try:
+            response = await call_next(request)
+            status = response.status_code
+            response.headers["X-SQL-Queries"] = str(queries.queries)
+            return response
+        finally:
+            route = getattr(request.scope.get("route"), "path", "unmatched")
+            queries.label = f"{request.method} {route}"
+            metrics.HTTP_REQUEST_SECONDS.observe(
+                time.perf_counter() - start,
+                method=request.method,
+                route=route,
+                status=str(status)
+            )
+
+
+# Scrape-time gauges read straight from in-memory state
+metrics.REGISTRY.gauge(
+    "soccer_ai_pipeline_tasks", "Pipeline executor tasks by state.", ("state",)
+).set_function(lambda: {
+    (state,): concurrency.get_stats()[state] for state in ("active", "waiting")
+})
+metrics.REGISTRY.gauge(
+    "soccer_ai_llm_pool_connections", "Pooled LLM connections by state.", ("state",)
+).set_function(lambda: {
+    (state,): http_pool.get_pool().get_stats()[state] for state in ("idle", "in_use")
+})
+
+# Conversation history, bounded + idle-expiring (per process, or shared via SQLite)
+conversations = session_store.open_store("conversation_history")
 
 # Valid club names for fan personas (validated against database)
 # "analyst" is a special case - neutral predictor persona (The Analyst)
@@ -92,17 +141,87 @@ CLUB_TO_TEAM_ID = {
 @app.on_event("startup")
 async def startup():
     """Initialize database on startup."""
-    if not Path(database.DB_PATH).exists():
-        database.init_db()
+    if not database.SERVING_MODE:
+        # Serving nodes get these prepared files (database.prepare_for_serving)
+        if not Path(database.DB_PATH).exists():
+            database.init_db()
+        # Initialize gap tracker table (Phase 0)
+        database.init_gap_tracker()
+        # Indexed MM-DD key for "on this day"
+        database.init_calendar_index()
+        # Keyset pagination indexes for the list endpoints (no-op once created)
+        database.ensure_pagination_indexes()
+        # Indexes for the match_history / elo_history hot paths (no-op once created)
+        try:
+            database.ensure_reference_indexes()
+        except Exception as e:  # Read-only reference DB - serve without them
+            print(f"[DB] Could not create reference indexes: {e}")
     # Initialize analytics table (CP6)
     database.init_analytics()
-    # Initialize gap tracker table (Phase 0)
-    database.init_gap_tracker()
     # Initialize security tables (Phase 1)
     database.init_security_tables()
     # Initialize trivia table (Phase 6)
     database.init_trivia_table()
-    print(f"Soccer-AI started. Database: {database.DB_PATH}")
+    # Data generation counter (response cache invalidation)
+    database.init_data_generation()
+    if not database.SERVING_MODE:
+        # Per-club persona documents and their invalidation triggers
+        database.init_persona_documents()
+    # Expire idle chat/security sessions in the background
+    session_store.start_sweeper()
+    # Batch analytics/security log inserts off the request path
+    database.start_write_behind()
+    # Build models/KG and prime caches in the background; /health is not-ready until done
+    if warmup.WARMUP_ENABLED:
+        warmup.mark_pending()
+        threading.Thread(target=warmup.run, args=(_warmup_steps(),), name="warmup", daemon=True).start()
+    print(f"Soccer-AI started. Database: {database.DB_PATH}"
+          + (f" (serving, writes to {database.WRITE_DB_PATH})" if database.SERVING_MODE else ""))
+
+
+def _warmup_steps() -> list:
+    """Startup warm-up: everything the first requests would otherwise build lazily."""
+    def kg():
+        if rag.KG_AVAILABLE:
+            rag.get_kg()
+
+    def personas():
+        for team_id in CLUB_TO_TEAM_ID.values():
+            database.load_full_persona(team_id)
+
+    def moods():
+        for club in CLUB_TO_TEAM_ID:
+            fan_enhancements.calculate_mood_from_results(club)
+        if rag.ENHANCED_COMPONENTS:
+            rag.get_mood_engine()
+
+    def synthetic_queries():
+        for query in warmup.WARMUP_QUERIES:
+            rag.retrieve_hybrid(query, club="arsenal")
+
+    def predictors():
+        registry = get_predictor_registry()
+        for name in ("football_oracle", "tri_lens"):
+            registry.get(name)
+
+    return [
+        ("kg", kg),
+        ("prediction_engine", get_prediction_engine),
+        ("predictors", predictors),
+        ("personas", personas),
+        ("moods", moods),
+        ("synthetic_queries", synthetic_queries),
+    ]
+
+
+@app.on_event("shutdown")
+async def shutdown():
+    """Flush queued log rows, release worker threads, pooled connections and the session sweeper."""
+    session_store.stop_sweeper()
+    concurrency.shutdown(wait=False)
+    http_pool.get_pool().close_all()
+    database.stop_write_behind()
+    sqlite_pool.close_all()
 
 
 # ============================================
@@ -111,180 +230,275 @@ async def startup():
 
 @app.get("/health")
 async def health_check():
-    """Health check endpoint."""
-    return {"status": "healthy", "timestamp": datetime.utcnow().isoformat()}
+    """
+    Health check endpoint.
+
+    Returns 503 with status "warming_up" until the startup warm-up has
+    finished, so load balancers hold traffic back until then.
+    """
+    body = {
+        "status": "healthy" if warmup.is_ready() else "warming_up",
+        "ready": warmup.is_ready(),
+        "warmup": warmup.get_status(),
+        "timestamp": datetime.utcnow().isoformat()
+    }
+    if not body["ready"]:
+        return JSONResponse(status_code=503, content=body)
+    return body
 
 
 # ============================================
 # CHAT ENDPOINT (Primary Interface)
 # ============================================
 
+# Identical concurrent questions share one LLM call / one upstream stream
+chat_flights = single_flight.SingleFlight("chat")
+stream_flights = single_flight.StreamFlight("chat_stream")
+
+
 @app.post("/api/v1/chat", response_model=ChatResponse)
 async def chat(request: ChatRequest):
     """
     Main chat endpoint. User asks natural language question, gets AI response.
     Uses KG-RAG hybrid retrieval and logs analytics.
+
+    The pipeline is blocking (SQLite, KG retrieval, LLM call), so it runs on
+    the bounded pipeline executor instead of the event loop. Stage timings
+    are collected by the request trace and stored with the analytics row.
+
+    Concurrent requests with the same answer key (club, question, context)
+    wait on a single LLM call instead of each making their own.
     """
-    import time
     start_time = time.time()
 
-    try:
-        # Get or create conversation
-        conv_id = request.conversation_id or str(uuid.uuid4())
-        history = conversations.get(conv_id, [])
-
-        # Normalize and validate club name (security: prevent injection via club field)
-        club = None
-        if request.club:
-            # Normalize: lowercase, replace spaces/hyphens with underscores
-            normalized_club = request.club.lower().strip().replace(" ", "_").replace("-", "_")
-            # Only accept known valid clubs
-            if normalized_club in VALID_CLUBS:
-                club = normalized_club
-            # else: silently fall back to generic (don't expose valid club list)
-
-        # Check for injection attempt first
-        is_injection, pattern = ai_response.detect_injection(request.message)
-
-        if is_injection:
-            # Log injection attempt
-            database.log_query(
-                query=request.message,
-                was_injection_attempt=True,
-                response_time_ms=int((time.time() - start_time) * 1000)
-            )
-            # Return snap-back response
-            snap_back = ai_response.get_snap_back_response(club or "default")
-            return ChatResponse(
-                response=snap_back,
-                conversation_id=conv_id,
-                sources=[],
-                confidence=0.0
-            )
+    with tracing.start_trace():
+        try:
+            turn = await concurrency.run_blocking(_prepare_chat_turn, request, start_time)
+
+            if turn.get("snap_back"):
+                return ChatResponse(
+                    response=turn["snap_back"],
+                    conversation_id=turn["conversation_id"],
+                    sources=[],
+                    confidence=0.0
+                )
+
+            result = turn["cached"]
+            if result is None:
+                result, shared = await chat_flights.run(
+                    turn["answer_key"],
+                    lambda: concurrency.run_blocking(_generate_chat_answer, request, turn)
+                )
+                if shared:
+                    print(f"[SINGLE-FLIGHT] {turn['conversation_id'][:8]} shared an in-flight answer")
+
+            return await concurrency.run_blocking(_finish_chat_turn, request, turn, result, start_time)
+
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=str(e))
 
-        # ===== COMPOUND INTELLIGENT CONVERSATION SYSTEM =====
-        # Get conversation state for fluency
-        conv_state = ci.get_conversation_state(conv_id, club=club)
 
-        # CRITICAL: Load persona data on first turn (COST OPTIMIZATION: cached for session!)
-        if conv_state.persona_data is None and club and club in CLUB_TO_TEAM_ID:
-            team_id = CLUB_TO_TEAM_ID[club]
+def _prepare_chat_turn(request: ChatRequest, start_time: float) -> dict:
+    """
+    Blocking preamble shared by /api/v1/chat and /api/v1/chat/stream
+    (runs in a pipeline worker thread): persona, retrieval, answer key
+    and cache lookup.
+    """
+    # Get or create conversation
+    conv_id = request.conversation_id or str(uuid.uuid4())
+    history = list(conversations.get(conv_id, []))  # Snapshot; writes go through _append_history
+
+    # Normalize and validate club name (security: prevent injection via club field)
+    club = None
+    if request.club:
+        # Normalize: lowercase, replace spaces/hyphens with underscores
+        normalized_club = request.club.lower().strip().replace(" ", "_").replace("-", "_")
+        # Only accept known valid clubs
+        if normalized_club in VALID_CLUBS:
+            club = normalized_club
+        # else: silently fall back to generic (don't expose valid club list)
+
+    # Check for injection attempt first
+    is_injection, pattern = ai_response.detect_injection(request.message)
+
+    if is_injection:
+        # Log injection attempt
+        database.log_query(
+            query=request.message,
+            was_injection_attempt=True,
+            response_time_ms=int((time.time() - start_time) * 1000)
+        )
+        return {
+            "conversation_id": conv_id,
+            "snap_back": ai_response.get_snap_back_response(club or "default")
+        }
+
+    # ===== COMPOUND INTELLIGENT CONVERSATION SYSTEM =====
+    # Get conversation state for fluency
+    conv_state = ci.get_conversation_state(conv_id, club=club)
+
+    # CRITICAL: Load persona data on first turn (COST OPTIMIZATION: cached for session!)
+    if conv_state.persona_data is None and club and club in CLUB_TO_TEAM_ID:
+        team_id = CLUB_TO_TEAM_ID[club]
+        with tracing.span("persona.load"):
             conv_state.persona_data = database.load_full_persona(team_id)
-            print(f"[PERSONA] Loaded personality data for {club} (team_id={team_id})")
+        print(f"[PERSONA] Loaded personality data for {club} (team_id={team_id})")
 
-        # ===== FAN ENHANCEMENTS: Dynamic Mood + Rivalry + Dialect =====
-        if club:
-            # Get enhanced persona (mood from results, rivalry detection, dialect)
+    # ===== FAN ENHANCEMENTS: Dynamic Mood + Rivalry + Dialect =====
+    if club:
+        # Get enhanced persona (mood from results, rivalry detection, dialect)
+        with tracing.span("persona.enhance"):
             enhanced = fan_enhancements.get_enhanced_persona(club, request.message)
 
-            # Override mood with dynamic calculation from recent results
-            if conv_state.persona_data:
-                conv_state.persona_data["mood"] = enhanced["mood"]
-                conv_state.persona_data["rivalry"] = enhanced.get("rivalry")
-                conv_state.persona_data["dialect"] = enhanced.get("dialect")
-            else:
-                conv_state.persona_data = enhanced
-
-            # Log rivalry trigger if detected
-            if enhanced.get("has_rivalry_trigger"):
-                rivalry = enhanced["rivalry"]
-                print(f"[RIVALRY] ⚔️ {rivalry['derby_name']} triggered! ({rivalry['rival_display']})")
-
-            # Log dynamic mood
-            mood = enhanced["mood"]
-            print(f"[MOOD] {mood['current_mood'].upper()} {enhanced['mood_emoji']} - Form: {mood['form']}")
-
-        # Detect and resolve follow-up queries
-        query_to_process = request.message
-        is_follow_up, resolved_query = ci.detect_follow_up(request.message, conv_state)
-        if is_follow_up and resolved_query:
-            query_to_process = resolved_query
-            # Log follow-up detection for analytics
-            print(f"[FOLLOW-UP] Resolved: '{request.message}' -> '{resolved_query}'")
-
-        # KG-RAG hybrid retrieval (upgraded from basic RAG)
-        # Use resolved query for better context retrieval
-        context, sources, metadata = rag.retrieve_hybrid(query_to_process, club=club)
-
-        # Build compound context (anti-repetition, emotional continuity)
-        enriched_context, sources, ci_metadata = ci.build_compound_context(
-            query=query_to_process,
-            base_context=context,
-            base_sources=sources,
-            state=conv_state
-        )
+        # Override mood with dynamic calculation from recent results
+        if conv_state.persona_data:
+            conv_state.persona_data["mood"] = enhanced["mood"]
+            conv_state.persona_data["rivalry"] = enhanced.get("rivalry")
+            conv_state.persona_data["dialect"] = enhanced.get("dialect")
+        else:
+            conv_state.persona_data = enhanced
+
+        # Log rivalry trigger if detected
+        if enhanced.get("has_rivalry_trigger"):
+            rivalry = enhanced["rivalry"]
+            print(f"[RIVALRY] ⚔️ {rivalry['derby_name']} triggered! ({rivalry['rival_display']})")
+
+        # Log dynamic mood
+        mood = enhanced["mood"]
+        print(f"[MOOD] {mood['current_mood'].upper()} {enhanced['mood_emoji']} - Form: {mood['form']}")
+
+    # Detect and resolve follow-up queries
+    query_to_process = request.message
+    is_follow_up, resolved_query = ci.detect_follow_up(request.message, conv_state)
+    if is_follow_up and resolved_query:
+        query_to_process = resolved_query
+        # Log follow-up detection for analytics
+        print(f"[FOLLOW-UP] Resolved: '{request.message}' -> '{resolved_query}'")
+
+    # KG-RAG hybrid retrieval (upgraded from basic RAG)
+    # Use resolved query for better context retrieval
+    context, sources, metadata = rag.retrieve_hybrid(query_to_process, club=club)
+
+    # Build compound context (anti-repetition, emotional continuity)
+    enriched_context, sources, ci_metadata = ci.build_compound_context(
+        query=query_to_process,
+        base_context=context,
+        base_sources=sources,
+        state=conv_state
+    )
 
-        # Enhance prompt with conversation awareness
-        # (This happens inside ai_response.generate_response via enhanced context)
+    # Answer key: same club + question + context -> same answer.
+    # Used for single-flight coalescing and the exact-match answer cache.
+    answer_key = response_cache.make_key(
+        club, request.message,
+        response_cache.context_fingerprint(enriched_context, history)
+    )
+    cache = response_cache.get_cache()
+    generation = cached = None
+    if cache is not None:
+        generation = database.get_data_generation()
+        cached = cache.get(answer_key, generation)
 
-        # Generate AI response (KG-aware, with compound intelligence + mood framing)
-        result = ai_response.generate_response(
-            query=request.message,
-            context=enriched_context,  # Use enriched context with compound intelligence
-            sources=sources,
-            conversation_history=history,
-            club=club or "default",
-            session_id=conv_id,  # Enable session-based escalation
-            persona_data=conv_state.persona_data  # CRITICAL: Pass cached persona for mood framing
-        )
+    return {
+        "conversation_id": conv_id,
+        "club": club,
+        "history": history,
+        "conv_state": conv_state,
+        "context": enriched_context,
+        "sources": sources,
+        "metadata": metadata,
+        "answer_key": answer_key,
+        "generation": generation,
+        "cached": cached,
+    }
 
-        # Update conversation state after response
-        entities = metadata.get('entities', {})
-        intent = metadata.get('kg_intent', metadata.get('intent', 'general'))
-        ci.update_conversation_state(
-            state=conv_state,
-            query=request.message,
-            entities=entities,
-            intent=intent,
-            response=result["response"]
-        )
 
-        # Calculate response time
-        response_time_ms = int((time.time() - start_time) * 1000)
+def _generate_chat_answer(request: ChatRequest, turn: dict) -> dict:
+    """LLM call for a chat turn (run once per answer key, result shared)."""
+    # Generate AI response (KG-aware, with compound intelligence + mood framing)
+    result = ai_response.generate_response(
+        query=request.message,
+        context=turn["context"],  # Use enriched context with compound intelligence
+        sources=turn["sources"],
+        conversation_history=turn["history"],
+        club=turn["club"] or "default",
+        session_id=turn["conversation_id"],  # Enable session-based escalation
+        persona_data=turn["conv_state"].persona_data  # CRITICAL: Pass cached persona for mood framing
+    )
 
-        # Log query analytics (CP6)
-        try:
-            # Extract first club from entities if available
-            club_detected = None
-            entities = metadata.get('entities', {})
-            teams = entities.get('teams', [])
-            if teams:
-                club_detected = teams[0]
-
-            database.log_query(
-                query=request.message,
-                kg_intent=metadata.get('kg_intent'),
-                club_detected=club_detected,
-                kg_nodes_used=entities.get('kg_nodes', 0) if isinstance(entities.get('kg_nodes'), int) else len(entities.get('kg_nodes', [])),
-                source_count=len(sources),
-                confidence=result.get('confidence'),
-                response_time_ms=response_time_ms,
-                was_injection_attempt=False
-            )
-        except Exception:
-            pass  # Don't fail on analytics errors
-
-        # Update conversation history
-        history.append({"role": "user", "content": request.message})
-        history.append({"role": "assistant", "content": result["response"]})
-        conversations[conv_id] = history[-10:]  # Keep last 10 messages
-
-        # Format sources
-        formatted_sources = [
-            ChatSource(type=s["type"], id=s.get("id"))
-            for s in sources
-        ]
+    cache = response_cache.get_cache()
+    if cache is not None and response_cache.is_cacheable(result):
+        cache.put(turn["answer_key"], turn["generation"], result)
+    return result
+
+
+def _append_history(conv_id: str, message: str, response: str):
+    """Append one exchange to the stored history (atomic; keeps the last 10 messages)."""
+    with conversations.edit(conv_id, list) as stored:
+        stored.append({"role": "user", "content": message})
+        stored.append({"role": "assistant", "content": response})
+        del stored[:-10]
+
+
+def _finish_chat_turn(request: ChatRequest, turn: dict, result: dict, start_time: float) -> ChatResponse:
+    """Per-conversation bookkeeping after the answer is known (pipeline worker thread)."""
+    conv_id = turn["conversation_id"]
+    metadata = turn["metadata"]
+    sources = turn["sources"]
+
+    # Update conversation state after response
+    entities = metadata.get('entities', {})
+    intent = metadata.get('kg_intent', metadata.get('intent', 'general'))
+    ci.update_conversation_state(
+        state=turn["conv_state"],
+        query=request.message,
+        entities=entities,
+        intent=intent,
+        response=result["response"]
+    )
+
+    # Calculate response time
+    response_time_ms = int((time.time() - start_time) * 1000)
+    trace = tracing.current_trace()
+
+    # Log query analytics (CP6)
+    try:
+        # Extract first club from entities if available
+        club_detected = None
+        teams = entities.get('teams', [])
+        if teams:
+            club_detected = teams[0]
 
-        return ChatResponse(
-            response=result["response"],
-            conversation_id=conv_id,
-            sources=formatted_sources,
-            confidence=result.get("confidence", 0.5),
-            usage=result.get("usage")
+        database.log_query(
+            query=request.message,
+            kg_intent=metadata.get('kg_intent'),
+            club_detected=club_detected,
+            kg_nodes_used=entities.get('kg_nodes', 0) if isinstance(entities.get('kg_nodes'), int) else len(entities.get('kg_nodes', [])),
+            source_count=len(sources),
+            confidence=result.get('confidence'),
+            response_time_ms=response_time_ms,
+            was_injection_attempt=False,
+            stage_timings=trace.as_dict() if trace else None
         )
+    except Exception:
+        pass  # Don't fail on analytics errors
 
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+    # Update conversation history
+    _append_history(conv_id, request.message, result["response"])
+
+    # Format sources
+    formatted_sources = [
+        ChatSource(type=s["type"], id=s.get("id"))
+        for s in sources
+    ]
+
+    return ChatResponse(
+        response=result["response"],
+        conversation_id=conv_id,
+        sources=formatted_sources,
+        confidence=result.get("confidence", 0.5),
+        usage=result.get("usage")
+    )
 
 
 # ============================================
@@ -292,143 +506,148 @@ async def chat(request: ChatRequest):
 # ============================================
 
 @app.post("/api/v1/chat/stream")
-async def chat_stream(request: ChatRequest):
+async def chat_stream(request: ChatRequest, http_request: Request):
     """
     Streaming chat endpoint - returns tokens as Server-Sent Events.
 
     Same logic as /api/v1/chat but streams response in real-time.
     Frontend receives chunks as they arrive for a "typing" effect.
+
+    Retrieval and the upstream stream run on the pipeline executor.
+    Identical concurrent requests attach to one upstream stream; it is
+    closed as soon as the last of their clients disconnects, so no further
+    output tokens are generated.
     """
-    import time
     import json as json_lib
 
+    sse_headers = {
+        "Cache-Control": "no-cache",
+        "Connection": "keep-alive",
+        "X-Accel-Buffering": "no"  # Disable nginx buffering
+    }
+
     try:
-        # Get or create conversation
-        conv_id = request.conversation_id or str(uuid.uuid4())
-        history = conversations.get(conv_id, [])
-
-        # Normalize and validate club name
-        club = None
-        if request.club:
-            normalized_club = request.club.lower().strip().replace(" ", "_").replace("-", "_")
-            if normalized_club in VALID_CLUBS:
-                club = normalized_club
-
-        # Check for injection attempt first
-        is_injection, pattern = ai_response.detect_injection(request.message)
-
-        if is_injection:
-            # Return snap-back as a single SSE event
-            snap_back = ai_response.get_snap_back_response(club or "default")
-
-            async def injection_response():
-                yield f"data: {json_lib.dumps({'text': snap_back})}\n\n"
-                yield f"data: {json_lib.dumps({'done': True, 'conversation_id': conv_id})}\n\n"
-
-            return StreamingResponse(
-                injection_response(),
-                media_type="text/event-stream",
-                headers={
-                    "Cache-Control": "no-cache",
-                    "Connection": "keep-alive",
-                    "X-Accel-Buffering": "no"
-                }
-            )
+        turn = await concurrency.run_blocking(_prepare_chat_turn, request, time.time())
+    except Exception as e:
+        error_message = str(e)
+
+        async def error_stream():
+            yield f"data: {json_lib.dumps({'error': error_message})}\n\n"
 
-        # Get conversation state for fluency
-        conv_state = ci.get_conversation_state(conv_id, club=club)
+        return StreamingResponse(
+            error_stream(),
+            media_type="text/event-stream"
+        )
 
-        # Load persona data on first turn
-        if conv_state.persona_data is None and club and club in CLUB_TO_TEAM_ID:
-            team_id = CLUB_TO_TEAM_ID[club]
-            conv_state.persona_data = database.load_full_persona(team_id)
+    conv_id = turn["conversation_id"]
 
-        # ===== FAN ENHANCEMENTS: Dynamic Mood + Rivalry + Dialect =====
-        if club:
-            enhanced = fan_enhancements.get_enhanced_persona(club, request.message)
-            if conv_state.persona_data:
-                conv_state.persona_data["mood"] = enhanced["mood"]
-                conv_state.persona_data["rivalry"] = enhanced.get("rivalry")
-                conv_state.persona_data["dialect"] = enhanced.get("dialect")
-            else:
-                conv_state.persona_data = enhanced
-
-        # Detect and resolve follow-up queries
-        query_to_process = request.message
-        is_follow_up, resolved_query = ci.detect_follow_up(request.message, conv_state)
-        if is_follow_up and resolved_query:
-            query_to_process = resolved_query
-
-        # KG-RAG hybrid retrieval
-        context, sources, metadata = rag.retrieve_hybrid(query_to_process, club=club)
-
-        # Build compound context
-        enriched_context, sources, ci_metadata = ci.build_compound_context(
-            query=query_to_process,
-            base_context=context,
-            base_sources=sources,
-            state=conv_state
+    if turn.get("snap_back"):
+        # Return snap-back as a single SSE event
+        snap_back = turn["snap_back"]
+
+        async def injection_response():
+            yield f"data: {json_lib.dumps({'text': snap_back})}\n\n"
+            yield f"data: {json_lib.dumps({'done': True, 'conversation_id': conv_id})}\n\n"
+
+        return StreamingResponse(
+            injection_response(),
+            media_type="text/event-stream",
+            headers=sse_headers
         )
 
-        # Generator for SSE stream
-        async def generate_stream():
-            full_response = ""
-
-            # Stream from AI
-            for chunk in ai_response.generate_response_stream(
-                query=request.message,
-                context=enriched_context,
-                sources=sources,
-                conversation_history=history,
-                club=club or "default",
-                persona_data=conv_state.persona_data
-            ):
+    history = turn["history"]
+    conv_state = turn["conv_state"]
+    handle = ai_response.StreamHandle()
+
+    def upstream():
+        # Only the first request for an answer key runs this; the rest follow it
+        for chunk in ai_response.generate_response_stream(
+            query=request.message,
+            context=turn["context"],
+            sources=turn["sources"],
+            conversation_history=history,
+            club=turn["club"] or "default",
+            persona_data=conv_state.persona_data,
+            handle=handle
+        ):
+            if chunk.get("done"):
+                handle.finished = True
+
+                # Store the completed answer for identical follow-on requests
+                cache = response_cache.get_cache()
+                if cache is not None and chunk.get("full_response") and not chunk.get("injection_detected"):
+                    cache.put(turn["answer_key"], turn["generation"], {
+                        "response": ai_response.validate_response(chunk["full_response"]),
+                        "sources": turn["sources"],
+                        "model": ai_response.MODEL,
+                    })
+            yield chunk
+
+    def upstream_finished():
+        saved = ai_response.record_stream_finished(handle)
+        if saved:
+            print(f"[STREAM] Clients left {conv_id[:8]} - upstream aborted after "
+                  f"~{handle.generated_tokens()} tokens (~{saved} tokens saved)")
+
+    async def replay_cached():
+        # Replay a cached answer as a single chunk
+        yield {"text": turn["cached"]["response"]}
+        yield {"done": True, "full_response": turn["cached"]["response"]}
+
+    # Generator for SSE stream
+    async def generate_stream():
+        full_response = ""
+
+        if turn["cached"]:
+            chunks = replay_cached()
+        else:
+            chunks = stream_flights.subscribe(
+                turn["answer_key"],
+                upstream,
+                should_stop=http_request.is_disconnected,
+                on_start=ai_response.record_stream_started,
+                on_abort=handle.cancel,
+                on_finish=upstream_finished
+            )
+
+        async with aclosing(chunks):
+            async for chunk in chunks:
                 if "error" in chunk:
+                    # Upstream ends right after an error; drain it normally
                     yield f"data: {json_lib.dumps({'error': chunk['error']})}\n\n"
-                    return
+                    continue
 
                 if "text" in chunk:
                     full_response += chunk["text"]
                     yield f"data: {json_lib.dumps({'text': chunk['text']})}\n\n"
 
                 if chunk.get("done"):
-                    # Update conversation state
-                    entities = metadata.get('entities', {})
-                    intent = metadata.get('kg_intent', metadata.get('intent', 'general'))
-                    ci.update_conversation_state(
-                        state=conv_state,
-                        query=request.message,
-                        entities=entities,
-                        intent=intent,
-                        response=full_response
-                    )
-
-                    # Update conversation history
-                    history.append({"role": "user", "content": request.message})
-                    history.append({"role": "assistant", "content": full_response})
-                    conversations[conv_id] = history[-10:]
+                    # Update conversation state and history (may hit the shared session DB)
+                    await concurrency.run_blocking(_finish_stream_turn, request, turn, full_response)
 
                     # Send done event with metadata
                     yield f"data: {json_lib.dumps({'done': True, 'conversation_id': conv_id})}\n\n"
 
-        return StreamingResponse(
-            generate_stream(),
-            media_type="text/event-stream",
-            headers={
-                "Cache-Control": "no-cache",
-                "Connection": "keep-alive",
-                "X-Accel-Buffering": "no"  # Disable nginx buffering
-            }
-        )
+    return StreamingResponse(
+        generate_stream(),
+        media_type="text/event-stream",
+        headers=sse_headers
+    )
 
-    except Exception as e:
-        async def error_stream():
-            yield f"data: {json_lib.dumps({'error': str(e)})}\n\n"
 
-        return StreamingResponse(
-            error_stream(),
-            media_type="text/event-stream"
-        )
+def _finish_stream_turn(request: ChatRequest, turn: dict, full_response: str):
+    """Per-conversation bookkeeping once a stream completes (pipeline worker thread)."""
+    metadata = turn["metadata"]
+    entities = metadata.get('entities', {})
+    intent = metadata.get('kg_intent', metadata.get('intent', 'general'))
+    ci.update_conversation_state(
+        state=turn["conv_state"],
+        query=request.message,
+        entities=entities,
+        intent=intent,
+        response=full_response
+    )
+    _append_history(turn["conversation_id"], request.message, full_response)
 
 
 # ============================================
@@ -486,6 +705,30 @@ async def get_fan_enhancements(club: str, message: str = ""):
     }
 
 
+# ============================================
+# PAGINATION
+# ============================================
+
+def _valid_cursor(kind: str, cursor: Optional[str]) -> Optional[str]:
+    """Reject malformed cursors (or ones from another listing) with a 400."""
+    if cursor:
+        try:
+            database.decode_cursor(kind, cursor)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+    return cursor
+
+
+def _page_meta(kind: str, rows: list, limit: int, offset: int = 0) -> dict:
+    """PaginatedMeta fields; clients pass next_cursor back as ?cursor= for the next page."""
+    return {
+        "limit": limit,
+        "offset": offset,
+        "next_cursor": database.next_cursor(kind, rows, limit),
+        "timestamp": datetime.utcnow().isoformat()
+    }
+
+
 # ============================================
 # TEAMS ENDPOINTS
 # ============================================
@@ -494,14 +737,14 @@ async def get_fan_enhancements(club: str, message: str = ""):
 async def list_teams(
     league: Optional[str] = None,
     limit: int = Query(default=20, ge=1, le=100),
-    offset: int = Query(default=0, ge=0)
+    offset: int = Query(default=0, ge=0),
+    cursor: Optional[str] = None
 ):
-    """List teams with optional filtering."""
-    teams = database.get_teams(limit=limit, offset=offset, league=league)
-    return ApiResponse(
-        data=teams,
-        meta={"limit": limit, "offset": offset, "timestamp": datetime.utcnow().isoformat()}
+    """List teams with optional filtering (keyset cursor; offset is legacy)."""
+    teams = database.get_teams(
+        limit=limit, offset=offset, league=league, cursor=_valid_cursor("teams", cursor)
     )
+    return ApiResponse(data=teams, meta=_page_meta("teams", teams, limit, offset))
 
 
 @app.get("/api/v1/teams/{team_id}")
@@ -547,17 +790,16 @@ async def list_players(
     team_id: Optional[int] = None,
     position: Optional[str] = None,
     limit: int = Query(default=20, ge=1, le=100),
-    offset: int = Query(default=0, ge=0)
+    offset: int = Query(default=0, ge=0),
+    cursor: Optional[str] = None
 ):
-    """List players with optional filtering."""
+    """List players with optional filtering (keyset cursor; offset is legacy)."""
     players = database.get_players(
         limit=limit, offset=offset,
-        team_id=team_id, position=position
-    )
-    return ApiResponse(
-        data=players,
-        meta={"limit": limit, "offset": offset, "timestamp": datetime.utcnow().isoformat()}
+        team_id=team_id, position=position,
+        cursor=_valid_cursor("players", cursor)
     )
+    return ApiResponse(data=players, meta=_page_meta("players", players, limit, offset))
 
 
 @app.get("/api/v1/players/{player_id}")
@@ -598,18 +840,17 @@ async def list_games(
     date_from: Optional[str] = None,
     date_to: Optional[str] = None,
     limit: int = Query(default=20, ge=1, le=100),
-    offset: int = Query(default=0, ge=0)
+    offset: int = Query(default=0, ge=0),
+    cursor: Optional[str] = None
 ):
-    """List games with optional filtering."""
+    """List games with optional filtering (keyset cursor; offset is legacy)."""
     games = database.get_games(
         limit=limit, offset=offset,
         team_id=team_id, status=status,
-        date_from=date_from, date_to=date_to
-    )
-    return ApiResponse(
-        data=games,
-        meta={"limit": limit, "offset": offset, "timestamp": datetime.utcnow().isoformat()}
+        date_from=date_from, date_to=date_to,
+        cursor=_valid_cursor("games", cursor)
     )
+    return ApiResponse(data=games, meta=_page_meta("games", games, limit, offset))
 
 
 @app.get("/api/v1/games/live")
@@ -651,11 +892,14 @@ async def get_game(game_id: int):
 async def list_injuries(
     team_id: Optional[int] = None,
     status: str = "active",
-    limit: int = 50
+    limit: int = Query(default=50, ge=1, le=100),
+    cursor: Optional[str] = None
 ):
-    """List injuries with optional filtering."""
-    injuries = database.get_injuries(team_id=team_id, status=status, limit=limit)
-    return ApiResponse(data=injuries)
+    """List injuries with optional filtering, newest first (keyset cursor)."""
+    injuries = database.get_injuries(
+        team_id=team_id, status=status, limit=limit, cursor=_valid_cursor("injuries", cursor)
+    )
+    return ApiResponse(data=injuries, meta=_page_meta("injuries", injuries, limit))
 
 
 @app.get("/api/v1/injuries/active")
@@ -680,11 +924,14 @@ async def get_team_injuries(team_id: int):
 async def list_transfers(
     team_id: Optional[int] = None,
     status: Optional[str] = None,
-    limit: int = 50
+    limit: int = Query(default=50, ge=1, le=100),
+    cursor: Optional[str] = None
 ):
-    """List transfers with optional filtering."""
-    transfers = database.get_transfers(team_id=team_id, status=status, limit=limit)
-    return ApiResponse(data=transfers)
+    """List transfers with optional filtering, newest first (keyset cursor)."""
+    transfers = database.get_transfers(
+        team_id=team_id, status=status, limit=limit, cursor=_valid_cursor("transfers", cursor)
+    )
+    return ApiResponse(data=transfers, meta=_page_meta("transfers", transfers, limit))
 
 
 @app.get("/api/v1/transfers/recent")
@@ -797,9 +1044,10 @@ async def oracle_predict(
     Returns three-way probabilities (home/draw/away) with confidence level.
     """
     try:
-        from predictor.statistical_predictor import FootballOracle
-        oracle = FootballOracle()
-        prediction = oracle.predict(home_team, away_team, home_odds, draw_odds, away_odds)
+        registry = get_predictor_registry()
+        oracle = registry.get("football_oracle")
+        with registry.timed("football_oracle"):
+            prediction = oracle.predict(home_team, away_team, home_odds, draw_odds, away_odds)
         return ApiResponse(data=prediction.to_dict())
     except Exception as e:
         return ApiResponse(data={}, error=str(e))
@@ -814,10 +1062,10 @@ async def oracle_upcoming():
     """
     try:
         from football_api import get_football_api
-        from predictor.statistical_predictor import FootballOracle
 
         api = get_football_api()
-        oracle = FootballOracle()
+        registry = get_predictor_registry()
+        oracle = registry.get("football_oracle")
 
         fixtures = api.get_upcoming_fixtures(days=7)
         predictions = []
@@ -826,7 +1074,8 @@ async def oracle_upcoming():
             home = fixture.get("home_team", "")
             away = fixture.get("away_team", "")
             if home and away:
-                pred = oracle.predict(home, away)
+                with registry.timed("football_oracle"):
+                    pred = oracle.predict(home, away)
                 predictions.append({
                     "fixture": f"{home} vs {away}",
                     "date": fixture.get("date", ""),
@@ -877,11 +1126,13 @@ async def oracle_accuracy():
 @app.get("/api/v1/legends")
 async def list_legends(
     team_id: Optional[int] = None,
-    limit: int = Query(default=50, ge=1, le=100)
+    limit: int = Query(default=50, ge=1, le=100),
+    cursor: Optional[str] = None
 ):
-    """List club legends with optional team filtering."""
-    legends = database.get_legends(team_id=team_id, limit=limit)
-    return ApiResponse(data=legends)
+    """List club legends with optional team filtering (keyset cursor)."""
+    kind = "team_legends" if team_id else "legends"
+    legends = database.get_legends(team_id=team_id, limit=limit, cursor=_valid_cursor(kind, cursor))
+    return ApiResponse(data=legends, meta=_page_meta(kind, legends, limit))
 
 
 @app.get("/api/v1/legends/{legend_id}")
@@ -957,17 +1208,17 @@ async def get_team_mood(team_id: int):
 @app.get("/api/v1/teams/{team_id}/personality")
 async def get_team_full_personality(team_id: int):
     """Get complete club personality (identity + mood + rivalries + moments)."""
-    team = database.get_team(team_id)
-    if not team:
+    persona = database.get_persona_document(team_id)
+    if not persona["team"]:
         raise HTTPException(status_code=404, detail="Team not found")
 
     return ApiResponse(data={
-        "team": team,
-        "identity": database.get_club_identity(team_id),
-        "mood": database.get_club_mood(team_id),
-        "rivalries": database.get_club_rivalries(team_id),
-        "moments": database.get_club_moments(team_id, limit=5),
-        "legends": database.get_legends(team_id=team_id, limit=5)
+        "team": persona["team"],
+        "identity": persona["identity"],
+        "mood": persona["mood"],
+        "rivalries": persona["rivalries"],
+        "moments": persona["moments"][:5],
+        "legends": persona["legends_by_name"]
     })
 
 
@@ -1110,16 +1361,15 @@ async def list_personas():
     }
 
     for club_key, team_id in team_ids.items():
-        team = database.get_team(team_id)
-        identity = database.get_club_identity(team_id)
-        mood = database.get_club_mood(team_id)
+        persona = database.get_persona_document(team_id)
+        team = persona["team"]
 
         personas.append({
             "club_key": club_key,
             "team_id": team_id,
             "display_name": team["name"] if team else club_key.replace("_", " ").title(),
-            "identity": identity,
-            "mood": mood
+            "identity": persona["identity"],
+            "mood": persona["mood"]
         })
 
     return ApiResponse(data={
@@ -1206,22 +1456,15 @@ async def search(
     type: str = "all",
     limit: int = 10
 ):
-    """Unified search across all entities."""
-    if type == "all":
-        results = database.search_all(q, limit=limit)
-    elif type == "players":
-        results = {"players": database.search_players(q, limit=limit)}
-    elif type == "teams":
-        results = {"teams": database.search_teams(q, limit=limit)}
-    elif type == "news":
-        results = {"news": database.search_news(q, limit=limit)}
-    else:
-        results = database.search_all(q, limit=limit)
-
-    total = sum(len(v) for v in results.values())
+    """Unified ranked search across all entities (global top-k by bm25)."""
+    tables = [type] if type in database.SEARCH_SOURCES else list(database.SEARCH_SOURCES)
+    hits = database.search(q, limit=limit, tables=tables)
+
+    # Grouped view keeps the per-type shape; each list is in rank order
+    results = {table: [hit for hit in hits if hit["type"] == table] for table in tables}
 
     return ApiResponse(
-        data=SearchResults(query=q, results=results, total=total)
+        data=SearchResults(query=q, results=results, hits=hits, total=len(hits))
     )
 
 
@@ -1398,19 +1641,13 @@ def get_prediction_engine():
 
 
 # Tri-Lens Predictor (xG + Oracle + Upset Detection)
-tri_lens_predictor = None
-
 def get_tri_lens_predictor():
-    """Lazy initialization of Tri-Lens predictor."""
-    global tri_lens_predictor
-    if tri_lens_predictor is None:
-        try:
-            tri_lens_predictor = TriLensPredictor()
-            print("Tri-Lens Predictor initialized: 53.2% accuracy, 17.3% draw detection")
-        except Exception as e:
-            print(f"Error initializing Tri-Lens predictor: {e}")
-            tri_lens_predictor = None
-    return tri_lens_predictor
+    """Shared Tri-Lens predictor from the registry (reloaded when ratings/data change)."""
+    try:
+        return get_predictor_registry().get("tri_lens")
+    except Exception as e:
+        print(f"Error initializing Tri-Lens predictor: {e}")
+        return None
 
 
 from pydantic import BaseModel
@@ -1440,13 +1677,14 @@ async def tri_lens_predict(request: TriLensRequest):
         if predictor is None:
             raise HTTPException(status_code=500, detail="Predictor not available")
 
-        pred = predictor.predict(
-            request.home_team,
-            request.away_team,
-            request.home_odds,
-            request.draw_odds,
-            request.away_odds
-        )
+        with get_predictor_registry().timed("tri_lens"):
+            pred = predictor.predict(
+                request.home_team,
+                request.away_team,
+                request.home_odds,
+                request.draw_odds,
+                request.away_odds
+            )
 
         return ApiResponse(data={
             "home_team": pred.home_team,
@@ -1618,24 +1856,12 @@ async def get_match_context(home_team: str, away_team: str):
 # BRIDGE ENDPOINTS (Fan <-> Predictor)
 # ============================================
 
-# Name mapping for cross-system queries
-TEAM_NAME_MAP = {
-    "wolves": "wolverhampton",
-    "wolverhampton": "wolves",
-    "spurs": "tottenham",
-    "man_united": "manchester_united",
-    "man_city": "manchester_city",
-}
-
-
 def normalize_team_name(name: str, for_system: str = "fan") -> str:
-    """Normalize team name for cross-system queries."""
-    name_lower = name.lower().replace(" ", "_").replace("-", "_")
-    if for_system == "fan" and name_lower == "wolves":
-        return "Wolverhampton"
-    if for_system == "predictor" and name_lower == "wolverhampton":
-        return "Wolves"
-    return name
+    """Normalize team name for cross-system queries (fan DB name or predictor slug)."""
+    team = team_identity.resolve(name)
+    if team is None:
+        return name
+    return team.slug if for_system == "predictor" else team.name
 
 
 @app.get("/api/v1/teams/{team_id}/insights")
@@ -1689,21 +1915,22 @@ async def get_match_preview(home_team_id: int, away_team_id: int):
     - Predictor data: patterns, insights, upset probability
     """
     try:
-        # Get teams from fan DB
-        home_team = database.get_team(home_team_id)
-        away_team = database.get_team(away_team_id)
+        # Teams and fan context from the persona documents
+        home_persona = database.get_persona_document(home_team_id)
+        away_persona = database.get_persona_document(away_team_id)
+        home_team = home_persona["team"]
+        away_team = away_persona["team"]
 
         if not home_team or not away_team:
             raise HTTPException(status_code=404, detail="Team not found")
 
-        # Fan context
-        home_identity = database.get_club_identity(home_team_id)
-        away_identity = database.get_club_identity(away_team_id)
-        home_mood = database.get_club_mood(home_team_id)
-        away_mood = database.get_club_mood(away_team_id)
+        home_identity = home_persona["identity"]
+        away_identity = away_persona["identity"]
+        home_mood = home_persona["mood"]
+        away_mood = away_persona["mood"]
 
         # Check for rivalry
-        rivalries = database.get_club_rivalries(home_team_id)
+        rivalries = home_persona["rivalries"]
         is_derby = False
         derby_info = None
         for rivalry in rivalries:
@@ -1875,10 +2102,20 @@ async def get_security_metrics(days: int = Query(default=7, ge=1, le=30)):
 # METRICS ENDPOINT (Phase 2)
 # ============================================
 
-@app.get("/api/v1/metrics")
+@app.get("/api/v1/metrics", response_class=PlainTextResponse)
+async def get_prometheus_metrics():
+    """
+    Prometheus text exposition of in-process metrics.
+    Served from memory only - no database queries on scrape.
+    """
+    return PlainTextResponse(metrics.render(), media_type=metrics.CONTENT_TYPE)
+
+
+@app.get("/api/v1/metrics/summary")
 async def get_system_metrics():
     """
-    Get system metrics - response times, API costs, cache stats.
+    Get system metrics summary - analytics, DB stats, security, streaming.
+    Runs aggregate queries; use /api/v1/metrics for frequent scraping.
     """
     try:
         analytics = database.get_analytics_summary(days=7)
@@ -1889,6 +2126,19 @@ async def get_system_metrics():
             "analytics": analytics,
             "database": db_stats,
             "security": security,
+            "streaming": ai_response.get_stream_stats(),
+            "pipeline": concurrency.get_stats(),
+            "llm_pool": http_pool.get_pool().get_stats(),
+            "response_cache": response_cache.get_cache().get_stats() if response_cache.get_cache() else None,
+            "sessions": session_store.get_stats(),
+            "write_behind": database.get_write_behind_stats(),
+            "predictors": get_predictor_registry().get_stats(),
+            "sqlite_connections": sqlite_pool.get_stats(),
+            "sqlite_queries": query_trace.get_stats(),
+            "single_flight": {
+                "chat": chat_flights.get_stats(),
+                "chat_stream": stream_flights.get_stats(),
+            },
             "timestamp": datetime.utcnow().isoformat()
         })
     except Exception as e:
@@ -1937,19 +2187,22 @@ async def get_on_this_day(date: Optional[str] = None):
 async def get_trivia_question(
     team_id: Optional[int] = None,
     category: Optional[str] = None,
-    difficulty: str = "medium"
+    difficulty: str = "medium",
+    session_id: Optional[str] = None
 ):
     """
     Get a random trivia question.
 
     Categories: legends, history, transfers, rivalries, stats
     Difficulty: easy, medium, hard, expert
+    Pass a session_id to avoid repeats until the matching questions run out.
     """
     try:
         question = database.get_trivia_question(
             team_id=team_id,
             category=category,
-            difficulty=difficulty
+            difficulty=difficulty,
+            session_id=session_id
         )
 
         if not question:
@@ -2116,6 +2369,9 @@ async def record_match_result(
     """
     if result.upper() not in ["W", "D", "L"]:
         raise HTTPException(status_code=400, detail="Result must be W, D, or L")
+    if database.SERVING_MODE:
+        # Mood and persona documents live in the immutable main database here
+        raise HTTPException(status_code=409, detail="Match results are recorded on the build side, not on serving nodes")
 
     try:
         team = database.get_team(team_id)
@@ -11,49 +11,68 @@ Provides data-driven insights from 25 years of match history:
 """
 
 import sqlite3
+from contextlib import contextmanager
 from datetime import datetime
 from typing import List, Dict, Optional, Tuple
 from pathlib import Path
 
+try:
+    import sqlite_pool
+    from calendar_index import DayCache, file_version, month_day_filter, month_day_key
+    from team_identity import has_team_ids, history_names, lookup_team_id
+except ImportError:  # Imported as backend.match_insights
+    from backend import sqlite_pool
+    from backend.calendar_index import DayCache, file_version, month_day_filter, month_day_key
+    from backend.team_identity import has_team_ids, history_names, lookup_team_id
+
 DB_PATH = Path(__file__).parent.parent / "soccer_ai_architecture_kg.db"
 
+# "On this day" results per (db, MM-DD, team, limit), until match_history changes
+_on_this_day_cache = DayCache("on_this_day_matches")
+
 
 class MatchInsights:
     """
     Killer features powered by 230K matches + 26K ELO snapshots.
     """
 
-    # Team name mappings (CSV names to canonical names)
-    TEAM_ALIASES = {
-        "man united": ["Man United", "Manchester United", "Manchester Utd"],
-        "man city": ["Man City", "Manchester City"],
-        "tottenham": ["Tottenham", "Spurs", "Tottenham Hotspur"],
-        "wolves": ["Wolves", "Wolverhampton"],
-        "nott'm forest": ["Nott'm Forest", "Nottingham Forest", "Forest"],
-        "newcastle": ["Newcastle", "Newcastle United", "Newcastle Utd"],
-        "west ham": ["West Ham", "West Ham United"],
-        "aston villa": ["Aston Villa", "Villa"],
-        "leicester": ["Leicester", "Leicester City"],
-        "leeds": ["Leeds", "Leeds United"],
-        "brighton": ["Brighton", "Brighton & Hove Albion"],
-        "crystal palace": ["Crystal Palace", "C Palace"],
-        "sheffield united": ["Sheffield United", "Sheffield Utd", "Sheff Utd"],
-        "west brom": ["West Brom", "West Bromwich", "WBA"],
-    }
-
     def __init__(self, db_path: str = None):
         self.db_path = db_path or str(DB_PATH)
 
+    @contextmanager
     def _get_conn(self):
-        return sqlite3.connect(self.db_path)
+        """This thread's read-only connection, released on exit (also on error)."""
+        conn = sqlite_pool.acquire(self.db_path, readonly=True)
+        try:
+            yield conn
+        finally:
+            conn.close()
 
     def _normalize_team(self, name: str) -> List[str]:
         """Get all variations of a team name for matching."""
-        name_lower = name.lower()
-        for canonical, aliases in self.TEAM_ALIASES.items():
-            if name_lower in canonical or any(name_lower in a.lower() for a in aliases):
-                return aliases
-        return [name]
+        return history_names(name)
+
+    def _team_sides(self, conn, team: str) -> Tuple[str, str, list]:
+        """
+        (home predicate, away predicate, params for either) matching a team.
+
+        Compares canonical team ids once match_history has them, otherwise
+        falls back to the list of name variations.
+        """
+        if has_team_ids(conn):
+            team_id = lookup_team_id(conn, team)
+            if team_id is not None:
+                return "home_team_id = ?", "away_team_id = ?", [team_id]
+        team_vars = self._normalize_team(team)
+        placeholders = ','.join(['?' for _ in team_vars])
+        return f"home_team IN ({placeholders})", f"away_team IN ({placeholders})", team_vars
+
+    def _pair_filter(self, conn, team1: str, team2: str) -> Tuple[str, list, Tuple[str, list]]:
+        """WHERE fragment for matches between two teams, and team1's home predicate."""
+        home1, away1, params1 = self._team_sides(conn, team1)
+        home2, away2, params2 = self._team_sides(conn, team2)
+        where = f"(({home1} AND {away2}) OR ({home2} AND {away1}))"
+        return where, params1 + params2 + params2 + params1, (home1, params1)
 
     def on_this_day(self, month: int = None, day: int = None,
                     team: str = None, limit: int = 10) -> List[Dict]:
@@ -66,49 +85,49 @@ class MatchInsights:
             team: Optional team filter
             limit: Max results
         """
-        if month is None:
-            month = datetime.now().month
-        if day is None:
-            day = datetime.now().day
-
-        date_pattern = f"%-{month:02d}-{day:02d}"
-
-        conn = self._get_conn()
-        cursor = conn.cursor()
-
-        query = """
-            SELECT match_date, home_team, away_team, ft_home, ft_away,
-                   division, home_elo, away_elo
-            FROM match_history
-            WHERE match_date LIKE ?
-            AND ft_home IS NOT NULL
-        """
-        params = [date_pattern]
+        key = month_day_key(month, day)
+        results = _on_this_day_cache.get_or_compute(
+            (self.db_path, key, team, limit),
+            file_version(self.db_path),
+            lambda: self._on_this_day(key, team, limit)
+        )
+        return [dict(match) for match in results]
+
+    def _on_this_day(self, key: str, team: Optional[str], limit: int) -> List[Dict]:
+        with self._get_conn() as conn:
+            cursor = conn.cursor()
+
+            query = f"""
+                SELECT match_date, home_team, away_team, ft_home, ft_away,
+                       division, home_elo, away_elo
+                FROM match_history
+                WHERE {month_day_filter(conn, "match_history", "match_date")}
+                AND ft_home IS NOT NULL
+            """
+            params = [key]
+
+            if team:
+                home, away, team_params = self._team_sides(conn, team)
+                query += f" AND ({home} OR {away})"
+                params.extend(team_params * 2)
+
+            query += " ORDER BY (ft_home + ft_away) DESC, ABS(ft_home - ft_away) DESC LIMIT ?"
+            params.append(limit)
+
+            cursor.execute(query, params)
+            results = []
+            for row in cursor.fetchall():
+                results.append({
+                    "date": row[0],
+                    "home_team": row[1],
+                    "away_team": row[2],
+                    "score": f"{row[3]}-{row[4]}",
+                    "division": row[5],
+                    "home_elo": row[6],
+                    "away_elo": row[7],
+                    "years_ago": datetime.now().year - int(row[0][:4]) if row[0] else None
+                })
 
-        if team:
-            team_vars = self._normalize_team(team)
-            placeholders = ','.join(['?' for _ in team_vars])
-            query += f" AND (home_team IN ({placeholders}) OR away_team IN ({placeholders}))"
-            params.extend(team_vars * 2)
-
-        query += " ORDER BY (ft_home + ft_away) DESC, ABS(ft_home - ft_away) DESC LIMIT ?"
-        params.append(limit)
-
-        cursor.execute(query, params)
-        results = []
-        for row in cursor.fetchall():
-            results.append({
-                "date": row[0],
-                "home_team": row[1],
-                "away_team": row[2],
-                "score": f"{row[3]}-{row[4]}",
-                "division": row[5],
-                "home_elo": row[6],
-                "away_elo": row[7],
-                "years_ago": datetime.now().year - int(row[0][:4]) if row[0] else None
-            })
-
-        conn.close()
         return results
 
     def head_to_head(self, team1: str, team2: str) -> Dict:
@@ -118,145 +137,134 @@ class MatchInsights:
         Returns:
             Dict with wins, draws, losses, goals, biggest wins for each side
         """
-        conn = self._get_conn()
-        cursor = conn.cursor()
-
-        team1_vars = self._normalize_team(team1)
-        team2_vars = self._normalize_team(team2)
-
-        # Get all matches between teams
-        placeholders1 = ','.join(['?' for _ in team1_vars])
-        placeholders2 = ','.join(['?' for _ in team2_vars])
-
-        query = f"""
-            SELECT match_date, home_team, away_team, ft_home, ft_away,
-                   ht_home, ht_away, home_elo, away_elo
-            FROM match_history
-            WHERE ((home_team IN ({placeholders1}) AND away_team IN ({placeholders2}))
-                   OR (home_team IN ({placeholders2}) AND away_team IN ({placeholders1})))
-            AND ft_home IS NOT NULL
-            ORDER BY match_date DESC
-        """
-
-        cursor.execute(query, team1_vars + team2_vars + team2_vars + team1_vars)
-        matches = cursor.fetchall()
-
-        stats = {
-            "team1": team1,
-            "team2": team2,
-            "total_matches": len(matches),
-            "team1_wins": 0,
-            "team2_wins": 0,
-            "draws": 0,
-            "team1_goals": 0,
-            "team2_goals": 0,
-            "team1_biggest_win": None,
-            "team2_biggest_win": None,
-            "recent_matches": [],
-            "all_matches": []
-        }
-
-        max_diff_t1 = 0
-        max_diff_t2 = 0
-
-        for row in matches:
-            date, home, away, fth, fta, hth, hta, home_elo, away_elo = row
-
-            # Determine if team1 is home or away
-            is_team1_home = home.lower() in [t.lower() for t in team1_vars]
-
-            if is_team1_home:
-                t1_goals, t2_goals = fth, fta
-            else:
-                t1_goals, t2_goals = fta, fth
-
-            stats["team1_goals"] += t1_goals
-            stats["team2_goals"] += t2_goals
-
-            if t1_goals > t2_goals:
-                stats["team1_wins"] += 1
-                diff = t1_goals - t2_goals
-                if diff > max_diff_t1:
-                    max_diff_t1 = diff
-                    stats["team1_biggest_win"] = {
-                        "date": date,
-                        "score": f"{fth}-{fta}",
-                        "home": home,
-                        "away": away
-                    }
-            elif t2_goals > t1_goals:
-                stats["team2_wins"] += 1
-                diff = t2_goals - t1_goals
-                if diff > max_diff_t2:
-                    max_diff_t2 = diff
-                    stats["team2_biggest_win"] = {
-                        "date": date,
-                        "score": f"{fth}-{fta}",
-                        "home": home,
-                        "away": away
-                    }
-            else:
-                stats["draws"] += 1
-
-            match_info = {
-                "date": date,
-                "home": home,
-                "away": away,
-                "score": f"{fth}-{fta}"
+        with self._get_conn() as conn:
+            cursor = conn.cursor()
+
+            # Get all matches between teams
+            pair, pair_params, (team1_home, team1_params) = self._pair_filter(conn, team1, team2)
+
+            query = f"""
+                SELECT match_date, home_team, away_team, ft_home, ft_away,
+                       ht_home, ht_away, home_elo, away_elo, ({team1_home}) AS team1_home
+                FROM match_history
+                WHERE {pair}
+                AND ft_home IS NOT NULL
+                ORDER BY match_date DESC
+            """
+
+            cursor.execute(query, team1_params + pair_params)
+            matches = cursor.fetchall()
+
+            stats = {
+                "team1": team1,
+                "team2": team2,
+                "total_matches": len(matches),
+                "team1_wins": 0,
+                "team2_wins": 0,
+                "draws": 0,
+                "team1_goals": 0,
+                "team2_goals": 0,
+                "team1_biggest_win": None,
+                "team2_biggest_win": None,
+                "recent_matches": [],
+                "all_matches": []
             }
-            stats["all_matches"].append(match_info)
 
-        stats["recent_matches"] = stats["all_matches"][:5]
-        conn.close()
+            max_diff_t1 = 0
+            max_diff_t2 = 0
+
+            for row in matches:
+                date, home, away, fth, fta, hth, hta, home_elo, away_elo, is_team1_home = row
+
+                if is_team1_home:
+                    t1_goals, t2_goals = fth, fta
+                else:
+                    t1_goals, t2_goals = fta, fth
+
+                stats["team1_goals"] += t1_goals
+                stats["team2_goals"] += t2_goals
+
+                if t1_goals > t2_goals:
+                    stats["team1_wins"] += 1
+                    diff = t1_goals - t2_goals
+                    if diff > max_diff_t1:
+                        max_diff_t1 = diff
+                        stats["team1_biggest_win"] = {
+                            "date": date,
+                            "score": f"{fth}-{fta}",
+                            "home": home,
+                            "away": away
+                        }
+                elif t2_goals > t1_goals:
+                    stats["team2_wins"] += 1
+                    diff = t2_goals - t1_goals
+                    if diff > max_diff_t2:
+                        max_diff_t2 = diff
+                        stats["team2_biggest_win"] = {
+                            "date": date,
+                            "score": f"{fth}-{fta}",
+                            "home": home,
+                            "away": away
+                        }
+                else:
+                    stats["draws"] += 1
+
+                match_info = {
+                    "date": date,
+                    "home": home,
+                    "away": away,
+                    "score": f"{fth}-{fta}"
+                }
+                stats["all_matches"].append(match_info)
+
+            stats["recent_matches"] = stats["all_matches"][:5]
         return stats
 
     def find_comebacks(self, team: str = None, limit: int = 10) -> List[Dict]:
         """
         Find matches where a team was losing at half-time but won.
         """
-        conn = self._get_conn()
-        cursor = conn.cursor()
-
-        query = """
-            SELECT match_date, home_team, away_team, ht_home, ht_away,
-                   ft_home, ft_away, division
-            FROM match_history
-            WHERE ht_home IS NOT NULL AND ft_home IS NOT NULL
-            AND (
-                (ht_home < ht_away AND ft_home > ft_away)  -- Home comeback
-                OR (ht_away < ht_home AND ft_away > ft_home)  -- Away comeback
-            )
-        """
-        params = []
+        with self._get_conn() as conn:
+            cursor = conn.cursor()
+
+            query = """
+                SELECT match_date, home_team, away_team, ht_home, ht_away,
+                       ft_home, ft_away, division
+                FROM match_history
+                WHERE ht_home IS NOT NULL AND ft_home IS NOT NULL
+                AND (
+                    (ht_home < ht_away AND ft_home > ft_away)  -- Home comeback
+                    OR (ht_away < ht_home AND ft_away > ft_home)  -- Away comeback
+                )
+            """
+            params = []
+
+            if team:
+                home, away, team_params = self._team_sides(conn, team)
+                query += f" AND ({home} OR {away})"
+                params.extend(team_params * 2)
+
+            query += " ORDER BY ABS((ft_home - ft_away) - (ht_home - ht_away)) DESC LIMIT ?"
+            params.append(limit)
+
+            cursor.execute(query, params)
+            results = []
+
+            for row in cursor.fetchall():
+                date, home, away, hth, hta, fth, fta, div = row
+                home_comeback = hth < hta and fth > fta
+
+                results.append({
+                    "date": date,
+                    "home_team": home,
+                    "away_team": away,
+                    "ht_score": f"{hth}-{hta}",
+                    "ft_score": f"{fth}-{fta}",
+                    "comeback_team": home if home_comeback else away,
+                    "turnaround": abs((fth - fta) - (hth - hta)),
+                    "division": div
+                })
 
-        if team:
-            team_vars = self._normalize_team(team)
-            placeholders = ','.join(['?' for _ in team_vars])
-            query += f" AND (home_team IN ({placeholders}) OR away_team IN ({placeholders}))"
-            params.extend(team_vars * 2)
-
-        query += " ORDER BY ABS((ft_home - ft_away) - (ht_home - ht_away)) DESC LIMIT ?"
-        params.append(limit)
-
-        cursor.execute(query, params)
-        results = []
-
-        for row in cursor.fetchall():
-            date, home, away, hth, hta, fth, fta, div = row
-            home_comeback = hth < hta and fth > fta
-
-            results.append({
-                "date": date,
-                "home_team": home,
-                "away_team": away,
-                "ht_score": f"{hth}-{hta}",
-                "ft_score": f"{fth}-{fta}",
-                "comeback_team": home if home_comeback else away,
-                "turnaround": abs((fth - fta) - (hth - hta)),
-                "division": div
-            })
-
-        conn.close()
         return results
 
     def find_upsets(self, elo_diff_min: int = 100, limit: int = 10) -> List[Dict]:
@@ -266,79 +274,77 @@ class MatchInsights:
         Args:
             elo_diff_min: Minimum ELO difference to qualify as upset
         """
-        conn = self._get_conn()
-        cursor = conn.cursor()
-
-        query = """
-            SELECT match_date, home_team, away_team, ft_home, ft_away,
-                   home_elo, away_elo, division
-            FROM match_history
-            WHERE home_elo IS NOT NULL AND away_elo IS NOT NULL
-            AND ft_home IS NOT NULL
-            AND (
-                (home_elo - away_elo > ? AND ft_away > ft_home)  -- Away upset
-                OR (away_elo - home_elo > ? AND ft_home > ft_away)  -- Home upset
-            )
-            ORDER BY ABS(home_elo - away_elo) DESC
-            LIMIT ?
-        """
+        with self._get_conn() as conn:
+            cursor = conn.cursor()
+
+            query = """
+                SELECT match_date, home_team, away_team, ft_home, ft_away,
+                       home_elo, away_elo, division
+                FROM match_history
+                WHERE home_elo IS NOT NULL AND away_elo IS NOT NULL
+                AND ft_home IS NOT NULL
+                AND (
+                    (home_elo - away_elo > ? AND ft_away > ft_home)  -- Away upset
+                    OR (away_elo - home_elo > ? AND ft_home > ft_away)  -- Home upset
+                )
+                ORDER BY ABS(home_elo - away_elo) DESC
+                LIMIT ?
+            """
+
+            cursor.execute(query, [elo_diff_min, elo_diff_min, limit])
+            results = []
+
+            for row in cursor.fetchall():
+                date, home, away, fth, fta, home_elo, away_elo, div = row
+                elo_diff = abs(home_elo - away_elo)
+                underdog = away if home_elo > away_elo else home
+
+                results.append({
+                    "date": date,
+                    "home_team": home,
+                    "away_team": away,
+                    "score": f"{fth}-{fta}",
+                    "elo_diff": round(elo_diff, 1),
+                    "underdog": underdog,
+                    "division": div
+                })
 
-        cursor.execute(query, [elo_diff_min, elo_diff_min, limit])
-        results = []
-
-        for row in cursor.fetchall():
-            date, home, away, fth, fta, home_elo, away_elo, div = row
-            elo_diff = abs(home_elo - away_elo)
-            underdog = away if home_elo > away_elo else home
-
-            results.append({
-                "date": date,
-                "home_team": home,
-                "away_team": away,
-                "score": f"{fth}-{fta}",
-                "elo_diff": round(elo_diff, 1),
-                "underdog": underdog,
-                "division": div
-            })
-
-        conn.close()
         return results
 
     def get_elo_trajectory(self, team: str, start_year: int = 2000) -> List[Dict]:
         """
         Get ELO rating over time for a team.
         """
-        conn = self._get_conn()
-        cursor = conn.cursor()
-
-        team_vars = self._normalize_team(team)
-        placeholders = ','.join(['?' for _ in team_vars])
+        with self._get_conn() as conn:
+            cursor = conn.cursor()
 
-        query = f"""
-            SELECT date, elo
-            FROM elo_history
-            WHERE club IN ({placeholders})
-            AND date >= ?
-            ORDER BY date
-        """
+            team_vars = self._normalize_team(team)
+            placeholders = ','.join(['?' for _ in team_vars])
 
-        cursor.execute(query, team_vars + [f"{start_year}-01-01"])
-        results = [{"date": row[0], "elo": row[1]} for row in cursor.fetchall()]
-
-        # Calculate peak and low
-        if results:
-            peak = max(results, key=lambda x: x["elo"])
-            low = min(results, key=lambda x: x["elo"])
-            return {
-                "team": team,
-                "trajectory": results,
-                "peak": peak,
-                "low": low,
-                "current": results[-1] if results else None,
-                "change": results[-1]["elo"] - results[0]["elo"] if len(results) > 1 else 0
-            }
+            query = f"""
+                SELECT date, elo
+                FROM elo_history
+                WHERE club IN ({placeholders})
+                AND date >= ?
+                ORDER BY date
+            """
+
+            cursor.execute(query, team_vars + [f"{start_year}-01-01"])
+            results = [{"date": row[0], "elo": row[1]} for row in cursor.fetchall()]
+
+            # Calculate peak and low
+            if results:
+                peak = max(results, key=lambda x: x["elo"])
+                low = min(results, key=lambda x: x["elo"])
+                return {
+                    "team": team,
+                    "trajectory": results,
+                    "peak": peak,
+                    "low": low,
+                    "current": results[-1] if results else None,
+                    "change": results[-1]["elo"] - results[0]["elo"] if len(results) > 1 else 0
+                }
 
-        conn.close()
         return {"team": team, "trajectory": [], "peak": None, "low": None}
 
     def derby_stats(self, team1: str, team2: str) -> Dict:
@@ -347,35 +353,29 @@ class MatchInsights:
         """
         h2h = self.head_to_head(team1, team2)
 
-        conn = self._get_conn()
-        cursor = conn.cursor()
-
-        team1_vars = self._normalize_team(team1)
-        team2_vars = self._normalize_team(team2)
-
-        placeholders1 = ','.join(['?' for _ in team1_vars])
-        placeholders2 = ','.join(['?' for _ in team2_vars])
-
-        # Get card stats
-        query = f"""
-            SELECT
-                SUM(COALESCE(home_yellow, 0) + COALESCE(away_yellow, 0)) as yellows,
-                SUM(COALESCE(home_red, 0) + COALESCE(away_red, 0)) as reds,
-                AVG(ft_home + ft_away) as avg_goals
-            FROM match_history
-            WHERE ((home_team IN ({placeholders1}) AND away_team IN ({placeholders2}))
-                   OR (home_team IN ({placeholders2}) AND away_team IN ({placeholders1})))
-            AND ft_home IS NOT NULL
-        """
+        with self._get_conn() as conn:
+            cursor = conn.cursor()
+
+            pair, pair_params, _ = self._pair_filter(conn, team1, team2)
+
+            # Get card stats
+            query = f"""
+                SELECT
+                    SUM(COALESCE(home_yellow, 0) + COALESCE(away_yellow, 0)) as yellows,
+                    SUM(COALESCE(home_red, 0) + COALESCE(away_red, 0)) as reds,
+                    AVG(ft_home + ft_away) as avg_goals
+                FROM match_history
+                WHERE {pair}
+                AND ft_home IS NOT NULL
+            """
 
-        cursor.execute(query, team1_vars + team2_vars + team2_vars + team1_vars)
-        row = cursor.fetchone()
+            cursor.execute(query, pair_params)
+            row = cursor.fetchone()
 
-        h2h["total_yellows"] = int(row[0]) if row[0] else 0
-        h2h["total_reds"] = int(row[1]) if row[1] else 0
-        h2h["avg_goals"] = round(row[2], 2) if row[2] else 0
+            h2h["total_yellows"] = int(row[0]) if row[0] else 0
+            h2h["total_reds"] = int(row[1]) if row[1] else 0
+            h2h["avg_goals"] = round(row[2], 2) if row[2] else 0
 
-        conn.close()
         return h2h
 
     def generate_matchday_context(self, team: str, opponent: str) -> str:
@@ -208,10 +208,11 @@ class ApiResponse(BaseModel):
 
 
 class PaginatedMeta(BaseModel):
-    """Pagination metadata."""
-    total: int
+    """Pagination metadata. next_cursor is None on the last page."""
+    total: Optional[int] = None
     limit: int
-    offset: int
+    offset: int = 0
+    next_cursor: Optional[str] = None
     timestamp: datetime = Field(default_factory=datetime.utcnow)
 
 
@@ -219,6 +220,7 @@ class SearchResults(BaseModel):
     """Search results model."""
     query: str
     results: Dict[str, List[Any]]
+    hits: List[Dict[str, Any]] = []
     total: int
 
 
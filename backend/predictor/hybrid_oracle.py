@@ -17,6 +17,7 @@ The hybrid approach:
 Target: 60%+ overall accuracy with balanced detection.
 """
 
+import sys
 import math
 import sqlite3
 from pathlib import Path
@@ -33,33 +34,18 @@ except ImportError:
     from team_ratings import TeamRatingSystem, expected_score, HOME_ADVANTAGE
     from draw_detector import analyze_draw_probability, enhanced_predict
 
+try:
+    from team_identity import team_slug
+    from sqlite_pool import readonly_uri
+except ImportError:  # Run from predictor/ - these live in backend/
+    sys.path.insert(0, str(Path(__file__).parent.parent))
+    from team_identity import team_slug
+    from sqlite_pool import readonly_uri
+
 # Database path
 DB_PATH = Path(__file__).parent.parent.parent / "soccer_ai_architecture_kg.db"
 
 
-# Team name normalization map
-TEAM_ALIASES = {
-    # Display names to team_ids
-    "manchester city": "manchester_city",
-    "man city": "manchester_city",
-    "manchester united": "manchester_united",
-    "man united": "manchester_united",
-    "man utd": "manchester_united",
-    "tottenham hotspur": "tottenham",
-    "spurs": "tottenham",
-    "wolverhampton": "wolves",
-    "wolverhampton wanderers": "wolves",
-    "nottingham forest": "nottingham_forest",
-    "nott'm forest": "nottingham_forest",
-    "crystal palace": "crystal_palace",
-    "west ham": "west_ham",
-    "west ham united": "west_ham",
-    "aston villa": "aston_villa",
-    "leicester city": "leicester",
-    "ipswich town": "ipswich",
-}
-
-
 def normalize_team_name(name: str) -> str:
     """
     Convert any team name format to the normalized team_id.
@@ -69,27 +55,7 @@ def normalize_team_name(name: str) -> str:
         "Man Utd" -> "manchester_united"
         "Wolves" -> "wolves"
     """
-    # Lowercase and strip
-    normalized = name.lower().strip()
-
-    # Check aliases first
-    if normalized in TEAM_ALIASES:
-        return TEAM_ALIASES[normalized]
-
-    # Standard conversion: spaces to underscores
-    normalized = normalized.replace(" ", "_")
-
-    # Remove common suffixes
-    for suffix in ["_fc", "_afc", "_united", "_city"]:
-        if normalized.endswith(suffix) and normalized != suffix.lstrip("_"):
-            # Keep "manchester_city", but strip "_fc" from "arsenal_fc"
-            base = normalized.replace(suffix, "")
-            if base in ["arsenal", "chelsea", "liverpool", "brentford",
-                        "fulham", "wolves", "brighton", "bournemouth",
-                        "everton", "newcastle", "leicester", "ipswich", "southampton"]:
-                normalized = base
-
-    return normalized
+    return team_slug(name)
 
 
 @dataclass
@@ -221,7 +187,7 @@ class HybridOracle:
             return
 
         try:
-            conn = sqlite3.connect(self.db_path)
+            conn = sqlite3.connect(readonly_uri(self.db_path), uri=True)
             cursor = conn.cursor()
 
             # Get last 200 PL matches for pattern context
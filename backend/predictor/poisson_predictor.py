@@ -18,6 +18,7 @@ This approach captures the inherent randomness of football through
 the Poisson distribution, which naturally produces draw probabilities.
 """
 
+import sys
 import math
 import sqlite3
 from pathlib import Path
@@ -25,6 +26,14 @@ from dataclasses import dataclass
 from typing import Dict, List, Tuple, Optional
 from collections import defaultdict
 
+try:
+    from team_identity import team_slug
+    from sqlite_pool import readonly_uri
+except ImportError:  # Run from predictor/ - these live in backend/
+    sys.path.insert(0, str(Path(__file__).parent.parent))
+    from team_identity import team_slug
+    from sqlite_pool import readonly_uri
+
 DB_PATH = Path(__file__).parent.parent.parent / "soccer_ai_architecture_kg.db"
 
 
@@ -141,7 +150,7 @@ class PoissonPredictor:
             return
 
         try:
-            conn = sqlite3.connect(self.db_path)
+            conn = sqlite3.connect(readonly_uri(self.db_path), uri=True)
             cursor = conn.cursor()
 
             # Get recent Premier League matches (last 2 seasons)
@@ -175,8 +184,9 @@ class PoissonPredictor:
                 if h_goals is None or a_goals is None:
                     continue
 
-                home = home.lower().replace(" ", "_")
-                away = away.lower().replace(" ", "_")
+                # Same keys predict() looks up ("Man United" -> "manchester_united")
+                home = self._normalize_team(home)
+                away = self._normalize_team(away)
 
                 team_stats[home]["home_scored"] += h_goals
                 team_stats[home]["home_conceded"] += a_goals
@@ -248,33 +258,8 @@ class PoissonPredictor:
             self.team_defense[team] = defense
 
     def _normalize_team(self, name: str) -> str:
-        """Normalize team name to match our keys."""
-        name = name.lower().strip()
-
-        aliases = {
-            "manchester city": "manchester_city",
-            "man city": "manchester_city",
-            "manchester united": "manchester_united",
-            "man united": "manchester_united",
-            "man utd": "manchester_united",
-            "tottenham hotspur": "tottenham",
-            "spurs": "tottenham",
-            "wolverhampton": "wolves",
-            "wolverhampton wanderers": "wolves",
-            "nottingham forest": "nottingham_forest",
-            "nott'm forest": "nottingham_forest",
-            "crystal palace": "crystal_palace",
-            "west ham": "west_ham",
-            "west ham united": "west_ham",
-            "aston villa": "aston_villa",
-            "leicester city": "leicester",
-            "ipswich town": "ipswich",
-        }
-
-        if name in aliases:
-            return aliases[name]
-
-        return name.replace(" ", "_")
+        """Normalize team name to match our keys (canonical team slug)."""
+        return team_slug(name)
 
     def predict(self, home_team: str, away_team: str) -> PoissonPrediction:
         """
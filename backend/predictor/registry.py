@@ -0,0 +1,240 @@
+"""
+Predictor Registry
+Long-lived, shared predictor instances for the API.
+
+Building a predictor reads team_ratings.json and/or scans match_history,
+so endpoints must not construct one per request. The registry builds each
+model once, hands the same instance to every caller, and rebuilds it when
+its backing files change. The rebuild happens off to the side and the new
+instance is swapped in atomically - callers never see a half-loaded model.
+
+Models:
+- football_oracle: FootballOracle (ELO + patterns)
+- hybrid_oracle: HybridOracle (ELO + pattern + market fusion)
+- poisson: PoissonPredictor (xG)
+- tri_lens: TriLensPredictor (shares the poisson / hybrid_oracle instances;
+  its calls into them are timed against those models too)
+"""
+
+import os
+import time
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+try:
+    from metrics import REGISTRY as METRICS
+except ImportError:  # Standalone predictor scripts run without the backend on sys.path
+    METRICS = None
+
+# Files that, when changed, make a model stale
+RATINGS_PATH = Path(__file__).parent / "team_ratings.json"
+MATCH_DB_PATH = Path(__file__).parent.parent.parent / "soccer_ai_architecture_kg.db"
+
+# How often get() re-checks backing files for changes (seconds)
+RELOAD_CHECK_SECONDS = float(os.getenv("PREDICTOR_RELOAD_CHECK_SECONDS", "30"))
+
+if METRICS is not None:
+    PREDICTIONS = METRICS.counter(
+        "soccer_ai_predictions_total", "Predictions served, by model.", ("model",)
+    )
+    PREDICTION_SECONDS = METRICS.histogram(
+        "soccer_ai_prediction_seconds", "Time per prediction, by model.", ("model",)
+    )
+    RELOADS = METRICS.counter(
+        "soccer_ai_predictor_reloads_total", "Predictor (re)builds, by model.", ("model",)
+    )
+
+
+def _fingerprint(paths: List[Path]) -> Tuple:
+    """(mtime, size) of every backing file, including SQLite WAL files."""
+    parts = []
+    for path in paths:
+        for candidate in (path, Path(f"{path}-wal")):
+            try:
+                stat = candidate.stat()
+                parts.append((str(candidate), stat.st_mtime_ns, stat.st_size))
+            except OSError:
+                parts.append((str(candidate), None, None))
+    return tuple(parts)
+
+
+class _Model:
+    """One registered model: its factory, backing files, instance and counters."""
+
+    def __init__(self, name: str, factory: Callable[[], Any], sources: List[Path]):
+        self.name = name
+        self.factory = factory
+        self.sources = sources
+        self.instance = None
+        self.fingerprint = None
+        self.checked_at = 0.0
+        self.loaded_at = None
+        self.build_lock = threading.Lock()
+        self.stats = {"predictions": 0, "errors": 0, "busy_seconds": 0.0, "reloads": 0, "load_ms": None}
+
+
+class _TimedPredictor:
+    """A shared instance whose predict() calls are timed against its model."""
+
+    def __init__(self, registry: "PredictorRegistry", name: str, instance: Any):
+        self._registry = registry
+        self._name = name
+        self._instance = instance
+
+    def predict(self, *args, **kwargs):
+        with self._registry.timed(self._name):
+            return self._instance.predict(*args, **kwargs)
+
+    def __getattr__(self, attr: str) -> Any:
+        return getattr(self._instance, attr)
+
+
+class PredictorRegistry:
+    """Thread-safe registry of shared predictor instances."""
+
+    def __init__(self, reload_check_seconds: float = RELOAD_CHECK_SECONDS):
+        self.reload_check_seconds = reload_check_seconds
+        self._models: Dict[str, _Model] = {}
+        self._lock = threading.Lock()
+        self._started = time.time()
+
+    def register(self, name: str, factory: Callable[[], Any], sources: List[Path]):
+        """Register a model built by factory() and invalidated by changes to sources."""
+        with self._lock:
+            self._models[name] = _Model(name, factory, list(sources))
+
+    def _build(self, model: _Model, fingerprint: Tuple):
+        start = time.perf_counter()
+        instance = model.factory()
+        load_ms = round((time.perf_counter() - start) * 1000, 1)
+        with self._lock:
+            # Swap in one step; callers holding the old instance finish with it
+            model.instance = instance
+            model.fingerprint = fingerprint
+            model.loaded_at = time.time()
+            model.stats["reloads"] += 1
+            model.stats["load_ms"] = load_ms
+        if METRICS is not None:
+            RELOADS.inc(model=model.name)
+        print(f"[PREDICTORS] Loaded {model.name} in {load_ms}ms")
+
+    def get(self, name: str) -> Any:
+        """Shared instance of a model, (re)built if missing or its data changed."""
+        model = self._models[name]
+        now = time.monotonic()
+        if model.instance is not None and now - model.checked_at < self.reload_check_seconds:
+            return model.instance
+
+        fingerprint = _fingerprint(model.sources)
+        model.checked_at = now
+        if model.instance is not None and fingerprint == model.fingerprint:
+            return model.instance
+
+        # One builder per model; others keep serving the old instance meanwhile
+        if model.instance is not None:
+            if not model.build_lock.acquire(blocking=False):
+                return model.instance
+        else:
+            model.build_lock.acquire()
+        try:
+            if model.instance is None or model.fingerprint != fingerprint:
+                self._build(model, fingerprint)
+        finally:
+            model.build_lock.release()
+        return model.instance
+
+    def reload(self, name: Optional[str] = None):
+        """Force a rebuild of one model (or all of them)."""
+        names = [name] if name else list(self._models)
+        for model_name in names:
+            model = self._models[model_name]
+            with model.build_lock:
+                self._build(model, _fingerprint(model.sources))
+
+    def get_timed(self, name: str) -> Any:
+        """get(name), with predict() accounted via timed(name) - for models used by other models."""
+        return _TimedPredictor(self, name, self.get(name))
+
+    @contextmanager
+    def timed(self, name: str):
+        """Account one prediction (or batch item) against a model's throughput."""
+        model = self._models[name]
+        start = time.perf_counter()
+        failed = False
+        try:
+            yield
+        except Exception:
+            failed = True
+            raise
+        finally:
+            elapsed = time.perf_counter() - start
+            with self._lock:
+                model.stats["predictions"] += 1
+                model.stats["busy_seconds"] += elapsed
+                if failed:
+                    model.stats["errors"] += 1
+            if METRICS is not None:
+                PREDICTIONS.inc(model=name)
+                PREDICTION_SECONDS.observe(elapsed, model=name)
+
+    def get_stats(self) -> Dict[str, Dict]:
+        """Per-model load state and prediction throughput."""
+        uptime = max(time.time() - self._started, 1e-9)
+        result = {}
+        with self._lock:
+            for name, model in self._models.items():
+                stats = dict(model.stats)
+                count = stats["predictions"]
+                stats["loaded"] = model.instance is not None
+                stats["loaded_at"] = model.loaded_at
+                stats["avg_ms"] = round(stats["busy_seconds"] / count * 1000, 2) if count else None
+                stats["predictions_per_second"] = round(count / uptime, 3)
+                stats["max_predictions_per_second"] = (
+                    round(count / stats["busy_seconds"], 1) if stats["busy_seconds"] else None
+                )
+                del stats["busy_seconds"]
+                result[name] = stats
+        return result
+
+
+def _default_registry() -> PredictorRegistry:
+    # tri_lens_predictor puts this directory on sys.path and imports its
+    # lenses as top-level modules; use the same modules so classes match.
+    try:
+        from . import tri_lens_predictor
+    except ImportError:
+        import tri_lens_predictor
+    from statistical_predictor import FootballOracle
+    HybridOracle = tri_lens_predictor.HybridOracle
+    PoissonPredictor = tri_lens_predictor.PoissonPredictor
+    TriLensPredictor = tri_lens_predictor.TriLensPredictor
+
+    registry = PredictorRegistry()
+    registry.register("football_oracle", FootballOracle, [RATINGS_PATH, MATCH_DB_PATH])
+    registry.register("hybrid_oracle", HybridOracle, [RATINGS_PATH, MATCH_DB_PATH])
+    registry.register("poisson", PoissonPredictor, [MATCH_DB_PATH])
+    registry.register(
+        "tri_lens",
+        lambda: TriLensPredictor(
+            poisson=registry.get_timed("poisson"), oracle=registry.get_timed("hybrid_oracle")
+        ),
+        [RATINGS_PATH, MATCH_DB_PATH]
+    )
+    return registry
+
+
+# Singleton instance
+_registry_instance = None
+_registry_lock = threading.Lock()
+
+
+def get_registry() -> PredictorRegistry:
+    """Get the shared predictor registry."""
+    global _registry_instance
+    if _registry_instance is None:
+        with _registry_lock:
+            if _registry_instance is None:
+                _registry_instance = _default_registry()
+    return _registry_instance
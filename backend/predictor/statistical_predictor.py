@@ -23,13 +23,23 @@ The Oracle combines:
 - Derby/rivalry detection
 """
 
+import sys
 import math
 import sqlite3
+import threading
 from pathlib import Path
 from dataclasses import dataclass
 from typing import Optional, Tuple, Dict, List
 from datetime import datetime
 
+try:
+    from team_identity import has_team_ids, lookup_team_id
+    from sqlite_pool import readonly_uri
+except ImportError:  # Run from predictor/ - these live in backend/
+    sys.path.insert(0, str(Path(__file__).parent.parent))
+    from team_identity import has_team_ids, lookup_team_id
+    from sqlite_pool import readonly_uri
+
 # Database path (project root contains the database)
 DB_PATH = Path(__file__).parent.parent.parent / "soccer_ai_architecture_kg.db"
 
@@ -127,8 +137,20 @@ class FootballOracle:
         self.db_path = db_path or DB_PATH
         self.team_ratings: Dict[str, float] = {}
         self.team_form: Dict[str, List[str]] = {}
+        # H2H lookups: one read-only connection per thread, results memoised
+        # (the registry builds a fresh Oracle when match_history changes)
+        self._local = threading.local()
+        self._h2h_cache: Dict[Tuple[str, str], float] = {}
         self._load_ratings()
 
+    def _get_conn(self) -> sqlite3.Connection:
+        """This thread's read-only connection to the match database."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(readonly_uri(self.db_path), uri=True, check_same_thread=False)
+            self._local.conn = conn
+        return conn
+
     def _load_ratings(self):
         """Load current team ratings from database or initialize defaults."""
         # Premier League 2024-25 starting ELOs (based on 2023-24 finish + transfers)
@@ -236,27 +258,53 @@ class FootballOracle:
         - Positive = home team historically dominant
         - Negative = away team historically dominant
         """
+        cached = self._h2h_cache.get((home_team, away_team))
+        if cached is not None:
+            return cached
+        adjustment = self._lookup_h2h_adjustment(home_team, away_team)
+        if len(self._h2h_cache) < 10000:
+            self._h2h_cache[(home_team, away_team)] = adjustment
+        return adjustment
+
+    def _lookup_h2h_adjustment(self, home_team: str, away_team: str) -> float:
+        """Uncached head-to-head query behind _get_h2h_adjustment."""
         if not self.db_path.exists():
             return 0.0
 
         try:
-            conn = sqlite3.connect(self.db_path)
+            conn = self._get_conn()
             cursor = conn.cursor()
 
+            home_id = away_id = None
+            if has_team_ids(conn):
+                home_id = lookup_team_id(conn, home_team)
+                away_id = lookup_team_id(conn, away_team)
+
             # Get last 10 meetings
-            cursor.execute("""
-                SELECT ft_result, COUNT(*) as cnt
-                FROM match_history
-                WHERE (home_team LIKE ? AND away_team LIKE ?)
-                   OR (home_team LIKE ? AND away_team LIKE ?)
-                GROUP BY ft_result
-                ORDER BY match_date DESC
-                LIMIT 10
-            """, (f"%{home_team}%", f"%{away_team}%",
-                  f"%{away_team}%", f"%{home_team}%"))
+            if home_id is not None and away_id is not None:
+                # Index seek on canonical team ids
+                cursor.execute("""
+                    SELECT ft_result, COUNT(*) as cnt
+                    FROM match_history
+                    WHERE (home_team_id = ? AND away_team_id = ?)
+                       OR (home_team_id = ? AND away_team_id = ?)
+                    GROUP BY ft_result
+                    ORDER BY match_date DESC
+                    LIMIT 10
+                """, (home_id, away_id, away_id, home_id))
+            else:
+                cursor.execute("""
+                    SELECT ft_result, COUNT(*) as cnt
+                    FROM match_history
+                    WHERE (home_team LIKE ? AND away_team LIKE ?)
+                       OR (home_team LIKE ? AND away_team LIKE ?)
+                    GROUP BY ft_result
+                    ORDER BY match_date DESC
+                    LIMIT 10
+                """, (f"%{home_team}%", f"%{away_team}%",
+                      f"%{away_team}%", f"%{home_team}%"))
 
             results = cursor.fetchall()
-            conn.close()
 
             if not results:
                 return 0.0
@@ -168,12 +168,17 @@ class TriLensPredictor:
     Together, they form a complete picture.
     """
 
-    def __init__(self, db_path: Optional[Path] = None):
+    def __init__(
+        self,
+        db_path: Optional[Path] = None,
+        poisson: Optional[PoissonPredictor] = None,
+        oracle: Optional[HybridOracle] = None
+    ):
         self.db_path = db_path or DB_PATH
 
-        # Initialize all three lenses
-        self.poisson = PoissonPredictor(self.db_path)
-        self.oracle = HybridOracle(self.db_path)
+        # Initialize all three lenses (or reuse shared ones from the registry)
+        self.poisson = poisson or PoissonPredictor(self.db_path)
+        self.oracle = oracle or HybridOracle(self.db_path)
 
         # Fusion weights (tuned)
         self.poisson_weight = 0.55  # Best calibration - slightly dominant
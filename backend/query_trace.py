@@ -0,0 +1,361 @@
+"""
+Soccer-AI Query Tracing
+Per-statement instrumentation for pooled SQLite connections.
+
+Every statement run on a pooled connection is timed (execute plus fetches)
+and its rows counted. Inside a request (track()), statements are also
+collected per request, so a request can report how many queries it issued
+and which ones repeated - an N+1 loop shows up as one statement text with
+a high call count.
+
+- Requests issuing more than SQLITE_QUERY_BUDGET statements are logged
+  with their most repeated statements.
+- Statements slower than SQLITE_SLOW_QUERY_MS are logged together with
+  their EXPLAIN QUERY PLAN.
+
+Set SQLITE_TRACE_ENABLED=0 to hand out plain cursors instead.
+"""
+
+import os
+import time
+import sqlite3
+import threading
+import contextvars
+from collections import deque
+from contextlib import contextmanager
+from typing import Dict, List, Optional
+
+try:
+    from metrics import REGISTRY
+except ImportError:  # Imported as backend.query_trace
+    from backend.metrics import REGISTRY
+
+# ============================================
+# CONFIGURATION
+# ============================================
+
+TRACE_ENABLED = os.getenv("SQLITE_TRACE_ENABLED", "1") not in ("0", "false", "no")
+
+# Statements at or above this duration are logged with their query plan (ms)
+SLOW_QUERY_MS = float(os.getenv("SQLITE_SLOW_QUERY_MS", "50"))
+
+# Statements per request before the request is flagged
+QUERY_BUDGET = int(os.getenv("SQLITE_QUERY_BUDGET", "40"))
+
+# Re-explain the same slow statement at most this often (seconds)
+EXPLAIN_INTERVAL = float(os.getenv("SQLITE_EXPLAIN_INTERVAL", "60"))
+
+# Distinct statement texts kept in the process-wide table
+MAX_STATEMENTS = 500
+
+QUERY_SECONDS = REGISTRY.histogram(
+    "soccer_ai_sqlite_query_seconds", "Time per SQLite statement (execute + fetch)."
+)
+SLOW_QUERIES = REGISTRY.counter(
+    "soccer_ai_sqlite_slow_queries_total", "Statements slower than SQLITE_SLOW_QUERY_MS."
+)
+QUERIES_PER_REQUEST = REGISTRY.histogram(
+    "soccer_ai_sqlite_queries_per_request",
+    "SQLite statements issued per HTTP request, by route template.",
+    ("route",),
+    buckets=(1, 2, 5, 10, 20, 40, 80, 160, 320),
+)
+OVER_BUDGET = REGISTRY.counter(
+    "soccer_ai_sqlite_query_budget_exceeded_total",
+    "Requests that issued more statements than SQLITE_QUERY_BUDGET.",
+    ("route",),
+)
+
+_current: contextvars.ContextVar = contextvars.ContextVar("soccer_ai_queries", default=None)
+
+_lock = threading.Lock()
+_statements: Dict[str, Dict] = {}
+_explained: Dict[str, float] = {}
+_slow_log: deque = deque(maxlen=50)
+_over_budget_log: deque = deque(maxlen=20)
+
+
+def normalize(sql: str) -> str:
+    """Collapse whitespace so the same statement always has the same key."""
+    return " ".join(sql.split())
+
+
+# ============================================
+# PER-REQUEST COLLECTION
+# ============================================
+
+class RequestQueries:
+    """Statements issued while handling one request."""
+
+    def __init__(self, label: str, budget: int = QUERY_BUDGET):
+        self.label = label
+        self.budget = budget
+        self.queries = 0
+        self.seconds = 0.0
+        self.rows = 0
+        self._statements: Dict[str, List] = {}  # sql -> [calls, seconds, rows]
+        self._lock = threading.Lock()
+
+    def add(self, sql: str, seconds: float, rows: int):
+        with self._lock:
+            self.queries += 1
+            self.seconds += seconds
+            self.rows += rows
+            entry = self._statements.setdefault(sql, [0, 0.0, 0])
+            entry[0] += 1
+            entry[1] += seconds
+            entry[2] += rows
+
+    @property
+    def over_budget(self) -> bool:
+        return self.queries > self.budget
+
+    def top(self, limit: int = 5) -> List[Dict]:
+        """Most repeated statements (ties broken by time spent)."""
+        with self._lock:
+            ranked = sorted(self._statements.items(), key=lambda kv: (kv[1][0], kv[1][1]), reverse=True)
+        return [
+            {"sql": sql[:200], "calls": calls, "ms": round(seconds * 1000, 2), "rows": rows}
+            for sql, (calls, seconds, rows) in ranked[:limit]
+        ]
+
+    def as_dict(self) -> Dict:
+        return {
+            "label": self.label,
+            "queries": self.queries,
+            "ms": round(self.seconds * 1000, 2),
+            "rows": self.rows,
+            "budget": self.budget,
+            "over_budget": self.over_budget,
+            "top": self.top(),
+        }
+
+
+@contextmanager
+def track(label: str, budget: int = QUERY_BUDGET):
+    """
+    Collect the statements issued inside this block (context-local).
+
+    label can be reassigned on the yielded object before the block ends,
+    e.g. once the route template is known.
+    """
+    request = RequestQueries(label, budget)
+    token = _current.set(request)
+    try:
+        yield request
+    finally:
+        _current.reset(token)
+        QUERIES_PER_REQUEST.observe(request.queries, route=request.label)
+        if request.over_budget:
+            OVER_BUDGET.inc(route=request.label)
+            summary = request.as_dict()
+            summary["at"] = time.time()
+            with _lock:
+                _over_budget_log.append(summary)
+            worst = summary["top"][0] if summary["top"] else None
+            print(
+                f"[SQL] {request.label} issued {request.queries} queries (budget {request.budget})"
+                + (f"; most repeated: {worst['calls']}x {worst['sql']}" if worst else "")
+            )
+
+
+def current_request() -> Optional[RequestQueries]:
+    """Queries collected for the current request, if any."""
+    return _current.get()
+
+
+# ============================================
+# STATEMENT RECORDING
+# ============================================
+
+class _Record:
+    __slots__ = ("sql", "params", "seconds", "rows", "request")
+
+    def __init__(self, sql: str, params):
+        self.sql = sql
+        self.params = params
+        self.seconds = 0.0
+        self.rows = 0
+        self.request = _current.get()
+
+
+def _explain(conn: sqlite3.Connection, sql: str, params) -> List[str]:
+    """EXPLAIN QUERY PLAN lines for a statement (empty if it can't be explained)."""
+    try:
+        # Plain cursor: the EXPLAIN itself must not be traced
+        rows = sqlite3.Cursor(conn).execute(f"EXPLAIN QUERY PLAN {sql}", params or ()).fetchall()
+    except (sqlite3.Error, ValueError):
+        return []
+    return [row[3] for row in rows]
+
+
+def _finish(record: _Record, conn: sqlite3.Connection):
+    sql = normalize(record.sql)
+    seconds = record.seconds
+    ms = seconds * 1000
+    slow = ms >= SLOW_QUERY_MS
+
+    QUERY_SECONDS.observe(seconds)
+    if record.request is not None:
+        record.request.add(sql, seconds, record.rows)
+
+    with _lock:
+        stats = _statements.get(sql)
+        if stats is None and len(_statements) < MAX_STATEMENTS:
+            stats = _statements[sql] = {"calls": 0, "total_ms": 0.0, "max_ms": 0.0, "rows": 0, "slow": 0}
+        if stats is not None:
+            stats["calls"] += 1
+            stats["total_ms"] += ms
+            stats["max_ms"] = max(stats["max_ms"], ms)
+            stats["rows"] += record.rows
+            stats["slow"] += slow
+        explain = False
+        if slow:
+            now = time.monotonic()
+            if now - _explained.get(sql, -EXPLAIN_INTERVAL) >= EXPLAIN_INTERVAL:
+                _explained[sql] = now
+                explain = True
+
+    if not slow:
+        return
+    SLOW_QUERIES.inc()
+    plan = _explain(conn, record.sql, record.params) if explain else None
+    entry = {
+        "sql": sql[:500],
+        "ms": round(ms, 2),
+        "rows": record.rows,
+        "request": record.request.label if record.request is not None else None,
+        "plan": plan,
+        "at": time.time(),
+    }
+    with _lock:
+        _slow_log.append(entry)
+    if explain:
+        print(f"[SQL] Slow query {entry['ms']}ms, {record.rows} rows: {entry['sql'][:200]}")
+        for line in plan or ["(no plan)"]:
+            print(f"[SQL]   {line}")
+
+
+class TracedCursor(sqlite3.Cursor):
+    """
+    Cursor that times each statement from execute() until its results are
+    exhausted (or the cursor is reused, closed or dropped).
+    """
+
+    _record: Optional[_Record] = None
+
+    def _close_record(self):
+        record = self._record
+        if record is not None:
+            self._record = None
+            _finish(record, self.connection)
+
+    def _run(self, method, sql, parameters, single: bool):
+        self._close_record()
+        record = _Record(sql, parameters if single else None)
+        start = time.perf_counter()
+        try:
+            method(sql, parameters)
+        finally:
+            record.seconds = time.perf_counter() - start
+            self._record = record
+        if self.description is None:
+            # Not a query - nothing to fetch
+            record.rows = max(self.rowcount, 0)
+            self._close_record()
+        return self
+
+    def _fetched(self, seconds: float, rows: int, done: bool):
+        record = self._record
+        if record is not None:
+            record.seconds += seconds
+            record.rows += rows
+            if done:
+                self._close_record()
+
+    def execute(self, sql, parameters=()):
+        return self._run(super().execute, sql, parameters, single=True)
+
+    def executemany(self, sql, seq_of_parameters):
+        return self._run(super().executemany, sql, seq_of_parameters, single=False)
+
+    def fetchone(self):
+        start = time.perf_counter()
+        row = super().fetchone()
+        self._fetched(time.perf_counter() - start, row is not None, done=row is None)
+        return row
+
+    def fetchmany(self, size=None):
+        size = self.arraysize if size is None else size
+        start = time.perf_counter()
+        rows = super().fetchmany(size)
+        self._fetched(time.perf_counter() - start, len(rows), done=len(rows) < size)
+        return rows
+
+    def fetchall(self):
+        start = time.perf_counter()
+        rows = super().fetchall()
+        self._fetched(time.perf_counter() - start, len(rows), done=True)
+        return rows
+
+    def __next__(self):
+        start = time.perf_counter()
+        try:
+            row = super().__next__()
+        except StopIteration:
+            self._fetched(time.perf_counter() - start, 0, done=True)
+            raise
+        self._fetched(time.perf_counter() - start, 1, done=False)
+        return row
+
+    def close(self):
+        self._close_record()
+        super().close()
+
+    def __del__(self):
+        try:
+            self._close_record()
+        except Exception:
+            pass  # Connection already gone (e.g. interpreter shutdown)
+
+
+def cursor_factory():
+    """Cursor class pooled connections should use."""
+    return TracedCursor if TRACE_ENABLED else sqlite3.Cursor
+
+
+# ============================================
+# STATS
+# ============================================
+
+def get_stats(limit: int = 10) -> Dict:
+    """Top statements by total time, recent slow statements and over-budget requests."""
+    with _lock:
+        statements = [(sql, dict(stats)) for sql, stats in _statements.items()]
+        slow = list(_slow_log)[-limit:]
+        over_budget = list(_over_budget_log)[-limit:]
+    statements.sort(key=lambda kv: kv[1]["total_ms"], reverse=True)
+    top = []
+    for sql, stats in statements[:limit]:
+        stats["total_ms"] = round(stats["total_ms"], 2)
+        stats["max_ms"] = round(stats["max_ms"], 2)
+        stats["avg_ms"] = round(stats["total_ms"] / stats["calls"], 3) if stats["calls"] else None
+        top.append({"sql": sql[:200], **stats})
+    return {
+        "enabled": TRACE_ENABLED,
+        "slow_query_ms": SLOW_QUERY_MS,
+        "query_budget": QUERY_BUDGET,
+        "distinct_statements": len(statements),
+        "top_statements": top,
+        "recent_slow": slow,
+        "recent_over_budget": over_budget,
+    }
+
+
+def reset():
+    """Forget collected statistics (tests / after a deploy)."""
+    with _lock:
+        _statements.clear()
+        _explained.clear()
+        _slow_log.clear()
+        _over_budget_log.clear()
@@ -9,6 +9,8 @@ import re
 from typing import List, Dict, Any, Optional, Tuple
 from datetime import datetime, timedelta
 import database
+from tracing import span, traced
+from team_identity import get_resolver
 
 # Import 500-node KG integration
 try:
@@ -31,28 +33,6 @@ except ImportError:
 # ENTITY EXTRACTION
 # ============================================
 
-# Common team name variations
-TEAM_ALIASES = {
-    "man utd": "Manchester United",
-    "man united": "Manchester United",
-    "united": "Manchester United",
-    "man city": "Manchester City",
-    "city": "Manchester City",
-    "liverpool": "Liverpool",
-    "arsenal": "Arsenal",
-    "gunners": "Arsenal",
-    "chelsea": "Chelsea",
-    "blues": "Chelsea",
-    "spurs": "Tottenham",
-    "tottenham": "Tottenham",
-    "barca": "Barcelona",
-    "barcelona": "Barcelona",
-    "real": "Real Madrid",
-    "real madrid": "Real Madrid",
-    "bayern": "Bayern Munich",
-    "psg": "Paris Saint-Germain",
-}
-
 # Time expressions
 TIME_PATTERNS = {
     "yesterday": -1,
@@ -115,10 +95,9 @@ def extract_entities(query: str) -> Dict[str, Any]:
         "raw_query": query
     }
 
-    # Extract team mentions
-    for alias, full_name in TEAM_ALIASES.items():
-        if alias in query_lower:
-            entities["teams"].append(full_name)
+    # Extract team mentions (any alias, e.g. "spurs" -> "Tottenham")
+    for team in get_resolver().find_in_text(query):
+        entities["teams"].append(team.name)
 
     # Extract time references
     for pattern, days_delta in TIME_PATTERNS.items():
@@ -143,7 +122,7 @@ def extract_entities(query: str) -> Dict[str, Any]:
     words = query.split()
     potential_names = []
     for i, word in enumerate(words):
-        if word[0].isupper() and word.lower() not in TEAM_ALIASES:
+        if word[0].isupper() and get_resolver().resolve(word) is None:
             # Could be a player name - try to combine with next word
             if i + 1 < len(words) and words[i + 1][0].isupper():
                 potential_names.append(f"{word} {words[i + 1]}")
@@ -226,6 +205,11 @@ def detect_intent(query: str) -> str:
 # CONTEXT RETRIEVAL
 # ============================================
 
+# Ranked FTS hits for general queries (global top-k across teams/players/news)
+GENERAL_SEARCH_LIMIT = 6
+# Prompt context wants plain-text snippets, not <mark> highlights
+SNIPPET_PLAIN = ("", "")
+
 def retrieve_context(query: str) -> Tuple[str, List[Dict]]:
     """
     Main RAG function. Retrieves relevant context for the query.
@@ -736,14 +720,18 @@ def retrieve_news_context(entities: Dict) -> Tuple[str, List[Dict]]:
     search_terms.extend([p["name"] for p in entities.get("players", [])])
 
     if search_terms:
-        search_query = " OR ".join(search_terms)
-        news = database.search_news(search_query, limit=3)
+        # Any entity may match; bm25 ranks articles mentioning more of them first
+        news = database.search(
+            " ".join(search_terms), limit=3, tables=["news"],
+            match_any=True, highlight=SNIPPET_PLAIN
+        )
         if news:
             context_lines.append("Related news:")
             for article in news:
                 context_lines.append(f"  - {article['title']} ({article.get('source', 'Unknown')})")
-                if article.get("summary"):
-                    context_lines.append(f"    {article['summary']}")
+                excerpt = article.get("summary") or article.get("snippet")
+                if excerpt:
+                    context_lines.append(f"    {excerpt}")
                 sources.append({"type": "news", "id": article["id"]})
 
     return "\n".join(context_lines), sources
@@ -757,7 +745,8 @@ def retrieve_general_context(entities: Dict) -> Tuple[str, List[Dict]]:
     # Use the raw query for FTS search
     query = entities.get("raw_query", "")
     if query:
-        results = database.search_all(query, limit=3)
+        hits = database.search(query, limit=GENERAL_SEARCH_LIMIT, highlight=SNIPPET_PLAIN)
+        results = {table: [hit for hit in hits if hit["type"] == table] for table in ("teams", "players", "news")}
 
         if results["teams"]:
             context_lines.append("Teams found:")
@@ -775,6 +764,8 @@ def retrieve_general_context(entities: Dict) -> Tuple[str, List[Dict]]:
             context_lines.append("Related news:")
             for article in results["news"]:
                 context_lines.append(f"  - {article['title']}")
+                if article.get("snippet"):
+                    context_lines.append(f"    {article['snippet']}")
                 sources.append({"type": "news", "id": article["id"]})
 
     return "\n".join(context_lines), sources
@@ -980,11 +971,9 @@ def get_team_id_by_name(club_name: str) -> Optional[int]:
     if not club_name:
         return None
 
-    # Normalize the name
-    normalized = club_name.lower().replace("_", " ").strip()
-
-    # Check aliases first
-    canonical = TEAM_ALIASES.get(normalized, normalized.title())
+    # Canonical fan DB name for any alias / slug ("man_utd" -> "Manchester United")
+    team = get_resolver().resolve(club_name)
+    canonical = team.name if team else club_name.lower().replace("_", " ").strip().title()
 
     # Query database for team
     teams = database.search_teams(canonical, limit=1)
@@ -994,20 +983,32 @@ def get_team_id_by_name(club_name: str) -> Optional[int]:
     return None
 
 
+# Rendered persona context: team_id -> (document built_at, club name, context, sources)
+_persona_context_cache: Dict[int, Tuple] = {}
+
+
 def get_club_persona_context(club_name: str) -> Tuple[str, List[Dict]]:
     """
     Get rich context for a club persona.
     Returns identity, legends, rivalries, mood - everything needed for persona.
-    """
-    context_parts = []
-    sources = []
 
+    Rendered from the club's persona document and reused until the
+    document is rebuilt.
+    """
     team_id = get_team_id_by_name(club_name)
     if not team_id:
         return "", []
 
+    persona = database.get_persona_document(team_id)
+    cached = _persona_context_cache.get(team_id)
+    if cached is not None and cached[:2] == (persona["built_at"], club_name):
+        return cached[2], [dict(source) for source in cached[3]]
+
+    context_parts = []
+    sources = []
+
     # Club identity
-    identity = database.get_club_identity(team_id)
+    identity = persona["identity"]
     if identity:
         context_parts.append(f"## Your Club: {identity.get('name', club_name)}")
         if identity.get("founded"):
@@ -1021,7 +1022,7 @@ def get_club_persona_context(club_name: str) -> Tuple[str, List[Dict]]:
         sources.append({"type": "club_identity", "id": team_id})
 
     # Legends
-    legends = database.get_legends(team_id, limit=5)
+    legends = persona["legends_by_name"]
     if legends:
         context_parts.append("\n## Your Legends")
         for legend in legends:
@@ -1031,7 +1032,7 @@ def get_club_persona_context(club_name: str) -> Tuple[str, List[Dict]]:
         sources.append({"type": "legends", "id": team_id})
 
     # Rivalries
-    rivalries = database.get_club_rivalries(team_id)
+    rivalries = persona["rivalries"]
     if rivalries:
         context_parts.append("\n## Your Rivalries")
         for rivalry in rivalries[:3]:
@@ -1040,16 +1041,19 @@ def get_club_persona_context(club_name: str) -> Tuple[str, List[Dict]]:
         sources.append({"type": "rivalries", "id": team_id})
 
     # Iconic moments
-    moments = database.get_club_moments(team_id, limit=3)
+    moments = persona["moments"][:3]
     if moments:
         context_parts.append("\n## Iconic Moments")
         for moment in moments:
             context_parts.append(f"- **{moment['title']}**")
         sources.append({"type": "moments", "id": team_id})
 
-    return "\n".join(context_parts), sources
+    context = "\n".join(context_parts)
+    _persona_context_cache[team_id] = (persona["built_at"], club_name, context, sources)
+    return context, [dict(source) for source in sources]
 
 
+@traced("rag.total")
 def retrieve_hybrid(query: str, club: str = None) -> Tuple[str, List[Dict], Dict]:
     """
     Hybrid retrieval combining FTS5 + Knowledge Graph.
@@ -1062,20 +1066,24 @@ def retrieve_hybrid(query: str, club: str = None) -> Tuple[str, List[Dict], Dict
         club: Optional club name for persona-aware retrieval (e.g., "arsenal", "chelsea")
     """
     # Extract entities with KG resolution
-    entities = extract_kg_entities(query)
+    with span("rag.extract_entities"):
+        entities = extract_kg_entities(query)
 
     # Get FTS5 context (standard RAG)
-    fts_context, fts_sources = retrieve_context(query)
+    with span("rag.fts5"):
+        fts_context, fts_sources = retrieve_context(query)
 
     # Get KG context from original KG
-    kg_context, kg_sources = retrieve_kg_context(entities)
+    with span("rag.kg_context"):
+        kg_context, kg_sources = retrieve_kg_context(entities)
 
     # === ENHANCED: 500-node KG Integration ===
     enhanced_kg_context = ""
     if KG_AVAILABLE:
         try:
-            kg = get_kg()
-            enhanced_result = kg.get_enhanced_context(query, club=club)
+            with span("rag.enhanced_kg"):
+                kg = get_kg()
+                enhanced_result = kg.get_enhanced_context(query, club=club)
             if enhanced_result.get("combined_context"):
                 enhanced_kg_context = enhanced_result["combined_context"]
                 # Add stats to track
@@ -1090,19 +1098,21 @@ def retrieve_hybrid(query: str, club: str = None) -> Tuple[str, List[Dict], Dict
 
     # Club persona enrichment: add club context even for generic queries
     if club and club != "default" and not team_node:
-        club_context, club_sources = get_club_persona_context(club)
-        if club_context:
-            kg_context = club_context + "\n" + kg_context if kg_context else club_context
-            kg_sources.extend(club_sources)
-        # Also get the team node for mood
-        team_id = get_team_id_by_name(club)
-        if team_id:
-            team_node = {"entity_id": team_id, "node_type": "team"}
+        with span("rag.club_persona"):
+            club_context, club_sources = get_club_persona_context(club)
+            if club_context:
+                kg_context = club_context + "\n" + kg_context if kg_context else club_context
+                kg_sources.extend(club_sources)
+            # Also get the team node for mood
+            team_id = get_team_id_by_name(club)
+            if team_id:
+                team_node = {"entity_id": team_id, "node_type": "team"}
 
     # Get mood for emotional calibration
     team_mood = None
     if team_node:
-        team_mood = database.get_club_mood(team_node["entity_id"])
+        with span("rag.club_mood"):
+            team_mood = database.get_club_mood(team_node["entity_id"])
 
     # Fuse contexts (original)
     fused_context = fuse_contexts(fts_context, kg_context, team_mood)
@@ -1120,7 +1130,8 @@ def retrieve_hybrid(query: str, club: str = None) -> Tuple[str, List[Dict], Dict
             # Get mood from live results
             mood_engine = get_mood_engine()
             club_name = club.replace("_", " ").title()
-            mood_result = mood_engine.generate_mood_aware_opening(club_name)
+            with span("rag.mood_engine"):
+                mood_result = mood_engine.generate_mood_aware_opening(club_name)
             enhanced_mood = {
                 "mood": mood_result.get("mood"),
                 "mood_value": mood_result.get("mood_value"),
@@ -1137,7 +1148,8 @@ def retrieve_hybrid(query: str, club: str = None) -> Tuple[str, List[Dict], Dict
             # If another team is mentioned, get H2H
             if detected_teams and detected_teams[0].lower() != club_name.lower():
                 opponent = detected_teams[0]
-                h2h = insights.head_to_head(club_name, opponent)
+                with span("rag.head_to_head"):
+                    h2h = insights.head_to_head(club_name, opponent)
                 if h2h.get("total_matches", 0) > 0:
                     live_context_parts.append(
                         f"H2H vs {opponent}: {h2h['team1_wins']}W-{h2h['draws']}D-{h2h['team2_wins']}L "
@@ -1145,7 +1157,8 @@ def retrieve_hybrid(query: str, club: str = None) -> Tuple[str, List[Dict], Dict
                     )
 
             # Get ELO context
-            elo = insights.get_elo_trajectory(club_name)
+            with span("rag.elo"):
+                elo = insights.get_elo_trajectory(club_name)
             if elo.get("current"):
                 live_context_parts.append(f"Current ELO: {elo['current']['elo']:.0f} (Peak: {elo['peak']['elo']:.0f} in {elo['peak']['date'][:4]})")
 
@@ -0,0 +1,267 @@
+"""
+Soccer-AI Response Cache
+Exact-match cache for generated answers, in front of
+ai_response.generate_response.
+
+Key: club + normalised query + hash of the retrieved context (and recent
+history). Entries expire by TTL, are evicted LRU, and are ignored once the
+data generation (database.get_data_generation) moves on - i.e. after a new
+result, mood update or match_history load.
+
+Backends:
+- memory: per-process OrderedDict (default)
+- sqlite: WAL-mode file shared by every worker on the box
+"""
+
+import os
+import re
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from metrics import cache_lookup
+
+# ============================================
+# CONFIGURATION
+# ============================================
+
+# "memory", "sqlite" or "off"
+CACHE_BACKEND = os.getenv("RESPONSE_CACHE_BACKEND", "memory").lower()
+CACHE_TTL_SECONDS = float(os.getenv("RESPONSE_CACHE_TTL", "300"))
+CACHE_MAX_ENTRIES = int(os.getenv("RESPONSE_CACHE_MAX_ENTRIES", "2048"))
+CACHE_DB_PATH = Path(os.getenv("RESPONSE_CACHE_DB", str(Path(__file__).parent / "response_cache.db")))
+
+
+# ============================================
+# KEYING
+# ============================================
+
+_WHITESPACE = re.compile(r"\s+")
+_EDGE_PUNCTUATION = re.compile(r"^[\s\W_]+|[\s\W_]+$")
+
+
+def normalize_query(query: str) -> str:
+    """Lowercase, collapse whitespace and trim edge punctuation ("Did we WIN??" -> "did we win")."""
+    return _EDGE_PUNCTUATION.sub("", _WHITESPACE.sub(" ", query.lower()))
+
+
+def context_fingerprint(context: str, history: Optional[List[Dict]] = None) -> str:
+    """Short hash of the retrieved context plus the history the LLM will see."""
+    digest = hashlib.sha256(context.encode("utf-8"))
+    for msg in (history or [])[-5:]:  # generate_response only sends the last 5
+        digest.update(b"\x00" + msg.get("role", "").encode() + b"\x01" + msg.get("content", "").encode("utf-8"))
+    return digest.hexdigest()[:32]
+
+
+def make_key(club: Optional[str], query: str, fingerprint: str) -> str:
+    """Cache key for one (club, normalised query, context) combination."""
+    raw = f"{club or 'default'}\x00{normalize_query(query)}\x00{fingerprint}"
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def is_cacheable(result: Dict) -> bool:
+    """Only successful, non-security answers are worth replaying."""
+    return bool(result.get("response")) and "error" not in result and "security" not in result
+
+
+# ============================================
+# BACKENDS
+# ============================================
+
+class MemoryBackend:
+    """In-process LRU with TTL."""
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            return entry
+
+    def put(self, key: str, generation: str, expires_at: float, value: Dict) -> int:
+        evicted = 0
+        with self._lock:
+            self._entries[key] = (generation, expires_at, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                evicted += 1
+        return evicted
+
+    def delete(self, key: str):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def size(self) -> int:
+        return len(self._entries)
+
+
+class SQLiteBackend:
+    """
+    WAL-mode SQLite cache shared across worker processes.
+
+    Each thread keeps its own connection; LRU order is tracked with a
+    last_used column and trimmed every few writes.
+    """
+
+    EVICT_EVERY = 64
+
+    def __init__(self, db_path: Path, max_entries: int):
+        self.db_path = str(db_path)
+        self.max_entries = max_entries
+        self._local = threading.local()
+        self._writes = 0
+        self._lock = threading.Lock()
+        conn = self._conn()
+        conn.execute("PRAGMA journal_mode = WAL")
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS response_cache (
+                cache_key TEXT PRIMARY KEY,
+                generation TEXT NOT NULL,
+                expires_at REAL NOT NULL,
+                last_used REAL NOT NULL,
+                payload TEXT NOT NULL
+            )
+        ''')
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_response_cache_last_used ON response_cache(last_used)")
+        conn.commit()
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=5, isolation_level=None)
+            conn.execute("PRAGMA synchronous = NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def get(self, key: str):
+        conn = self._conn()
+        row = conn.execute(
+            "SELECT generation, expires_at, payload FROM response_cache WHERE cache_key = ?", (key,)
+        ).fetchone()
+        if row is None:
+            return None
+        conn.execute("UPDATE response_cache SET last_used = ? WHERE cache_key = ?", (time.time(), key))
+        return row[0], row[1], json.loads(row[2])
+
+    def put(self, key: str, generation: str, expires_at: float, value: Dict) -> int:
+        conn = self._conn()
+        conn.execute(
+            "INSERT OR REPLACE INTO response_cache (cache_key, generation, expires_at, last_used, payload) "
+            "VALUES (?, ?, ?, ?, ?)",
+            (key, generation, expires_at, time.time(), json.dumps(value, separators=(",", ":")))
+        )
+        with self._lock:
+            self._writes += 1
+            due = self._writes % self.EVICT_EVERY == 0
+        if not due:
+            return 0
+        cursor = conn.execute('''
+            DELETE FROM response_cache WHERE cache_key IN (
+                SELECT cache_key FROM response_cache
+                ORDER BY last_used DESC
+                LIMIT -1 OFFSET ?
+            )
+        ''', (self.max_entries,))
+        conn.execute("DELETE FROM response_cache WHERE expires_at < ?", (time.time(),))
+        return cursor.rowcount
+
+    def delete(self, key: str):
+        self._conn().execute("DELETE FROM response_cache WHERE cache_key = ?", (key,))
+
+    def clear(self):
+        self._conn().execute("DELETE FROM response_cache")
+
+    def size(self) -> int:
+        return self._conn().execute("SELECT COUNT(*) FROM response_cache").fetchone()[0]
+
+
+# ============================================
+# CACHE
+# ============================================
+
+class ResponseCache:
+    """TTL + LRU answer cache validated against the data generation."""
+
+    def __init__(self, backend, ttl_seconds: float = CACHE_TTL_SECONDS, name: str = "llm_response"):
+        self.backend = backend
+        self.ttl_seconds = ttl_seconds
+        self.name = name
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "expired": 0, "stale_generation": 0, "stores": 0, "evictions": 0}
+
+    def _count(self, key: str, amount: int = 1):
+        with self._lock:
+            self._stats[key] += amount
+
+    def get(self, key: str, generation: str) -> Optional[Dict]:
+        """Cached answer for key, or None if missing, expired or from an older generation."""
+        entry = self.backend.get(key)
+        if entry is not None:
+            entry_generation, expires_at, value = entry
+            if expires_at < time.time():
+                self.backend.delete(key)
+                self._count("expired")
+            elif entry_generation != generation:
+                self.backend.delete(key)
+                self._count("stale_generation")
+            else:
+                self._count("hits")
+                cache_lookup(self.name, hit=True)
+                return value
+        self._count("misses")
+        cache_lookup(self.name, hit=False)
+        return None
+
+    def put(self, key: str, generation: str, value: Dict):
+        evicted = self.backend.put(key, generation, time.time() + self.ttl_seconds, value)
+        self._count("stores")
+        if evicted:
+            self._count("evictions", evicted)
+
+    def clear(self):
+        self.backend.clear()
+
+    def get_stats(self) -> Dict:
+        with self._lock:
+            stats = dict(self._stats)
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_rate"] = round(stats["hits"] / lookups, 3) if lookups else 0.0
+        stats["size"] = self.backend.size()
+        stats["backend"] = type(self.backend).__name__
+        return stats
+
+
+# Singleton instance
+_cache_instance = None
+_cache_lock = threading.Lock()
+
+
+def get_cache() -> Optional[ResponseCache]:
+    """Get the shared response cache (None when RESPONSE_CACHE_BACKEND=off)."""
+    global _cache_instance
+    if CACHE_BACKEND == "off":
+        return None
+    if _cache_instance is None:
+        with _cache_lock:
+            if _cache_instance is None:
+                if CACHE_BACKEND == "sqlite":
+                    backend = SQLiteBackend(CACHE_DB_PATH, CACHE_MAX_ENTRIES)
+                else:
+                    backend = MemoryBackend(CACHE_MAX_ENTRIES)
+                _cache_instance = ResponseCache(backend)
+    return _cache_instance
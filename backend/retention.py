@@ -0,0 +1,207 @@
+"""
+Soccer-AI Log Retention
+Moves old rows out of the append-only log tables into compressed monthly
+archives, so the serving databases only hold recent history.
+
+Policies (see RETENTION_POLICIES):
+- query_analytics     write DB (main DB unless serving)
+- security_log        write DB
+- interaction_log     KG database
+
+Rows older than RETENTION_DAYS are appended, one JSON object per line, to
+ARCHIVE_DIR/<policy>/<YYYY-MM>.jsonl.gz (each run appends a new gzip
+member, which gzip readers treat as one stream) and then deleted. Work is
+done in batches of RETENTION_BATCH_SIZE rows, oldest id first, each in its
+own short write transaction, so writers are never blocked for long. A
+crash between the archive append and the commit can leave a row in the
+archive twice; rows keep their id, so readers can dedupe.
+
+The hourly analytics rollups are separate tables and are not touched, so
+dashboards keep reporting archived history.
+
+Deletes production rows, so it is run from the command line (cron) on
+the node that owns the files, not exposed over HTTP.
+
+Usage:
+    python retention.py [--days N]
+"""
+
+import os
+import gzip
+import json
+import time
+import sqlite3
+from pathlib import Path
+from typing import Callable, Dict, Iterator, List, NamedTuple, Optional
+
+import database
+from kg.kg_database import KG_DB_PATH
+
+# ============================================
+# CONFIGURATION
+# ============================================
+
+# Rows older than this many days are archived
+RETENTION_DAYS = int(os.getenv("RETENTION_DAYS", "90"))
+
+# Refuse shorter windows (a typo'd --days 0 would archive everything)
+RETENTION_MIN_DAYS = int(os.getenv("RETENTION_MIN_DAYS", "30"))
+
+# Rows per archive/delete transaction
+RETENTION_BATCH_SIZE = int(os.getenv("RETENTION_BATCH_SIZE", "1000"))
+
+ARCHIVE_DIR = Path(os.getenv("RETENTION_ARCHIVE_DIR", str(Path(__file__).parent / "archive")))
+
+
+class RetentionPolicy(NamedTuple):
+    name: str                       # Archive subdirectory
+    db_path: Callable[[], Path]     # Resolved at run time (serving mode, tests)
+    table: str
+    time_column: str
+
+
+def _log_db_path() -> Path:
+    return database.WRITE_DB_PATH if database.SERVING_MODE else database.DB_PATH
+
+
+RETENTION_POLICIES = (
+    RetentionPolicy("query_analytics", _log_db_path, "query_analytics", "created_at"),
+    RetentionPolicy("security_log", _log_db_path, "security_log", "timestamp"),
+    RetentionPolicy("kg_interaction_log", lambda: KG_DB_PATH, "interaction_log", "created_at"),
+)
+
+
+# ============================================
+# ARCHIVING
+# ============================================
+
+def _live_bytes(conn: sqlite3.Connection) -> int:
+    """Bytes in pages holding data (file pages minus the freelist)."""
+    page_size = conn.execute("PRAGMA page_size").fetchone()[0]
+    page_count = conn.execute("PRAGMA page_count").fetchone()[0]
+    freelist = conn.execute("PRAGMA freelist_count").fetchone()[0]
+    return (page_count - freelist) * page_size
+
+
+def _append_archive(policy: RetentionPolicy, rows: List[Dict]) -> int:
+    """Append rows to their monthly archive files. Returns compressed bytes written."""
+    by_month: Dict[str, List[Dict]] = {}
+    for row in rows:
+        month = (row[policy.time_column] or "")[:7] or "undated"
+        by_month.setdefault(month, []).append(row)
+
+    written = 0
+    directory = ARCHIVE_DIR / policy.name
+    directory.mkdir(parents=True, exist_ok=True)
+    for month, month_rows in by_month.items():
+        path = directory / f"{month}.jsonl.gz"
+        before = path.stat().st_size if path.exists() else 0
+        lines = "".join(json.dumps(row, separators=(",", ":")) + "\n" for row in month_rows)
+        with open(path, "ab") as f:
+            f.write(gzip.compress(lines.encode("utf-8")))
+            f.flush()
+            os.fsync(f.fileno())
+        written += path.stat().st_size - before
+    return written
+
+
+def archive_table(policy: RetentionPolicy, days: int = RETENTION_DAYS,
+                  batch_size: int = RETENTION_BATCH_SIZE) -> Dict:
+    """Archive and delete one table's rows older than `days`."""
+    path = policy.db_path()
+    result = {"table": policy.table, "db": str(path), "rows_archived": 0,
+              "archive_bytes": 0, "reclaimed_bytes": 0, "released_bytes": 0}
+    if not Path(path).exists():
+        result["skipped"] = "database missing"
+        return result
+
+    cutoff = time.strftime("%Y-%m-%d %H:%M:%S", time.gmtime(time.time() - days * 86400))
+    conn = sqlite3.connect(path, timeout=10, isolation_level=None)
+    conn.row_factory = sqlite3.Row
+    try:
+        exists = conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (policy.table,)
+        ).fetchone()
+        if not exists:
+            result["skipped"] = "table missing"
+            return result
+
+        live_before = _live_bytes(conn)
+        file_before = os.path.getsize(path)
+        while True:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                # Ids grow with time, so expired rows are always at the front
+                rows = conn.execute(
+                    f"SELECT * FROM {policy.table} ORDER BY id LIMIT ?", (batch_size,)
+                ).fetchall()
+                expired = []
+                for row in rows:
+                    if (row[policy.time_column] or "") >= cutoff:
+                        break
+                    expired.append(dict(row))
+                if expired:
+                    result["archive_bytes"] += _append_archive(policy, expired)
+                    conn.execute(
+                        f"DELETE FROM {policy.table} WHERE id <= ?", (expired[-1]["id"],)
+                    )
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+            result["rows_archived"] += len(expired)
+            if len(expired) < batch_size:
+                break
+
+        if result["rows_archived"]:
+            # Freed pages only shrink the file with auto_vacuum = INCREMENTAL
+            if conn.execute("PRAGMA auto_vacuum").fetchone()[0] == 2:
+                conn.execute("PRAGMA incremental_vacuum").fetchall()
+            conn.execute("PRAGMA wal_checkpoint(PASSIVE)").fetchall()
+        result["reclaimed_bytes"] = max(0, live_before - _live_bytes(conn))
+        result["released_bytes"] = max(0, file_before - os.path.getsize(path))
+        return result
+    finally:
+        conn.close()
+
+
+def run_retention(days: int = RETENTION_DAYS, batch_size: int = RETENTION_BATCH_SIZE) -> Dict:
+    """
+    Apply every retention policy.
+
+    reclaimed_bytes is space freed inside the database files (reused by new
+    rows); released_bytes is how much the files shrank on disk. Raises
+    ValueError if days is below RETENTION_MIN_DAYS.
+    """
+    if days < RETENTION_MIN_DAYS:
+        raise ValueError(f"Retention must keep at least {RETENTION_MIN_DAYS} days (got {days})")
+    started = time.perf_counter()
+    tables = [archive_table(policy, days, batch_size) for policy in RETENTION_POLICIES]
+    return {
+        "retention_days": days,
+        "tables": tables,
+        "rows_archived": sum(t["rows_archived"] for t in tables),
+        "archive_bytes": sum(t["archive_bytes"] for t in tables),
+        "reclaimed_bytes": sum(t["reclaimed_bytes"] for t in tables),
+        "released_bytes": sum(t["released_bytes"] for t in tables),
+        "seconds": round(time.perf_counter() - started, 3),
+    }
+
+
+def iter_archive(policy_name: str, month: Optional[str] = None) -> Iterator[Dict]:
+    """Read archived rows back, for one month (YYYY-MM) or all of them."""
+    directory = ARCHIVE_DIR / policy_name
+    pattern = f"{month}.jsonl.gz" if month else "*.jsonl.gz"
+    for path in sorted(directory.glob(pattern)):
+        with gzip.open(path, "rt", encoding="utf-8") as f:
+            for line in f:
+                yield json.loads(line)
+
+
+if __name__ == "__main__":
+    import sys
+
+    days = RETENTION_DAYS
+    if "--days" in sys.argv:
+        days = int(sys.argv[sys.argv.index("--days") + 1])
+    print(json.dumps(run_retention(days), indent=2))
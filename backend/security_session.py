@@ -18,8 +18,9 @@ Rate Limiting:
 
 import time
 from typing import Dict, Optional, Tuple
-from datetime import datetime, timedelta
+from datetime import datetime
 import database
+from session_store import open_store
 
 # ============================================
 # SECURITY STATE CONSTANTS
@@ -194,10 +195,12 @@ class SecuritySession:
 
 
 # ============================================
-# SESSION CACHE (In-Memory)
+# SESSION CACHE
 # ============================================
 
-_session_cache: Dict[str, SecuritySession] = {}
+# Bounded + idle-expiring (per process, or shared via SQLite);
+# evicted sessions reload their state from the DB
+_session_cache = open_store("security_session")
 
 
 def get_session(session_id: str) -> SecuritySession:
@@ -208,28 +211,22 @@ def get_session(session_id: str) -> SecuritySession:
         session_id: Unique session identifier
 
     Returns:
-        SecuritySession instance
+        SecuritySession instance (a copy on the SQLite backend - use
+        _session_cache.edit() to change state)
     """
-    if session_id not in _session_cache:
-        _session_cache[session_id] = SecuritySession(session_id)
-
-    session = _session_cache[session_id]
+    session = _session_cache.get_or_create(session_id, lambda: SecuritySession(session_id))
     session.last_activity = datetime.now()
     return session
 
 
-def cleanup_stale_sessions(max_age_minutes: int = 30):
-    """Remove sessions older than max_age_minutes."""
-    now = datetime.now()
-    cutoff = now - timedelta(minutes=max_age_minutes)
-
-    stale = [
-        sid for sid, session in _session_cache.items()
-        if session.last_activity < cutoff
-    ]
+def cleanup_stale_sessions(max_age_minutes: int = 30) -> int:
+    """
+    Remove sessions idle for more than max_age_minutes.
 
-    for sid in stale:
-        del _session_cache[sid]
+    The session store's background sweeper does this on its own TTL;
+    this is for an explicit, stricter pass.
+    """
+    return _session_cache.sweep(idle_ttl=max_age_minutes * 60)
 
 
 # ============================================
@@ -283,15 +280,18 @@ def process_query_security(
     """
     from ai_response import detect_injection
 
-    session = get_session(session_id)
-
     # Check for injection
     is_injection, pattern = detect_injection(query)
 
-    if is_injection:
-        # Handle the injection
-        response_type, delay_ms = session.handle_injection(pattern)
+    # State transition is an atomic read-modify-write (shared across workers)
+    with _session_cache.edit(session_id, lambda: SecuritySession(session_id)) as session:
+        session.last_activity = datetime.now()
+        if is_injection:
+            response_type, delay_ms = session.handle_injection(pattern)
+        else:
+            delay_ms = session.handle_clean_query()
 
+    if is_injection:
         # Apply rate limiting
         session.apply_delay()
 
@@ -308,9 +308,7 @@ def process_query_security(
         }
 
     else:
-        # Clean query - update session and apply any existing delay
-        delay_ms = session.handle_clean_query()
-
+        # Clean query - apply any existing delay
         if delay_ms > 0:
             session.apply_delay()
 
@@ -0,0 +1,575 @@
+"""
+Soccer-AI Session Store
+Bounded stores for per-conversation state.
+
+Used for chat history (main.conversations), conversation intelligence
+state and security sessions. Each store has:
+- max_entries: least recently used sessions are evicted beyond this
+- idle_ttl: sessions not touched for this long are dropped
+- a shared background sweeper that expires idle sessions and refreshes
+  the approximate memory figure exported as metrics
+
+Backends (SESSION_STORE_BACKEND):
+- memory: per-process, values kept by reference (default)
+- sqlite: WAL-mode file shared by every worker on the box; values are
+  stored as compressed pickles, so changes must go through edit() or
+  an explicit store[key] = value to be seen by other workers
+"""
+
+import os
+import sys
+import time
+import zlib
+import pickle
+import sqlite3
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from metrics import REGISTRY
+
+# ============================================
+# CONFIGURATION
+# ============================================
+
+# Sessions kept per store before least recently used ones are evicted
+SESSION_MAX_ENTRIES = int(os.getenv("SESSION_MAX_ENTRIES", "10000"))
+
+# Sessions idle for longer than this are dropped (seconds)
+SESSION_IDLE_TTL = float(os.getenv("SESSION_IDLE_TTL", "1800"))
+
+# How often the background sweeper runs (seconds)
+SESSION_SWEEP_INTERVAL = float(os.getenv("SESSION_SWEEP_INTERVAL", "60"))
+
+# "memory" (per process) or "sqlite" (shared across workers)
+SESSION_STORE_BACKEND = os.getenv("SESSION_STORE_BACKEND", "memory").lower()
+SESSION_STORE_DB = Path(os.getenv("SESSION_STORE_DB", str(Path(__file__).parent / "sessions.db")))
+
+EVICTIONS = REGISTRY.counter(
+    "soccer_ai_session_evictions_total",
+    "Sessions removed from in-process stores, by reason (lru or idle).",
+    ("store", "reason"),
+)
+
+_MISSING = object()
+
+
+# ============================================
+# MEMORY ACCOUNTING
+# ============================================
+
+def approx_size(obj: Any, _seen: Optional[set] = None) -> int:
+    """
+    Rough deep size of obj in bytes (containers, dataclasses, plain objects).
+
+    Good enough to spot a store growing out of bounds; not exact.
+    """
+    seen = _seen if _seen is not None else set()
+    if id(obj) in seen:
+        return 0
+    seen.add(id(obj))
+
+    size = sys.getsizeof(obj)
+    if isinstance(obj, (str, bytes, int, float, bool)) or obj is None:
+        return size
+    if isinstance(obj, dict):
+        for key, value in obj.items():
+            size += approx_size(key, seen) + approx_size(value, seen)
+    elif isinstance(obj, (list, tuple, set, frozenset)):
+        for item in obj:
+            size += approx_size(item, seen)
+    elif hasattr(obj, "__dict__"):
+        size += approx_size(vars(obj), seen)
+    return size
+
+
+# ============================================
+# STORE
+# ============================================
+
+class SessionStore:
+    """
+    Thread-safe LRU + idle-TTL mapping of session id -> state.
+
+    Reads refresh both recency and the idle clock. Values are kept by
+    reference, so callers may keep mutating the object they got back.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        max_entries: int = SESSION_MAX_ENTRIES,
+        idle_ttl: float = SESSION_IDLE_TTL
+    ):
+        self.name = name
+        self.max_entries = max_entries
+        self.idle_ttl = idle_ttl
+        self._entries: "OrderedDict[str, List]" = OrderedDict()  # key -> [value, last_access]
+        self._lock = threading.Lock()
+        self._approx_bytes = 0
+        self._stats = {"hits": 0, "misses": 0, "created": 0, "evicted_lru": 0, "expired": 0}
+        # Striped per-key locks for edit()
+        self._key_locks = [threading.Lock() for _ in range(64)]
+        _register(self)
+
+    # ---------- internals ----------
+
+    def _live(self, key: str, now: float):
+        """Entry for key if present and not idle-expired (caller holds the lock)."""
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if now - entry[1] > self.idle_ttl:
+            del self._entries[key]
+            self._stats["expired"] += 1
+            EVICTIONS.inc(store=self.name, reason="idle")
+            return None
+        entry[1] = now
+        self._entries.move_to_end(key)
+        return entry
+
+    def _store(self, key: str, value: Any, now: float):
+        """Insert or replace key and trim to max_entries (caller holds the lock)."""
+        self._entries[key] = [value, now]
+        self._entries.move_to_end(key)
+        evicted = 0
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            evicted += 1
+        if evicted:
+            self._stats["evicted_lru"] += evicted
+            EVICTIONS.inc(evicted, store=self.name, reason="lru")
+
+    # ---------- mapping API ----------
+
+    def get(self, key: str, default: Any = None) -> Any:
+        """Value for key (refreshing it), or default if missing or expired."""
+        with self._lock:
+            entry = self._live(key, time.monotonic())
+            self._stats["hits" if entry is not None else "misses"] += 1
+            return entry[0] if entry is not None else default
+
+    def get_or_create(self, key: str, factory: Callable[[], Any]) -> Any:
+        """Value for key, creating it with factory() if missing or expired."""
+        value = self.get(key, _MISSING)
+        if value is not _MISSING:
+            return value
+
+        created = factory()  # Outside the lock - factories may hit the DB
+        with self._lock:
+            entry = self._live(key, time.monotonic())
+            if entry is not None:
+                return entry[0]  # Another thread won the race
+            self._store(key, created, time.monotonic())
+            self._stats["created"] += 1
+        return created
+
+    @contextmanager
+    def edit(self, key: str, factory: Callable[[], Any]):
+        """
+        Read-modify-write a session atomically with respect to other edits
+        of the same key. Yields the (created if missing) value to mutate.
+        """
+        with self._key_locks[hash(key) % len(self._key_locks)]:
+            yield self.get_or_create(key, factory)
+
+    def __getitem__(self, key: str) -> Any:
+        value = self.get(key, _MISSING)
+        if value is _MISSING:
+            raise KeyError(key)
+        return value
+
+    def __setitem__(self, key: str, value: Any):
+        with self._lock:
+            self._store(key, value, time.monotonic())
+
+    def __delitem__(self, key: str):
+        with self._lock:
+            del self._entries[key]
+
+    def __contains__(self, key: str) -> bool:
+        with self._lock:
+            entry = self._entries.get(key)
+            return entry is not None and time.monotonic() - entry[1] <= self.idle_ttl
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def pop(self, key: str, default: Any = None) -> Any:
+        with self._lock:
+            entry = self._entries.pop(key, None)
+        return entry[0] if entry is not None else default
+
+    def items(self) -> List[Tuple[str, Any]]:
+        """Snapshot of (key, value) pairs, least recently used first."""
+        with self._lock:
+            return [(key, entry[0]) for key, entry in self._entries.items()]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter([key for key, _ in self.items()])
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._approx_bytes = 0
+
+    # ---------- maintenance ----------
+
+    def sweep(self, idle_ttl: Optional[float] = None) -> int:
+        """
+        Drop sessions idle longer than idle_ttl (default: the store's TTL)
+        and refresh the memory estimate. Returns the number dropped.
+        """
+        ttl = self.idle_ttl if idle_ttl is None else idle_ttl
+        cutoff = time.monotonic() - ttl
+        with self._lock:
+            # Oldest first: stop at the first entry that is still fresh
+            stale = []
+            for key, entry in self._entries.items():
+                if entry[1] >= cutoff:
+                    break
+                stale.append(key)
+            for key in stale:
+                del self._entries[key]
+            self._stats["expired"] += len(stale)
+            values = [entry[0] for entry in self._entries.values()]
+        if stale:
+            EVICTIONS.inc(len(stale), store=self.name, reason="idle")
+
+        seen = set()
+        self._approx_bytes = sum(approx_size(value, seen) for value in values)
+        return len(stale)
+
+    def get_stats(self) -> Dict:
+        with self._lock:
+            stats = dict(self._stats)
+            stats["size"] = len(self._entries)
+        stats["max_entries"] = self.max_entries
+        stats["idle_ttl_seconds"] = self.idle_ttl
+        stats["approx_bytes"] = self._approx_bytes
+        stats["backend"] = "memory"
+        return stats
+
+
+class SQLiteSessionStore:
+    """
+    Session store kept in a WAL-mode SQLite file shared by worker processes.
+
+    Same interface as SessionStore, but get() returns a private copy:
+    use edit() for read-modify-write (BEGIN IMMEDIATE, so concurrent
+    edits from any worker are serialised) or assign store[key] = value.
+    """
+
+    # Reads refresh last_access at most this often per session (seconds)
+    TOUCH_GRANULARITY = 1.0
+    # LRU trim runs every N writes
+    TRIM_EVERY = 64
+
+    def __init__(
+        self,
+        name: str,
+        db_path: Path = SESSION_STORE_DB,
+        max_entries: int = SESSION_MAX_ENTRIES,
+        idle_ttl: float = SESSION_IDLE_TTL
+    ):
+        self.name = name
+        self.db_path = str(db_path)
+        self.max_entries = max_entries
+        self.idle_ttl = idle_ttl
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._writes = 0
+        # Row count and stored bytes as of the last sweep (cheap for scrapes)
+        self._size = 0
+        self._approx_bytes = 0
+        self._stats = {"hits": 0, "misses": 0, "created": 0, "evicted_lru": 0, "expired": 0}
+
+        conn = self._conn()
+        conn.execute("PRAGMA journal_mode = WAL")
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS sessions (
+                store TEXT NOT NULL,
+                session_key TEXT NOT NULL,
+                last_access REAL NOT NULL,
+                value BLOB NOT NULL,
+                PRIMARY KEY (store, session_key)
+            ) WITHOUT ROWID
+        ''')
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_sessions_last_access ON sessions(store, last_access)")
+        self._measure(conn)
+        _register(self)
+
+    # ---------- internals ----------
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=5, isolation_level=None)
+            conn.execute("PRAGMA synchronous = NORMAL")
+            conn.execute("PRAGMA busy_timeout = 5000")
+            self._local.conn = conn
+        return conn
+
+    @staticmethod
+    def _dumps(value: Any) -> bytes:
+        # Trusted local file written only by this app
+        return zlib.compress(pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL), 1)
+
+    @staticmethod
+    def _loads(blob: bytes) -> Any:
+        return pickle.loads(zlib.decompress(blob))
+
+    def _count(self, key: str, amount: int = 1):
+        with self._lock:
+            self._stats[key] += amount
+
+    def _read(self, conn: sqlite3.Connection, key: str, now: float, touch: bool = True):
+        """Deserialised value for key, or _MISSING if absent or idle-expired."""
+        row = conn.execute(
+            "SELECT last_access, value FROM sessions WHERE store = ? AND session_key = ?",
+            (self.name, key)
+        ).fetchone()
+        if row is None:
+            return _MISSING
+        last_access, blob = row
+        if now - last_access > self.idle_ttl:
+            conn.execute("DELETE FROM sessions WHERE store = ? AND session_key = ?", (self.name, key))
+            self._count("expired")
+            EVICTIONS.inc(store=self.name, reason="idle")
+            return _MISSING
+        if touch and now - last_access > self.TOUCH_GRANULARITY:
+            conn.execute(
+                "UPDATE sessions SET last_access = ? WHERE store = ? AND session_key = ?",
+                (now, self.name, key)
+            )
+        return self._loads(blob)
+
+    def _write(self, conn: sqlite3.Connection, key: str, value: Any, now: float):
+        conn.execute(
+            "INSERT OR REPLACE INTO sessions (store, session_key, last_access, value) VALUES (?, ?, ?, ?)",
+            (self.name, key, now, self._dumps(value))
+        )
+        with self._lock:
+            self._writes += 1
+            due = self._writes % self.TRIM_EVERY == 0
+        if due:
+            self._trim(conn)
+
+    def _trim(self, conn: sqlite3.Connection):
+        cursor = conn.execute('''
+            DELETE FROM sessions WHERE store = ? AND session_key IN (
+                SELECT session_key FROM sessions WHERE store = ?
+                ORDER BY last_access DESC
+                LIMIT -1 OFFSET ?
+            )
+        ''', (self.name, self.name, self.max_entries))
+        if cursor.rowcount > 0:
+            self._count("evicted_lru", cursor.rowcount)
+            EVICTIONS.inc(cursor.rowcount, store=self.name, reason="lru")
+
+    # ---------- mapping API ----------
+
+    def get(self, key: str, default: Any = None) -> Any:
+        """Copy of the value for key, or default if missing or expired."""
+        value = self._read(self._conn(), key, time.time())
+        self._count("hits" if value is not _MISSING else "misses")
+        return default if value is _MISSING else value
+
+    def get_or_create(self, key: str, factory: Callable[[], Any]) -> Any:
+        """Copy of the value for key, creating and storing factory() if missing."""
+        with self.edit(key, factory) as value:
+            return value
+
+    @contextmanager
+    def edit(self, key: str, factory: Callable[[], Any]):
+        """
+        Atomic read-modify-write across threads and worker processes.
+        Yields the value (created with factory() if missing); whatever it
+        holds when the block exits is written back in the same transaction.
+        """
+        conn = self._conn()
+        now = time.time()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            value = self._read(conn, key, now, touch=False)
+            if value is _MISSING:
+                self._count("misses")
+                self._count("created")
+                value = factory()
+            else:
+                self._count("hits")
+            yield value
+            self._write(conn, key, value, now)
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+
+    def __getitem__(self, key: str) -> Any:
+        value = self.get(key, _MISSING)
+        if value is _MISSING:
+            raise KeyError(key)
+        return value
+
+    def __setitem__(self, key: str, value: Any):
+        self._write(self._conn(), key, value, time.time())
+
+    def __delitem__(self, key: str):
+        cursor = self._conn().execute(
+            "DELETE FROM sessions WHERE store = ? AND session_key = ?", (self.name, key)
+        )
+        if cursor.rowcount == 0:
+            raise KeyError(key)
+
+    def __contains__(self, key: str) -> bool:
+        row = self._conn().execute(
+            "SELECT 1 FROM sessions WHERE store = ? AND session_key = ? AND last_access >= ?",
+            (self.name, key, time.time() - self.idle_ttl)
+        ).fetchone()
+        return row is not None
+
+    def __len__(self) -> int:
+        return self._conn().execute(
+            "SELECT COUNT(*) FROM sessions WHERE store = ?", (self.name,)
+        ).fetchone()[0]
+
+    def pop(self, key: str, default: Any = None) -> Any:
+        value = self.get(key, _MISSING)
+        if value is _MISSING:
+            return default
+        self._conn().execute("DELETE FROM sessions WHERE store = ? AND session_key = ?", (self.name, key))
+        return value
+
+    def items(self) -> List[Tuple[str, Any]]:
+        """Snapshot of (key, value) pairs, least recently used first."""
+        rows = self._conn().execute(
+            "SELECT session_key, value FROM sessions WHERE store = ? ORDER BY last_access",
+            (self.name,)
+        ).fetchall()
+        return [(key, self._loads(blob)) for key, blob in rows]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter([key for key, _ in self.items()])
+
+    def clear(self):
+        self._conn().execute("DELETE FROM sessions WHERE store = ?", (self.name,))
+        self._size = 0
+        self._approx_bytes = 0
+
+    # ---------- maintenance ----------
+
+    def _measure(self, conn: sqlite3.Connection):
+        self._size, self._approx_bytes = conn.execute(
+            "SELECT COUNT(*), COALESCE(SUM(LENGTH(value)), 0) FROM sessions WHERE store = ?",
+            (self.name,)
+        ).fetchone()
+
+    def sweep(self, idle_ttl: Optional[float] = None) -> int:
+        """
+        Delete sessions idle longer than idle_ttl (default: the store's TTL),
+        trim to max_entries and refresh the size and stored-bytes figures.
+        """
+        ttl = self.idle_ttl if idle_ttl is None else idle_ttl
+        conn = self._conn()
+        cursor = conn.execute(
+            "DELETE FROM sessions WHERE store = ? AND last_access < ?",
+            (self.name, time.time() - ttl)
+        )
+        dropped = max(cursor.rowcount, 0)
+        if dropped:
+            self._count("expired", dropped)
+            EVICTIONS.inc(dropped, store=self.name, reason="idle")
+        self._trim(conn)
+        self._measure(conn)
+        return dropped
+
+    def get_stats(self) -> Dict:
+        with self._lock:
+            stats = dict(self._stats)
+        # As of the last sweep: this runs on every metrics scrape, so no COUNT(*)
+        stats["size"] = self._size
+        stats["max_entries"] = self.max_entries
+        stats["idle_ttl_seconds"] = self.idle_ttl
+        stats["approx_bytes"] = self._approx_bytes
+        stats["backend"] = "sqlite"
+        return stats
+
+
+def open_store(
+    name: str,
+    max_entries: int = SESSION_MAX_ENTRIES,
+    idle_ttl: float = SESSION_IDLE_TTL
+):
+    """Session store for name on the configured backend (SESSION_STORE_BACKEND)."""
+    if SESSION_STORE_BACKEND == "sqlite":
+        return SQLiteSessionStore(name, SESSION_STORE_DB, max_entries, idle_ttl)
+    return SessionStore(name, max_entries, idle_ttl)
+
+
+# ============================================
+# REGISTRY + SWEEPER
+# ============================================
+
+_stores: Dict[str, Any] = {}
+_stores_lock = threading.Lock()
+_sweeper: Optional[threading.Thread] = None
+_sweeper_stop = threading.Event()
+
+
+def _register(store):
+    with _stores_lock:
+        _stores[store.name] = store
+
+
+def sweep_all() -> Dict[str, int]:
+    """Sweep every store once. Returns {store name: sessions dropped}."""
+    with _stores_lock:
+        stores = list(_stores.values())
+    return {store.name: store.sweep() for store in stores}
+
+
+def _sweep_loop(interval: float):
+    while not _sweeper_stop.wait(interval):
+        try:
+            sweep_all()
+        except Exception as e:
+            print(f"[SESSIONS] Sweep failed: {e}")
+
+
+def start_sweeper(interval: float = SESSION_SWEEP_INTERVAL):
+    """Start the background sweeper thread (idempotent)."""
+    global _sweeper
+    with _stores_lock:
+        if _sweeper is not None and _sweeper.is_alive():
+            return
+        _sweeper_stop.clear()
+        _sweeper = threading.Thread(
+            target=_sweep_loop, args=(interval,), name="session-sweeper", daemon=True
+        )
+        _sweeper.start()
+
+
+def stop_sweeper():
+    """Stop the background sweeper thread."""
+    global _sweeper
+    _sweeper_stop.set()
+    if _sweeper is not None:
+        _sweeper.join(timeout=5)
+        _sweeper = None
+
+
+def get_stats() -> Dict[str, Dict]:
+    """Stats for every registered store."""
+    with _stores_lock:
+        stores = list(_stores.values())
+    return {store.name: store.get_stats() for store in stores}
+
+
+REGISTRY.gauge(
+    "soccer_ai_sessions", "Sessions held in each in-process store.", ("store",)
+).set_function(lambda: {(name,): stats["size"] for name, stats in get_stats().items()})
+REGISTRY.gauge(
+    "soccer_ai_session_store_bytes", "Approximate memory held by each session store (as of the last sweep).", ("store",)
+).set_function(lambda: {(name,): stats["approx_bytes"] for name, stats in get_stats().items()})
@@ -0,0 +1,197 @@
+"""
+Soccer-AI Single-Flight Coalescing
+Concurrent identical chat requests share one in-flight computation.
+
+- SingleFlight: identical awaitables run once; every caller gets the result.
+- StreamFlight: one upstream token stream is fanned out to every subscriber.
+  Late joiners replay what has already arrived and then follow live.
+  Upstream is aborted only when the last subscriber leaves.
+
+Both run on the event loop. The work itself runs on the pipeline executor,
+so waiting followers do not hold worker threads.
+"""
+
+import asyncio
+import threading
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Iterable, List, Optional, Tuple
+
+import concurrency
+from metrics import REGISTRY
+
+COALESCED = REGISTRY.counter(
+    "soccer_ai_single_flight_total",
+    "Chat requests by single-flight role (leader ran the work, follower shared it).",
+    ("mode", "role"),
+)
+
+
+class SingleFlight:
+    """Coalesce concurrent calls that share a key."""
+
+    def __init__(self, name: str = "chat"):
+        self.name = name
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self._lock = threading.Lock()
+        self._stats = {"leaders": 0, "followers": 0}
+
+    async def run(self, key: str, factory: Callable[[], Awaitable[Any]]) -> Tuple[Any, bool]:
+        """
+        Await factory() once per key across concurrent callers.
+
+        Returns (result, shared) where shared is True for followers. The work
+        runs in its own task, so a caller being cancelled (client gone) does
+        not cancel it for everybody else.
+        """
+        task = self._inflight.get(key)
+        shared = task is not None
+        if task is None:
+            task = asyncio.ensure_future(factory())
+            self._inflight[key] = task
+            task.add_done_callback(lambda t, k=key: self._done(k, t))
+
+        with self._lock:
+            self._stats["followers" if shared else "leaders"] += 1
+        COALESCED.inc(mode=self.name, role="follower" if shared else "leader")
+
+        return await asyncio.shield(task), shared
+
+    def _done(self, key: str, task: asyncio.Future):
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        if not task.cancelled():
+            task.exception()  # Mark retrieved even if every caller went away
+
+    def get_stats(self) -> Dict:
+        with self._lock:
+            stats = dict(self._stats)
+        stats["in_flight"] = len(self._inflight)
+        return stats
+
+
+class _Broadcast:
+    """Chunks of one upstream stream, shared by all subscribers."""
+
+    def __init__(self):
+        self.chunks: List[Any] = []
+        self.done = False
+        self.error: Optional[BaseException] = None
+        self.subscribers = 0
+        self.pump: Optional[asyncio.Task] = None
+        self._signal: asyncio.Future = asyncio.get_running_loop().create_future()
+
+    def _wake(self):
+        if not self._signal.done():
+            self._signal.set_result(None)
+        self._signal = asyncio.get_running_loop().create_future()
+
+    def publish(self, chunk: Any):
+        self.chunks.append(chunk)
+        self._wake()
+
+    def finish(self, error: Optional[BaseException] = None):
+        self.done = True
+        self.error = error
+        self._wake()
+
+
+class StreamFlight:
+    """Fan one upstream stream out to every identical concurrent request."""
+
+    def __init__(self, name: str = "chat_stream"):
+        self.name = name
+        self._flights: Dict[str, _Broadcast] = {}
+        self._lock = threading.Lock()
+        self._stats = {"leaders": 0, "followers": 0, "aborted": 0}
+
+    def _start(
+        self,
+        key: str,
+        make_iterable: Callable[[], Iterable],
+        on_start: Optional[Callable[[], None]],
+        on_abort: Optional[Callable[[], None]],
+        on_finish: Optional[Callable[[], None]]
+    ) -> _Broadcast:
+        broadcast = _Broadcast()
+        if on_start is not None:
+            on_start()
+
+        async def pump():
+            try:
+                async for chunk in concurrency.iterate_blocking(make_iterable, on_abort=on_abort):
+                    broadcast.publish(chunk)
+                broadcast.finish()
+            except asyncio.CancelledError:
+                broadcast.finish()
+                raise
+            except Exception as e:
+                broadcast.finish(error=e)
+            finally:
+                if self._flights.get(key) is broadcast:
+                    del self._flights[key]
+                if on_finish is not None:
+                    on_finish()
+
+        broadcast.pump = asyncio.ensure_future(pump())
+        return broadcast
+
+    async def subscribe(
+        self,
+        key: str,
+        make_iterable: Callable[[], Iterable],
+        should_stop: Optional[Callable[[], Awaitable[bool]]] = None,
+        on_start: Optional[Callable[[], None]] = None,
+        on_abort: Optional[Callable[[], None]] = None,
+        on_finish: Optional[Callable[[], None]] = None,
+        poll_interval: float = 0.5
+    ) -> AsyncIterator[Any]:
+        """
+        Yield the chunks of the stream identified by key.
+
+        The first subscriber starts make_iterable() on the pipeline executor;
+        on_start/on_abort/on_finish belong to that upstream and are ignored
+        for followers. should_stop() is this subscriber's disconnect check.
+        """
+        broadcast = self._flights.get(key)
+        is_leader = broadcast is None
+        if is_leader:
+            broadcast = self._start(key, make_iterable, on_start, on_abort, on_finish)
+            self._flights[key] = broadcast
+
+        with self._lock:
+            self._stats["leaders" if is_leader else "followers"] += 1
+        COALESCED.inc(mode=self.name, role="leader" if is_leader else "follower")
+
+        broadcast.subscribers += 1
+        position = 0
+        try:
+            while True:
+                while position < len(broadcast.chunks):
+                    yield broadcast.chunks[position]
+                    position += 1
+                    if should_stop is not None and await should_stop():
+                        return
+
+                if broadcast.done:
+                    if broadcast.error is not None:
+                        raise broadcast.error
+                    return
+
+                done, _ = await asyncio.wait({broadcast._signal}, timeout=poll_interval)
+                if not done and should_stop is not None and await should_stop():
+                    return
+        finally:
+            broadcast.subscribers -= 1
+            if broadcast.subscribers == 0 and not broadcast.done and broadcast.pump is not None:
+                # Last listener gone - stop generating tokens nobody will read,
+                # and don't let a new request attach to the dying stream
+                if self._flights.get(key) is broadcast:
+                    del self._flights[key]
+                with self._lock:
+                    self._stats["aborted"] += 1
+                broadcast.pump.cancel()
+
+    def get_stats(self) -> Dict:
+        with self._lock:
+            stats = dict(self._stats)
+        stats["in_flight"] = len(self._flights)
+        return stats
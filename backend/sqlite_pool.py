@@ -0,0 +1,264 @@
+"""
+Soccer-AI SQLite Connection Manager
+One persistent connection per thread per database file, instead of a
+sqlite3.connect() on every function call.
+
+Connections are configured once when opened:
+- journal_mode=WAL, synchronous=NORMAL (readers don't block the writer)
+- mmap_size, a larger page cache and temp_store=MEMORY
+- a larger prepared-statement cache
+- foreign_keys=ON, busy_timeout
+
+acquire() hands out the thread's connection. Calling close() on it does
+not close it; it releases it back to the thread (rolling back anything
+left uncommitted, as a real close would). If the file on disk is
+replaced (new inode), the connection is reopened.
+
+Statements run through a pooled connection are timed per request by
+query_trace.
+
+Serving mode (SQLITE_SERVING_MODE=1): read-only connections are opened
+with immutable=1 - no file locking and no change detection - and a large
+mmap, so every worker maps the same file pages from the OS page cache.
+The files must not change in place while served: prepare them with
+freeze() and deploy new versions by replacing the file (new inode).
+"""
+
+import os
+import sqlite3
+import threading
+from pathlib import Path
+from urllib.parse import quote
+from typing import Callable, Dict, Optional, Tuple, Union
+
+try:
+    from metrics import REGISTRY, cache_lookup
+    import query_trace
+except ImportError:  # Imported as backend.sqlite_pool
+    from backend.metrics import REGISTRY, cache_lookup
+    from backend import query_trace
+
+# ============================================
+# CONFIGURATION
+# ============================================
+
+# Memory-mapped I/O per connection (bytes)
+SQLITE_MMAP_SIZE = int(os.getenv("SQLITE_MMAP_SIZE", str(256 * 1024 * 1024)))
+
+# Page cache per connection (KiB, applied as a negative cache_size)
+SQLITE_CACHE_KB = int(os.getenv("SQLITE_CACHE_KB", "16384"))
+
+# Prepared statements kept per connection
+SQLITE_STATEMENT_CACHE = int(os.getenv("SQLITE_STATEMENT_CACHE", "256"))
+
+# How long a connection waits on a locked database (ms)
+SQLITE_BUSY_TIMEOUT_MS = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000"))
+
+# Serve reference databases immutable (read-only connections only)
+SERVING_MODE = os.getenv("SQLITE_SERVING_MODE", "0") not in ("0", "false", "no")
+
+# Memory-mapped I/O for immutable connections (SQLite caps it at its compile-time max)
+SQLITE_IMMUTABLE_MMAP_SIZE = int(os.getenv("SQLITE_IMMUTABLE_MMAP_SIZE", str(2 * 1024 * 1024 * 1024)))
+
+RowFactory = Optional[Callable]
+
+
+def readonly_uri(path: Union[str, Path]) -> str:
+    """URI opening path read-only - and immutable in serving mode. Pass uri=True."""
+    query = "mode=ro&immutable=1" if SERVING_MODE else "mode=ro"
+    return f"file:{quote(os.path.abspath(str(path)))}?{query}"
+
+
+class PooledConnection(sqlite3.Connection):
+    """sqlite3.Connection whose close() returns it to its thread instead of closing."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.depth = 0
+        self.file_id: Optional[Tuple[int, int]] = None
+        self.cursor_factory = sqlite3.Cursor
+
+    def cursor(self, factory=None):
+        return super().cursor(factory or self.cursor_factory)
+
+    # Connection.execute() builds a plain Cursor internally; route it
+    # through cursor() so the configured factory is used
+    def execute(self, sql, parameters=()):
+        return self.cursor().execute(sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        return self.cursor().executemany(sql, seq_of_parameters)
+
+    def close(self):
+        self.depth = max(0, self.depth - 1)
+        if self.depth == 0 and self.in_transaction:
+            # A real close would have discarded uncommitted work
+            self.rollback()
+
+    def really_close(self):
+        super().close()
+
+
+def _file_id(path: str) -> Optional[Tuple[int, int]]:
+    try:
+        stat = os.stat(path)
+        return stat.st_dev, stat.st_ino
+    except OSError:
+        return None
+
+
+class ConnectionManager:
+    """Per-thread persistent connections keyed by (file, read-only, row factory)."""
+
+    def __init__(self):
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._all: Dict[int, Tuple[str, PooledConnection]] = {}
+        self._stats: Dict[str, Dict[str, int]] = {}
+
+    def _count(self, db: str, name: str):
+        with self._lock:
+            stats = self._stats.setdefault(db, {"acquires": 0, "reuses": 0, "opens": 0, "reopens": 0})
+            stats[name] += 1
+
+    def _open(self, path: str, readonly: bool) -> PooledConnection:
+        if readonly:
+            conn = sqlite3.connect(
+                readonly_uri(path), uri=True, factory=PooledConnection,
+                cached_statements=SQLITE_STATEMENT_CACHE, check_same_thread=False
+            )
+        else:
+            conn = sqlite3.connect(
+                path, factory=PooledConnection,
+                cached_statements=SQLITE_STATEMENT_CACHE, check_same_thread=False
+            )
+        mmap_size = SQLITE_IMMUTABLE_MMAP_SIZE if readonly and SERVING_MODE else SQLITE_MMAP_SIZE
+        pragmas = [
+            f"PRAGMA busy_timeout = {SQLITE_BUSY_TIMEOUT_MS}",
+            f"PRAGMA mmap_size = {mmap_size}",
+            f"PRAGMA cache_size = -{SQLITE_CACHE_KB}",
+            "PRAGMA temp_store = MEMORY",
+            "PRAGMA foreign_keys = ON",
+        ]
+        if not readonly:
+            pragmas += ["PRAGMA journal_mode = WAL", "PRAGMA synchronous = NORMAL"]
+        for pragma in pragmas:
+            try:
+                conn.execute(pragma)
+            except sqlite3.Error:
+                pass  # e.g. WAL on a read-only filesystem - keep the default
+        conn.file_id = _file_id(path)
+        conn.cursor_factory = query_trace.cursor_factory()
+        with self._lock:
+            self._all[id(conn)] = (path, conn)
+        return conn
+
+    def _discard(self, conn: PooledConnection):
+        with self._lock:
+            self._all.pop(id(conn), None)
+        try:
+            conn.really_close()
+        except sqlite3.Error:
+            pass
+
+    def acquire(
+        self,
+        path: Union[str, Path],
+        row_factory: RowFactory = None,
+        readonly: bool = False
+    ) -> PooledConnection:
+        """This thread's connection to path (opened and configured on first use)."""
+        path = str(path)
+        key = (path, readonly, row_factory)
+        conns = getattr(self._local, "conns", None)
+        if conns is None:
+            conns = self._local.conns = {}
+
+        conn = conns.get(key)
+        if conn is not None and conn.file_id != _file_id(path):
+            # File was replaced or removed underneath us - don't read a stale inode
+            self._discard(conn)
+            conn = None
+            self._count(path, "reopens")
+
+        reused = conn is not None
+        if conn is None:
+            conn = self._open(path, readonly)
+            conn.row_factory = row_factory
+            conns[key] = conn
+            self._count(path, "opens")
+        elif conn.depth == 0 and conn.in_transaction:
+            conn.rollback()  # Leftover from a caller that never released
+
+        conn.depth += 1
+        self._count(path, "acquires")
+        if reused:
+            self._count(path, "reuses")
+        cache_lookup("sqlite_connection", hit=reused)
+        return conn
+
+    def close_all(self):
+        """Close every connection (at shutdown, or after swapping a database file)."""
+        with self._lock:
+            conns = [conn for _, conn in self._all.values()]
+            self._all.clear()
+        for conn in conns:
+            try:
+                conn.really_close()
+            except sqlite3.Error:
+                pass
+        self._local = threading.local()
+
+    def get_stats(self) -> Dict:
+        """Acquire/reuse counts per database file, plus open connections."""
+        with self._lock:
+            per_db = {db: dict(stats) for db, stats in self._stats.items()}
+            open_by_db: Dict[str, int] = {}
+            for path, _ in self._all.values():
+                open_by_db[path] = open_by_db.get(path, 0) + 1
+        for db, stats in per_db.items():
+            stats["open"] = open_by_db.get(db, 0)
+            stats["reuse_rate"] = round(stats["reuses"] / stats["acquires"], 3) if stats["acquires"] else 0.0
+        return {
+            "serving_mode": SERVING_MODE,
+            "open_connections": sum(open_by_db.values()),
+            "databases": {Path(db).name: stats for db, stats in per_db.items()},
+        }
+
+
+# Singleton instance
+_manager = ConnectionManager()
+
+
+def acquire(path: Union[str, Path], row_factory: RowFactory = None, readonly: bool = False) -> PooledConnection:
+    """Shared per-thread connection to path. Call close() when done to release it."""
+    return _manager.acquire(path, row_factory=row_factory, readonly=readonly)
+
+
+def close_all():
+    _manager.close_all()
+
+
+def freeze(path: Union[str, Path]):
+    """
+    Make a database file self-contained for immutable readers: checkpoint
+    and drop its WAL (immutable connections never read one) and refresh
+    planner statistics. Run on the build side, with no other connections
+    open, before the file is served.
+    """
+    conn = sqlite3.connect(str(path), timeout=30)
+    try:
+        conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        conn.execute("PRAGMA journal_mode = DELETE")
+        conn.execute("PRAGMA optimize")
+    finally:
+        conn.close()
+
+
+def get_stats() -> Dict:
+    return _manager.get_stats()
+
+
+REGISTRY.gauge(
+    "soccer_ai_sqlite_connections", "Open pooled SQLite connections."
+).set_function(lambda: get_stats()["open_connections"])
@@ -0,0 +1,314 @@
+"""
+Soccer-AI Team Identity
+One canonical record per club, with every known spelling compiled into a
+single alias dictionary.
+
+Each subsystem names clubs differently:
+- slug          "manchester_united"   persona ids, predictor keys
+- name          "Manchester United"   fan DB (teams table), display
+- full_name     "Manchester United"   official name, KG nodes
+- history_name  "Man United"          match_history / football-data
+
+resolve() normalises the input (case, "_"/"-", "&", FC/AFC) and does one
+dict lookup, so any of those spellings, or an alias like "spurs", maps to
+the same TeamIdentity.
+
+In the reference DB, sync_team_identity() mirrors the seed into
+team_identity / team_alias tables. It gives every other club in
+match_history an id too, and backfills indexed integer
+home_team_id / away_team_id columns, so team filters compare integers
+instead of name variants.
+
+Standard library only: the predictor package and scripts import it too.
+"""
+
+import re
+import sqlite3
+import threading
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+
+class TeamIdentity(NamedTuple):
+    id: int
+    slug: str
+    name: str
+    full_name: str
+    history_name: str
+
+
+# (id, slug, name, full_name, history_name, aliases)
+# Ids are stable - never renumber. Clubs discovered in match_history get ids
+# from UNSEEDED_ID_START upwards.
+SEED: List[Tuple[int, str, str, str, str, Tuple[str, ...]]] = [
+    (1, "arsenal", "Arsenal", "Arsenal", "Arsenal", ("Gunners", "The Gunners")),
+    (2, "aston_villa", "Aston Villa", "Aston Villa", "Aston Villa", ("Villa",)),
+    (3, "bournemouth", "Bournemouth", "AFC Bournemouth", "Bournemouth", ("Cherries",)),
+    (4, "brentford", "Brentford", "Brentford", "Brentford", ()),
+    (5, "brighton", "Brighton", "Brighton & Hove Albion", "Brighton", ("Brighton and Hove Albion",)),
+    (6, "burnley", "Burnley", "Burnley", "Burnley", ()),
+    (7, "chelsea", "Chelsea", "Chelsea", "Chelsea", ("Blues", "The Blues")),
+    (8, "crystal_palace", "Crystal Palace", "Crystal Palace", "Crystal Palace", ("C Palace",)),
+    (9, "everton", "Everton", "Everton", "Everton", ("Toffees",)),
+    (10, "fulham", "Fulham", "Fulham", "Fulham", ()),
+    (11, "ipswich", "Ipswich Town", "Ipswich Town", "Ipswich", ()),
+    (12, "leeds", "Leeds United", "Leeds United", "Leeds", ("Leeds Utd",)),
+    (13, "leicester", "Leicester City", "Leicester City", "Leicester", ()),
+    (14, "liverpool", "Liverpool", "Liverpool", "Liverpool", ("The Reds",)),
+    (15, "luton", "Luton Town", "Luton Town", "Luton", ()),
+    (16, "manchester_city", "Manchester City", "Manchester City", "Man City", ("City",)),
+    (17, "manchester_united", "Manchester United", "Manchester United", "Man United",
+     ("Man Utd", "Man U", "Manchester Utd", "United")),
+    (18, "newcastle", "Newcastle United", "Newcastle United", "Newcastle", ("Newcastle Utd", "Toon")),
+    (19, "nottingham_forest", "Nottingham Forest", "Nottingham Forest", "Nott'm Forest", ("Forest",)),
+    (20, "sheffield_united", "Sheffield United", "Sheffield United", "Sheffield United",
+     ("Sheffield Utd", "Sheff Utd")),
+    (21, "southampton", "Southampton", "Southampton", "Southampton", ()),
+    (22, "sunderland", "Sunderland", "Sunderland", "Sunderland", ()),
+    (23, "tottenham", "Tottenham", "Tottenham Hotspur", "Tottenham", ("Spurs",)),
+    (24, "west_brom", "West Brom", "West Bromwich Albion", "West Brom", ("West Bromwich", "WBA")),
+    (25, "west_ham", "West Ham", "West Ham United", "West Ham", ("Hammers",)),
+    (26, "wolves", "Wolverhampton", "Wolverhampton Wanderers", "Wolves", ()),
+    (27, "barcelona", "Barcelona", "FC Barcelona", "Barcelona", ("Barca",)),
+    (28, "real_madrid", "Real Madrid", "Real Madrid", "Real Madrid", ("Real",)),
+    (29, "bayern_munich", "Bayern Munich", "FC Bayern Munich", "Bayern Munich", ("Bayern",)),
+    (30, "paris_saint_germain", "Paris Saint-Germain", "Paris Saint-Germain", "Paris SG", ("PSG",)),
+]
+
+UNSEEDED_ID_START = 1000
+
+# One-word aliases that are also part of other clubs' names ("Norwich City",
+# "Real Sociedad", "Leeds United"). resolve() accepts them as the whole
+# input; find_in_text() ignores them in free text.
+AMBIGUOUS_ALIASES = frozenset({"city", "united", "real", "forest", "villa", "blues"})
+
+_CLUB_AFFIXES = {"fc", "afc"}
+
+
+def normalize(name: str) -> str:
+    """Lookup key for a team name: "Man_Utd FC" -> "man utd"."""
+    text = name.lower().replace("&", " and ").replace("_", " ").replace("-", " ")
+    text = re.sub(r"[.'’]", "", text)  # "Nott'm" -> "nottm", "A.F.C." -> "afc"
+    text = re.sub(r"[^\w\s]", " ", text)  # Other punctuation separates words: "Chelsea?"
+    words = text.split()
+    # "Arsenal FC", "AFC Bournemouth" -> drop the affix (but keep a bare "fc")
+    while len(words) > 1 and words[-1] in _CLUB_AFFIXES:
+        words.pop()
+    while len(words) > 1 and words[0] in _CLUB_AFFIXES:
+        words.pop(0)
+    return " ".join(words)
+
+
+def slugify(name: str) -> str:
+    """Slug for a name the resolver doesn't know: "Real Sociedad" -> "real_sociedad"."""
+    return normalize(name).replace(" ", "_")
+
+
+class TeamResolver:
+    """Compiled alias -> TeamIdentity dictionary."""
+
+    def __init__(self, seed: Iterable[Tuple] = SEED, ambiguous: Iterable[str] = AMBIGUOUS_ALIASES):
+        self._ambiguous = frozenset(normalize(alias) for alias in ambiguous)
+        self._by_alias: Dict[str, TeamIdentity] = {}
+        self._by_id: Dict[int, TeamIdentity] = {}
+        self._spellings: Dict[int, List[str]] = {}
+        self._max_words = 1
+        for team_id, slug, name, full_name, history_name, aliases in seed:
+            self.add(TeamIdentity(team_id, slug, name, full_name, history_name), aliases)
+
+    def add(self, team: TeamIdentity, aliases: Iterable[str] = ()):
+        """Register a team and its aliases (its own names are always aliases)."""
+        self._by_id[team.id] = team
+        spellings = self._spellings.setdefault(team.id, [])
+        for spelling in (team.history_name, team.name, team.full_name, team.slug, *aliases):
+            key = normalize(spelling)
+            owner = self._by_alias.get(key)
+            if owner is not None and owner.id != team.id:
+                raise ValueError(f"Alias {spelling!r} maps to both {owner.slug} and {team.slug}")
+            self._by_alias[key] = team
+            self._max_words = max(self._max_words, len(key.split()))
+            if spelling != team.slug and spelling not in spellings:
+                spellings.append(spelling)
+
+    def resolve(self, name: Optional[str]) -> Optional[TeamIdentity]:
+        """TeamIdentity for any known spelling, else None."""
+        if not name:
+            return None
+        return self._by_alias.get(normalize(name))
+
+    def by_id(self, team_id: int) -> Optional[TeamIdentity]:
+        return self._by_id.get(team_id)
+
+    def spellings(self, team: TeamIdentity) -> List[str]:
+        """Every known way of writing a team (for string-matched tables like elo_history)."""
+        return list(self._spellings.get(team.id, [team.name]))
+
+    def find_in_text(self, text: str) -> List[TeamIdentity]:
+        """
+        Teams mentioned in free text, in order, longest alias first
+        ("Newcastle United" is Newcastle, not Manchester United). Ambiguous
+        one-word aliases don't count on their own ("Norwich City" is not
+        Manchester City).
+        """
+        words = normalize(text).split()
+        found: List[TeamIdentity] = []
+        i = 0
+        while i < len(words):
+            for size in range(min(self._max_words, len(words) - i), 0, -1):
+                key = " ".join(words[i:i + size])
+                team = self._by_alias.get(key) if key not in self._ambiguous else None
+                if team is not None:
+                    if team not in found:
+                        found.append(team)
+                    i += size
+                    break
+            else:
+                i += 1
+        return found
+
+    def __iter__(self):
+        return iter(self._by_id.values())
+
+    def __len__(self) -> int:
+        return len(self._by_id)
+
+
+# Singleton instance
+_resolver: Optional[TeamResolver] = None
+_resolver_lock = threading.Lock()
+
+
+def get_resolver() -> TeamResolver:
+    """Shared resolver compiled from SEED."""
+    global _resolver
+    if _resolver is None:
+        with _resolver_lock:
+            if _resolver is None:
+                _resolver = TeamResolver()
+    return _resolver
+
+
+def resolve(name: Optional[str]) -> Optional[TeamIdentity]:
+    """Shorthand for get_resolver().resolve(name)."""
+    return get_resolver().resolve(name)
+
+
+def team_slug(name: str) -> str:
+    """Canonical slug for a name, or a best-effort slug if unknown."""
+    team = resolve(name)
+    return team.slug if team else slugify(name)
+
+
+def history_names(name: str) -> List[str]:
+    """All spellings of a team (just [name] if unknown)."""
+    team = resolve(name)
+    return get_resolver().spellings(team) if team else [name]
+
+
+# ============================================
+# REFERENCE DB (team_identity / team_alias / match_history ids)
+# ============================================
+
+def has_team_ids(conn: sqlite3.Connection) -> bool:
+    """True once match_history carries home_team_id / away_team_id."""
+    columns = {row[1] for row in conn.execute("PRAGMA table_info(match_history)")}
+    return {"home_team_id", "away_team_id"} <= columns
+
+
+def lookup_team_id(conn: sqlite3.Connection, name: str) -> Optional[int]:
+    """Team id for a name: seeded clubs in memory, others via the team_alias table."""
+    team = resolve(name)
+    if team is not None:
+        return team.id
+    try:
+        row = conn.execute("SELECT team_id FROM team_alias WHERE alias = ?", (normalize(name),)).fetchone()
+    except sqlite3.OperationalError:  # Not migrated
+        return None
+    return row[0] if row else None
+
+
+def sync_team_identity(conn: sqlite3.Connection) -> Dict[str, int]:
+    """
+    Mirror the seed into team_identity / team_alias, register every other
+    club found in match_history, and backfill match_history team ids for
+    rows that don't have them yet (incremental - cheap once done).
+
+    Caller commits. Returns counts: teams, new_teams, rows_backfilled.
+    """
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS team_identity (
+            team_id INTEGER PRIMARY KEY,
+            slug TEXT NOT NULL UNIQUE,
+            name TEXT NOT NULL,
+            full_name TEXT NOT NULL,
+            history_name TEXT NOT NULL
+        )
+    """)
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS team_alias (
+            alias TEXT PRIMARY KEY,
+            team_id INTEGER NOT NULL REFERENCES team_identity(team_id)
+        ) WITHOUT ROWID
+    """)
+
+    resolver = get_resolver()
+    conn.executemany(
+        "INSERT OR REPLACE INTO team_identity (team_id, slug, name, full_name, history_name) VALUES (?, ?, ?, ?, ?)",
+        list(resolver)
+    )
+    conn.executemany(
+        "INSERT OR REPLACE INTO team_alias (alias, team_id) VALUES (?, ?)",
+        [(normalize(spelling), team.id) for team in resolver
+         for spelling in resolver.spellings(team) + [team.slug]]
+    )
+
+    result = {"teams": len(resolver), "new_teams": 0, "rows_backfilled": 0}
+    has_history = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'match_history'"
+    ).fetchone()
+    if not has_history:
+        return result
+
+    if not has_team_ids(conn):
+        conn.execute("ALTER TABLE match_history ADD COLUMN home_team_id INTEGER")
+        conn.execute("ALTER TABLE match_history ADD COLUMN away_team_id INTEGER")
+
+    # Names on rows that still lack an id
+    pending = {
+        row[0] for row in conn.execute("""
+            SELECT home_team FROM match_history WHERE home_team_id IS NULL
+            UNION
+            SELECT away_team FROM match_history WHERE away_team_id IS NULL
+        """) if row[0]
+    }
+    if not pending:
+        return result
+
+    known = dict(conn.execute("SELECT alias, team_id FROM team_alias"))
+    slugs = {row[0] for row in conn.execute("SELECT slug FROM team_identity")}
+    next_id = max(UNSEEDED_ID_START, conn.execute("SELECT COALESCE(MAX(team_id), 0) FROM team_identity").fetchone()[0] + 1)
+    ids: Dict[str, int] = {}
+    for name in sorted(pending):
+        key = normalize(name)
+        team_id = known.get(key)
+        if team_id is None:
+            slug = slugify(name)
+            while slug in slugs:
+                slug += "_"
+            team_id, next_id = next_id, next_id + 1
+            conn.execute(
+                "INSERT INTO team_identity (team_id, slug, name, full_name, history_name) VALUES (?, ?, ?, ?, ?)",
+                (team_id, slug, name, name, name)
+            )
+            conn.execute("INSERT OR IGNORE INTO team_alias (alias, team_id) VALUES (?, ?)", (key, team_id))
+            known[key] = team_id
+            slugs.add(slug)
+            result["new_teams"] += 1
+        ids[name] = team_id
+
+    for column, name_column in (("home_team_id", "home_team"), ("away_team_id", "away_team")):
+        cursor = conn.executemany(
+            f"UPDATE match_history SET {column} = ? WHERE {name_column} = ? AND {column} IS NULL",
+            list((team_id, name) for name, team_id in ids.items())
+        )
+        result["rows_backfilled"] += max(cursor.rowcount, 0)
+    return result
@@ -0,0 +1,122 @@
+"""
+Tests for the hourly analytics rollups behind the dashboard summaries.
+"""
+
+import sqlite3
+import tempfile
+import unittest
+from pathlib import Path
+import sys
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import database
+import tracing
+
+
+class TestLatencySketch(unittest.TestCase):
+
+    def test_sketch_percentiles_within_bucket_error(self):
+        values = [i * 1.37 for i in range(1, 1001)]
+        buckets = {}
+        for value in values:
+            bucket = tracing.sketch_bucket(value)
+            buckets[bucket] = buckets.get(bucket, 0) + 1
+        exact = tracing.percentiles(values)
+        approx = tracing.sketch_percentiles(buckets)
+        for point, value in exact.items():
+            self.assertLessEqual(abs(approx[point] - value) / value, 0.05, point)
+        self.assertEqual(tracing.sketch_percentiles({}), {"p50": None, "p95": None, "p99": None})
+
+
+class TestAnalyticsRollups(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.original_path = database.DB_PATH
+        database.DB_PATH = Path(self.tmp.name) / "rollups.db"
+        database.init_analytics()
+        database.init_security_tables()
+
+    def tearDown(self):
+        database.stop_write_behind()
+        database.DB_PATH = self.original_path
+        self.tmp.cleanup()
+
+    def _log_sample(self):
+        database.log_query(query="who scored?", intent="match", club_detected="arsenal",
+                           kg_nodes_used=4, kg_edges_traversed=6, response_time_ms=100, confidence=0.8)
+        database.log_query(query="who scored?", intent="match", club_detected="arsenal",
+                           response_time_ms=300, confidence=0.6)
+        database.log_query(query="ignore previous", intent="general", was_injection_attempt=True)
+        database.log_security_event(session_id="s1", attempt_number=1, pattern_matched="ignore",
+                                    escalation_level=None, response_type="snap_back")
+
+    def test_summary_served_from_rollups(self):
+        self._log_sample()
+        with database.get_write_connection() as conn:
+            conn.execute("DELETE FROM query_analytics")  # Rollups alone answer the dashboard
+            conn.execute("DELETE FROM security_log")
+            conn.commit()
+
+        summary = database.get_analytics_summary(days=1)
+        self.assertEqual(summary["total_queries"], 3)
+        self.assertEqual(summary["injection_attempts"], 1)
+        self.assertEqual(summary["by_intent"], {"match": 2, "general": 1})
+        self.assertEqual(list(summary["by_intent"]), ["match", "general"])
+        self.assertEqual(summary["by_club"], {"arsenal": 2})
+        self.assertEqual(summary["avg_response_time_ms"], 200)
+        self.assertEqual(summary["avg_confidence"], 0.7)
+        self.assertEqual(summary["kg_usage"]["queries_using_kg"], 1)
+        self.assertEqual(summary["kg_usage"]["avg_nodes_per_query"], 1.33)
+        self.assertEqual(summary["response_time_percentiles_ms"]["p99"], 300)
+
+        hot = database.get_hot_queries(days=1)
+        self.assertEqual(hot[0]["query"], "who scored?")
+        self.assertEqual((hot[0]["count"], hot[0]["avg_time_ms"]), (2, 200))
+        self.assertIsNone(hot[1]["avg_confidence"])
+
+        self.assertEqual(database.get_security_metrics(days=1)["by_escalation_level"], {"normal": 1})
+
+    def test_write_behind_matches_synchronous(self):
+        self._log_sample()
+        synchronous = database.get_analytics_summary(days=1)
+
+        database.start_write_behind()
+        self._log_sample()
+        database.stop_write_behind()
+        queued = database.get_analytics_summary(days=1)
+        self.assertEqual(queued["total_queries"], 2 * synchronous["total_queries"])
+        self.assertEqual(queued["by_intent"]["match"], 4)
+        self.assertEqual(queued["avg_response_time_ms"], synchronous["avg_response_time_ms"])
+        self.assertEqual(database.get_security_metrics(days=1)["total_injection_attempts"], 2)
+
+    def test_existing_rows_backfilled_by_hour(self):
+        path = Path(self.tmp.name) / "legacy.db"
+        with sqlite3.connect(path) as conn:
+            conn.execute("""
+                CREATE TABLE query_analytics (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT, query TEXT NOT NULL, intent TEXT,
+                    kg_intent TEXT, club_detected TEXT, kg_nodes_used INTEGER DEFAULT 0,
+                    kg_edges_traversed INTEGER DEFAULT 0, response_time_ms INTEGER,
+                    source_count INTEGER DEFAULT 0, confidence REAL,
+                    was_injection_attempt INTEGER DEFAULT 0, created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                )
+            """)
+            conn.execute("INSERT INTO query_analytics (query, intent) VALUES ('recent', 'match')")
+            conn.execute("INSERT INTO query_analytics (query, intent, created_at) "
+                         "VALUES ('old', 'match', datetime('now', '-30 days'))")
+        conn.close()
+
+        database.DB_PATH = path
+        database.init_analytics()
+        self.assertEqual(database.get_analytics_summary(days=7)["total_queries"], 1)
+        self.assertEqual(database.get_analytics_summary(days=60)["total_queries"], 2)
+        # A second init does not double count
+        database.init_analytics()
+        self.assertEqual(database.get_analytics_summary(days=60)["by_intent"], {"match": 2})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,105 @@
+"""
+Tests for the batch insert API and the bulk knowledge graph rebuild.
+"""
+
+import sqlite3
+import tempfile
+import unittest
+from pathlib import Path
+import sys
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import database
+import sqlite_pool
+
+CLUB_TABLES = """
+    CREATE TABLE club_legends (id INTEGER PRIMARY KEY, team_id INTEGER, name TEXT, era TEXT, position TEXT);
+    CREATE TABLE club_moments (
+        id INTEGER PRIMARY KEY, team_id INTEGER, title TEXT, date TEXT, opponent TEXT, keywords TEXT
+    );
+    CREATE TABLE club_rivalries (
+        id INTEGER PRIMARY KEY, team_id INTEGER, rival_team_id INTEGER, intensity INTEGER,
+        rivalry_type TEXT, key_moments TEXT, banter_phrases TEXT
+    );
+"""
+
+
+class TestBulkWrites(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.original_path = database.DB_PATH
+        database.DB_PATH = Path(self.tmp.name) / "bulk.db"
+        database.init_db()
+        self.team_ids = database.insert_teams([
+            {"name": "Arsenal", "short_name": "ARS", "league": "Premier League", "country": "England"},
+            {"name": "Tottenham", "short_name": "TOT", "league": "Premier League", "country": "England"},
+        ])
+
+    def tearDown(self):
+        sqlite_pool.close_all()
+        database.DB_PATH = self.original_path
+        self.tmp.cleanup()
+
+    def _trigger_exists(self, name):
+        with database.get_connection() as conn:
+            return conn.execute(
+                "SELECT 1 FROM sqlite_master WHERE type = 'trigger' AND name = ?", (name,)
+            ).fetchone() is not None
+
+    def test_large_batch_defers_fts_and_returns_ids(self):
+        count = database.FTS_DEFER_MIN_ROWS + 10
+        ids = database.insert_players(
+            {"name": f"Player {i}", "team_id": self.team_ids[0], "position": "Forward"} for i in range(count)
+        )
+        self.assertEqual(len(ids), count)
+        self.assertEqual(database.get_player(ids[-1])["name"], f"Player {count - 1}")
+        self.assertTrue(self._trigger_exists("players_ai"))
+        self.assertEqual(len(database.search_players("Forward", limit=count)), count)
+
+        # Single inserts still go through the (restored) trigger
+        player_id = database.insert_player({"name": "Bukayo Saka", "team_id": self.team_ids[0]})
+        self.assertEqual(database.search_players("Saka")[0]["id"], player_id)
+
+    def test_failed_batch_rolls_back(self):
+        rows = [{"title": f"Story {i}"} for i in range(database.FTS_DEFER_MIN_ROWS)]
+        rows.append({"title": None})  # NOT NULL
+        with self.assertRaises(sqlite3.IntegrityError):
+            database.insert_news_articles(rows)
+        self.assertEqual(database.search_news("Story"), [])
+        self.assertTrue(self._trigger_exists("news_ai"))
+
+        with self.assertRaises(Exception):
+            with database.bulk_write(defer_fts=["news"]) as conn:
+                conn.execute("INSERT INTO news (title) VALUES ('Rolled back')")
+                raise RuntimeError("abort")
+        with database.get_connection() as conn:
+            self.assertEqual(conn.execute("SELECT COUNT(*) FROM news").fetchone()[0], 0)
+        self.assertTrue(self._trigger_exists("news_ai"))
+
+    def test_populate_knowledge_graph(self):
+        arsenal, spurs = self.team_ids
+        with database.get_connection() as conn:
+            conn.executescript(CLUB_TABLES)
+            conn.execute("INSERT INTO club_legends VALUES (1, ?, 'Thierry Henry', '2000s', 'Forward')", (arsenal,))
+            conn.execute("INSERT INTO club_moments VALUES (1, ?, 'NLD win', '2004-04-25', 'tot', NULL)", (arsenal,))
+            conn.execute("INSERT INTO club_rivalries VALUES (1, ?, ?, 10, 'derby', NULL, NULL)", (arsenal, spurs))
+            conn.commit()
+
+        first = database.populate_knowledge_graph()
+        self.assertEqual((first["nodes"], first["edges"]), (4, 4))
+        # Rebuild replaces rather than appends
+        second = database.populate_knowledge_graph()
+        self.assertEqual((second["nodes"], second["edges"]), (4, 4))
+
+        team_node = database.get_kg_node_by_entity("team", arsenal)
+        relationships = sorted(edge["relationship"] for edge in database.get_kg_edges_to(team_node["node_id"]))
+        self.assertEqual(relationships, ["legendary_at", "occurred_at"])
+        rival = database.get_kg_edges_from(team_node["node_id"], "rival_of")[0]
+        self.assertEqual(rival["weight"], 1.0)
+
+
+if __name__ == "__main__":
+    unittest.main()
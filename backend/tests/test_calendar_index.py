@@ -0,0 +1,104 @@
+"""
+Tests for the shared "on this day" month-day index and day cache.
+"""
+
+import sqlite3
+import tempfile
+import unittest
+from pathlib import Path
+import sys
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from calendar_index import DayCache, ensure_month_day_column, month_day_filter, month_day_key
+from match_insights import MatchInsights
+import sqlite_pool
+
+
+class TestMonthDayColumn(unittest.TestCase):
+
+    def setUp(self):
+        self.conn = sqlite3.connect(":memory:")
+        self.conn.execute("CREATE TABLE moments (id INTEGER PRIMARY KEY, date TEXT)")
+        self.conn.executemany(
+            "INSERT INTO moments (date) VALUES (?)",
+            [("1999-05-26",), ("2005-05-25",), ("2012-05-13",), ("1989-05-26",)]
+        )
+
+    def test_unmigrated_table_falls_back_to_substr(self):
+        self.assertEqual(month_day_filter(self.conn, "moments", "date"), "substr(date, 6, 5) = ?")
+
+    def test_generated_column_is_indexed_and_idempotent(self):
+        self.assertTrue(ensure_month_day_column(self.conn, "moments", "date"))
+        self.assertTrue(ensure_month_day_column(self.conn, "moments", "date"))
+
+        where = month_day_filter(self.conn, "moments", "date", alias="m")
+        self.assertEqual(where, "m.month_day = ?")
+        rows = self.conn.execute(f"SELECT date FROM moments m WHERE {where} ORDER BY date", ("05-26",)).fetchall()
+        self.assertEqual([r[0] for r in rows], ["1989-05-26", "1999-05-26"])
+
+        plan = " ".join(r[3] for r in self.conn.execute(
+            f"EXPLAIN QUERY PLAN SELECT id FROM moments m WHERE {where}", ("05-26",)
+        ))
+        self.assertIn("idx_moments_month_day", plan)
+
+    def test_missing_table(self):
+        self.assertFalse(ensure_month_day_column(self.conn, "absent", "date"))
+
+    def test_month_day_key(self):
+        self.assertEqual(month_day_key(5, 26), "05-26")
+        self.assertEqual(len(month_day_key()), 5)
+
+
+class TestDayCache(unittest.TestCase):
+
+    def test_recomputes_when_version_changes(self):
+        cache = DayCache("test_day_cache")
+        calls = []
+
+        def compute():
+            calls.append(1)
+            return len(calls)
+
+        self.assertEqual(cache.get_or_compute("05-26", 1, compute), 1)
+        self.assertEqual(cache.get_or_compute("05-26", 1, compute), 1)
+        self.assertEqual(cache.get_or_compute("05-26", 2, compute), 2)
+        self.assertEqual(len(calls), 2)
+
+
+class TestMatchInsightsOnThisDay(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = str(Path(self.tmp.name) / "reference.db")
+        with sqlite3.connect(self.path) as conn:
+            conn.execute("""
+                CREATE TABLE match_history (
+                    match_date TEXT, home_team TEXT, away_team TEXT, ft_home INTEGER, ft_away INTEGER,
+                    division TEXT, home_elo REAL, away_elo REAL
+                )
+            """)
+            conn.executemany("INSERT INTO match_history VALUES (?, ?, ?, ?, ?, 'E0', 1800, 1700)", [
+                ("1989-05-26", "Liverpool", "Arsenal", 0, 2),
+                ("2001-05-26", "Chelsea", "Leeds", 1, 1),
+                ("2001-05-27", "Chelsea", "Leeds", 5, 1),
+            ])
+            ensure_month_day_column(conn, "match_history", "match_date")
+
+    def tearDown(self):
+        sqlite_pool.close_all()
+        self.tmp.cleanup()
+
+    def test_matches_and_refreshes_after_write(self):
+        insights = MatchInsights(self.path)
+        first = insights.on_this_day(5, 26)
+        self.assertEqual([m["date"] for m in first], ["1989-05-26", "2001-05-26"])
+
+        with sqlite3.connect(self.path) as conn:
+            conn.execute("INSERT INTO match_history VALUES ('2010-05-26', 'A', 'B', 4, 4, 'E0', 1, 1)")
+        self.assertEqual(insights.on_this_day(5, 26)[0]["date"], "2010-05-26")
+
+
+if __name__ == "__main__":
+    unittest.main()
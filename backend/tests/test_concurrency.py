@@ -0,0 +1,136 @@
+"""
+Tests for the bounded pipeline executor.
+"""
+
+import unittest
+import asyncio
+import threading
+import time
+import contextvars
+from pathlib import Path
+import sys
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import concurrency
+
+
+class TestRunBlocking(unittest.TestCase):
+    """Blocking work must not stall the event loop."""
+
+    def tearDown(self):
+        concurrency.shutdown()
+
+    def test_runs_off_event_loop_thread(self):
+        """Callable executes in a pipeline worker, not the loop thread."""
+        async def main():
+            loop_thread = threading.get_ident()
+            worker_thread = await concurrency.run_blocking(threading.get_ident)
+            return loop_thread, worker_thread
+
+        loop_thread, worker_thread = asyncio.run(main())
+        self.assertNotEqual(loop_thread, worker_thread)
+
+    def test_concurrent_calls_overlap(self):
+        """Several slow calls complete in roughly one call's time."""
+        async def main():
+            start = time.perf_counter()
+            await asyncio.gather(*[
+                concurrency.run_blocking(time.sleep, 0.2) for _ in range(8)
+            ])
+            return time.perf_counter() - start
+
+        elapsed = asyncio.run(main())
+        self.assertLess(elapsed, 1.0)
+
+    def test_context_vars_propagate(self):
+        """Context variables set on the loop are visible in the worker."""
+        var = contextvars.ContextVar("request_id", default=None)
+
+        async def main():
+            var.set("req-1")
+            return await concurrency.run_blocking(var.get)
+
+        self.assertEqual(asyncio.run(main()), "req-1")
+
+    def test_exceptions_propagate(self):
+        """Errors raised in the worker reach the awaiting coroutine."""
+        def boom():
+            raise ValueError("bad")
+
+        async def main():
+            await concurrency.run_blocking(boom)
+
+        with self.assertRaises(ValueError):
+            asyncio.run(main())
+        self.assertGreaterEqual(concurrency.get_stats()["failed"], 1)
+
+
+class TestIterateBlocking(unittest.TestCase):
+    """Blocking iterators are bridged to async consumers."""
+
+    def tearDown(self):
+        concurrency.shutdown()
+
+    def test_yields_all_items(self):
+        """Items arrive in order and iteration ends normally."""
+        async def main():
+            return [x async for x in concurrency.iterate_blocking(lambda: iter(range(5)))]
+
+        self.assertEqual(asyncio.run(main()), [0, 1, 2, 3, 4])
+
+    def test_should_stop_aborts_producer(self):
+        """A stop request calls on_abort and halts the producer."""
+        produced = []
+        aborted = threading.Event()
+
+        def slow_source():
+            for i in range(100):
+                if aborted.is_set():
+                    return
+                produced.append(i)
+                time.sleep(0.01)
+                yield i
+
+        async def main():
+            received = []
+
+            async def should_stop():
+                return len(received) >= 3
+
+            async for item in concurrency.iterate_blocking(
+                slow_source, should_stop=should_stop, on_abort=aborted.set
+            ):
+                received.append(item)
+            return received
+
+        received = asyncio.run(main())
+        self.assertEqual(received, [0, 1, 2])
+        self.assertTrue(aborted.is_set())
+        time.sleep(0.05)
+        self.assertLess(len(produced), 100)
+
+
+class TestStreamAccounting(unittest.TestCase):
+    """Cancelled streams report estimated tokens saved."""
+
+    def test_cancelled_stream_records_savings(self):
+        import ai_response
+
+        handle = ai_response.StreamHandle()
+        handle.output_chars = 400  # ~100 tokens generated
+        handle.cancel()
+        saved = ai_response.record_stream_finished(handle)
+        self.assertEqual(saved, ai_response.MAX_OUTPUT_TOKENS - 100)
+
+    def test_completed_stream_saves_nothing(self):
+        import ai_response
+
+        handle = ai_response.StreamHandle()
+        handle.finished = True
+        self.assertEqual(ai_response.record_stream_finished(handle), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
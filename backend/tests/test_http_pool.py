@@ -0,0 +1,152 @@
+"""
+Tests for the keep-alive LLM connection pool.
+Runs against a local stand-in HTTP/1.1 server.
+"""
+
+import json
+import time
+import unittest
+import socket
+import threading
+from unittest import mock
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+import sys
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import ai_response
+from http_pool import ConnectionPool, PoolTimeout
+
+
+class _KeepAliveHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        body = self.rfile.read(length)
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class _SSEHandler(BaseHTTPRequestHandler):
+    """Streams one text delta, flushed so a two-byte character straddles reads."""
+    protocol_version = "HTTP/1.1"
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        events = [
+            {"type": "content_block_delta", "delta": {"type": "text_delta", "text": "Café"}},
+            {"type": "message_stop"},
+        ]
+        body = "".join(f"data: {json.dumps(e, ensure_ascii=False)}\n\n" for e in events).encode("utf-8")
+        split = body.index("é".encode("utf-8")) + 1
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body[:split])
+        self.wfile.flush()
+        time.sleep(0.05)
+        self.wfile.write(body[split:])
+
+    def log_message(self, *args):
+        pass
+
+
+class TestConnectionPool(unittest.TestCase):
+    """Connections are reused, bounded and accounted for."""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.server = ThreadingHTTPServer(("127.0.0.1", 0), _KeepAliveHandler)
+        cls.url = f"http://127.0.0.1:{cls.server.server_address[1]}/v1/messages"
+        cls.thread = threading.Thread(target=cls.server.serve_forever, daemon=True)
+        cls.thread.start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+
+    def test_sequential_requests_reuse_connection(self):
+        """Second and later requests hit an idle keep-alive connection."""
+        pool = ConnectionPool(max_size=4, max_per_host=2)
+        for i in range(5):
+            status, body = pool.request("POST", self.url, body=f"{i}".encode())
+            self.assertEqual(status, 200)
+            self.assertEqual(body, f"{i}".encode())
+
+        stats = pool.get_stats()
+        self.assertEqual(stats["misses"], 1)
+        self.assertEqual(stats["hits"], 4)
+        self.assertEqual(stats["idle"], 1)
+        pool.close_all()
+
+    def test_unread_response_is_discarded(self):
+        """A connection with an unread body is not returned to the pool."""
+        pool = ConnectionPool()
+        with pool.open("POST", self.url, body=b"abc"):
+            pass
+        self.assertEqual(pool.get_stats()["idle"], 0)
+        self.assertEqual(pool.get_stats()["discarded"], 1)
+
+    def test_stale_idle_connection_is_retried(self):
+        """If the server drops an idle socket the request transparently reconnects."""
+        pool = ConnectionPool()
+        pool.request("POST", self.url, body=b"1")
+        # Simulate the server closing the idle connection
+        (conn, _), = list(pool._idle.values())[0]
+        conn.sock.shutdown(socket.SHUT_RDWR)
+
+        status, _ = pool.request("POST", self.url, body=b"2")
+        self.assertEqual(status, 200)
+        self.assertEqual(pool.get_stats()["stale_retries"], 1)
+        pool.close_all()
+
+    def test_per_host_limit(self):
+        """Checkouts beyond max_per_host time out."""
+        pool = ConnectionPool(max_per_host=1, acquire_timeout=0.1)
+        with pool.open("POST", self.url, body=b"x") as (_, response):
+            response.read()
+            with self.assertRaises(PoolTimeout):
+                pool.request("POST", self.url, body=b"y")
+        self.assertEqual(pool.get_stats()["slot_timeouts"], 1)
+        pool.close_all()
+
+
+class TestStreaming(unittest.TestCase):
+    """stream_anthropic_api against a stand-in SSE server."""
+
+    def setUp(self):
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), _SSEHandler)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.pool = ConnectionPool()
+        url = f"http://127.0.0.1:{self.server.server_address[1]}/v1/messages"
+        for patch in (
+            mock.patch.object(ai_response, "API_URL", url),
+            mock.patch.object(ai_response, "ANTHROPIC_API_KEY", "test"),
+            mock.patch.object(ai_response, "get_pool", lambda: self.pool),
+        ):
+            patch.start()
+            self.addCleanup(patch.stop)
+
+    def tearDown(self):
+        self.pool.close_all()
+        self.server.shutdown()
+        self.server.server_close()
+
+    def test_character_split_across_reads(self):
+        events = list(ai_response.stream_anthropic_api([{"role": "user", "content": "hi"}], "system"))
+        self.assertEqual(events, [{"text": "Café"}])
+
+
+if __name__ == "__main__":
+    unittest.main()
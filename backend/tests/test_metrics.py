@@ -0,0 +1,72 @@
+"""
+Tests for the in-process metrics registry and text exposition.
+"""
+
+import unittest
+from pathlib import Path
+import sys
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from metrics import Registry
+
+
+class TestRegistry(unittest.TestCase):
+    """Metrics render in Prometheus text format."""
+
+    def setUp(self):
+        self.registry = Registry()
+
+    def test_counter_with_labels(self):
+        tokens = self.registry.counter("llm_tokens_total", "Tokens.", ("direction",))
+        tokens.inc(10, direction="input")
+        tokens.inc(5, direction="input")
+        tokens.inc(3, direction="output")
+
+        text = self.registry.render()
+        self.assertIn("# TYPE llm_tokens_total counter", text)
+        self.assertIn('llm_tokens_total{direction="input"} 15', text)
+        self.assertIn('llm_tokens_total{direction="output"} 3', text)
+
+    def test_counter_rejects_wrong_labels(self):
+        counter = self.registry.counter("errors_total", "Errors.", ("upstream",))
+        with self.assertRaises(ValueError):
+            counter.inc(route="/x")
+
+    def test_histogram_buckets_are_cumulative(self):
+        hist = self.registry.histogram("latency_seconds", "Latency.", ("route",), buckets=(0.1, 1.0))
+        for value in (0.05, 0.5, 0.5, 2.0):
+            hist.observe(value, route="/chat")
+
+        text = self.registry.render()
+        self.assertIn('latency_seconds_bucket{route="/chat",le="0.1"} 1', text)
+        self.assertIn('latency_seconds_bucket{route="/chat",le="1"} 3', text)
+        self.assertIn('latency_seconds_bucket{route="/chat",le="+Inf"} 4', text)
+        self.assertIn('latency_seconds_count{route="/chat"} 4', text)
+        self.assertIn('latency_seconds_sum{route="/chat"} 3.05', text)
+
+    def test_gauge_callback_read_at_scrape(self):
+        state = {"idle": 2}
+        gauge = self.registry.gauge("pool_connections", "Pool.", ("state",))
+        gauge.set_function(lambda: {("idle",): state["idle"]})
+
+        self.assertIn('pool_connections{state="idle"} 2', self.registry.render())
+        state["idle"] = 7
+        self.assertIn('pool_connections{state="idle"} 7', self.registry.render())
+
+    def test_registration_is_idempotent(self):
+        first = self.registry.counter("hits_total", "Hits.")
+        second = self.registry.counter("hits_total", "Hits.")
+        self.assertIs(first, second)
+        with self.assertRaises(ValueError):
+            self.registry.gauge("hits_total", "Hits.")
+
+    def test_label_values_are_escaped(self):
+        counter = self.registry.counter("q_total", "Queries.", ("query",))
+        counter.inc(query='say "hi"\n')
+        self.assertIn('q_total{query="say \\"hi\\"\\n"} 1', self.registry.render())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,93 @@
+"""
+Tests for keyset (cursor) pagination of the list queries.
+"""
+
+import tempfile
+import unittest
+from pathlib import Path
+import sys
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import database
+import sqlite_pool
+
+
+class TestKeysetPagination(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.original_path = database.DB_PATH
+        database.DB_PATH = Path(self.tmp.name) / "pages.db"
+        database.init_db()
+        self.team_ids = database.insert_teams(
+            {"name": f"Club {i:02d}", "league": "League A" if i % 2 else "League B", "country": "England"}
+            for i in range(12)
+        )
+        # Duplicate names and dates, and NULL times, to exercise the id tiebreak
+        self.player_ids = database.insert_players(
+            {"name": f"Player {i % 4}", "team_id": self.team_ids[i % 3]} for i in range(11)
+        )
+        database.insert_games(
+            {"date": f"2024-01-0{1 + i % 3}", "time": None if i % 2 else "15:00",
+             "home_team_id": self.team_ids[0], "away_team_id": self.team_ids[1]}
+            for i in range(9)
+        )
+
+    def tearDown(self):
+        sqlite_pool.close_all()
+        database.DB_PATH = self.original_path
+        self.tmp.cleanup()
+
+    def _walk(self, kind, fetch, limit):
+        pages, cursor = [], None
+        while True:
+            rows = fetch(limit=limit, cursor=cursor)
+            pages.append(rows)
+            cursor = database.next_cursor(kind, rows, limit)
+            if cursor is None:
+                return [row["id"] for page in pages for row in page], len(pages)
+
+    def test_cursor_walk_matches_offset_order(self):
+        for kind, fetch, total in (
+            ("teams", database.get_teams, 12),
+            ("players", database.get_players, 11),
+            ("games", database.get_games, 9),
+        ):
+            expected = [row["id"] for row in fetch(limit=100)]
+            walked, pages = self._walk(kind, fetch, limit=4)
+            self.assertEqual(walked, expected, kind)
+            self.assertEqual(len(walked), total)
+            self.assertEqual(pages, -(-total // 4) + (total % 4 == 0))
+
+    def test_cursor_respects_filters(self):
+        fetch = lambda **kw: database.get_teams(league="League A", **kw)
+        walked, _ = self._walk("teams", fetch, limit=5)
+        self.assertEqual(walked, [row["id"] for row in fetch(limit=100)])
+        self.assertEqual(len(walked), 6)
+
+    def test_bad_cursors_rejected(self):
+        cursor = database.encode_cursor("teams", database.get_teams(limit=1)[0])
+        with self.assertRaises(ValueError):
+            database.get_players(cursor=cursor)
+        with self.assertRaises(ValueError):
+            database.get_teams(cursor="not-a-cursor")
+
+    def test_list_queries_use_indexes(self):
+        result = database.ensure_pagination_indexes()
+        self.assertIn("idx_games_date_time", result["existing"])
+        self.assertIn("idx_legends_team_name", result["skipped"])  # No club_legends table here
+
+        cursor = database.encode_cursor("games", {"date": "2024-01-02", "time": None, "id": 5})
+        after, params, order_by = database._keyset("games", cursor)
+        with database.get_connection() as conn:
+            plan = " ".join(row[-1] for row in conn.execute(
+                f"EXPLAIN QUERY PLAN SELECT * FROM games g WHERE {after} {order_by} LIMIT 4", params
+            ))
+        self.assertIn("idx_games_date_time", plan)
+        self.assertNotIn("TEMP B-TREE", plan)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,102 @@
+"""
+Tests for the materialised per-club persona documents.
+"""
+
+import tempfile
+import unittest
+from pathlib import Path
+import sys
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import database
+import sqlite_pool
+
+SCHEMA = """
+    CREATE TABLE teams (id INTEGER PRIMARY KEY, name TEXT, short_name TEXT);
+    CREATE TABLE club_identity (team_id INTEGER PRIMARY KEY, nickname TEXT, core_values TEXT);
+    CREATE TABLE club_mood (
+        team_id INTEGER PRIMARY KEY, current_mood TEXT, mood_intensity REAL, updated_at TEXT
+    );
+    CREATE TABLE club_rivalries (
+        id INTEGER PRIMARY KEY, team_id INTEGER, rival_team_id INTEGER, intensity INTEGER,
+        key_moments TEXT, banter_phrases TEXT
+    );
+    CREATE TABLE club_legends (
+        id INTEGER PRIMARY KEY, team_id INTEGER, name TEXT, years TEXT, achievements TEXT
+    );
+    CREATE TABLE club_moments (
+        id INTEGER PRIMARY KEY, team_id INTEGER, title TEXT, date TEXT, keywords TEXT
+    );
+    INSERT INTO teams VALUES (1, 'Arsenal', 'ARS'), (2, 'Tottenham', 'TOT');
+    INSERT INTO club_identity VALUES (1, 'The Gunners', '["class"]');
+    INSERT INTO club_mood VALUES (1, 'steady', 0.5, NULL);
+    INSERT INTO club_rivalries VALUES (1, 1, 2, 10, '[]', '["St Totteringham''s Day"]');
+    INSERT INTO club_legends VALUES (1, 1, 'Thierry Henry', '1999-2007', '["Invincible"]');
+    INSERT INTO club_moments VALUES (1, 1, 'Invincibles', '2004-05-15', '["unbeaten"]');
+"""
+
+
+class TestPersonaDocuments(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.original_path = database.DB_PATH
+        database.DB_PATH = Path(self.tmp.name) / "fan.db"
+        with database.get_connection() as conn:
+            conn.executescript(SCHEMA)
+        database.init_data_generation()
+        database.init_persona_documents()
+        database._persona_cache.clear()
+        database._generation_cache["checked_at"] = 0.0
+
+    def tearDown(self):
+        database._persona_cache.clear()
+        database._generation_cache["checked_at"] = 0.0
+        sqlite_pool.close_all()
+        database.DB_PATH = self.original_path
+        self.tmp.cleanup()
+
+    def _stored(self):
+        with database.get_connection() as conn:
+            return [row[0] for row in conn.execute("SELECT team_id FROM persona_documents")]
+
+    def test_built_once_then_served_from_row_and_memory(self):
+        document = database.get_persona_document(1)
+        self.assertEqual(document["identity"]["core_values"], ["class"])
+        self.assertEqual(document["rivalries"][0]["rival_name"], "Tottenham")
+        self.assertEqual(document["legends"][0]["achievements"], ["Invincible"])
+        self.assertEqual(self._stored(), [1])
+
+        # Callers get their own copy
+        document["mood"]["current_mood"] = "changed"
+        self.assertEqual(database.get_persona_document(1)["mood"]["current_mood"], "steady")
+
+        persona = database.load_full_persona(1)
+        self.assertEqual(persona["personality"]["nickname"], "The Gunners")
+        self.assertEqual(len(persona["moments"]), 1)
+
+    def test_source_write_invalidates_document(self):
+        database.get_persona_document(1)
+        with database.get_connection() as conn:
+            conn.execute("UPDATE club_legends SET name = 'Titi' WHERE id = 1")
+            conn.commit()
+        self.assertEqual(self._stored(), [])  # Dropped by the trigger
+
+        database._generation_cache["checked_at"] = 0.0  # As after the refresh interval
+        self.assertEqual(database.get_persona_document(1)["legends"][0]["name"], "Titi")
+
+    def test_mood_update_rebuilds(self):
+        database.get_persona_document(1)
+        database.update_mood_after_match(1, "W", is_derby=True)
+        self.assertEqual(self._stored(), [1])
+        self.assertEqual(database.get_persona_document(1)["mood"]["current_mood"], "euphoric")
+
+    def test_unknown_team_is_not_stored(self):
+        self.assertIsNone(database.get_persona_document(99)["team"])
+        self.assertEqual(self._stored(), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
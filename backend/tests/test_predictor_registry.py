@@ -0,0 +1,117 @@
+"""
+Tests for the shared predictor registry and Oracle H2H lookups.
+"""
+
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+import unittest
+from pathlib import Path
+import sys
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from predictor.registry import PredictorRegistry
+from predictor.statistical_predictor import FootballOracle
+
+
+class TestPredictorRegistry(unittest.TestCase):
+    """Instances are shared, rebuilt on data change and timed."""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.ratings = Path(self.tmp.name) / "team_ratings.json"
+        self.ratings.write_text('{"ratings": {}}')
+        self.builds = []
+        self.registry = PredictorRegistry(reload_check_seconds=0)
+        self.registry.register("model", self.build, [self.ratings])
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def build(self):
+        time.sleep(0.02)
+        self.builds.append(1)
+        return object()
+
+    def test_same_instance_until_data_changes(self):
+        first = self.registry.get("model")
+        self.assertIs(self.registry.get("model"), first)
+
+        self.ratings.write_text('{"ratings": {"arsenal": {"elo": 1800}}}')
+        os.utime(self.ratings, (time.time() + 5, time.time() + 5))
+        self.assertIsNot(self.registry.get("model"), first)
+        self.assertEqual(len(self.builds), 2)
+
+    def test_concurrent_first_use_builds_once(self):
+        instances = []
+        threads = [
+            threading.Thread(target=lambda: instances.append(self.registry.get("model")))
+            for _ in range(8)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(len(self.builds), 1)
+        self.assertEqual(len({id(instance) for instance in instances}), 1)
+
+    def test_timed_counts_throughput(self):
+        for _ in range(3):
+            with self.registry.timed("model"):
+                pass
+        with self.assertRaises(ValueError):
+            with self.registry.timed("model"):
+                raise ValueError("bad team")
+
+        stats = self.registry.get_stats()["model"]
+        self.assertEqual(stats["predictions"], 4)
+        self.assertEqual(stats["errors"], 1)
+        self.assertIsNotNone(stats["avg_ms"])
+
+    def test_get_timed_counts_inner_predictions(self):
+        class Model:
+            name = "inner"
+
+            def predict(self, home, away):
+                return f"{home}-{away}"
+
+        self.registry.register("inner", Model, [self.ratings])
+        inner = self.registry.get_timed("inner")
+        self.assertEqual(inner.predict("Arsenal", "Chelsea"), "Arsenal-Chelsea")
+        self.assertEqual(inner.name, "inner")
+        self.assertEqual(self.registry.get_stats()["inner"]["predictions"], 1)
+
+
+class TestOracleHeadToHead(unittest.TestCase):
+    """H2H lookups reuse a connection and are memoised per instance."""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.db = Path(self.tmp.name) / "matches.db"
+        with sqlite3.connect(self.db) as conn:
+            conn.execute("CREATE TABLE match_history (home_team TEXT, away_team TEXT, ft_result TEXT, match_date TEXT)")
+            conn.executemany(
+                "INSERT INTO match_history VALUES (?, ?, ?, ?)",
+                [("Arsenal", "Tottenham", "H", f"2024-0{i}-01") for i in range(1, 5)]
+            )
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_h2h_memoised(self):
+        oracle = FootballOracle(self.db)
+        adjustment = oracle._get_h2h_adjustment("Arsenal", "Tottenham")
+        self.assertGreater(adjustment, 0)
+
+        with sqlite3.connect(self.db) as conn:
+            conn.execute("DELETE FROM match_history")
+        self.assertEqual(oracle._get_h2h_adjustment("Arsenal", "Tottenham"), adjustment)
+        self.assertEqual(FootballOracle(self.db)._get_h2h_adjustment("Arsenal", "Tottenham"), 0.0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,74 @@
+"""
+Tests for per-request SQLite query tracing.
+"""
+
+import sqlite3
+import tempfile
+import unittest
+from pathlib import Path
+import sys
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import query_trace
+from sqlite_pool import ConnectionManager
+
+
+class TestQueryTrace(unittest.TestCase):
+    """Statements on pooled connections are counted per request."""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        path = Path(self.tmp.name) / "trace.db"
+        with sqlite3.connect(path) as conn:
+            conn.execute("CREATE TABLE nodes (id INTEGER PRIMARY KEY, name TEXT)")
+            conn.executemany("INSERT INTO nodes (name) VALUES (?)", [(f"n{i}",) for i in range(10)])
+        self.manager = ConnectionManager()
+        self.conn = self.manager.acquire(path, row_factory=sqlite3.Row)
+        query_trace.reset()
+        self._slow_ms = query_trace.SLOW_QUERY_MS
+
+    def tearDown(self):
+        query_trace.SLOW_QUERY_MS = self._slow_ms
+        self.manager.close_all()
+        self.tmp.cleanup()
+
+    def test_counts_statements_and_rows(self):
+        with query_trace.track("GET /nodes") as request:
+            self.conn.execute("SELECT * FROM nodes").fetchall()
+            for row in self.conn.execute("SELECT id FROM nodes WHERE id <= 3"):
+                pass
+            self.conn.execute("UPDATE nodes SET name = 'x' WHERE id <= 2")
+        self.assertEqual(request.queries, 3)
+        self.assertEqual(request.rows, 10 + 3 + 2)
+        self.assertFalse(request.over_budget)
+
+    def test_repeated_statement_flags_request(self):
+        with query_trace.track("GET /context", budget=5) as request:
+            ids = [row["id"] for row in self.conn.execute("SELECT id FROM nodes").fetchall()]
+            for node_id in ids:  # N+1
+                self.conn.execute("SELECT * FROM nodes WHERE id = ?", (node_id,)).fetchone()
+        self.assertTrue(request.over_budget)
+        worst = request.top(1)[0]
+        self.assertEqual(worst["calls"], 10)
+        self.assertEqual(worst["sql"], "SELECT * FROM nodes WHERE id = ?")
+        self.assertEqual(query_trace.get_stats()["recent_over_budget"][-1]["queries"], 11)
+
+    def test_slow_statement_logged_with_plan(self):
+        query_trace.SLOW_QUERY_MS = 0
+        self.conn.execute("SELECT name FROM nodes WHERE name = ?", ("n1",)).fetchall()
+        slow = query_trace.get_stats()["recent_slow"][-1]
+        self.assertEqual(slow["rows"], 1)
+        self.assertTrue(any("nodes" in line for line in slow["plan"]))
+
+    def test_untracked_statements_still_aggregated(self):
+        self.conn.execute("SELECT COUNT(*) FROM nodes").fetchone()
+        self.conn.execute("SELECT COUNT(*) FROM nodes").fetchone()
+        self.assertIsNone(query_trace.current_request())
+        top = query_trace.get_stats()["top_statements"]
+        self.assertEqual(top[0]["calls"], 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
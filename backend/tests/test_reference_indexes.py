@@ -0,0 +1,68 @@
+"""
+Tests for the managed match_history / elo_history indexes.
+"""
+
+import sqlite3
+import tempfile
+import unittest
+from pathlib import Path
+import sys
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import database
+
+
+class TestReferenceIndexes(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = Path(self.tmp.name) / "reference.db"
+        with sqlite3.connect(self.path) as conn:
+            conn.execute("""
+                CREATE TABLE match_history (
+                    division TEXT, match_date TEXT, home_team TEXT, away_team TEXT,
+                    ft_home INTEGER, ft_away INTEGER, ft_result TEXT
+                )
+            """)
+            conn.execute("CREATE TABLE elo_history (club TEXT, date TEXT)")  # no elo column
+            teams = [f"Team {i}" for i in range(400)]
+            conn.executemany(
+                "INSERT INTO match_history VALUES (?, ?, ?, ?, 1, 0, 'H')",
+                [(f"D{i % 8}", f"2020-01-{i % 28 + 1:02d}", teams[i % 400], teams[(i * 7 + 1) % 400])
+                 for i in range(4000)]
+            )
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_idempotent_and_skips_missing_columns(self):
+        first = database.ensure_reference_indexes(self.path)
+        self.assertIn("idx_mh_division_date", first["created"])
+        self.assertEqual(first["skipped"], ["idx_elo_club_date"])
+
+        second = database.ensure_reference_indexes(self.path)
+        self.assertEqual(second["created"], [])
+        self.assertEqual(sorted(second["existing"]), sorted(first["created"]))
+
+    def test_planner_uses_indexes(self):
+        database.ensure_reference_indexes(self.path)
+        with sqlite3.connect(self.path) as conn:
+            plan = " ".join(row[3] for row in conn.execute("""
+                EXPLAIN QUERY PLAN
+                SELECT match_date, ft_result FROM match_history
+                WHERE (home_team = ? OR away_team = ?) AND division = 'D1'
+                ORDER BY match_date DESC LIMIT 5
+            """, ("Team 1", "Team 1")))
+        self.assertIn("idx_mh_home_away_date", plan)
+        self.assertIn("idx_mh_away_home_date", plan)
+
+    def test_missing_database(self):
+        result = database.ensure_reference_indexes(Path(self.tmp.name) / "absent.db")
+        self.assertEqual(result["created"], [])
+        self.assertFalse((Path(self.tmp.name) / "absent.db").exists())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,128 @@
+"""
+Tests for the exact-match LLM response cache and data-generation invalidation.
+"""
+
+import unittest
+import tempfile
+import time
+from pathlib import Path
+import sys
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import database
+from response_cache import (
+    ResponseCache, MemoryBackend, SQLiteBackend,
+    make_key, normalize_query, context_fingerprint, is_cacheable
+)
+
+ANSWER = {"response": "We won 2-0, get in!", "sources": [], "confidence": 0.8}
+
+
+class TestKeying(unittest.TestCase):
+    """Equivalent questions share a key; different context does not."""
+
+    def test_normalize_query(self):
+        self.assertEqual(normalize_query("  Did we   WIN?? "), "did we win")
+
+    def test_key_depends_on_club_query_and_context(self):
+        fp = context_fingerprint("Arsenal 2-0 Spurs")
+        self.assertEqual(make_key("arsenal", "Did we win?", fp), make_key("arsenal", "did we win", fp))
+        self.assertNotEqual(make_key("arsenal", "did we win", fp), make_key("chelsea", "did we win", fp))
+        self.assertNotEqual(
+            make_key("arsenal", "did we win", fp),
+            make_key("arsenal", "did we win", context_fingerprint("Arsenal 1-1 Spurs"))
+        )
+
+    def test_history_changes_fingerprint(self):
+        history = [{"role": "user", "content": "hi"}, {"role": "assistant", "content": "hello"}]
+        self.assertNotEqual(context_fingerprint("ctx"), context_fingerprint("ctx", history))
+
+    def test_errors_not_cacheable(self):
+        self.assertTrue(is_cacheable(ANSWER))
+        self.assertFalse(is_cacheable({"response": "Sorry", "error": "HTTP 529"}))
+
+
+class _CacheBehaviour:
+    """Shared assertions for both backends."""
+
+    def make_cache(self, max_entries=3, ttl=60) -> ResponseCache:
+        raise NotImplementedError
+
+    def test_hit_after_put(self):
+        cache = self.make_cache()
+        cache.put("k", "1.100", ANSWER)
+        self.assertEqual(cache.get("k", "1.100"), ANSWER)
+        self.assertEqual(cache.get_stats()["hits"], 1)
+
+    def test_generation_change_invalidates(self):
+        cache = self.make_cache()
+        cache.put("k", "1.100", ANSWER)
+        self.assertIsNone(cache.get("k", "2.100"))
+        self.assertEqual(cache.get_stats()["stale_generation"], 1)
+
+    def test_ttl_expiry(self):
+        cache = self.make_cache(ttl=0.05)
+        cache.put("k", "1.100", ANSWER)
+        time.sleep(0.1)
+        self.assertIsNone(cache.get("k", "1.100"))
+        self.assertEqual(cache.get_stats()["expired"], 1)
+
+
+class TestMemoryCache(_CacheBehaviour, unittest.TestCase):
+
+    def make_cache(self, max_entries=3, ttl=60):
+        return ResponseCache(MemoryBackend(max_entries), ttl_seconds=ttl)
+
+    def test_lru_eviction(self):
+        cache = self.make_cache(max_entries=2)
+        cache.put("a", "g", ANSWER)
+        cache.put("b", "g", ANSWER)
+        cache.get("a", "g")          # a is now most recently used
+        cache.put("c", "g", ANSWER)  # evicts b
+        self.assertIsNotNone(cache.get("a", "g"))
+        self.assertIsNone(cache.get("b", "g"))
+        self.assertEqual(cache.get_stats()["evictions"], 1)
+
+
+class TestSQLiteCache(_CacheBehaviour, unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def make_cache(self, max_entries=3, ttl=60):
+        return ResponseCache(SQLiteBackend(Path(self.tmp.name) / "cache.db", max_entries), ttl_seconds=ttl)
+
+    def test_shared_between_instances(self):
+        """Two caches on one file (two workers) see each other's entries."""
+        first, second = self.make_cache(), self.make_cache()
+        first.put("k", "1.100", ANSWER)
+        self.assertEqual(second.get("k", "1.100"), ANSWER)
+
+
+class TestDataGeneration(unittest.TestCase):
+    """Writes that change match/mood data bump the generation."""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.original_path = database.DB_PATH
+        database.DB_PATH = Path(self.tmp.name) / "generation.db"
+        database.init_data_generation()
+
+    def tearDown(self):
+        database.DB_PATH = self.original_path
+        self.tmp.cleanup()
+
+    def test_bump_changes_generation_immediately(self):
+        before = database.get_data_generation()
+        self.assertEqual(database.get_data_generation(), before)
+        database.bump_data_generation()
+        self.assertNotEqual(database.get_data_generation(), before)
+
+
+if __name__ == "__main__":
+    unittest.main()
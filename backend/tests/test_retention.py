@@ -0,0 +1,104 @@
+"""
+Tests for archiving old log rows out of the serving databases.
+"""
+
+import sqlite3
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+import sys
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import database
+import retention
+import sqlite_pool
+
+
+class TestRetention(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        root = Path(self.tmp.name)
+        self.original_path = database.DB_PATH
+        database.DB_PATH = root / "logs.db"
+        database.init_analytics()
+        database.init_security_tables()
+        self.patches = [
+            mock.patch.object(retention, "ARCHIVE_DIR", root / "archive"),
+            mock.patch.object(retention, "RETENTION_POLICIES", retention.RETENTION_POLICIES[:2]),
+        ]
+        for patch in self.patches:
+            patch.start()
+
+    def tearDown(self):
+        for patch in self.patches:
+            patch.stop()
+        sqlite_pool.close_all()
+        database.DB_PATH = self.original_path
+        self.tmp.cleanup()
+
+    def _age_rows(self, table, column, ids, days):
+        with database.get_write_connection() as conn:
+            conn.execute(
+                f"UPDATE {table} SET {column} = datetime('now', ?) WHERE id IN ({','.join('?' * len(ids))})",
+                (f'-{days} days', *ids)
+            )
+            conn.commit()
+
+    def test_old_rows_archived_in_batches_and_rollups_kept(self):
+        # Long queries so the archived rows span whole pages
+        ids = [database.log_query(query=f"query {i} " + "x" * 400, intent="match") for i in range(25)]
+        self._age_rows("query_analytics", "created_at", ids[:20], 120)
+        database.log_security_event(session_id="s1", attempt_number=1, pattern_matched="x",
+                                    escalation_level="warned", response_type="snap_back")
+        total_before = database.get_analytics_summary(days=1)["total_queries"]
+
+        result = retention.run_retention(days=90, batch_size=7)
+        analytics, security = result["tables"]
+        self.assertEqual(analytics["rows_archived"], 20)
+        self.assertEqual(security["rows_archived"], 0)
+        self.assertGreater(result["archive_bytes"], 0)
+        self.assertGreater(result["reclaimed_bytes"], 0)
+
+        with database.get_write_connection() as conn:
+            remaining = [row[0] for row in conn.execute("SELECT id FROM query_analytics ORDER BY id")]
+        self.assertEqual(remaining, ids[20:])
+        archived = list(retention.iter_archive("query_analytics"))
+        self.assertEqual(sorted(row["id"] for row in archived), ids[:20])
+        self.assertTrue(archived[0]["query"].startswith("query 0 "))
+
+        # Rollups still count the archived rows; a rerun has nothing to do
+        self.assertEqual(database.get_analytics_summary(days=1)["total_queries"], total_before)
+        self.assertEqual(retention.run_retention(days=90)["rows_archived"], 0)
+
+    def test_failed_archive_keeps_rows(self):
+        ids = [database.log_query(query="old") for _ in range(3)]
+        self._age_rows("query_analytics", "created_at", ids, 120)
+        with mock.patch.object(retention, "_append_archive", side_effect=OSError("disk full")):
+            with self.assertRaises(OSError):
+                retention.run_retention(days=90)
+        with sqlite3.connect(database.DB_PATH) as conn:
+            self.assertEqual(conn.execute("SELECT COUNT(*) FROM query_analytics").fetchone()[0], 3)
+        conn.close()
+
+    def test_missing_database_is_skipped(self):
+        database.DB_PATH = Path(self.tmp.name) / "absent.db"
+        result = retention.run_retention()
+        self.assertEqual(result["rows_archived"], 0)
+        self.assertEqual(result["tables"][0]["skipped"], "database missing")
+
+
+    def test_short_windows_are_refused(self):
+        ids = [database.log_query(query="recent") for _ in range(2)]
+        self._age_rows("query_analytics", "created_at", ids, 2)
+        with self.assertRaises(ValueError):
+            retention.run_retention(days=1)
+        with database.get_write_connection() as conn:
+            self.assertEqual(conn.execute("SELECT COUNT(*) FROM query_analytics").fetchone()[0], 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,84 @@
+"""
+Tests for the ranked single-connection FTS5 search.
+"""
+
+import tempfile
+import unittest
+from pathlib import Path
+import sys
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import database
+import rag
+import sqlite_pool
+
+
+class TestRankedSearch(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.original_path = database.DB_PATH
+        database.DB_PATH = Path(self.tmp.name) / "search.db"
+        database.init_db()
+        self.arsenal, self.chelsea = database.insert_teams([
+            {"name": "Arsenal", "short_name": "ARS", "league": "Premier League", "country": "England"},
+            {"name": "Chelsea", "short_name": "CHE", "league": "Premier League", "country": "England"},
+            {"name": "Celtic", "short_name": "CEL", "league": "Premiership", "country": "Scotland"},
+            {"name": "Rangers", "short_name": "RAN", "league": "Premiership", "country": "Scotland"},
+        ])[:2]
+        database.insert_players([
+            {"name": "Bukayo Saka", "team_id": self.arsenal, "position": "Winger"},
+            {"name": "Cole Palmer", "team_id": self.chelsea, "position": "Midfielder", "nationality": "England"},
+        ])
+        database.insert_news_articles([
+            {"title": "Transfer roundup", "content": "Scouts watched an Arsenal academy winger."},
+            {"title": "Arsenal beat Chelsea", "content": "Arsenal won the London derby.",
+             "summary": "Arsenal win at home"},
+            {"title": "Chelsea injury news", "content": "Chelsea confirm a knock for Palmer."},
+            {"title": "Ticket prices frozen", "content": "Season tickets stay the same."},
+            {"title": "Kit launch", "content": "A new away kit goes on sale."},
+        ])
+
+    def tearDown(self):
+        sqlite_pool.close_all()
+        database.DB_PATH = self.original_path
+        self.tmp.cleanup()
+
+    def test_news_ranked_by_bm25_with_snippets(self):
+        news = database.search_news("Arsenal")
+        self.assertEqual([article["title"] for article in news],
+                         ["Arsenal beat Chelsea", "Transfer roundup"])
+        self.assertGreater(news[0]["score"], news[1]["score"])
+        self.assertIn("<mark>Arsenal</mark>", news[0]["snippet"])
+
+    def test_global_top_k_merges_tables(self):
+        hits = database.search("Arsenal", limit=2)
+        self.assertEqual([(hit["type"], hit.get("name") or hit.get("title")) for hit in hits],
+                         [("teams", "Arsenal"), ("news", "Arsenal beat Chelsea")])
+        scores = [hit["score"] for hit in database.search("Arsenal", limit=10)]
+        self.assertEqual(scores, sorted(scores, reverse=True))
+
+        grouped = database.search_all("England", limit=1)
+        self.assertEqual(grouped["teams"][0]["country"], "England")
+        self.assertEqual(grouped["players"][0]["team_name"], "Chelsea")
+        self.assertEqual(grouped["news"], [])
+
+    def test_match_any_and_escaping(self):
+        self.assertEqual(database.search_news("Palmer Saka"), [])
+        any_hits = database.search("Palmer Saka", tables=["players"], match_any=True)
+        self.assertEqual({hit["name"] for hit in any_hits}, {"Bukayo Saka", "Cole Palmer"})
+        # Operators in user input stay literal
+        self.assertEqual(database.search("Arsenal OR"), [])
+        self.assertEqual(database.search("  "), [])
+
+    def test_rag_news_context_matches_any_entity(self):
+        context, sources = rag.retrieve_news_context({"teams": ["Arsenal", "Chelsea"], "players": []})
+        self.assertIn("Arsenal beat Chelsea", context.splitlines()[1])
+        self.assertEqual(len(sources), 3)
+        self.assertNotIn("<mark>", context)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,183 @@
+"""
+Tests for the bounded, idle-expiring session store.
+"""
+
+import time
+import tempfile
+import threading
+import unittest
+from unittest import mock
+from pathlib import Path
+import sys
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import session_store
+import conversation_intelligence
+from session_store import SessionStore, SQLiteSessionStore, approx_size
+from conversation_intelligence import ConversationState
+
+
+class TestSessionStore(unittest.TestCase):
+    """LRU bound, idle TTL and sweeping."""
+
+    def test_lru_eviction(self):
+        store = SessionStore("test_lru", max_entries=2, idle_ttl=60)
+        store["a"] = 1
+        store["b"] = 2
+        store.get("a")   # a is now most recently used
+        store["c"] = 3   # evicts b
+        self.assertIn("a", store)
+        self.assertNotIn("b", store)
+        self.assertEqual(store.get_stats()["evicted_lru"], 1)
+
+    def test_idle_entries_expire_on_read(self):
+        store = SessionStore("test_ttl", max_entries=10, idle_ttl=0.05)
+        store["a"] = [1]
+        time.sleep(0.1)
+        self.assertIsNone(store.get("a"))
+        self.assertEqual(store.get_stats()["expired"], 1)
+
+    def test_reads_refresh_idle_clock(self):
+        store = SessionStore("test_refresh", max_entries=10, idle_ttl=0.15)
+        store["a"] = 1
+        for _ in range(3):
+            time.sleep(0.06)
+            self.assertEqual(store.get("a"), 1)
+
+    def test_get_or_create_keeps_reference(self):
+        store = SessionStore("test_create", max_entries=10, idle_ttl=60)
+        history = store.get_or_create("conv", list)
+        history.append("hi")
+        self.assertIs(store.get_or_create("conv", list), history)
+        self.assertEqual(store.get_stats()["created"], 1)
+
+    def test_sweep_drops_idle_and_measures_memory(self):
+        store = SessionStore("test_sweep", max_entries=10, idle_ttl=0.05)
+        store["old"] = "x" * 1000
+        time.sleep(0.1)
+        store["new"] = "y" * 1000
+        self.assertEqual(store.sweep(), 1)
+        self.assertEqual(len(store), 1)
+        self.assertGreater(store.get_stats()["approx_bytes"], 1000)
+
+    def test_stores_are_registered(self):
+        SessionStore("test_registry", max_entries=10, idle_ttl=60)["a"] = 1
+        self.assertEqual(session_store.get_stats()["test_registry"]["size"], 1)
+        self.assertIn("test_registry", session_store.sweep_all())
+
+
+class TestSQLiteSessionStore(unittest.TestCase):
+    """Shared WAL-mode backend: what several workers on one box would see."""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = Path(self.tmp.name) / "sessions.db"
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def make_store(self, name="conversation_state", **kwargs):
+        kwargs.setdefault("max_entries", 100)
+        kwargs.setdefault("idle_ttl", 60)
+        return SQLiteSessionStore(name, self.path, **kwargs)
+
+    def test_state_shared_between_instances(self):
+        worker_a, worker_b = self.make_store(), self.make_store()
+        state = ConversationState(conversation_id="c1", club="arsenal")
+        state.mark_fact_discussed("won 2-0")
+        worker_a["c1"] = state
+
+        loaded = worker_b["c1"]
+        self.assertEqual(loaded.club, "arsenal")
+        self.assertTrue(loaded.was_discussed("won 2-0"))
+
+    def test_stores_are_namespaced(self):
+        history, states = self.make_store("history"), self.make_store("state")
+        history["c1"] = ["hi"]
+        self.assertNotIn("c1", states)
+
+    def test_edit_is_atomic_across_workers(self):
+        workers = [self.make_store() for _ in range(4)]
+
+        def bump(store):
+            for _ in range(25):
+                with store.edit("counter", list) as items:
+                    items.append(1)
+
+        threads = [threading.Thread(target=bump, args=(store,)) for store in workers]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(len(workers[0]["counter"]), 100)
+
+    def test_concurrent_turns_keep_every_update(self):
+        store = self.make_store()
+
+        def turn(i):
+            for _ in range(10):
+                # Each turn works on its own copy, as main.py does between prepare and finish
+                state = conversation_intelligence.get_conversation_state("c1", club="arsenal")
+                conversation_intelligence.update_conversation_state(
+                    state, "query", {"teams": [f"team{i}"]}, "match", "response"
+                )
+
+        with mock.patch.object(conversation_intelligence, "_conversation_states", store):
+            threads = [threading.Thread(target=turn, args=(i,)) for i in range(4)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+
+        state = store["c1"]
+        self.assertEqual(state.turn_count, 40)
+        self.assertEqual(sorted(state.last_entities["teams"]), ["team0", "team1", "team2", "team3"])
+
+    def test_stats_size_is_refreshed_by_sweep(self):
+        store = self.make_store()
+        store["a"] = 1
+        store["b"] = 2
+        self.assertEqual(store.get_stats()["size"], 0)
+        store.sweep()
+        self.assertEqual(store.get_stats()["size"], 2)
+
+    def test_edit_rolls_back_on_error(self):
+        store = self.make_store()
+        store["c1"] = ["kept"]
+        with self.assertRaises(RuntimeError):
+            with store.edit("c1", list) as items:
+                items.append("lost")
+                raise RuntimeError("boom")
+        self.assertEqual(store["c1"], ["kept"])
+
+    def test_idle_expiry_and_sweep(self):
+        store = self.make_store(idle_ttl=0.05)
+        store["old"] = 1
+        store["older"] = 2
+        time.sleep(0.1)
+        self.assertIsNone(store.get("old"))
+        self.assertEqual(store.sweep(), 1)
+        self.assertEqual(len(store), 0)
+
+    def test_lru_trim(self):
+        store = self.make_store(max_entries=2)
+        for key in ("a", "b", "c"):
+            store[key] = key
+            time.sleep(0.01)
+        store.sweep()
+        self.assertEqual(sorted(key for key, _ in store.items()), ["b", "c"])
+        self.assertEqual(store.get_stats()["evicted_lru"], 1)
+
+
+class TestApproxSize(unittest.TestCase):
+
+    def test_counts_nested_containers_once(self):
+        shared = "z" * 500
+        self.assertGreater(approx_size({"a": [shared]}), 500)
+        self.assertLess(approx_size([shared, shared]), 2 * 500)
+
+
+if __name__ == "__main__":
+    unittest.main()
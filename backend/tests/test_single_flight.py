@@ -0,0 +1,163 @@
+"""
+Tests for single-flight coalescing of identical chat requests.
+"""
+
+import asyncio
+import threading
+import time
+import unittest
+from pathlib import Path
+import sys
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import concurrency
+from single_flight import SingleFlight, StreamFlight
+
+
+class TestSingleFlight(unittest.TestCase):
+    """Identical concurrent calls run once and share the result."""
+
+    def test_concurrent_calls_run_once(self):
+        flight = SingleFlight("test")
+        calls = []
+
+        def work():
+            calls.append(1)
+            time.sleep(0.05)
+            return {"response": "Up the Arsenal"}
+
+        async def main():
+            return await asyncio.gather(*[
+                flight.run("k", lambda: concurrency.run_blocking(work)) for _ in range(5)
+            ])
+
+        results = asyncio.run(main())
+        self.assertEqual(len(calls), 1)
+        self.assertTrue(all(result == {"response": "Up the Arsenal"} for result, _ in results))
+        self.assertEqual(sum(1 for _, shared in results if shared), 4)
+        self.assertEqual(flight.get_stats()["in_flight"], 0)
+
+    def test_different_keys_do_not_share(self):
+        flight = SingleFlight("test")
+
+        async def main():
+            async def answer(value):
+                await asyncio.sleep(0.01)
+                return value
+            return await asyncio.gather(
+                flight.run("a", lambda: answer("a")),
+                flight.run("b", lambda: answer("b")),
+            )
+
+        (a, a_shared), (b, b_shared) = asyncio.run(main())
+        self.assertEqual((a, b), ("a", "b"))
+        self.assertFalse(a_shared or b_shared)
+
+    def test_cancelled_leader_does_not_cancel_followers(self):
+        flight = SingleFlight("test")
+
+        async def main():
+            async def answer():
+                await asyncio.sleep(0.05)
+                return "done"
+            leader = asyncio.ensure_future(flight.run("k", answer))
+            await asyncio.sleep(0)
+            follower = asyncio.ensure_future(flight.run("k", answer))
+            await asyncio.sleep(0)
+            leader.cancel()
+            return await follower
+
+        self.assertEqual(asyncio.run(main()), ("done", True))
+
+
+class TestStreamFlight(unittest.TestCase):
+    """One upstream stream is fanned out to every identical request."""
+
+    def test_follower_replays_and_follows(self):
+        flight = StreamFlight("test")
+        starts = []
+        release = threading.Event()
+
+        def upstream():
+            starts.append(1)
+            yield "a"
+            release.wait(2)
+            yield "b"
+
+        async def collect():
+            return [chunk async for chunk in flight.subscribe("k", upstream, poll_interval=0.01)]
+
+        async def main():
+            leader = asyncio.ensure_future(collect())
+            await asyncio.sleep(0.05)  # Leader has seen "a"
+            follower = asyncio.ensure_future(collect())
+            await asyncio.sleep(0.01)
+            release.set()
+            return await asyncio.gather(leader, follower)
+
+        leader_chunks, follower_chunks = asyncio.run(main())
+        self.assertEqual(len(starts), 1)
+        self.assertEqual(leader_chunks, ["a", "b"])
+        self.assertEqual(follower_chunks, ["a", "b"])
+        self.assertEqual(flight.get_stats()["followers"], 1)
+
+    def test_last_subscriber_leaving_aborts_upstream(self):
+        flight = StreamFlight("test")
+        aborted = threading.Event()
+        finished = []
+
+        def upstream():
+            yield "a"
+            aborted.wait(2)
+            yield "b"
+
+        async def main():
+            stream = flight.subscribe(
+                "k", upstream,
+                on_abort=aborted.set,
+                on_finish=lambda: finished.append(1),
+                poll_interval=0.01
+            )
+            self.assertEqual(await stream.__anext__(), "a")
+            await stream.aclose()  # Client disconnected
+            await asyncio.sleep(0.05)
+
+        asyncio.run(main())
+        self.assertTrue(aborted.is_set())
+        self.assertEqual(finished, [1])
+        self.assertEqual(flight.get_stats()["aborted"], 1)
+        self.assertEqual(flight.get_stats()["in_flight"], 0)
+
+    def test_one_subscriber_leaving_keeps_stream_alive(self):
+        flight = StreamFlight("test")
+        aborted = threading.Event()
+        release = threading.Event()
+
+        def upstream():
+            yield "a"
+            release.wait(2)
+            yield "b"
+
+        async def main():
+            first = flight.subscribe("k", upstream, on_abort=aborted.set, poll_interval=0.01)
+            self.assertEqual(await first.__anext__(), "a")
+            second = asyncio.ensure_future(
+                self._drain(flight.subscribe("k", upstream, poll_interval=0.01))
+            )
+            await asyncio.sleep(0.02)
+            await first.aclose()
+            release.set()
+            return await second
+
+        self.assertEqual(asyncio.run(main()), ["a", "b"])
+        self.assertFalse(aborted.is_set())
+
+    @staticmethod
+    async def _drain(stream):
+        return [chunk async for chunk in stream]
+
+
+if __name__ == "__main__":
+    unittest.main()
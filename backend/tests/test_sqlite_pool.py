@@ -0,0 +1,176 @@
+"""
+Tests for the per-thread persistent SQLite connection manager.
+"""
+
+import os
+import sqlite3
+import tempfile
+import threading
+import unittest
+from pathlib import Path
+from unittest import mock
+import sys
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from sqlite_pool import ConnectionManager
+import database
+import sqlite_pool
+from match_insights import MatchInsights
+
+
+class TestConnectionManager(unittest.TestCase):
+    """One configured connection per thread per file, reused across calls."""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = Path(self.tmp.name) / "pool.db"
+        with sqlite3.connect(self.path) as conn:
+            conn.execute("CREATE TABLE t (x INTEGER)")
+        self.manager = ConnectionManager()
+
+    def tearDown(self):
+        self.manager.close_all()
+        self.tmp.cleanup()
+
+    def test_reused_within_thread_and_survives_close(self):
+        first = self.manager.acquire(self.path)
+        first.close()
+        second = self.manager.acquire(self.path)
+        self.assertIs(first, second)
+        self.assertEqual(second.execute("SELECT 1").fetchone()[0], 1)
+
+        stats = self.manager.get_stats()["databases"]["pool.db"]
+        self.assertEqual((stats["acquires"], stats["reuses"], stats["opens"]), (2, 1, 1))
+
+    def test_separate_connection_per_thread(self):
+        mine = self.manager.acquire(self.path)
+        theirs = []
+        thread = threading.Thread(target=lambda: theirs.append(self.manager.acquire(self.path)))
+        thread.start()
+        thread.join()
+        self.assertIsNot(mine, theirs[0])
+
+    def test_pragmas_applied(self):
+        conn = self.manager.acquire(self.path)
+        self.assertEqual(conn.execute("PRAGMA journal_mode").fetchone()[0], "wal")
+        self.assertEqual(conn.execute("PRAGMA temp_store").fetchone()[0], 2)  # MEMORY
+        self.assertLess(conn.execute("PRAGMA cache_size").fetchone()[0], 0)
+
+    def test_release_rolls_back_uncommitted(self):
+        conn = self.manager.acquire(self.path)
+        conn.execute("INSERT INTO t VALUES (1)")
+        conn.close()
+        conn = self.manager.acquire(self.path)
+        self.assertEqual(conn.execute("SELECT COUNT(*) FROM t").fetchone()[0], 0)
+
+    def test_nested_release_keeps_outer_transaction(self):
+        outer = self.manager.acquire(self.path)
+        outer.execute("INSERT INTO t VALUES (1)")
+        inner = self.manager.acquire(self.path)
+        inner.close()
+        outer.commit()
+        outer.close()
+        self.assertEqual(self.manager.acquire(self.path).execute("SELECT COUNT(*) FROM t").fetchone()[0], 1)
+
+    def test_row_factories_get_their_own_connection(self):
+        plain = self.manager.acquire(self.path)
+        rows = self.manager.acquire(self.path, row_factory=sqlite3.Row)
+        self.assertIsNot(plain, rows)
+        self.assertIsInstance(rows.execute("SELECT 1 AS one").fetchone(), sqlite3.Row)
+        self.assertIsInstance(plain.execute("SELECT 1").fetchone(), tuple)
+
+    def test_replaced_file_is_reopened(self):
+        conn = self.manager.acquire(self.path)
+        conn.close()
+        replacement = Path(self.tmp.name) / "new.db"
+        with sqlite3.connect(replacement) as new:
+            new.execute("CREATE TABLE fresh (y INTEGER)")
+        os.replace(replacement, self.path)
+
+        conn = self.manager.acquire(self.path)
+        tables = {row[0] for row in conn.execute("SELECT name FROM sqlite_master")}
+        self.assertIn("fresh", tables)
+        self.assertEqual(self.manager.get_stats()["databases"]["pool.db"]["reopens"], 1)
+
+
+    def test_failed_query_releases_connection(self):
+        # No match_history table: every insight query raises
+        insights = MatchInsights(str(self.path))
+        with self.assertRaises(sqlite3.OperationalError):
+            insights.find_comebacks()
+        conn = sqlite_pool.acquire(self.path, readonly=True)
+        self.assertEqual(conn.depth, 1)
+        conn.close()
+        sqlite_pool.close_all()
+
+
+class TestServingMode(unittest.TestCase):
+    """Immutable read-only connections and the separate write database."""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = Path(self.tmp.name) / "reference.db"
+        conn = sqlite3.connect(self.path)
+        conn.execute("PRAGMA journal_mode = WAL")
+        conn.execute("CREATE TABLE t (x INTEGER)")
+        conn.execute("INSERT INTO t VALUES (1)")
+        conn.commit()
+        conn.close()
+        self.manager = ConnectionManager()
+        patcher = mock.patch.object(sqlite_pool, "SERVING_MODE", True)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        self.manager.close_all()
+        sqlite_pool.close_all()
+        self.tmp.cleanup()
+
+    def test_freeze_then_immutable_reads(self):
+        sqlite_pool.freeze(self.path)
+        self.assertFalse(Path(f"{self.path}-wal").exists())
+        self.assertIn("immutable=1", sqlite_pool.readonly_uri(self.path))
+
+        conn = self.manager.acquire(self.path, readonly=True)
+        self.assertEqual(conn.execute("SELECT x FROM t").fetchone()[0], 1)
+        self.assertGreater(conn.execute("PRAGMA mmap_size").fetchone()[0], sqlite_pool.SQLITE_MMAP_SIZE)
+        with self.assertRaises(sqlite3.OperationalError):
+            conn.execute("INSERT INTO t VALUES (2)")
+
+    def test_writes_go_to_write_db(self):
+        sqlite_pool.freeze(self.path)
+        with sqlite3.connect(self.path) as conn:
+            conn.execute(
+                "CREATE TABLE trivia_questions (id INTEGER PRIMARY KEY, question TEXT, "
+                "correct_answer TEXT, explanation TEXT, times_asked INTEGER DEFAULT 0)"
+            )
+            conn.execute("INSERT INTO trivia_questions VALUES (1, 'Q', 'Yes', NULL, 0)")
+        write_db = Path(self.tmp.name) / "writes.db"
+        with mock.patch.object(database, "SERVING_MODE", True), \
+                mock.patch.object(database, "DB_PATH", self.path), \
+                mock.patch.object(database, "WRITE_DB_PATH", write_db):
+            database.init_analytics()
+            database.init_trivia_table()
+            database.log_query(query="served")
+            self.assertTrue(database.check_trivia_answer(1, "yes")["correct"])
+            self.assertEqual(database.get_analytics_summary(days=1)["total_queries"], 1)
+
+        with sqlite3.connect(write_db) as conn:
+            self.assertEqual(conn.execute("SELECT times_asked, times_correct FROM trivia_answer_stats").fetchone(), (1, 1))
+        with sqlite3.connect(self.path) as conn:
+            self.assertEqual(conn.execute("SELECT times_asked FROM trivia_questions").fetchone()[0], 0)
+
+
+    def test_main_db_writes_are_refused(self):
+        with mock.patch.object(database, "SERVING_MODE", True), \
+                mock.patch.object(database, "DB_PATH", self.path):
+            with self.assertRaises(database.ReadOnlyError):
+                database.add_trivia_question("Q", "A", ["B", "C"])
+            with self.assertRaises(database.ReadOnlyError):
+                database.update_mood_after_match(1, "W")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,128 @@
+"""
+Tests for the canonical team identity resolver and match_history team ids.
+"""
+
+import sqlite3
+import tempfile
+import unittest
+from pathlib import Path
+import sys
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from team_identity import (
+    UNSEEDED_ID_START, get_resolver, has_team_ids, lookup_team_id, resolve,
+    sync_team_identity, team_slug,
+)
+from match_insights import MatchInsights
+import sqlite_pool
+
+
+class TestResolver(unittest.TestCase):
+
+    def test_spellings_resolve_to_one_team(self):
+        spurs = resolve("Tottenham")
+        for spelling in ("Spurs", "tottenham_hotspur", "Tottenham Hotspur FC", "TOTTENHAM"):
+            self.assertEqual(resolve(spelling), spurs, spelling)
+        self.assertEqual(resolve("Man Utd").slug, "manchester_united")
+        self.assertEqual(resolve("AFC Bournemouth").name, "Bournemouth")
+        self.assertEqual(resolve("Nott'm Forest").slug, "nottingham_forest")
+        self.assertIsNone(resolve("Sheffield Wednesday"))
+        self.assertIsNone(resolve(""))
+
+    def test_find_in_text_prefers_longest_match(self):
+        teams = get_resolver().find_in_text("Newcastle United vs Man City on Saturday")
+        self.assertEqual([t.slug for t in teams], ["newcastle", "manchester_city"])
+
+    def test_find_in_text_skips_ambiguous_one_word_aliases(self):
+        find = get_resolver().find_in_text
+        self.assertEqual(find("I watched Norwich City last night"), [])
+        self.assertEqual(find("Hull City away"), [])
+        self.assertEqual(find("Real Sociedad beat Real Betis"), [])
+        self.assertEqual([t.slug for t in find("Leeds United at home")], ["leeds"])
+        self.assertEqual([t.slug for t in find("Real Madrid or City?")], ["real_madrid"])
+        # Exact input still resolves
+        self.assertEqual(resolve("City").slug, "manchester_city")
+        self.assertEqual(resolve("Real").slug, "real_madrid")
+
+    def test_find_in_text_ignores_punctuation(self):
+        find = get_resolver().find_in_text
+        self.assertEqual([t.slug for t in find("Did we beat Chelsea?")], ["chelsea"])
+        self.assertEqual([t.slug for t in find("Arsenal, Spurs and Liverpool")],
+                         ["arsenal", "tottenham", "liverpool"])
+        self.assertEqual([t.slug for t in find("Come on Newcastle!")], ["newcastle"])
+        self.assertEqual(resolve("Chelsea?").slug, "chelsea")
+        self.assertEqual(resolve("Nott'm Forest").slug, "nottingham_forest")
+
+    def test_slug_falls_back_for_unknown_clubs(self):
+        self.assertEqual(team_slug("Man United"), "manchester_united")
+        self.assertEqual(team_slug("Real Sociedad"), "real_sociedad")
+
+
+class TestSyncTeamIdentity(unittest.TestCase):
+
+    ROWS = [
+        ("2020-01-01", "Arsenal", "Tottenham", 2, 1),
+        ("2020-06-01", "Tottenham", "Arsenal", 0, 0),
+        ("2021-01-01", "Arsenal", "Tottenham", 0, 3),
+        ("2021-03-01", "Arsenal", "Real Sociedad", 1, 0),
+    ]
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = str(Path(self.tmp.name) / "reference.db")
+        conn = sqlite3.connect(self.path)
+        conn.execute("""
+            CREATE TABLE match_history (
+                match_date TEXT, home_team TEXT, away_team TEXT, ft_home INTEGER, ft_away INTEGER,
+                ht_home INTEGER, ht_away INTEGER, home_elo REAL, away_elo REAL
+            )
+        """)
+        conn.executemany(
+            "INSERT INTO match_history (match_date, home_team, away_team, ft_home, ft_away) VALUES (?, ?, ?, ?, ?)",
+            self.ROWS
+        )
+        conn.commit()
+        self.conn = conn
+
+    def tearDown(self):
+        self.conn.close()
+        sqlite_pool.close_all()
+        self.tmp.cleanup()
+
+    def test_backfills_ids_and_registers_unknown_clubs(self):
+        result = sync_team_identity(self.conn)
+        self.conn.commit()
+        self.assertTrue(has_team_ids(self.conn))
+        self.assertEqual(result["new_teams"], 1)
+        self.assertEqual(result["rows_backfilled"], 2 * len(self.ROWS))
+
+        sociedad = lookup_team_id(self.conn, "Real Sociedad")
+        self.assertGreaterEqual(sociedad, UNSEEDED_ID_START)
+        ids = self.conn.execute(
+            "SELECT DISTINCT home_team_id FROM match_history WHERE home_team = 'Arsenal'"
+        ).fetchall()
+        self.assertEqual(ids, [(resolve("Arsenal").id,)])
+
+        # Second run only touches rows added since
+        self.conn.execute(
+            "INSERT INTO match_history (match_date, home_team, away_team, ft_home, ft_away) "
+            "VALUES ('2022-01-01', 'Spurs', 'Arsenal', 1, 1)"
+        )
+        again = sync_team_identity(self.conn)
+        self.assertEqual(again["new_teams"], 0)
+        self.assertEqual(again["rows_backfilled"], 2)
+        self.assertEqual(lookup_team_id(self.conn, "Real Sociedad"), sociedad)
+
+    def test_head_to_head_uses_ids(self):
+        sync_team_identity(self.conn)
+        self.conn.commit()
+        h2h = MatchInsights(self.path).head_to_head("Spurs", "Arsenal")
+        self.assertEqual(h2h["total_matches"], 3)
+        self.assertEqual((h2h["team1_wins"], h2h["draws"], h2h["team2_wins"]), (1, 1, 1))
+        self.assertEqual(h2h["team1_goals"], 4)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,74 @@
+"""
+Tests for stage-level request tracing and its analytics summary.
+"""
+
+import unittest
+import tempfile
+import time
+from pathlib import Path
+import sys
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import tracing
+import database
+
+
+class TestSpans(unittest.TestCase):
+    """Spans record into the active trace only."""
+
+    def test_span_outside_trace_is_noop(self):
+        with tracing.span("rag.fts5"):
+            pass
+        self.assertIsNone(tracing.current_trace())
+
+    def test_spans_accumulate_per_stage(self):
+        with tracing.start_trace() as trace:
+            for _ in range(2):
+                with tracing.span("rag.fts5"):
+                    time.sleep(0.01)
+            tracing.record("llm.api_call", 5.0)
+
+        timings = trace.as_dict()
+        self.assertGreaterEqual(timings["rag.fts5"], 20)
+        self.assertEqual(timings["llm.api_call"], 5.0)
+        self.assertIsNone(tracing.current_trace())
+
+    def test_percentiles(self):
+        result = tracing.percentiles(range(1, 101))
+        self.assertEqual(result, {"p50": 50, "p95": 95, "p99": 99})
+        self.assertEqual(tracing.percentiles([]), {"p50": None, "p95": None, "p99": None})
+
+
+class TestStageAnalytics(unittest.TestCase):
+    """Stage timings are stored with analytics rows and summarised."""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.original_path = database.DB_PATH
+        database.DB_PATH = Path(self.tmp.name) / "analytics.db"
+        database.init_analytics()
+
+    def tearDown(self):
+        database.DB_PATH = self.original_path
+        self.tmp.cleanup()
+
+    def test_summary_reports_stage_percentiles(self):
+        for ms in (10, 20, 30, 40):
+            database.log_query(
+                query="who scored?",
+                response_time_ms=ms * 2,
+                stage_timings={"rag.total": ms, "llm.api_call": ms * 10}
+            )
+        database.log_query(query="untraced")
+
+        summary = database.get_analytics_summary(days=1)
+        stages = summary["stage_latency_ms"]
+        self.assertEqual(stages["rag.total"]["count"], 4)
+        self.assertEqual(stages["rag.total"]["p50"], 20)
+        self.assertEqual(stages["llm.api_call"]["p99"], 400)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,142 @@
+"""
+Tests for trivia id pools, per-session decks and batched answer stats.
+"""
+
+import sqlite3
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+import sys
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import database
+import query_trace
+import sqlite_pool
+from trivia_sampler import TriviaSampler, pool_key
+
+
+class TestTriviaSampler(unittest.TestCase):
+
+    ROWS = [
+        (1, 10, "legends", "easy"),
+        (2, 10, "legends", "hard"),
+        (3, 10, "history", "easy"),
+        (4, None, "history", "easy"),
+        (5, 20, None, "medium"),
+    ]
+
+    def setUp(self):
+        self.rows = list(self.ROWS)
+        self.loads = 0
+        self.sampler = TriviaSampler("test_trivia_decks", self._load)
+
+    def _load(self):
+        self.loads += 1
+        return self.rows
+
+    def test_pools_cover_every_filter_combination(self):
+        self.assertEqual(self.sampler.pool(pool_key(), 1), (1, 2, 3, 4, 5))
+        self.assertEqual(self.sampler.pool(pool_key(10, None, "easy"), 1), (1, 3))
+        self.assertEqual(self.sampler.pool(pool_key(None, "history", "easy"), 1), (3, 4))
+        self.assertEqual(self.sampler.pool(pool_key(0, "", "medium"), 1), (5,))
+        self.assertEqual(self.sampler.pool(pool_key(30), 1), ())
+        self.assertEqual(self.loads, 1)  # Built once per version
+
+        self.sampler.pool(pool_key(), 2)
+        self.assertEqual(self.loads, 2)
+
+    def test_session_deck_has_no_repeats(self):
+        key = pool_key()
+        first = [self.sampler.draw(key, 1, "s1") for _ in range(5)]
+        self.assertEqual(sorted(first), [1, 2, 3, 4, 5])
+        second = [self.sampler.draw(key, 1, "s1") for _ in range(5)]
+        self.assertEqual(sorted(second), [1, 2, 3, 4, 5])
+        self.assertNotEqual(second[0], first[-1])
+        self.assertIsNone(self.sampler.draw(pool_key(30), 1, "s1"))
+
+    def test_new_questions_join_the_current_deck(self):
+        key = pool_key()
+        dealt = {self.sampler.draw(key, 1, "s1") for _ in range(3)}
+        self.rows.append((6, 10, "legends", "easy"))
+        rest = {self.sampler.draw(key, 2, "s1") for _ in range(3)}
+        self.assertEqual(dealt | rest, {1, 2, 3, 4, 5, 6})
+        self.assertFalse(dealt & rest)
+
+
+class TestTriviaQueries(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.original_path = database.DB_PATH
+        database.DB_PATH = Path(self.tmp.name) / "trivia.db"
+        database.init_db()
+        database.init_data_generation()
+        database.init_analytics()
+        database.init_trivia_table()
+        database.insert_teams([
+            {"name": "Arsenal", "league": "Premier League", "country": "England"},
+            {"name": "Chelsea", "league": "Premier League", "country": "England"},
+        ])
+        self.ids = [
+            database.add_trivia_question(f"Question {i}?", "Yes", ["No"], team_id=1, category="legends")
+            for i in range(4)
+        ]
+
+    def tearDown(self):
+        database.stop_write_behind()
+        database._trivia_sampler.invalidate()
+        database._trivia_changed()
+        sqlite_pool.close_all()
+        database.DB_PATH = self.original_path
+        self.tmp.cleanup()
+
+    def test_session_sees_each_question_once(self):
+        asked = [database.get_trivia_question(team_id=1, session_id="fan")["id"] for _ in self.ids]
+        self.assertEqual(sorted(asked), self.ids)
+        self.assertEqual(database.get_trivia_question(category="legends")["wrong_answers"], ["No"])
+        self.assertIsNone(database.get_trivia_question(team_id=2))
+
+        generation = database.get_data_generation()
+        new_id = database.add_trivia_question("Late?", "Yes", ["No"], team_id=2)
+        self.assertEqual(database.get_trivia_question(team_id=2)["id"], new_id)
+        # Only the trivia pools are rebuilt, not every generation-keyed cache
+        self.assertEqual(database.get_data_generation(), generation)
+
+    def test_draw_issues_only_the_primary_key_fetch(self):
+        database.get_trivia_question(team_id=1)  # Builds the pools
+        with query_trace.track("trivia") as request:
+            self.assertIn(database.get_trivia_question(team_id=1, session_id="fan")["id"], self.ids)
+        self.assertEqual(request.queries, 1)
+        self.assertEqual(request.top(1)[0]["sql"], "SELECT * FROM trivia_questions WHERE id = ?")
+
+    def test_questions_added_by_another_process_are_drawn(self):
+        self.assertIsNone(database.get_trivia_question(team_id=2))
+        with sqlite3.connect(database.DB_PATH) as conn:
+            new_id = conn.execute(
+                "INSERT INTO trivia_questions (team_id, question, correct_answer) VALUES (2, 'Q?', 'A')"
+            ).lastrowid
+        conn.close()
+        with mock.patch.object(database, "GENERATION_REFRESH_SECONDS", 0):
+            self.assertEqual(database.get_trivia_question(team_id=2)["id"], new_id)
+
+    def test_answer_stats_are_batched(self):
+        database.start_write_behind()
+        for answer in ("yes", "no", "Yes"):
+            self.assertIn("correct", database.check_trivia_answer(self.ids[0], answer))
+
+        def stats():
+            with database.get_connection() as conn:
+                return tuple(conn.execute(
+                    "SELECT times_asked, times_correct FROM trivia_questions WHERE id = ?", (self.ids[0],)
+                ).fetchone())
+
+        self.assertEqual(stats(), (0, 0))  # Still queued
+        self.assertEqual(database.flush_write_behind(), 3)
+        self.assertEqual(stats(), (3, 2))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,56 @@
+"""
+Tests for startup warm-up and readiness reporting.
+"""
+
+import threading
+import unittest
+from pathlib import Path
+import sys
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import warmup
+
+
+class TestWarmup(unittest.TestCase):
+    """Readiness flips only after every step has run."""
+
+    def test_not_ready_while_running(self):
+        started = threading.Event()
+        release = threading.Event()
+        seen = {}
+
+        def slow_step():
+            seen["ready_during"] = warmup.is_ready()
+            started.set()
+            release.wait(2)
+
+        thread = threading.Thread(target=warmup.run, args=([("slow", slow_step)],))
+        thread.start()
+        self.assertTrue(started.wait(timeout=2), "warm-up step never ran")
+        self.assertFalse(warmup.is_ready())
+        self.assertEqual(warmup.get_status()["status"], "running")
+        release.set()
+        thread.join(timeout=5)
+        self.assertFalse(thread.is_alive())
+
+        self.assertFalse(seen["ready_during"])
+        self.assertTrue(warmup.is_ready())
+
+    def test_failed_step_recorded_but_ready(self):
+        calls = []
+
+        def broken():
+            raise RuntimeError("no ratings file")
+
+        status = warmup.run([("broken", broken), ("after", lambda: calls.append(1))])
+        self.assertEqual(status["status"], "ready")
+        self.assertFalse(status["steps"]["broken"]["ok"])
+        self.assertIn("no ratings file", status["steps"]["broken"]["error"])
+        self.assertTrue(status["steps"]["after"]["ok"])
+        self.assertEqual(calls, [1])
+
+
+if __name__ == "__main__":
+    unittest.main()
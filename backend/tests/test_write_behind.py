@@ -0,0 +1,107 @@
+"""
+Tests for write-behind batching of analytics and security log rows.
+"""
+
+import sqlite3
+import tempfile
+import time
+import unittest
+from pathlib import Path
+import sys
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import database
+from write_behind import WriteBehindQueue
+
+INSERT = "INSERT INTO events (name) VALUES (?)"
+
+
+class TestWriteBehindQueue(unittest.TestCase):
+    """Rows are batched, capped and flushed on stop."""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = Path(self.tmp.name) / "events.db"
+        with sqlite3.connect(self.path) as conn:
+            conn.execute("CREATE TABLE events (name TEXT)")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def count(self) -> int:
+        with sqlite3.connect(self.path) as conn:
+            return conn.execute("SELECT COUNT(*) FROM events").fetchone()[0]
+
+    def make_queue(self, **kwargs) -> WriteBehindQueue:
+        return WriteBehindQueue("test", lambda: sqlite3.connect(self.path), **kwargs)
+
+    def test_rows_written_in_one_flush(self):
+        queue = self.make_queue(interval=60)
+        for i in range(50):
+            queue.enqueue("events", INSERT, (f"e{i}",))
+        self.assertEqual(self.count(), 0)
+        self.assertEqual(queue.flush(), 50)
+        self.assertEqual(self.count(), 50)
+        self.assertEqual(queue.get_stats()["flushes"], 1)
+        self.assertIsNotNone(queue.get_stats()["last_flush_ms"])
+
+    def test_full_queue_drops_and_counts(self):
+        queue = self.make_queue(interval=60, max_pending=3)
+        accepted = [queue.enqueue("events", INSERT, ("x",)) for _ in range(5)]
+        self.assertEqual(accepted, [True, True, True, False, False])
+        self.assertEqual(queue.get_stats()["dropped"], 2)
+
+    def test_background_flush_and_stop_drains(self):
+        queue = self.make_queue(interval=0.05)
+        queue.start()
+        queue.enqueue("events", INSERT, ("early",))
+        time.sleep(0.2)
+        self.assertEqual(self.count(), 1)
+
+        queue.enqueue("events", INSERT, ("late",))
+        queue.stop()
+        self.assertEqual(self.count(), 2)
+        self.assertFalse(queue.running)
+
+    def test_failed_batch_is_counted(self):
+        queue = self.make_queue(interval=60)
+        queue.enqueue("missing", "INSERT INTO missing (x) VALUES (?)", (1,))
+        self.assertEqual(queue.flush(), 0)
+        self.assertEqual(queue.get_stats()["failed"], 1)
+
+
+class TestDatabaseLogging(unittest.TestCase):
+    """log_query / log_security_event go through the queue once started."""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.original_path = database.DB_PATH
+        database.DB_PATH = Path(self.tmp.name) / "logs.db"
+        database.init_analytics()
+        database.init_security_tables()
+
+    def tearDown(self):
+        database.stop_write_behind()
+        database.DB_PATH = self.original_path
+        self.tmp.cleanup()
+
+    def test_synchronous_until_started(self):
+        self.assertIsNotNone(database.log_query(query="sync"))
+
+    def test_queued_then_flushed(self):
+        database.start_write_behind()
+        self.assertIsNone(database.log_query(query="queued"))
+        database.log_security_event(
+            session_id="s1", attempt_number=1, pattern_matched="ignore previous",
+            escalation_level="warned", response_type="snap_back"
+        )
+        database.stop_write_behind()  # Flushes on the way out
+
+        self.assertEqual(database.get_analytics_summary(days=1)["total_queries"], 1)
+        self.assertEqual(database.get_security_metrics(days=1)["total_injection_attempts"], 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,126 @@
+"""
+Soccer-AI Request Tracing
+Lightweight stage timers for the chat request path.
+
+Usage:
+    with start_trace() as trace:
+        with span("rag.fts5"):
+            ...
+        trace.as_dict()   # {"rag.fts5": 3.42, ...} in milliseconds
+
+span() is a no-op outside a trace, so instrumented functions cost nothing
+when called from scripts or tests.
+"""
+
+import time
+import functools
+import threading
+import contextvars
+from contextlib import contextmanager
+from typing import Dict, Iterable, List, Optional
+
+_current_trace: contextvars.ContextVar = contextvars.ContextVar("soccer_ai_trace", default=None)
+
+
+class Trace:
+    """Per-request collection of stage durations (milliseconds)."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self._stages: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def add(self, stage: str, duration_ms: float):
+        """Record a duration; repeated stages accumulate."""
+        with self._lock:
+            self._stages[stage] = self._stages.get(stage, 0.0) + duration_ms
+
+    def elapsed_ms(self) -> float:
+        return (time.perf_counter() - self.started) * 1000
+
+    def as_dict(self) -> Dict[str, float]:
+        with self._lock:
+            return {stage: round(ms, 2) for stage, ms in self._stages.items()}
+
+
+@contextmanager
+def start_trace():
+    """Begin a trace for the current request (context-local)."""
+    trace = Trace()
+    token = _current_trace.set(trace)
+    try:
+        yield trace
+    finally:
+        _current_trace.reset(token)
+
+
+def current_trace() -> Optional[Trace]:
+    """Trace for the current request, if any."""
+    return _current_trace.get()
+
+
+def record(stage: str, duration_ms: float):
+    """Add a pre-measured duration to the current trace (no-op outside one)."""
+    trace = _current_trace.get()
+    if trace is not None:
+        trace.add(stage, duration_ms)
+
+
+def traced(stage: str):
+    """Decorator form of span() for whole functions."""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with span(stage):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+@contextmanager
+def span(stage: str):
+    """Time a block as one stage of the current trace."""
+    trace = _current_trace.get()
+    if trace is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        trace.add(stage, (time.perf_counter() - start) * 1000)
+
+
+def percentiles(values: Iterable[float], points: Iterable[int] = (50, 95, 99)) -> Dict[str, float]:
+    """Nearest-rank percentiles, e.g. {"p50": .., "p95": .., "p99": ..}."""
+    ordered: List[float] = sorted(values)
+    if not ordered:
+        return {f"p{p}": None for p in points}
+    result = {}
+    for p in points:
+        rank = max(1, -(-p * len(ordered) // 100))  # ceil(p/100 * n)
+        result[f"p{p}"] = round(ordered[rank - 1], 2)
+    return result
+
+
+def sketch_bucket(ms: float) -> float:
+    """Latency sketch bucket: the value rounded to 2 significant figures (<=5% error)."""
+    return float(f"{ms:.2g}")
+
+
+def sketch_percentiles(buckets: Dict[float, int], points: Iterable[int] = (50, 95, 99)) -> Dict[str, float]:
+    """Nearest-rank percentiles over a latency sketch (bucket -> count)."""
+    total = sum(buckets.values())
+    if not total:
+        return {f"p{p}": None for p in points}
+    ordered = sorted(buckets.items())
+    result = {}
+    for p in points:
+        rank = max(1, -(-p * total // 100))  # ceil(p/100 * n)
+        seen = 0
+        for bucket, count in ordered:
+            seen += count
+            if seen >= rank:
+                result[f"p{p}"] = round(bucket, 2)
+                break
+    return result
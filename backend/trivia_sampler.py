@@ -0,0 +1,106 @@
+"""
+Soccer-AI Trivia Sampler
+Random trivia questions without ORDER BY RANDOM().
+
+Question ids are loaded once per data version into pools keyed by
+(team_id, category, difficulty), with None meaning "any", so every filter
+combination the API accepts is one dict lookup. Without a session a draw
+is random.choice() on the pool.
+
+With a session, each (session, filter) gets a shuffled deck dealt from
+the end, so no question repeats until the deck is used up. The next deck
+is a fresh shuffle that never starts with the question that ended the
+last one. If the questions change mid-deck, the deck is rebuilt from the
+new pool minus what the session has already been dealt.
+
+Decks live in a session store ("trivia_decks"), bounded and expired like
+the other per-conversation state.
+"""
+
+import random
+import threading
+from itertools import product
+from typing import Any, Callable, Dict, Iterable, Optional, Tuple
+
+from session_store import open_store
+
+# (team_id, category, difficulty); None = any
+PoolKey = Tuple[Optional[int], Optional[str], Optional[str]]
+
+# (id, team_id, category, difficulty) rows from trivia_questions
+QuestionRow = Tuple[int, Optional[int], Optional[str], Optional[str]]
+
+_UNBUILT = object()
+
+
+def pool_key(team_id: int = None, category: str = None, difficulty: str = None) -> PoolKey:
+    """Filters as a pool key (falsy means any, as in the SQL filters)."""
+    return (team_id or None, category or None, difficulty or None)
+
+
+class TriviaSampler:
+    """Question id pools per filter plus per-session no-repeat decks."""
+
+    def __init__(self, name: str, load: Callable[[], Iterable[QuestionRow]]):
+        self.name = name
+        self.load = load
+        self._pools: Dict[PoolKey, Tuple[int, ...]] = {}
+        self._version: Any = _UNBUILT
+        self._lock = threading.Lock()
+        self._decks = open_store(name)
+
+    def invalidate(self):
+        """Rebuild the pools on the next draw (after questions are added)."""
+        with self._lock:
+            self._version = _UNBUILT
+            self._pools = {}
+
+    def pool(self, key: PoolKey, version: Any) -> Tuple[int, ...]:
+        """Question ids matching key, (re)built when version changes."""
+        with self._lock:
+            if self._version is _UNBUILT or self._version != version:
+                pools: Dict[PoolKey, list] = {}
+                for question_id, team_id, category, difficulty in self.load():
+                    values = pool_key(team_id, category, difficulty)
+                    # Every filter this row satisfies (set: a None value is its own wildcard)
+                    keys = {
+                        tuple(None if wildcard else value for wildcard, value in zip(mask, values))
+                        for mask in product((False, True), repeat=3)
+                    }
+                    for k in keys:
+                        pools.setdefault(k, []).append(question_id)
+                self._pools = {k: tuple(ids) for k, ids in pools.items()}
+                self._version = version
+            return self._pools.get(key, ())
+
+    def draw(self, key: PoolKey, version: Any, session_id: str = None) -> Optional[int]:
+        """A question id for key, or None if no question matches."""
+        pool = self.pool(key, version)
+        if not pool:
+            return None
+        if not session_id:
+            return random.choice(pool)
+
+        with self._decks.edit(session_id, dict) as decks:
+            state = decks.get(key)
+            if state is None:
+                state = decks[key] = {"version": version, "deck": [], "dealt": set(), "last": None}
+            elif state["version"] != version:
+                # Questions changed: keep the no-repeat promise for this cycle
+                state["version"] = version
+                state["deck"] = self._shuffled(pool, exclude=state["dealt"])
+            if not state["deck"]:
+                state["deck"] = self._shuffled(pool)
+                state["dealt"] = set()
+                if len(pool) > 1 and state["deck"][-1] == state["last"]:
+                    state["deck"][0], state["deck"][-1] = state["deck"][-1], state["deck"][0]
+            question_id = state["deck"].pop()
+            state["dealt"].add(question_id)
+            state["last"] = question_id
+            return question_id
+
+    @staticmethod
+    def _shuffled(pool: Tuple[int, ...], exclude: set = frozenset()) -> list:
+        deck = [question_id for question_id in pool if question_id not in exclude]
+        random.shuffle(deck)
+        return deck
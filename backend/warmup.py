@@ -0,0 +1,102 @@
+"""
+Soccer-AI Warm-up
+Builds lazy singletons and primes caches before the app takes traffic, so
+the first users after a deploy don't pay for model and KG loading.
+
+The startup hook registers steps and runs them in the background; /health
+reports not-ready until every step has finished. A failing step is
+recorded but does not hold readiness back - the lazy path still works.
+"""
+
+import os
+import time
+import threading
+from datetime import datetime
+from typing import Callable, Dict, List, Optional, Tuple
+
+from metrics import REGISTRY
+
+# ============================================
+# CONFIGURATION
+# ============================================
+
+# Set to 0 to skip warm-up entirely (e.g. in tests / local dev)
+WARMUP_ENABLED = os.getenv("WARMUP_ENABLED", "1") not in ("0", "false", "no")
+
+# Synthetic retrieval queries run during warm-up (";"-separated)
+WARMUP_QUERIES = [
+    q.strip() for q in os.getenv(
+        "WARMUP_QUERIES",
+        "Who are Arsenal's legends?;Liverpool vs Manchester United head to head;How are Chelsea doing this season?"
+    ).split(";") if q.strip()
+]
+
+STEP_SECONDS = REGISTRY.gauge(
+    "soccer_ai_warmup_step_seconds", "Duration of each warm-up step at the last startup.", ("step",)
+)
+READY = REGISTRY.gauge("soccer_ai_ready", "1 once warm-up has finished, else 0.")
+
+_lock = threading.Lock()
+_state = {
+    "status": "idle",  # idle -> running -> ready
+    "started_at": None,
+    "finished_at": None,
+    "duration_ms": None,
+    "steps": {},
+}
+READY.set(1)
+
+
+def mark_pending():
+    """Flip to not-ready before the background warm-up is scheduled."""
+    with _lock:
+        _state["status"] = "running"
+        _state["started_at"] = datetime.utcnow().isoformat()
+        _state["finished_at"] = None
+        _state["duration_ms"] = None
+        _state["steps"] = {}
+    READY.set(0)
+
+
+def run(steps: List[Tuple[str, Callable[[], object]]]) -> Dict:
+    """
+    Run warm-up steps in order (blocking) and mark the app ready.
+
+    Each step is (name, callable). Returns the final status dict.
+    """
+    mark_pending()
+    start = time.perf_counter()
+
+    for name, step in steps:
+        step_start = time.perf_counter()
+        try:
+            step()
+            outcome = {"ok": True}
+        except Exception as e:
+            outcome = {"ok": False, "error": str(e)}
+            print(f"[WARMUP] {name} failed: {e}")
+        elapsed = time.perf_counter() - step_start
+        outcome["ms"] = round(elapsed * 1000, 1)
+        STEP_SECONDS.set(elapsed, step=name)
+        with _lock:
+            _state["steps"][name] = outcome
+
+    with _lock:
+        _state["status"] = "ready"
+        _state["finished_at"] = datetime.utcnow().isoformat()
+        _state["duration_ms"] = round((time.perf_counter() - start) * 1000, 1)
+    READY.set(1)
+    print(f"[WARMUP] Ready in {_state['duration_ms']}ms")
+    return get_status()
+
+
+def is_ready() -> bool:
+    """False only while a warm-up is in progress."""
+    return _state["status"] != "running"
+
+
+def get_status() -> Dict:
+    with _lock:
+        status = dict(_state)
+        status["steps"] = dict(_state["steps"])
+    return status
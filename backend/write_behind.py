@@ -0,0 +1,196 @@
+"""
+Soccer-AI Write-Behind Queue
+Moves fire-and-forget inserts (query analytics, security events) off the
+request path.
+
+Rows are queued in memory and written by a background thread in one
+transaction per flush, using executemany per statement. An optional
+on_write hook runs in the same transaction with the batch (used to fold
+rows into rollup tables). The queue is capped; rows arriving while it is
+full are dropped and counted. Pending rows are flushed on stop().
+"""
+
+import os
+import time
+import sqlite3
+import threading
+from collections import deque
+from typing import Callable, Dict, List, Optional, Tuple
+
+from metrics import REGISTRY
+
+# ============================================
+# CONFIGURATION
+# ============================================
+
+# Seconds between background flushes
+WRITE_BEHIND_INTERVAL = float(os.getenv("WRITE_BEHIND_INTERVAL", "1.0"))
+
+# Flush early once this many rows are waiting
+WRITE_BEHIND_BATCH_SIZE = int(os.getenv("WRITE_BEHIND_BATCH_SIZE", "500"))
+
+# Rows held in memory before new ones are dropped
+WRITE_BEHIND_MAX_PENDING = int(os.getenv("WRITE_BEHIND_MAX_PENDING", "10000"))
+
+ROWS = REGISTRY.counter(
+    "soccer_ai_write_behind_rows_total",
+    "Rows handled by write-behind queues (written, dropped when full, failed).",
+    ("queue", "table", "result"),
+)
+FLUSH_SECONDS = REGISTRY.histogram(
+    "soccer_ai_write_behind_flush_seconds",
+    "Time to write one write-behind batch.",
+    ("queue",),
+)
+
+# (table, sql, params)
+Row = Tuple[str, str, tuple]
+
+
+class WriteBehindQueue:
+    """Bounded in-memory queue of inserts written in periodic batches."""
+
+    def __init__(
+        self,
+        name: str,
+        connect: Callable[[], sqlite3.Connection],
+        interval: float = WRITE_BEHIND_INTERVAL,
+        batch_size: int = WRITE_BEHIND_BATCH_SIZE,
+        max_pending: int = WRITE_BEHIND_MAX_PENDING,
+        on_write: Optional[Callable[[sqlite3.Connection, List[Row]], None]] = None
+    ):
+        self.name = name
+        self.connect = connect
+        self.on_write = on_write
+        self.interval = interval
+        self.batch_size = batch_size
+        self.max_pending = max_pending
+
+        self._pending: deque = deque()
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()  # One writer at a time
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._conn: Optional[sqlite3.Connection] = None
+        self._stats = {
+            "enqueued": 0,
+            "written": 0,
+            "dropped": 0,
+            "failed": 0,
+            "flushes": 0,
+            "last_flush_ms": None,
+            "max_flush_ms": 0.0,
+        }
+
+    # ---------- producer side ----------
+
+    def enqueue(self, table: str, sql: str, params: tuple) -> bool:
+        """Queue one row. Returns False (and counts a drop) if the queue is full."""
+        with self._lock:
+            if len(self._pending) >= self.max_pending:
+                self._stats["dropped"] += 1
+                dropped = True
+            else:
+                self._pending.append((table, sql, params))
+                self._stats["enqueued"] += 1
+                dropped = False
+                full_batch = len(self._pending) >= self.batch_size
+        if dropped:
+            ROWS.inc(queue=self.name, table=table, result="dropped")
+            return False
+        if full_batch:
+            self._wake.set()
+        return True
+
+    # ---------- writer side ----------
+
+    def flush(self) -> int:
+        """Write everything queued so far in one transaction. Returns rows written."""
+        with self._flush_lock:
+            with self._lock:
+                batch = list(self._pending)
+                self._pending.clear()
+            if not batch:
+                return 0
+
+            # Group by statement so each one is a single executemany
+            groups: Dict[Tuple[str, str], list] = {}
+            for table, sql, params in batch:
+                groups.setdefault((table, sql), []).append(params)
+
+            start = time.perf_counter()
+            try:
+                if self._conn is None:
+                    self._conn = self.connect()
+                conn = self._conn
+                with conn:  # BEGIN ... COMMIT (ROLLBACK on error)
+                    for (table, sql), rows in groups.items():
+                        conn.executemany(sql, rows)
+                    if self.on_write is not None:
+                        self.on_write(conn, batch)
+            except sqlite3.Error as e:
+                self._close()
+                with self._lock:
+                    self._stats["failed"] += len(batch)
+                for (table, _), rows in groups.items():
+                    ROWS.inc(len(rows), queue=self.name, table=table, result="failed")
+                print(f"[WRITE-BEHIND] {self.name}: dropped batch of {len(batch)} rows: {e}")
+                return 0
+
+            elapsed = time.perf_counter() - start
+            FLUSH_SECONDS.observe(elapsed, queue=self.name)
+            for (table, _), rows in groups.items():
+                ROWS.inc(len(rows), queue=self.name, table=table, result="written")
+            with self._lock:
+                self._stats["written"] += len(batch)
+                self._stats["flushes"] += 1
+                self._stats["last_flush_ms"] = round(elapsed * 1000, 3)
+                self._stats["max_flush_ms"] = max(self._stats["max_flush_ms"], self._stats["last_flush_ms"])
+            return len(batch)
+
+    def _close(self):
+        if self._conn is not None:
+            try:
+                self._conn.close()
+            except sqlite3.Error:
+                pass
+            self._conn = None
+
+    def _run(self):
+        while not self._stop.is_set():
+            self._wake.wait(self.interval)
+            self._wake.clear()
+            self.flush()
+
+    def start(self):
+        """Start the background writer (idempotent)."""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name=f"write-behind-{self.name}", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 10):
+        """Stop the writer and flush whatever is still queued."""
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout=timeout)
+            self._thread = None
+        self.flush()
+        with self._flush_lock:
+            self._close()
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def get_stats(self) -> Dict:
+        with self._lock:
+            stats = dict(self._stats)
+            stats["pending"] = len(self._pending)
+        stats["max_pending"] = self.max_pending
+        stats["interval_seconds"] = self.interval
+        stats["running"] = self.running
+        return stats
@@ -0,0 +1,136 @@
+"""
+Soccer-AI LLM Connection Pool Benchmark
+Compares a fresh HTTPS connection per request (the old urllib path) against
+the shared keep-alive pool, using a local stand-in HTTPS server.
+
+Usage:
+    python scripts/bench_llm_pool.py [--requests 200] [--threads 8]
+"""
+
+import sys
+import ssl
+import json
+import time
+import argparse
+import tempfile
+import threading
+import subprocess
+import statistics
+import http.client
+from pathlib import Path
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from concurrent.futures import ThreadPoolExecutor
+
+# Add backend to path
+sys.path.insert(0, str(Path(__file__).parent.parent / "backend"))
+
+from http_pool import ConnectionPool
+
+RESPONSE_BODY = json.dumps({
+    "content": [{"type": "text", "text": "Up the Arsenal!"}],
+    "usage": {"input_tokens": 900, "output_tokens": 40}
+}).encode()
+
+
+class StandInHandler(BaseHTTPRequestHandler):
+    """Minimal Anthropic-shaped endpoint with HTTP/1.1 keep-alive."""
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True  # Headers and body go out in separate writes
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(RESPONSE_BODY)))
+        self.end_headers()
+        self.wfile.write(RESPONSE_BODY)
+
+    def log_message(self, *args):
+        pass
+
+
+def make_certificate(directory: Path):
+    """Create a throwaway self-signed certificate for localhost with openssl."""
+    cert, key = directory / "cert.pem", directory / "key.pem"
+    subprocess.run(
+        ["openssl", "req", "-x509", "-newkey", "rsa:2048", "-nodes",
+         "-keyout", str(key), "-out", str(cert), "-days", "1",
+         "-subj", "/CN=localhost", "-addext", "subjectAltName=DNS:localhost"],
+        check=True, capture_output=True
+    )
+    return cert, key
+
+
+def start_server(cert: Path, key: Path):
+    server = ThreadingHTTPServer(("localhost", 0), StandInHandler)
+    server_ctx = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+    server_ctx.load_cert_chain(cert, key)
+    server.socket = server_ctx.wrap_socket(server.socket, server_side=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def run(label, send_one, total, threads):
+    latencies = []
+    lock = threading.Lock()
+
+    def timed(_):
+        start = time.perf_counter()
+        send_one()
+        elapsed = (time.perf_counter() - start) * 1000
+        with lock:
+            latencies.append(elapsed)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        list(executor.map(timed, range(total)))
+    wall = time.perf_counter() - start
+
+    latencies.sort()
+    p95 = latencies[int(len(latencies) * 0.95) - 1]
+    print(f"{label:<22} {total / wall:>8.1f} req/s   p50 {statistics.median(latencies):6.2f} ms   p95 {p95:6.2f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the LLM connection pool")
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--threads", type=int, default=8)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        cert, key = make_certificate(Path(tmp))
+        server = start_server(cert, key)
+        port = server.server_address[1]
+        url = f"https://localhost:{port}/v1/messages"
+        payload = json.dumps({"model": "stand-in", "messages": [{"role": "user", "content": "hi"}]}).encode()
+        headers = {"Content-Type": "application/json"}
+
+        client_ctx = ssl.create_default_context(cafile=str(cert))
+
+        def fresh_connection():
+            # Old behaviour: new TCP + TLS handshake (and context) per call
+            ctx = ssl.create_default_context(cafile=str(cert))
+            conn = http.client.HTTPSConnection("localhost", port, context=ctx, timeout=10)
+            conn.request("POST", "/v1/messages", body=payload, headers=headers)
+            conn.getresponse().read()
+            conn.close()
+
+        pool = ConnectionPool(max_size=args.threads, max_per_host=args.threads, ssl_context=client_ctx)
+
+        def pooled():
+            pool.request("POST", url, body=payload, headers=headers, timeout=10)
+
+        print(f"Stand-in HTTPS server on {url}  ({args.requests} requests, {args.threads} threads)\n")
+        run("fresh connection", fresh_connection, args.requests, args.threads)
+        run("keep-alive pool", pooled, args.requests, args.threads)
+
+        stats = pool.get_stats()
+        print(f"\nPool: hits={stats['hits']} misses={stats['misses']} "
+              f"hit_rate={stats['hit_rate']} idle={stats['idle']} discarded={stats['discarded']}")
+
+        pool.close_all()
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,170 @@
+"""
+Soccer-AI Reference Index Benchmark
+Times the match_history / elo_history hot paths without and with the
+managed indexes (database.REFERENCE_INDEXES).
+
+Works on a temporary copy of the reference database, so the original is
+never modified. Without a reference database (or with --synthetic), a
+synthetic one of the same size is generated.
+
+Usage:
+    python scripts/bench_reference_indexes.py [--db PATH] [--repeat 5]
+    python scripts/bench_reference_indexes.py --synthetic [--matches 230000]
+"""
+
+import sys
+import random
+import shutil
+import sqlite3
+import argparse
+import tempfile
+import statistics
+import time
+from datetime import date, timedelta
+from pathlib import Path
+from types import SimpleNamespace
+
+# Add backend to path
+sys.path.insert(0, str(Path(__file__).parent.parent / "backend"))
+
+import database
+import sqlite_pool
+import fan_enhancements
+from match_insights import MatchInsights
+from pattern_extractor import PatternExtractor
+from predictor.tri_lens_predictor import PoissonPredictor, HybridOracle
+
+TEAMS = [
+    "Arsenal", "Chelsea", "Man United", "Man City", "Liverpool", "Tottenham",
+    "Newcastle", "West Ham", "Everton", "Brighton", "Aston Villa", "Wolves",
+    "Crystal Palace", "Fulham", "Nott'm Forest", "Brentford", "Bournemouth",
+    "Leicester", "Leeds", "Sunderland", "Birmingham", "Millwall",
+]
+DIVISIONS = ["E0", "E1", "E2", "E3", "SC0", "SP1", "SP2", "D1", "D2", "I1", "I2", "F1", "F2", "N1", "P1", "B1"]
+
+
+def build_synthetic(path: Path, matches: int, elo_rows: int):
+    """Reference-shaped database: match_history and elo_history with random data."""
+    rng = random.Random(7)
+    conn = sqlite3.connect(path)
+    conn.executescript("""
+        CREATE TABLE match_history (
+            division TEXT, match_date TEXT, home_team TEXT, away_team TEXT,
+            ft_home INTEGER, ft_away INTEGER, ft_result TEXT,
+            ht_home INTEGER, ht_away INTEGER, home_elo REAL, away_elo REAL,
+            odd_home REAL, odd_draw REAL, odd_away REAL
+        );
+        CREATE TABLE elo_history (club TEXT, country TEXT, date TEXT, elo REAL);
+    """)
+    # Each division has its own pool of clubs; E0 uses the real names
+    pools = {div: TEAMS if div == "E0" else [f"{div} Club {i}" for i in range(20)] for div in DIVISIONS}
+    start = date(1993, 8, 1)
+    rows = []
+    for i in range(matches):
+        div = DIVISIONS[i % len(DIVISIONS)]
+        home, away = rng.sample(pools[div], 2)
+        ft_home, ft_away = rng.randint(0, 4), rng.randint(0, 4)
+        ht_home, ht_away = rng.randint(0, ft_home), rng.randint(0, ft_away)
+        result = "H" if ft_home > ft_away else "A" if ft_away > ft_home else "D"
+        day = start + timedelta(days=rng.randint(0, 32 * 365))
+        rows.append((
+            div, day.isoformat(), home, away, ft_home, ft_away, result, ht_home, ht_away,
+            rng.uniform(1400, 2000), rng.uniform(1400, 2000),
+            rng.uniform(1.2, 8), rng.uniform(2.5, 5), rng.uniform(1.2, 9),
+        ))
+    conn.executemany("INSERT INTO match_history VALUES (?,?,?,?,?,?,?,?,?,?,?,?,?,?)", rows)
+
+    clubs = TEAMS + [f"Club {i}" for i in range(80)]
+    conn.executemany(
+        "INSERT INTO elo_history VALUES (?,?,?,?)",
+        [
+            (rng.choice(clubs), "ENG", (start + timedelta(days=rng.randint(0, 32 * 365))).isoformat(),
+             rng.uniform(1400, 2000))
+            for _ in range(elo_rows)
+        ]
+    )
+    conn.commit()
+    conn.close()
+
+
+def drop_managed_indexes(path: Path):
+    conn = sqlite3.connect(path)
+    for name, _, _ in database.REFERENCE_INDEXES:
+        conn.execute(f"DROP INDEX IF EXISTS {name}")
+    conn.commit()
+    conn.close()
+
+
+def benchmarks(path: Path):
+    """(name, callable) for every hot path named in the index set."""
+    fan_enhancements.DB_PATH = path
+    insights = MatchInsights(str(path))
+    extractor = PatternExtractor(str(path))
+    poisson = PoissonPredictor(path)
+    oracle_stub = SimpleNamespace(db_path=path)
+    return [
+        ("calculate_mood_from_results", lambda: fan_enhancements.calculate_mood_from_results("arsenal")),
+        ("MatchInsights.head_to_head", lambda: insights.head_to_head("Arsenal", "Tottenham")),
+        ("MatchInsights.get_elo_trajectory", lambda: insights.get_elo_trajectory("Arsenal")),
+        ("PoissonPredictor._calculate_team_strengths", poisson._calculate_team_strengths),
+        ("HybridOracle._load_match_history", lambda: HybridOracle._load_match_history(oracle_stub)),
+        ("PatternExtractor.extract_home_fortress", extractor.extract_home_fortress),
+        ("PatternExtractor.extract_bogey_teams", extractor.extract_bogey_teams),
+        ("PatternExtractor.extract_golden_eras", extractor.extract_golden_eras),
+        ("PatternExtractor.extract_comeback_specialists", extractor.extract_comeback_specialists),
+        ("PatternExtractor.extract_derby_dominance", extractor.extract_derby_dominance),
+    ]
+
+
+def time_all(path: Path, repeat: int) -> dict:
+    """Median milliseconds per benchmark (after one warm-up call)."""
+    results = {}
+    for name, func in benchmarks(path):
+        func()
+        samples = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            func()
+            samples.append((time.perf_counter() - start) * 1000)
+        results[name] = statistics.median(samples)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark reference DB indexes")
+    parser.add_argument("--db", type=Path, default=database.ARCHITECTURE_DB_PATH)
+    parser.add_argument("--synthetic", action="store_true", help="Use a generated database")
+    parser.add_argument("--matches", type=int, default=230_000)
+    parser.add_argument("--elo-rows", type=int, default=26_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "reference.db"
+        if args.synthetic or not args.db.exists():
+            print(f"Generating synthetic reference DB ({args.matches} matches, {args.elo_rows} ELO rows)...")
+            build_synthetic(path, args.matches, args.elo_rows)
+        else:
+            print(f"Copying {args.db}...")
+            shutil.copy(args.db, path)
+
+        drop_managed_indexes(path)
+        before = time_all(path, args.repeat)
+
+        start = time.perf_counter()
+        outcome = database.ensure_reference_indexes(path)
+        build_ms = (time.perf_counter() - start) * 1000
+        after = time_all(path, args.repeat)
+        sqlite_pool.close_all()
+
+    print(f"\nIndexes created in {build_ms:.0f}ms: {', '.join(outcome['created']) or '-'}")
+    if outcome["skipped"]:
+        print(f"Skipped (missing columns): {', '.join(outcome['skipped'])}")
+    print(f"\n{'Function':<48}{'before ms':>12}{'after ms':>12}{'speedup':>10}")
+    for name in before:
+        speedup = before[name] / after[name] if after[name] else float("inf")
+        print(f"{name:<48}{before[name]:>12.2f}{after[name]:>12.2f}{speedup:>9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
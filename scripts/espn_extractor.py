@@ -10,9 +10,14 @@ import json
 import time
 import sqlite3
 import os
+import sys
 import argparse
 from datetime import datetime, date
 
+# Team names resolve through the backend's canonical team identity
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "backend"))
+from team_identity import resolve
+
 # Configuration
 USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"
 DB_PATH = os.path.join(os.path.dirname(__file__), "..", "backend", "soccer_ai.db")
@@ -21,36 +26,6 @@ DB_PATH = os.path.join(os.path.dirname(__file__), "..", "backend", "soccer_ai.db
 ESPN_SCOREBOARD = "https://site.api.espn.com/apis/site/v2/sports/soccer/eng.1/scoreboard"
 ESPN_STANDINGS = "https://site.api.espn.com/apis/v2/sports/soccer/eng.1/standings"
 
-# Team name mapping (ESPN name -> our DB name)
-TEAM_NAME_MAP = {
-    "Manchester City": "Manchester City",
-    "Liverpool": "Liverpool",
-    "Arsenal": "Arsenal",
-    "Chelsea": "Chelsea",
-    "Manchester United": "Manchester United",
-    "Tottenham Hotspur": "Tottenham",
-    "Newcastle United": "Newcastle United",
-    "Brighton & Hove Albion": "Brighton",
-    "Brighton and Hove Albion": "Brighton",
-    "Aston Villa": "Aston Villa",
-    "West Ham United": "West Ham",
-    "Fulham": "Fulham",
-    "Brentford": "Brentford",
-    "Crystal Palace": "Crystal Palace",
-    "Wolverhampton Wanderers": "Wolverhampton",
-    "Wolves": "Wolverhampton",
-    "Bournemouth": "Bournemouth",
-    "AFC Bournemouth": "Bournemouth",
-    "Nottingham Forest": "Nottingham Forest",
-    "Everton": "Everton",
-    "Luton Town": "Luton Town",
-    "Burnley": "Burnley",
-    "Sheffield United": "Sheffield United",
-    "Ipswich Town": "Ipswich Town",
-    "Leicester City": "Leicester City",
-    "Southampton": "Southampton",
-}
-
 
 def fetch_url(url: str, retries: int = 3) -> str:
     """Fetch URL with retries and rate limiting."""
@@ -84,13 +59,8 @@ def fetch_url(url: str, retries: int = 3) -> str:
 
 def normalize_team_name(name: str) -> str:
     """Normalize ESPN team name to our database format."""
-    if name in TEAM_NAME_MAP:
-        return TEAM_NAME_MAP[name]
-    # Try partial matches
-    for espn_name, db_name in TEAM_NAME_MAP.items():
-        if espn_name.lower() in name.lower() or name.lower() in espn_name.lower():
-            return db_name
-    return name
+    team = resolve(name)
+    return team.name if team else name
 
 
 def extract_games(data: dict) -> list:
@@ -4,6 +4,7 @@ Populates database with sample Premier League data for testing
 """
 
 import sys
+import time
 from pathlib import Path
 from datetime import datetime, date, timedelta
 
@@ -13,6 +14,13 @@ sys.path.insert(0, str(Path(__file__).parent.parent / "backend"))
 import database
 
 
+def report_throughput(rows: int, started: float):
+    """Print rows written and rows/s since started (perf_counter)."""
+    seconds = time.perf_counter() - started
+    rate = f"{rows / seconds:,.0f} rows/s" if seconds > 0 else "-"
+    print(f"  = {rows} rows in {seconds * 1000:.1f}ms ({rate})")
+
+
 def seed_teams():
     """Seed Premier League teams."""
     teams = [
@@ -29,12 +37,15 @@ def seed_teams():
     ]
 
     print("Seeding teams...")
-    for team in teams:
-        try:
-            team_id = database.insert_team(team)
-            print(f"  + {team['name']} (ID: {team_id})")
-        except Exception as e:
-            print(f"  ! {team['name']}: {e}")
+    started = time.perf_counter()
+    try:
+        team_ids = database.insert_teams(teams)
+    except Exception as e:
+        print(f"  ! Teams: {e}")
+        return 0
+    report_throughput(len(team_ids), started)
+    for team, team_id in zip(teams, team_ids):
+        print(f"  + {team['name']} (ID: {team_id})")
 
     return len(teams)
 
@@ -77,12 +88,15 @@ def seed_players():
     ]
 
     print("Seeding players...")
-    for player in players:
-        try:
-            player_id = database.insert_player(player)
-            print(f"  + {player['name']} (ID: {player_id})")
-        except Exception as e:
-            print(f"  ! {player['name']}: {e}")
+    started = time.perf_counter()
+    try:
+        player_ids = database.insert_players(players)
+    except Exception as e:
+        print(f"  ! Players: {e}")
+        return 0
+    report_throughput(len(player_ids), started)
+    for player, player_id in zip(players, player_ids):
+        print(f"  + {player['name']} (ID: {player_id})")
 
     return len(players)
 
@@ -160,14 +174,17 @@ def seed_games():
     ]
 
     print("Seeding games...")
-    for game in games:
-        try:
-            game_id = database.insert_game(game)
-            home = [k for k, v in teams.items() if v == game["home_team_id"]][0]
-            away = [k for k, v in teams.items() if v == game["away_team_id"]][0]
-            print(f"  + {home} vs {away} ({game['date']}) (ID: {game_id})")
-        except Exception as e:
-            print(f"  ! Game: {e}")
+    started = time.perf_counter()
+    try:
+        game_ids = database.insert_games(games)
+    except Exception as e:
+        print(f"  ! Games: {e}")
+        return 0
+    report_throughput(len(game_ids), started)
+    for game, game_id in zip(games, game_ids):
+        home = [k for k, v in teams.items() if v == game["home_team_id"]][0]
+        away = [k for k, v in teams.items() if v == game["away_team_id"]][0]
+        print(f"  + {home} vs {away} ({game['date']}) (ID: {game_id})")
 
     return len(games)
 
@@ -316,12 +333,15 @@ def seed_news():
     ]
 
     print("Seeding news...")
-    for article in news_articles:
-        try:
-            news_id = database.insert_news(article)
-            print(f"  + {article['title'][:50]}... (ID: {news_id})")
-        except Exception as e:
-            print(f"  ! {article['title'][:30]}: {e}")
+    started = time.perf_counter()
+    try:
+        news_ids = database.insert_news_articles(news_articles)
+    except Exception as e:
+        print(f"  ! News: {e}")
+        return 0
+    report_throughput(len(news_ids), started)
+    for article, news_id in zip(news_articles, news_ids):
+        print(f"  + {article['title'][:50]}... (ID: {news_id})")
 
     return len(news_articles)
 
@@ -344,6 +364,13 @@ def main():
     standings_count = seed_standings()
     news_count = seed_news()
 
+    print("Populating knowledge graph...")
+    try:
+        kg = database.populate_knowledge_graph()
+    except Exception as e:  # Club persona tables not seeded yet
+        print(f"  ! Knowledge graph: {e}")
+        kg = None
+
     # Summary
     print("\n" + "=" * 50)
     print("Seeding Complete!")
@@ -354,6 +381,8 @@ def main():
     print(f"Injuries:  {injuries_count}")
     print(f"Standings: {standings_count}")
     print(f"News:      {news_count}")
+    if kg:
+        print(f"KG:        {kg['nodes']} nodes, {kg['edges']} edges ({kg['rows_per_sec']} rows/s)")
 
     # Verify
     print("\nDatabase stats:")